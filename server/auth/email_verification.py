@@ -8,9 +8,6 @@ from email.mime.image import MIMEImage
 from typing import Optional, Dict, Any
 from supabase_client.auth_client import get_unauthenticated_supabase_client
 from core.utils import create_standardized_response
-from dotenv import load_dotenv
-
-load_dotenv()
 
 def generate_verification_token() -> str:
     """Generate a secure URL-safe verification token for email links"""
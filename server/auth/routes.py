@@ -1,6 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Query, Request
 from fastapi.responses import JSONResponse, RedirectResponse, HTMLResponse
-from fastapi.templating import Jinja2Templates
 from auth import utils
 from auth.models import SignUp, Login, SignUpResponse, LoginResponse, EmailVerificationResponse
 from auth.email_verification import (
@@ -18,9 +17,6 @@ import os
 
 router = APIRouter()
 
-# Initialize Jinja2 templates
-templates = Jinja2Templates(directory="templates")
-
 # Pydantic models for request validation
 class EmailVerificationRequest(BaseModel):
     email: EmailStr
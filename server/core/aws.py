@@ -0,0 +1,156 @@
+"""
+Shared AWS clients.
+One S3 client and one DynamoDB resource per process, created on first use
+from a single session, so importing a module no longer resolves credentials
+or opens its own connection pool. Every client gets the pool size, timeouts,
+keep-alive and adaptive retry settings from AWS_CONFIG, and is instrumented
+to count in-flight requests against its pool so saturation shows up in
+get_pool_metrics().
+"""
+
+import logging
+import os
+import threading
+from typing import Any, Dict, Optional
+import boto3
+from botocore.config import Config
+from core.config import AWS_CONFIG, BACKEND_LEDGER_CONFIG
+from core.ledger import register_boto_hooks
+
+logger = logging.getLogger(__name__)
+
+
+class PoolMetrics:
+    """In-flight request counts for one client's connection pool."""
+
+    def __init__(self, service: str, max_pool_connections: int):
+        self.service = service
+        self.max_pool_connections = max_pool_connections
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.requests = 0
+        self.saturated_requests = 0  # Sent with every pooled connection already busy
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def on_before_send(self, **kwargs):
+        with self._lock:
+            self.requests += 1
+            if self.in_flight >= self.max_pool_connections:
+                self.saturated_requests += 1
+                if self.saturated_requests == 1 or self.saturated_requests % 100 == 0:
+                    logger.warning(
+                        f"{self.service} connection pool saturated "
+                        f"({self.in_flight} in flight, pool of {self.max_pool_connections})"
+                    )
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    def on_response_received(self, exception=None, **kwargs):
+        with self._lock:
+            self.in_flight = max(self.in_flight - 1, 0)
+            if exception is not None:
+                self.errors += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "max_pool_connections": self.max_pool_connections,
+                "in_flight": self.in_flight,
+                "peak_in_flight": self.peak_in_flight,
+                "utilization": round(self.in_flight / self.max_pool_connections, 3),
+                "requests": self.requests,
+                "saturated_requests": self.saturated_requests,
+                "errors": self.errors
+            }
+
+
+_session: Optional[boto3.session.Session] = None
+_s3_client = None
+_dynamodb_resource = None
+_metrics: Dict[str, PoolMetrics] = {}
+_lock = threading.Lock()
+
+
+def _client_config(max_pool_connections: int) -> Config:
+    return Config(
+        max_pool_connections=max_pool_connections,
+        connect_timeout=AWS_CONFIG["connect_timeout"],
+        read_timeout=AWS_CONFIG["read_timeout"],
+        retries={"mode": AWS_CONFIG["retry_mode"], "total_max_attempts": AWS_CONFIG["max_attempts"]},
+        tcp_keepalive=AWS_CONFIG["tcp_keepalive"]
+    )
+
+
+def _get_session() -> boto3.session.Session:
+    # Called with _lock held; sessions are not safe to share across threads while creating clients
+    global _session
+    if _session is None:
+        _session = boto3.session.Session()
+    return _session
+
+
+def _instrument(client, service: str, max_pool_connections: int):
+    metrics = PoolMetrics(service, max_pool_connections)
+    client.meta.events.register("before-send.*", metrics.on_before_send)
+    client.meta.events.register("response-received.*", metrics.on_response_received)
+    _metrics[service] = metrics
+    if BACKEND_LEDGER_CONFIG["enabled"]:
+        register_boto_hooks(client, service)
+
+
+def get_s3_client():
+    global _s3_client
+    if _s3_client is None:
+        with _lock:
+            if _s3_client is None:
+                max_pool_connections = AWS_CONFIG["s3_max_pool_connections"]
+                client = _get_session().client("s3", config=_client_config(max_pool_connections))
+                _instrument(client, "s3", max_pool_connections)
+                _s3_client = client
+    return _s3_client
+
+
+def get_dynamodb_resource():
+    global _dynamodb_resource
+    if _dynamodb_resource is None:
+        with _lock:
+            if _dynamodb_resource is None:
+                max_pool_connections = AWS_CONFIG["dynamodb_max_pool_connections"]
+                resource = _get_session().resource("dynamodb", config=_client_config(max_pool_connections))
+                _instrument(resource.meta.client, "dynamodb", max_pool_connections)
+                _dynamodb_resource = resource
+    return _dynamodb_resource
+
+
+def get_dynamodb_client():
+    """The low-level client behind the shared resource (same connection pool)."""
+    return get_dynamodb_resource().meta.client
+
+
+def get_pool_metrics() -> Dict[str, Dict[str, Any]]:
+    """Pool usage per service, for the clients created so far."""
+    return {service: metrics.snapshot() for service, metrics in list(_metrics.items())}
+
+
+def reset_clients():
+    """Drop the shared clients; they are recreated on next use."""
+    global _session, _s3_client, _dynamodb_resource
+    with _lock:
+        _session = None
+        _s3_client = None
+        _dynamodb_resource = None
+        _metrics.clear()
+
+
+def _reset_after_fork():
+    # Without taking _lock: a parent thread may have held it at fork time
+    global _session, _s3_client, _dynamodb_resource, _lock
+    _lock = threading.Lock()
+    _session = None
+    _s3_client = None
+    _dynamodb_resource = None
+    _metrics.clear()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
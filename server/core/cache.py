@@ -0,0 +1,62 @@
+"""
+In-process TTL-LRU cache shared by the data modules' per-process caches.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+
+class TTLCache:
+    """
+    Thread-safe LRU whose entries expire `ttl_seconds` after they were stored.
+    Subclasses add domain-specific updates; they hold `_lock` for compound
+    operations and use `peek` to update a cached value in place.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.RLock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            stored_at, value = entry
+            if time.time() - stored_at >= self.ttl_seconds:
+                self._entries.pop(key, None)
+                return None
+
+            self._entries.move_to_end(key)
+            return value
+
+    def peek(self, key: Hashable) -> Optional[Any]:
+        """The cached value, expired or not, without touching its recency."""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry[1] if entry is not None else None
+
+    def put(self, key: Hashable, value: Any):
+        with self._lock:
+            self._entries.pop(key, None)
+            # Evict least recently used entries when the cache is full
+            while len(self._entries) >= self.max_entries:
+                self._entries.popitem(last=False)
+            self._entries[key] = (time.time(), value)
+
+    def invalidate(self, key: Hashable):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
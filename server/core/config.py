@@ -1,4 +1,3 @@
-import boto3
 from dotenv import load_dotenv
 import os
 from botocore.exceptions import ClientError
@@ -22,10 +21,160 @@ SUPABASE_CONFIG = {
     "connection_timeout": int(os.getenv("SUPABASE_CONNECTION_TIMEOUT", "10"))  # 10 seconds
 }
 
-s3Client = boto3.client("s3")
+# Idempotency key store configuration (backend: "memory", per process, or "local_kv", SQLite shared by workers on one host;
+# serve.py defaults to local_kv when it runs several workers)
+IDEMPOTENCY_CONFIG = {
+    "backend": os.getenv("IDEMPOTENCY_BACKEND", "memory"),
+    "ttl_seconds": int(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400")),  # 24 hours
+    "max_entries": int(os.getenv("IDEMPOTENCY_MAX_ENTRIES", "10000")),
+    "kv_path": os.getenv("IDEMPOTENCY_KV_PATH", "/tmp/polymart-idempotency.sqlite3"),
+    "claim_lease_seconds": float(os.getenv("IDEMPOTENCY_CLAIM_LEASE_SECONDS", "30"))  # A crashed worker's claim expires after this
+}
+
+# Seller sales dashboard aggregates configuration
+SALES_SUMMARY_CONFIG = {
+    "resync_seconds": int(os.getenv("SALES_SUMMARY_RESYNC_SECONDS", "300")),  # 5 minutes
+    "max_sellers": int(os.getenv("SALES_SUMMARY_MAX_SELLERS", "1000"))
+}
+
+# Seller meetup availability index configuration
+AVAILABILITY_CONFIG = {
+    "meetup_duration_minutes": int(os.getenv("MEETUP_DURATION_MINUTES", "30")),
+    "max_age_seconds": int(os.getenv("AVAILABILITY_INDEX_MAX_AGE_SECONDS", "300")),  # 5 minutes
+    "max_sellers": int(os.getenv("AVAILABILITY_INDEX_MAX_SELLERS", "1000")),
+    "max_lookups": int(os.getenv("AVAILABILITY_MAX_SELLER_LOOKUPS", "50000"))  # Remembered listing/order -> seller ids
+}
+
+# Per-user favorites set cache configuration
+FAVORITES_CACHE_CONFIG = {
+    "ttl_seconds": int(os.getenv("FAVORITES_CACHE_TTL_SECONDS", "300")),  # 5 minutes
+    "max_users": int(os.getenv("FAVORITES_CACHE_MAX_USERS", "5000"))
+}
+
+# Listing popularity counters configuration
+POPULARITY_CONFIG = {
+    "flush_interval_seconds": float(os.getenv("POPULARITY_FLUSH_INTERVAL_SECONDS", "10")),
+    "snapshot_max_age_seconds": int(os.getenv("POPULARITY_SNAPSHOT_MAX_AGE_SECONDS", "60"))
+}
+
+# Listing search index configuration
+SEARCH_CONFIG = {
+    "max_results": int(os.getenv("SEARCH_MAX_RESULTS", "500")),
+    "rebuild_interval_seconds": int(os.getenv("SEARCH_INDEX_REBUILD_INTERVAL_SECONDS", "600"))  # 10 minutes
+}
+
+# Listing typeahead suggestion index configuration
+SUGGEST_CONFIG = {
+    "rebuild_interval_seconds": int(os.getenv("SUGGEST_INDEX_REBUILD_INTERVAL_SECONDS", "600"))  # 10 minutes
+}
+
+# Listing feed facets cache configuration
+FACETS_CONFIG = {
+    "ttl_seconds": int(os.getenv("FACETS_CACHE_TTL_SECONDS", "30")),
+    "max_entries": int(os.getenv("FACETS_CACHE_MAX_ENTRIES", "2000"))
+}
+
+# Columnar active listing snapshot configuration (requires numpy)
+LISTING_SNAPSHOT_CONFIG = {
+    "enabled": os.getenv("LISTING_SNAPSHOT_ENABLED", "true").lower() == "true",
+    "rebuild_interval_seconds": int(os.getenv("LISTING_SNAPSHOT_REBUILD_INTERVAL_SECONDS", "120"))  # 2 minutes
+}
+
+# Precomputed category landing feeds configuration
+LANDING_FEED_CONFIG = {
+    "items": int(os.getenv("LANDING_FEED_ITEMS", "60")),  # e.g. first 3 pages of 20
+    "overfetch": int(os.getenv("LANDING_FEED_OVERFETCH", "20")),  # covers skipped own listings
+    "soft_ttl_seconds": int(os.getenv("LANDING_FEED_SOFT_TTL_SECONDS", "60")),
+    "hard_ttl_seconds": int(os.getenv("LANDING_FEED_HARD_TTL_SECONDS", "900"))  # 15 minutes
+}
+
+# Listing tag index configuration
+TAG_INDEX_CONFIG = {
+    "rebuild_interval_seconds": int(os.getenv("TAG_INDEX_REBUILD_INTERVAL_SECONDS", "600"))  # 10 minutes
+}
+
+# Listing ownership cache configuration (listing_id -> seller_id, status)
+LISTING_OWNERSHIP_CACHE_CONFIG = {
+    "ttl_seconds": int(os.getenv("LISTING_OWNERSHIP_CACHE_TTL_SECONDS", "600")),  # 10 minutes
+    "max_entries": int(os.getenv("LISTING_OWNERSHIP_CACHE_MAX_ENTRIES", "50000"))
+}
+
+# Bulk listing endpoints configuration
+BULK_LISTINGS_CONFIG = {
+    "max_items": int(os.getenv("BULK_LISTINGS_MAX_ITEMS", "100"))
+}
+
+# Direct Postgres read path configuration (heavy reads bypass PostgREST when enabled)
+POSTGRES_CONFIG = {
+    "enabled": os.getenv("POSTGRES_DIRECT_READS_ENABLED", "false").lower() == "true",
+    "dsn": os.getenv("SUPABASE_DB_URL"),
+    "min_size": int(os.getenv("POSTGRES_POOL_MIN_SIZE", "1")),
+    "max_size": int(os.getenv("POSTGRES_POOL_MAX_SIZE", "10")),
+    "statement_timeout_ms": int(os.getenv("POSTGRES_STATEMENT_TIMEOUT_MS", "5000"))
+}
+
+# Storage backend configuration ("postgrest" for Supabase, "memory" for the in-process store used in load tests)
+STORAGE_BACKEND_CONFIG = {
+    "backend": os.getenv("STORAGE_BACKEND", "postgrest").lower(),
+    "memory_seed_path": os.getenv("MEMORY_STORE_SEED_PATH")
+}
+
+# DynamoDB repository configuration ("dynamodb" for AWS, "memory" for the in-process tables used in benchmarks)
+DYNAMODB_CONFIG = {
+    "backend": os.getenv("DYNAMODB_BACKEND", "dynamodb").lower(),
+    "memory_seed_path": os.getenv("DYNAMODB_MEMORY_SEED_PATH"),
+    "memory_page_size": int(os.getenv("DYNAMODB_MEMORY_PAGE_SIZE", "100")),  # Items per page, stands in for the 1 MB limit
+    "batch_max_retries": int(os.getenv("DYNAMODB_BATCH_MAX_RETRIES", "8")),
+    "batch_backoff_seconds": float(os.getenv("DYNAMODB_BATCH_BACKOFF_SECONDS", "0.05")),
+    "update_concurrency": int(os.getenv("DYNAMODB_UPDATE_CONCURRENCY", "8"))  # Conditional updates in flight per bulk update
+}
+
+# Shared AWS client configuration (one S3 client and one DynamoDB resource per process)
+AWS_CONFIG = {
+    "s3_max_pool_connections": int(os.getenv("AWS_S3_MAX_POOL_CONNECTIONS", "50")),
+    "dynamodb_max_pool_connections": int(os.getenv("AWS_DYNAMODB_MAX_POOL_CONNECTIONS", "50")),
+    "connect_timeout": float(os.getenv("AWS_CONNECT_TIMEOUT_SECONDS", "2")),
+    "read_timeout": float(os.getenv("AWS_READ_TIMEOUT_SECONDS", "10")),
+    "retry_mode": os.getenv("AWS_RETRY_MODE", "adaptive"),
+    "max_attempts": int(os.getenv("AWS_MAX_ATTEMPTS", "5")),  # Including the first attempt
+    "tcp_keepalive": os.getenv("AWS_TCP_KEEPALIVE", "true").lower() == "true"
+}
+
+# Startup warm-up configuration (/health reports ready once warm-up finishes)
+WARMUP_CONFIG = {
+    "enabled": os.getenv("WARMUP_ENABLED", "true").lower() == "true",
+    "timeout_seconds": float(os.getenv("WARMUP_TIMEOUT_SECONDS", "30")),  # Serve anyway after this, still warming
+    "build_indexes": os.getenv("WARMUP_BUILD_INDEXES", "true").lower() == "true"
+}
+
+# Production server configuration (serve.py)
+SERVER_CONFIG = {
+    "host": os.getenv("SERVER_HOST", "0.0.0.0"),
+    "port": int(os.getenv("SERVER_PORT", "8000")),
+    "workers": int(os.getenv("WEB_CONCURRENCY", "0")),  # 0 sizes the pool from the CPUs available
+    "graceful_shutdown_seconds": int(os.getenv("SERVER_GRACEFUL_SHUTDOWN_SECONDS", "20")),
+    "websocket_drain_seconds": float(os.getenv("WEBSOCKET_DRAIN_SECONDS", "5")),
+    "keep_alive_seconds": int(os.getenv("SERVER_KEEP_ALIVE_SECONDS", "5")),
+    "chat_relay_dir": os.getenv("CHAT_RELAY_DIR")  # Set by serve.py when running several workers
+}
+
+# Metrics configuration (with several workers each one writes snapshots to dir, merged by /metrics)
+METRICS_CONFIG = {
+    "dir": os.getenv("METRICS_DIR"),  # Set by serve.py when running several workers
+    "snapshot_interval_seconds": float(os.getenv("METRICS_SNAPSHOT_INTERVAL_SECONDS", "5"))
+}
+
+# Per-request backend call ledger configuration (Supabase, DynamoDB, S3 and Postgres round trips)
+BACKEND_LEDGER_CONFIG = {
+    "enabled": os.getenv("BACKEND_LEDGER_ENABLED", "true").lower() == "true",
+    "round_trip_budget": int(os.getenv("ROUND_TRIP_BUDGET", "10")),  # Requests making more calls are logged
+    "server_timing": os.getenv("SERVER_TIMING_ENABLED", "true").lower() == "true"
+}
 
 def generate_private_urls(images: list[str]) -> list[str]:
+    from core.aws import get_s3_client  # core.aws reads AWS_CONFIG from this module
     try:
+        s3Client = get_s3_client()
         urls = []
 
         for image in images:
@@ -46,8 +195,9 @@ def generate_private_urls(images: list[str]) -> list[str]:
         raise HTTPException(status_code=500, detail=f"Failed to generate private urls: {str(e)}")
     
 def generate_private_url(image: str) -> str:
+    from core.aws import get_s3_client
     try:
-        url = s3Client.generate_presigned_url(
+        url = get_s3_client().generate_presigned_url(
             "get_object",
             Params={"Bucket": os.getenv("S3_BUCKET"), "Key": f"private/{image}"},
             ExpiresIn=3600
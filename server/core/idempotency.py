@@ -0,0 +1,367 @@
+"""
+Idempotency key support for retry-safe POST endpoints.
+
+Clients send an ``Idempotency-Key`` header with create requests. The first
+execution for a (user, operation, key) triple runs normally and its response is
+stored for a bounded TTL; retries inside that window replay the stored response
+without touching the database, and concurrent duplicates wait on the in-flight
+execution instead of running it again.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+
+from core.config import IDEMPOTENCY_CONFIG
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+IDEMPOTENCY_REPLAYED_HEADER = "Idempotency-Replayed"
+MAX_IDEMPOTENCY_KEY_LENGTH = 255
+CLAIM_POLL_SECONDS = 0.1
+
+
+class InMemoryIdempotencyBackend:
+    """Thread-safe LRU store with per-entry expiry, local to the worker process."""
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.RLock()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            expires_at, record = entry
+            if time.time() >= expires_at:
+                self._entries.pop(key, None)
+                return None
+
+            self._entries.move_to_end(key)
+            return record
+
+    def put(self, key: str, record: Dict[str, Any], ttl_seconds: int):
+        with self._lock:
+            self._entries.pop(key, None)
+
+            # Evict least recently used entries when the store is full
+            while len(self._entries) >= self.max_entries:
+                self._entries.popitem(last=False)
+
+            self._entries[key] = (time.time() + ttl_seconds, record)
+
+    def claim(self, key: str, lease_seconds: float) -> bool:
+        # Only this process uses the store, and IdempotencyStore already coalesces its in-flight duplicates
+        return True
+
+    def renew(self, key: str, lease_seconds: float):
+        pass
+
+    def release(self, key: str):
+        pass
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def size(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+class LocalKVIdempotencyBackend:
+    """
+    SQLite-backed store (WAL mode) so stored responses survive worker restarts
+    and are shared by worker processes on the same host. SQLite's file locking
+    serializes writers across processes; each process opens its own connection.
+    A row with no record is a claim held by a worker still running the request.
+    """
+
+    def __init__(self, path: str, max_entries: int = 10000, busy_timeout_seconds: float = 5.0):
+        self.path = path
+        self.max_entries = max_entries
+        self.busy_timeout_seconds = busy_timeout_seconds
+        self._connection: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.RLock()
+
+    def _connect(self) -> sqlite3.Connection:
+        # Called with _lock held; connections must not be shared with a forked child
+        if self._connection is None or self._pid != os.getpid():
+            connection = sqlite3.connect(
+                self.path,
+                timeout=self.busy_timeout_seconds,
+                isolation_level=None,  # Autocommit; writes that must be atomic use BEGIN IMMEDIATE
+                check_same_thread=False
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS idempotency_entries ("
+                " key TEXT PRIMARY KEY, expires_at REAL NOT NULL, record TEXT)"
+            )
+            self._connection = connection
+            self._pid = os.getpid()
+        return self._connection
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT expires_at, record FROM idempotency_entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or row[1] is None:
+                return None
+            if time.time() >= row[0]:
+                self._connect().execute(
+                    "DELETE FROM idempotency_entries WHERE key = ? AND expires_at <= ?", (key, time.time())
+                )
+                return None
+            return json.loads(row[1])
+
+    def put(self, key: str, record: Dict[str, Any], ttl_seconds: int):
+        with self._lock:
+            db = self._connect()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                (count,) = db.execute("SELECT COUNT(*) FROM idempotency_entries").fetchone()
+                if count >= self.max_entries:
+                    self._evict(db, count)
+                db.execute(
+                    "INSERT OR REPLACE INTO idempotency_entries (key, expires_at, record) VALUES (?, ?, ?)",
+                    (key, time.time() + ttl_seconds, json.dumps(record))
+                )
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+
+    def _evict(self, db: sqlite3.Connection, count: int):
+        """Drop expired entries, then the soonest-to-expire ones until under the limit."""
+        count -= db.execute("DELETE FROM idempotency_entries WHERE expires_at <= ?", (time.time(),)).rowcount
+        overflow = count - self.max_entries + 1
+        if overflow > 0:
+            db.execute(
+                "DELETE FROM idempotency_entries WHERE key IN"
+                " (SELECT key FROM idempotency_entries ORDER BY expires_at LIMIT ?)",
+                (overflow,)
+            )
+
+    def claim(self, key: str, lease_seconds: float) -> bool:
+        """Reserve `key` for this worker; False while another worker holds it or a record is stored."""
+        with self._lock:
+            db = self._connect()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                db.execute("DELETE FROM idempotency_entries WHERE key = ? AND expires_at <= ?", (key, time.time()))
+                claimed = db.execute(
+                    "INSERT OR IGNORE INTO idempotency_entries (key, expires_at, record) VALUES (?, ?, NULL)",
+                    (key, time.time() + lease_seconds)
+                ).rowcount == 1
+                db.execute("COMMIT")
+                return claimed
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+
+    def renew(self, key: str, lease_seconds: float):
+        """Push back the expiry of this worker's claim while its request is still running."""
+        with self._lock:
+            self._connect().execute(
+                "UPDATE idempotency_entries SET expires_at = ? WHERE key = ? AND record IS NULL",
+                (time.time() + lease_seconds, key)
+            )
+
+    def release(self, key: str):
+        """Drop this worker's claim after a failed attempt so a retry can run."""
+        with self._lock:
+            self._connect().execute("DELETE FROM idempotency_entries WHERE key = ? AND record IS NULL", (key,))
+
+    def clear(self):
+        with self._lock:
+            self._connect().execute("DELETE FROM idempotency_entries")
+
+    def size(self) -> int:
+        with self._lock:
+            (count,) = self._connect().execute(
+                "SELECT COUNT(*) FROM idempotency_entries WHERE record IS NOT NULL"
+            ).fetchone()
+            return count
+
+
+class IdempotencyStore:
+    """
+    Coordinates idempotent execution on top of a storage backend.
+    Only successful results are stored, so a failed attempt can be retried.
+    """
+
+    def __init__(self, backend, ttl_seconds: int = 86400, claim_lease_seconds: float = 30):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.claim_lease_seconds = claim_lease_seconds
+        self._in_flight: Dict[str, asyncio.Future] = {}
+
+    async def execute(
+        self,
+        scope: str,
+        idempotency_key: str,
+        fingerprint: str,
+        operation: Callable[[], Awaitable[Any]]
+    ) -> Tuple[Any, bool]:
+        """
+        Run ``operation`` once per (scope, idempotency_key).
+        Returns the JSON-encoded result and whether it was replayed.
+        """
+        validate_idempotency_key(idempotency_key)
+        store_key = f"{scope}:{idempotency_key}"
+
+        # Backend calls can block on SQLite locks, so they run off the event loop
+        stored = await asyncio.to_thread(self.backend.get, store_key)
+        if stored is not None:
+            _check_fingerprint(stored, fingerprint)
+            return stored["response"], True
+
+        in_flight = self._in_flight.get(store_key)
+        if in_flight is not None:
+            record = await asyncio.shield(in_flight)
+            _check_fingerprint(record, fingerprint)
+            return record["response"], True
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[store_key] = future
+        claimed = False
+        renewal = None
+        try:
+            # Another worker process may be running the same request; wait for its stored response
+            while not await asyncio.to_thread(self.backend.claim, store_key, self.claim_lease_seconds):
+                await asyncio.sleep(CLAIM_POLL_SECONDS)
+                stored = await asyncio.to_thread(self.backend.get, store_key)
+                if stored is not None:
+                    future.set_result(stored)
+                    _check_fingerprint(stored, fingerprint)
+                    return stored["response"], True
+            claimed = True
+            renewal = asyncio.create_task(self._renew_claim(store_key))
+
+            result = await operation()
+            record = {"fingerprint": fingerprint, "response": jsonable_encoder(result)}
+            await asyncio.to_thread(self.backend.put, store_key, record, self.ttl_seconds)
+            future.set_result(record)
+            return record["response"], False
+        except asyncio.CancelledError:
+            if claimed:
+                await self._release(store_key, renewal)
+            if not future.done():
+                # Duplicates waiting on this attempt get a retryable error rather than the cancellation
+                future.set_exception(HTTPException(
+                    status_code=409,
+                    detail=f"The request holding this {IDEMPOTENCY_HEADER} was interrupted; retry it"
+                ))
+                future.exception()
+            raise
+        except Exception as e:
+            if claimed:
+                await self._release(store_key, renewal)
+            if future.done():
+                raise
+            future.set_exception(e)
+            # Mark the exception as retrieved when nobody was waiting on it
+            future.exception()
+            raise
+        finally:
+            if renewal is not None:
+                renewal.cancel()
+            self._in_flight.pop(store_key, None)
+
+    async def _renew_claim(self, store_key: str):
+        """Keep extending the claim so a long-running request is not taken over by another worker."""
+        while True:
+            await asyncio.sleep(self.claim_lease_seconds / 3)
+            await asyncio.to_thread(self.backend.renew, store_key, self.claim_lease_seconds)
+
+    async def _release(self, store_key: str, renewal: Optional[asyncio.Task]):
+        if renewal is not None:
+            renewal.cancel()
+        await asyncio.to_thread(self.backend.release, store_key)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "stored_responses": self.backend.size(),
+            "in_flight": len(self._in_flight)
+        }
+
+
+def validate_idempotency_key(idempotency_key: str) -> None:
+    """Validate the client-supplied key before it is used as a store key."""
+    if not idempotency_key or len(idempotency_key) > MAX_IDEMPOTENCY_KEY_LENGTH:
+        raise HTTPException(
+            status_code=400,
+            detail=f"{IDEMPOTENCY_HEADER} must be between 1 and {MAX_IDEMPOTENCY_KEY_LENGTH} characters"
+        )
+
+
+def _check_fingerprint(record: Dict[str, Any], fingerprint: str) -> None:
+    if record["fingerprint"] != fingerprint:
+        raise HTTPException(
+            status_code=422,
+            detail=f"{IDEMPOTENCY_HEADER} was already used with a different request payload"
+        )
+
+
+def request_fingerprint(payload: Any) -> str:
+    """Stable hash of a request body, used to reject key reuse across different requests."""
+    encoded = json.dumps(jsonable_encoder(payload), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+def _create_backend():
+    if IDEMPOTENCY_CONFIG["backend"] == "local_kv":
+        return LocalKVIdempotencyBackend(
+            IDEMPOTENCY_CONFIG["kv_path"],
+            max_entries=IDEMPOTENCY_CONFIG["max_entries"]
+        )
+    return InMemoryIdempotencyBackend(max_entries=IDEMPOTENCY_CONFIG["max_entries"])
+
+
+# Global store instance
+_idempotency_store = IdempotencyStore(
+    _create_backend(),
+    ttl_seconds=IDEMPOTENCY_CONFIG["ttl_seconds"],
+    claim_lease_seconds=IDEMPOTENCY_CONFIG["claim_lease_seconds"]
+)
+
+
+def get_idempotency_store() -> IdempotencyStore:
+    """Get the process-wide idempotency store."""
+    return _idempotency_store
+
+
+async def run_idempotent(
+    scope: str,
+    idempotency_key: Optional[str],
+    payload: Any,
+    operation: Callable[[], Awaitable[Any]]
+) -> Tuple[Any, bool]:
+    """
+    Execute ``operation`` idempotently when a key was supplied, otherwise run it directly.
+    Returns the result and whether it was replayed from the store.
+    """
+    if idempotency_key is None:
+        return await operation(), False
+
+    return await _idempotency_store.execute(
+        scope,
+        idempotency_key,
+        request_fingerprint(payload),
+        operation
+    )
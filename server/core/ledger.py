@@ -0,0 +1,165 @@
+"""
+Per-request ledger of backend round trips.
+performance_middleware opens a ledger for each request in a context
+variable, and every call to a backend made while handling it is recorded
+there: PostgREST .execute() calls (per table or RPC), DynamoDB and S3
+operations on the shared boto3 clients, and direct Postgres queries.
+The totals go out in a Server-Timing header, and requests making more than
+ROUND_TRIP_BUDGET calls are logged with a breakdown, which is where N+1
+query patterns show up.
+
+Calls made in threads started with asyncio.to_thread are recorded too (the
+context is copied); calls outside a request are not.
+"""
+
+import contextvars
+import functools
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class BackendCallLedger:
+    """Round trips made while handling one request, per backend and table or operation."""
+
+    def __init__(self):
+        self.calls: Dict[Tuple[str, str], list] = {}  # (backend, operation) -> [calls, seconds]
+        self.total_calls = 0
+        self._lock = threading.Lock()
+
+    def record(self, backend: str, operation: str, seconds: float):
+        with self._lock:
+            entry = self.calls.get((backend, operation))
+            if entry is None:
+                entry = self.calls[(backend, operation)] = [0, 0.0]
+            entry[0] += 1
+            entry[1] += seconds
+            self.total_calls += 1
+
+    def by_backend(self) -> Dict[str, Dict[str, Any]]:
+        totals: Dict[str, Dict[str, Any]] = {}
+        with self._lock:
+            for (backend, _), (calls, seconds) in self.calls.items():
+                total = totals.setdefault(backend, {"calls": 0, "seconds": 0.0})
+                total["calls"] += calls
+                total["seconds"] += seconds
+        return totals
+
+    def server_timing(self, total_seconds: float) -> str:
+        """e.g. supabase;dur=41.2;desc="6 calls", s3;dur=8.0;desc="1 call", app;dur=55.3"""
+        entries = [
+            f'{backend};dur={total["seconds"] * 1000:.1f};desc="{total["calls"]} call{"" if total["calls"] == 1 else "s"}"'
+            for backend, total in sorted(self.by_backend().items())
+        ]
+        entries.append(f"app;dur={total_seconds * 1000:.1f}")
+        return ", ".join(entries)
+
+    def breakdown(self) -> str:
+        """Operations by time spent, e.g. supabase listing_cards x12 (310ms), dynamodb Query messages x1 (9ms)"""
+        with self._lock:
+            rows = sorted(self.calls.items(), key=lambda item: item[1][1], reverse=True)
+        return ", ".join(
+            f"{backend} {operation} x{calls} ({seconds * 1000:.0f}ms)"
+            for (backend, operation), (calls, seconds) in rows
+        )
+
+
+_current_ledger: contextvars.ContextVar[Optional[BackendCallLedger]] = contextvars.ContextVar(
+    "backend_call_ledger", default=None
+)
+
+
+def start_request_ledger() -> Tuple[BackendCallLedger, contextvars.Token]:
+    ledger = BackendCallLedger()
+    return ledger, _current_ledger.set(ledger)
+
+
+def end_request_ledger(token: contextvars.Token):
+    _current_ledger.reset(token)
+
+
+def record_call(backend: str, operation: str, seconds: float):
+    """Record one round trip against the current request; a no-op outside a request."""
+    ledger = _current_ledger.get()
+    if ledger is not None:
+        ledger.record(backend, operation, seconds)
+
+
+def calls_so_far() -> int:
+    """Round trips made by the current request so far (0 outside a request)."""
+    ledger = _current_ledger.get()
+    return ledger.total_calls if ledger is not None else 0
+
+
+def check_round_trip_budget(ledger: BackendCallLedger, method: str, path: str, budget: int):
+    if ledger.total_calls > budget:
+        logger.warning(
+            f"🔁 ROUND TRIPS: {method} {path} made {ledger.total_calls} backend calls "
+            f"(budget {budget}): {ledger.breakdown()}"
+        )
+
+
+# PostgREST: wrap .execute() on the sync request builders (the in-memory backend goes through them too)
+
+_postgrest_hooks_installed = False
+
+
+def _instrument_execute(execute):
+    @functools.wraps(execute)
+    def wrapper(self, *args, **kwargs):
+        if _current_ledger.get() is None:
+            return execute(self, *args, **kwargs)
+        started_at = time.perf_counter()
+        try:
+            return execute(self, *args, **kwargs)
+        finally:
+            # path is "/<table>" or "/rpc/<function>"
+            record_call("supabase", self.path.lstrip("/"), time.perf_counter() - started_at)
+    return wrapper
+
+
+def install_postgrest_hooks():
+    global _postgrest_hooks_installed
+    if _postgrest_hooks_installed:
+        return
+    # SyncMaybeSingleRequestBuilder calls SyncSingleRequestBuilder.execute, so it is counted once
+    from postgrest._sync.request_builder import SyncQueryRequestBuilder, SyncSingleRequestBuilder
+    for builder in (SyncQueryRequestBuilder, SyncSingleRequestBuilder):
+        builder.execute = _instrument_execute(builder.execute)
+    _postgrest_hooks_installed = True
+
+
+# boto3: time each API call from parameter building to after-call (retries included). Presigning also
+# builds parameters but never reaches after-call, so it is not counted.
+
+def _on_boto_params(params=None, context=None, **kwargs):
+    if context is None or _current_ledger.get() is None:
+        return
+    resource = params.get("TableName") or params.get("Bucket")
+    if resource is None and "RequestItems" in params:
+        resource = ",".join(sorted(params["RequestItems"]))
+    context["ledger_resource"] = resource
+    context["ledger_started_at"] = time.perf_counter()
+
+
+def _boto_after_call(backend: str):
+    def on_after_call(model=None, context=None, event_name=None, **kwargs):
+        started_at = (context or {}).get("ledger_started_at")
+        if started_at is None:
+            return
+        operation = model.name if model is not None else event_name.rsplit(".", 1)[-1]
+        resource = context.get("ledger_resource")
+        record_call(backend, f"{operation} {resource}" if resource else operation, time.perf_counter() - started_at)
+        context.pop("ledger_started_at", None)
+    return on_after_call
+
+
+def register_boto_hooks(client, backend: str):
+    events = client.meta.events
+    events.register("before-parameter-build.*", _on_boto_params)
+    on_after_call = _boto_after_call(backend)
+    events.register("after-call.*", on_after_call)
+    events.register("after-call-error.*", on_after_call)
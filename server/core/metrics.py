@@ -0,0 +1,472 @@
+"""
+In-process request and WebSocket metrics, exposed in Prometheus text format.
+performance_middleware records every HTTP request against its route template
+(e.g. /supabase/listings/{listing_id}, so IDs do not create new series):
+counts by status, errors, in-flight requests and a latency histogram from
+which p50/p95/p99 are estimated. The chat ConnectionManager records open
+connections, message totals and how many rooms have how many connections, as
+fixed buckets (no per-room series: room ids embed user ids).
+
+Everything is updated from the event loop thread only, so the counters are
+plain ints without locks. With several workers (METRICS_DIR, set by
+serve.py) each one writes a snapshot of its metrics to <pid>-<start>.json
+there every few seconds and /metrics merges them, whichever worker serves the
+scrape. Gauges are summed over live workers only. The counters of workers that
+have exited (or whose pid was reused) are folded into retired.json and their
+files deleted, so counters never go backwards and the directory stays small.
+"""
+
+import asyncio
+import fcntl
+import glob
+import json
+import os
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Tuple
+from core.config import METRICS_CONFIG
+
+# Upper bounds of the latency buckets, in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 10.0)
+QUANTILES = (0.5, 0.95, 0.99)
+UNMATCHED_ROUTE = "unmatched"
+
+# Upper bounds of the connections-per-room buckets; the last bucket counts larger rooms
+ROOM_CONNECTION_BUCKETS = (1, 2, 3, 5, 10)
+
+# Exited workers' counters, and the lock serializing their retirement, in METRICS_DIR
+RETIRED_FILE = "retired.json"
+LOCK_FILE = ".lock"
+
+# Route templates resolved per (method, path); cleared when full so IDs in paths cannot grow it unbounded
+MAX_RESOLVED_PATHS = 4096
+
+
+class Histogram:
+    """Fixed-bucket histogram; the last bucket counts everything above the largest bound."""
+
+    def __init__(self, bounds: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def merge(self, counts: List[int], total: float):
+        """Add another histogram's bucket counts and sum (same bounds)."""
+        for i, bucket_count in enumerate(counts):
+            self.counts[i] += bucket_count
+        self.count += sum(counts)
+        self.sum += total
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimate by interpolating inside the bucket the quantile falls in (as Prometheus' histogram_quantile does)."""
+        if self.count == 0:
+            return None
+        rank = q * self.count
+        cumulative = 0
+        for i, bucket_count in enumerate(self.counts):
+            if cumulative + bucket_count >= rank and bucket_count:
+                if i == len(self.bounds):
+                    return self.bounds[-1]
+                lower = self.bounds[i - 1] if i else 0.0
+                return lower + (self.bounds[i] - lower) * (rank - cumulative) / bucket_count
+            cumulative += bucket_count
+        return self.bounds[-1]
+
+
+class RouteStats:
+    def __init__(self):
+        self.statuses: Dict[int, int] = {}
+        self.errors = 0  # 5xx responses and unhandled exceptions
+        self.in_flight = 0
+        self.latency = Histogram()
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "requests": self.latency.count,
+            "errors": self.errors,
+            "in_flight": self.in_flight,
+            "statuses": dict(self.statuses),
+            **{f"p{int(q * 100)}": _round(self.latency.quantile(q)) for q in QUANTILES}
+        }
+
+    def to_snapshot(self) -> Dict[str, Any]:
+        return {
+            "statuses": {str(status): count for status, count in self.statuses.items()},
+            "errors": self.errors,
+            "in_flight": self.in_flight,
+            "buckets": list(self.latency.counts),
+            "sum": self.latency.sum
+        }
+
+    def merge_snapshot(self, snapshot: Dict[str, Any], live: bool):
+        for status, count in snapshot["statuses"].items():
+            self.statuses[int(status)] = self.statuses.get(int(status), 0) + count
+        self.errors += snapshot["errors"]
+        if live:
+            self.in_flight += snapshot["in_flight"]
+        self.latency.merge(snapshot["buckets"], snapshot["sum"])
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.routes: Dict[Tuple[str, str], RouteStats] = {}
+        self._resolved: Dict[Tuple[str, str], str] = {}
+
+    def resolve_route(self, app, scope) -> str:
+        """The template of the route `scope` is dispatched to, matched the way the router does."""
+        key = (scope["method"], scope["path"])
+        template = self._resolved.get(key)
+        if template is not None:
+            return template
+
+        from starlette.routing import Match
+        template = UNMATCHED_ROUTE
+        for route in app.router.routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                template = route.path
+                break
+            if match == Match.PARTIAL and template == UNMATCHED_ROUTE:
+                template = route.path  # Path matches but method does not (405)
+
+        if len(self._resolved) >= MAX_RESOLVED_PATHS:
+            self._resolved.clear()
+        self._resolved[key] = template
+        return template
+
+    def started(self, method: str, route: str) -> RouteStats:
+        stats = self.routes.get((method, route))
+        if stats is None:
+            stats = self.routes[(method, route)] = RouteStats()
+        stats.in_flight += 1
+        return stats
+
+    def finished(self, stats: RouteStats, status_code: int, seconds: float):
+        stats.in_flight -= 1
+        stats.statuses[status_code] = stats.statuses.get(status_code, 0) + 1
+        if status_code >= 500:
+            stats.errors += 1
+        stats.latency.observe(seconds)
+
+
+class WebSocketMetrics:
+    COUNTERS = ("opened", "closed", "messages_received", "messages_sent", "relay_published", "relay_received")
+
+    def __init__(self):
+        self.connections = 0  # Open connections (a gauge)
+        self.rooms = [0] * (len(ROOM_CONNECTION_BUCKETS) + 1)  # Open rooms by connection count (gauges)
+        self.opened = 0
+        self.closed = 0
+        self.messages_received = 0
+        self.messages_sent = 0
+        self.relay_published = 0
+        self.relay_received = 0
+
+    def _move_room(self, from_size: int, to_size: int):
+        if from_size:
+            self.rooms[bisect_left(ROOM_CONNECTION_BUCKETS, from_size)] -= 1
+        if to_size:
+            self.rooms[bisect_left(ROOM_CONNECTION_BUCKETS, to_size)] += 1
+
+    def connected(self, room_connections: int):
+        """A connection joined a room that now has `room_connections` in this process."""
+        self.opened += 1
+        self.connections += 1
+        self._move_room(room_connections - 1, room_connections)
+
+    def disconnected(self, room_connections: int):
+        """A connection left a room that now has `room_connections` in this process."""
+        self.closed += 1
+        self.connections -= 1
+        self._move_room(room_connections + 1, room_connections)
+
+    def message_received(self):
+        self.messages_received += 1
+
+    def to_snapshot(self) -> Dict[str, Any]:
+        return {
+            "connections": self.connections,
+            "rooms": list(self.rooms),
+            **{name: getattr(self, name) for name in self.COUNTERS}
+        }
+
+    def merge_snapshot(self, snapshot: Dict[str, Any], live: bool):
+        if live:
+            self.connections += snapshot["connections"]
+            for i, room_count in enumerate(snapshot.get("rooms", [])):
+                self.rooms[i] += room_count
+        for name in self.COUNTERS:
+            setattr(self, name, getattr(self, name) + snapshot[name])
+
+
+request_metrics = RequestMetrics()
+websocket_metrics = WebSocketMetrics()
+_started_at = time.time()
+
+
+def snapshot() -> Dict[str, Any]:
+    """This worker's metrics as JSON-serializable data."""
+    return {
+        "pid": os.getpid(),
+        "started_at": _started_at,
+        "written_at": time.time(),
+        "routes": [[method, route, stats.to_snapshot()] for (method, route), stats in request_metrics.routes.items()],
+        "websocket": websocket_metrics.to_snapshot()
+    }
+
+
+def _snapshot_path(directory: str) -> str:
+    # The start time tells this worker's file apart from that of an exited worker which had the same pid
+    return os.path.join(directory, f"{os.getpid()}-{int(_started_at * 1000)}.json")
+
+
+def write_snapshot(directory: str):
+    """Replace this worker's snapshot file atomically, so readers never see a partial one."""
+    path = _snapshot_path(directory)
+    temporary_path = f"{path}.tmp"
+    with open(temporary_path, "w") as snapshot_file:
+        json.dump(snapshot(), snapshot_file)
+    os.replace(temporary_path, path)
+
+
+def _is_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass  # Exists, owned by another user
+    return True
+
+
+def _read_json(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path) as json_file:
+            return json.load(json_file)
+    except (OSError, ValueError):
+        return None  # Removed or replaced while listing the directory
+
+
+@contextmanager
+def _directory_lock(directory: str):
+    """Exclusive lock over `directory`, held by one worker at a time while it merges."""
+    with open(os.path.join(directory, LOCK_FILE), "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _merge(requests: RequestMetrics, websockets: WebSocketMetrics, worker_snapshot: Dict[str, Any], live: bool):
+    for method, route, route_snapshot in worker_snapshot["routes"]:
+        stats = requests.routes.get((method, route))
+        if stats is None:
+            stats = requests.routes[(method, route)] = RouteStats()
+        stats.merge_snapshot(route_snapshot, live)
+    websockets.merge_snapshot(worker_snapshot["websocket"], live)
+
+
+def _retire_exited_workers(directory: str) -> Tuple[List[Dict[str, Any]], Optional[Dict[str, Any]]]:
+    """
+    Called with the directory lock held. Folds the snapshots of exited workers
+    into the retired totals and deletes their files; returns the other live
+    workers' snapshots and the retired totals (None before any worker exited).
+    retired.json lists the files it already includes, so a crash between
+    writing it and deleting them cannot count them twice.
+    """
+    retired_path = os.path.join(directory, RETIRED_FILE)
+    retired = _read_json(retired_path)
+    retired_files = set(retired["files"]) if retired else set()
+    own_file = os.path.basename(_snapshot_path(directory))
+
+    snapshots: Dict[str, Dict[str, Any]] = {}
+    for path in glob.glob(os.path.join(directory, "*.json")):
+        name = os.path.basename(path)
+        if name in (RETIRED_FILE, own_file):
+            continue
+        if name in retired_files:
+            os.remove(path)
+            continue
+        worker_snapshot = _read_json(path)
+        if worker_snapshot is not None:
+            snapshots[name] = worker_snapshot
+
+    # With pid reuse only the latest start per pid can be the running worker
+    latest_start = {os.getpid(): _started_at}
+    for worker_snapshot in snapshots.values():
+        pid = worker_snapshot["pid"]
+        latest_start[pid] = max(latest_start.get(pid, 0), worker_snapshot["started_at"])
+
+    live, exited = [], {}
+    for name, worker_snapshot in snapshots.items():
+        if worker_snapshot["started_at"] >= latest_start[worker_snapshot["pid"]] and _is_alive(worker_snapshot["pid"]):
+            live.append(worker_snapshot)
+        else:
+            exited[name] = worker_snapshot
+    if not exited:
+        return live, retired
+
+    folded = ([retired] if retired else []) + list(exited.values())
+    requests, websockets = RequestMetrics(), WebSocketMetrics()
+    for worker_snapshot in folded:
+        _merge(requests, websockets, worker_snapshot, live=False)
+    retired = {
+        "started_at": min(worker_snapshot["started_at"] for worker_snapshot in folded),
+        "routes": [[method, route, stats.to_snapshot()] for (method, route), stats in requests.routes.items()],
+        "websocket": websockets.to_snapshot(),
+        "files": sorted(exited)
+    }
+    temporary_path = f"{retired_path}.tmp"
+    with open(temporary_path, "w") as retired_file:
+        json.dump(retired, retired_file)
+    os.replace(temporary_path, retired_path)
+    for name in exited:
+        os.remove(os.path.join(directory, name))
+    return live, retired
+
+
+def merged_metrics(directory: str) -> Tuple[RequestMetrics, WebSocketMetrics, float, int]:
+    """
+    This worker's live state, the other live workers' snapshots in `directory`
+    and the retired totals merged: (requests, websockets, earliest start, live workers).
+    """
+    with _directory_lock(directory):
+        others, retired = _retire_exited_workers(directory)
+
+    requests, websockets = RequestMetrics(), WebSocketMetrics()
+    snapshots = [snapshot()] + others
+    for worker_snapshot in snapshots:
+        _merge(requests, websockets, worker_snapshot, live=True)
+    if retired:
+        _merge(requests, websockets, retired, live=False)
+        snapshots.append(retired)
+    return requests, websockets, min(worker_snapshot["started_at"] for worker_snapshot in snapshots), len(others) + 1
+
+
+_snapshot_task: Optional[asyncio.Task] = None
+
+
+async def _snapshot_loop(directory: str, interval_seconds: float):
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            write_snapshot(directory)
+        except OSError as e:
+            print(f"Warning: Failed to write metrics snapshot to {directory}: {e}")
+
+
+def start_snapshot_writer(directory: str) -> None:
+    """Write this worker's snapshot now and then periodically on the running event loop."""
+    global _snapshot_task
+    if _snapshot_task is None or _snapshot_task.done():
+        write_snapshot(directory)
+        _snapshot_task = asyncio.create_task(_snapshot_loop(directory, METRICS_CONFIG["snapshot_interval_seconds"]))
+
+
+async def stop_snapshot_writer(directory: str) -> None:
+    """Stop the periodic task and write the final counts, which stay in the merged totals."""
+    global _snapshot_task
+    if _snapshot_task is not None:
+        _snapshot_task.cancel()
+        try:
+            await _snapshot_task
+        except asyncio.CancelledError:
+            pass
+        _snapshot_task = None
+    try:
+        write_snapshot(directory)
+    except OSError as e:
+        print(f"Warning: Failed to write metrics snapshot to {directory}: {e}")
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return round(value, 4) if value is not None else None
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels) -> str:
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+def _family(lines: List[str], name: str, kind: str, help_text: str, samples: List[Tuple[str, Any]]):
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} {kind}")
+    for suffix_and_labels, value in samples:
+        lines.append(f"{name}{suffix_and_labels} {value}")
+
+
+def route_summaries() -> Dict[str, Dict[str, Any]]:
+    """Per-route counts and latency percentiles (seconds), keyed by "METHOD /template"."""
+    return {f"{method} {route}": stats.summary() for (method, route), stats in sorted(request_metrics.routes.items())}
+
+
+def render_prometheus() -> str:
+    """Metrics of every worker when METRICS_DIR is set, otherwise of this process."""
+    directory = METRICS_CONFIG["dir"]
+    if directory:
+        requests, ws, started_at, workers = merged_metrics(directory)
+    else:
+        requests, ws, started_at, workers = request_metrics, websocket_metrics, _started_at, 1
+
+    lines: List[str] = []
+    routes = sorted(requests.routes.items())
+
+    _family(lines, "app_workers", "gauge", "Live worker processes whose metrics are included.", [("", workers)])
+    _family(lines, "process_start_time_seconds", "gauge", "Start time of the oldest worker included, since the epoch.", [
+        ("", started_at)
+    ])
+
+    _family(lines, "http_requests_total", "counter", "HTTP requests by route template and status.", [
+        (_labels(method=method, route=route, status=status), count)
+        for (method, route), stats in routes
+        for status, count in sorted(stats.statuses.items())
+    ])
+    _family(lines, "http_request_errors_total", "counter", "HTTP requests that failed with a 5xx or an unhandled exception.", [
+        (_labels(method=method, route=route), stats.errors) for (method, route), stats in routes
+    ])
+    _family(lines, "http_requests_in_flight", "gauge", "HTTP requests currently being handled.", [
+        (_labels(method=method, route=route), stats.in_flight) for (method, route), stats in routes
+    ])
+
+    samples = []
+    for (method, route), stats in routes:
+        cumulative = 0
+        for bound, count in zip(stats.latency.bounds + (float("inf"),), stats.latency.counts):
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            samples.append(("_bucket" + _labels(method=method, route=route, le=le), cumulative))
+        samples.append(("_sum" + _labels(method=method, route=route), round(stats.latency.sum, 6)))
+        samples.append(("_count" + _labels(method=method, route=route), stats.latency.count))
+    _family(lines, "http_request_duration_seconds", "histogram", "HTTP request latency by route template.", samples)
+
+    _family(lines, "http_request_duration_quantile_seconds", "gauge", "p50/p95/p99 latency estimated from the histogram buckets.", [
+        (_labels(method=method, route=route, quantile=q), _round(stats.latency.quantile(q)))
+        for (method, route), stats in routes if stats.latency.count
+        for q in QUANTILES
+    ])
+
+    _family(lines, "chat_websocket_connections", "gauge", "Open chat WebSocket connections.", [("", ws.connections)])
+    cumulative, samples = 0, []
+    for bound, count in zip(ROOM_CONNECTION_BUCKETS + (float("inf"),), ws.rooms):
+        cumulative += count
+        samples.append((_labels(le="+Inf" if bound == float("inf") else bound), cumulative))
+    _family(lines, "chat_websocket_rooms", "gauge", "Open chat rooms with at most `le` connections on one worker.", samples)
+    _family(lines, "chat_websocket_opened_total", "counter", "Chat WebSocket connections accepted.", [("", ws.opened)])
+    _family(lines, "chat_websocket_closed_total", "counter", "Chat WebSocket connections closed.", [("", ws.closed)])
+    _family(lines, "chat_messages_received_total", "counter", "Chat messages received from clients.", [("", ws.messages_received)])
+    _family(lines, "chat_messages_sent_total", "counter", "Chat messages delivered to WebSocket connections.", [("", ws.messages_sent)])
+    _family(lines, "chat_relay_published_total", "counter", "Chat broadcasts relayed to other workers.", [("", ws.relay_published)])
+    _family(lines, "chat_relay_received_total", "counter", "Chat broadcasts received from other workers.", [("", ws.relay_received)])
+
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,188 @@
+"""
+Startup measurement and warm-up.
+main.py records how long importing the app took, then the lifespan hook runs
+warm_up(): it creates the shared clients, opens pools and TLS connections,
+signs a JWT and builds the in-process listing indexes, timing each step.
+/health reports ready only after it finishes, so a new worker is not sent
+traffic while it is still cold.
+
+Import-time profile (cost per module and per top-level package):
+    python -m core.startup [--module main] [--top 30]
+"""
+
+import argparse
+import asyncio
+import inspect
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Optional
+from core.config import WARMUP_CONFIG, DYNAMODB_CONFIG
+
+WARMUP_USER_ID = "00000000-0000-0000-0000-000000000000"
+
+
+class StartupState:
+    """Timings of the import and warm-up phases, and whether the worker is ready."""
+
+    def __init__(self):
+        self.import_seconds: Optional[float] = None
+        self.warmup_seconds: Optional[float] = None
+        self.steps: Dict[str, Dict[str, Any]] = {}
+        self.ready = False
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "import_seconds": self.import_seconds,
+            "warmup_seconds": self.warmup_seconds,
+            "steps": dict(self.steps)
+        }
+
+
+startup_state = StartupState()
+
+
+def record_import_time(started_at: float):
+    """Call at the end of main.py with a perf_counter() taken at its top."""
+    startup_state.import_seconds = round(time.perf_counter() - started_at, 4)
+
+
+def _sign_jwt():
+    from auth.utils import create_access_token, verify_token
+    from supabase_client.auth_client import create_supabase_compatible_jwt
+    verify_token(create_access_token({"user_id": WARMUP_USER_ID, "email": "warmup@localhost"}))
+    create_supabase_compatible_jwt(WARMUP_USER_ID)
+
+
+def _open_supabase():
+    # Creates the shared anonymous and service clients and opens the service client's TLS connection
+    from supabase_client.auth_client import get_service_role_supabase_client, get_unauthenticated_supabase_client
+    get_unauthenticated_supabase_client()
+    client = get_service_role_supabase_client()
+    if client is not None:
+        client.table("listing_cards").select("listing_id").limit(1).execute()
+
+
+def _open_aws():
+    from core.aws import get_s3_client, get_dynamodb_client
+    get_s3_client()
+    if DYNAMODB_CONFIG["backend"] == "dynamodb":
+        get_dynamodb_client().describe_endpoints()
+
+
+async def _open_postgres():
+    from supabase_client.database import postgres
+    if postgres.is_enabled():
+        await postgres.get_pool()
+
+
+async def _build_indexes():
+    from supabase_client.database import listing_index, popularity
+    await listing_index.warm_indexes()
+    await popularity.refresh_popularity_snapshot(force=True)
+
+
+async def _run_step(name: str, step):
+    started_at = time.perf_counter()
+    try:
+        if inspect.iscoroutinefunction(step):
+            await step()
+        else:
+            await asyncio.to_thread(step)
+        startup_state.steps[name] = {"seconds": round(time.perf_counter() - started_at, 4), "ok": True}
+    except Exception as e:
+        # A failed step only means the first request pays for it
+        startup_state.steps[name] = {"seconds": round(time.perf_counter() - started_at, 4), "ok": False, "error": str(e)}
+        print(f"Warning: Warm-up step {name} failed: {e}")
+
+
+async def warm_up():
+    """Run every warm-up step (independent steps concurrently), then mark the worker ready."""
+    started_at = time.perf_counter()
+    try:
+        steps = [("jwt", _sign_jwt), ("supabase", _open_supabase), ("aws", _open_aws), ("postgres", _open_postgres)]
+        await asyncio.gather(*(_run_step(name, step) for name, step in steps))
+        # The indexes load through the Supabase clients opened above
+        if WARMUP_CONFIG["build_indexes"]:
+            await _run_step("indexes", _build_indexes)
+    finally:
+        startup_state.warmup_seconds = round(time.perf_counter() - started_at, 4)
+        startup_state.ready = True
+
+
+async def start_warm_up() -> Optional[asyncio.Task]:
+    """
+    Start warm-up and wait for it up to WARMUP_TIMEOUT_SECONDS. If it is still
+    running after that the worker starts serving anyway, and /health keeps
+    reporting not ready until it finishes.
+    """
+    if not WARMUP_CONFIG["enabled"]:
+        startup_state.ready = True
+        return None
+
+    task = asyncio.create_task(warm_up())
+    try:
+        await asyncio.wait_for(asyncio.shield(task), timeout=WARMUP_CONFIG["timeout_seconds"])
+    except asyncio.TimeoutError:
+        print(f"Warning: Warm-up still running after {WARMUP_CONFIG['timeout_seconds']}s; serving while it finishes")
+    return task
+
+
+def profile_imports(module: str = "main") -> List[Dict[str, Any]]:
+    """
+    Import `module` in a fresh interpreter with -X importtime and return one
+    row per imported module: self and cumulative microseconds and nesting depth.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr}")
+
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append({
+            "module": name.strip(),
+            "depth": (len(name) - len(name.lstrip()) - 1) // 2,
+            "self_us": int(self_us),
+            "cumulative_us": int(cumulative_us)
+        })
+    return rows
+
+
+def summarize_by_package(rows: List[Dict[str, Any]]) -> Dict[str, int]:
+    """Self time summed per top-level package, in microseconds, largest first."""
+    totals: Dict[str, int] = {}
+    for row in rows:
+        package = row["module"].split(".")[0]
+        totals[package] = totals.get(package, 0) + row["self_us"]
+    return dict(sorted(totals.items(), key=lambda item: item[1], reverse=True))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report import-time cost per module.")
+    parser.add_argument("--module", default="main", help="Module to import (default: main)")
+    parser.add_argument("--top", type=int, default=30, help="Rows to show per table")
+    args = parser.parse_args()
+
+    rows = profile_imports(args.module)
+    total_us = next((row["cumulative_us"] for row in rows if row["module"] == args.module), 0)
+    print(f"import {args.module}: {total_us / 1000:.1f} ms\n")
+
+    print(f"{'package':<40}{'self ms':>10}{'share':>8}")
+    for package, self_us in list(summarize_by_package(rows).items())[:args.top]:
+        share = self_us / total_us * 100 if total_us else 0
+        print(f"{package:<40}{self_us / 1000:>10.1f}{share:>7.1f}%")
+
+    print(f"\n{'module':<60}{'cumulative ms':>15}{'self ms':>10}")
+    for row in sorted(rows, key=lambda row: row["cumulative_us"], reverse=True)[:args.top]:
+        print(f"{row['module']:<60}{row['cumulative_us'] / 1000:>15.1f}{row['self_us'] / 1000:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
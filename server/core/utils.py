@@ -4,9 +4,11 @@ Core utilities for the application.
 
 import time
 import functools
+import inspect
 import logging
+from types import ModuleType
 from typing import Callable, Any, Dict, Optional
-from fastapi import Request
+from fastapi import HTTPException, Request
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -66,28 +68,53 @@ def get_file_extension(filename: str, default_ext: str = "jpg") -> str:
     return default_ext
 
 def performance_monitor(func: Callable) -> Callable:
-    """Decorator to monitor function performance."""
+    """Decorator to monitor function performance, with the backend calls it made (see core/ledger.py)."""
+    from core.ledger import calls_so_far
+
     @functools.wraps(func)
     async def wrapper(*args, **kwargs):
         start_time = time.time()
+        calls_before = calls_so_far()
         try:
             result = await func(*args, **kwargs)
             execution_time = time.time() - start_time
             
             # Log slow operations (over 1 second)
             if execution_time > 1.0:
-                logger.warning(f"Slow operation detected: {func.__name__} took {execution_time:.2f}s")
+                logger.warning(f"Slow operation detected: {func.__name__} took {execution_time:.2f}s ({calls_so_far() - calls_before} backend calls)")
             elif execution_time > 0.5:
-                logger.info(f"Operation: {func.__name__} took {execution_time:.2f}s")
+                logger.info(f"Operation: {func.__name__} took {execution_time:.2f}s ({calls_so_far() - calls_before} backend calls)")
                 
             return result
+        except HTTPException:
+            # Expected outcome (404, 403, ...) or an error already reported where it was converted
+            raise
         except Exception as e:
-            execution_time = time.time() - start_time
-            logger.error(f"Error in {func.__name__} after {execution_time:.2f}s: {str(e)}")
+            # Log once, at the innermost monitored function, not again at every level it passes through
+            if not getattr(e, "_performance_logged", False):
+                execution_time = time.time() - start_time
+                logger.error(f"Error in {func.__name__} after {execution_time:.2f}s: {type(e).__name__}: {e}")
+                try:
+                    e._performance_logged = True
+                except AttributeError:
+                    pass
             raise
     
+    wrapper._performance_monitored = True
     return wrapper
 
+def monitor_module(module: ModuleType, exclude: tuple = ()):
+    """Apply performance_monitor to the public async functions defined in `module`."""
+    for name, value in list(vars(module).items()):
+        if (
+            name.startswith("_") or name in exclude
+            or not inspect.iscoroutinefunction(value)
+            or value.__module__ != module.__name__
+            or getattr(value, "_performance_monitored", False)
+        ):
+            continue
+        setattr(module, name, performance_monitor(value))
+
 def log_request_performance(request: Request, response_time: float):
     """Log request performance metrics - only important ones."""
     if response_time > 2.0:
@@ -97,10 +124,11 @@ def log_request_performance(request: Request, response_time: float):
     # Don't log fast requests to reduce noise
 
 def get_performance_stats():
-    """Get current performance statistics."""
-    # This could be expanded to include more metrics
+    """Get current performance statistics: per-route counts and latency percentiles of this worker."""
+    from core.metrics import route_summaries
     return {
         "timestamp": time.time(),
-        "log_level": logger.level
+        "log_level": logger.level,
+        "routes": route_summaries()
     }
 
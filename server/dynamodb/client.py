@@ -1,10 +1,91 @@
 from fastapi import WebSocket
-from dynamodb import utils
+from typing import Awaitable, Callable, Optional
+import asyncio
 import json
+import os
+import socket
+from core.metrics import websocket_metrics
+
+# Receive buffer per datagram; chat payloads are far smaller
+MAX_DATAGRAM_BYTES = 65536
+
+
+class RoomBus:
+    """
+    Relays room broadcasts between worker processes on one host. Each worker
+    binds a Unix datagram socket in a shared directory and sends every
+    broadcast to the other sockets there, so a room's members get its
+    messages whichever worker they are connected to.
+    """
+
+    def __init__(self, directory: str, deliver: Callable[[dict, str], Awaitable[None]]):
+        self.directory = directory
+        self.path = os.path.join(directory, f"worker-{os.getpid()}.sock")
+        self.deliver = deliver
+        self._socket: Optional[socket.socket] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def start(self):
+        os.makedirs(self.directory, exist_ok=True)
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        sock.bind(self.path)
+        sock.setblocking(False)
+        self._socket = sock
+        self._loop = asyncio.get_running_loop()
+        self._loop.add_reader(sock.fileno(), self._on_readable)
+
+    def stop(self):
+        if self._socket is None:
+            return
+        self._loop.remove_reader(self._socket.fileno())
+        self._socket.close()
+        self._socket = None
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+    def _on_readable(self):
+        while self._socket is not None:
+            try:
+                data = self._socket.recv(MAX_DATAGRAM_BYTES)
+            except BlockingIOError:
+                return
+            try:
+                envelope = json.loads(data)
+                websocket_metrics.relay_received += 1
+                self._loop.create_task(self.deliver(envelope["message"], envelope["room_id"]))
+            except (ValueError, KeyError) as e:
+                print(f"Warning: Dropped malformed chat relay datagram: {e}")
+
+    def publish(self, message: dict, room_id: str):
+        if self._socket is None:
+            return
+        data = json.dumps({"room_id": room_id, "message": message}).encode()
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if path == self.path or not name.endswith(".sock"):
+                continue
+            try:
+                self._socket.sendto(data, path)
+                websocket_metrics.relay_published += 1
+            except (ConnectionRefusedError, FileNotFoundError):
+                # Left behind by a worker that exited without cleaning up
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    pass
+            except OSError as e:
+                # Peer's receive buffer is full or the payload is too large
+                print(f"Warning: Failed to relay chat message to {name}: {e}")
+
 
 class ConnectionManager:
     def __init__(self):
-        self.active_connections: dict[str, list[WebSocket]] = {}  # room_id -> websockets
+        self.active_connections: dict[str, list[WebSocket]] = {}  # room_id -> websockets (this process only)
+        self._bus: Optional[RoomBus] = None
 
     async def connect(self, websocket: WebSocket, room_id: str):
         await websocket.accept()
@@ -12,12 +93,66 @@ class ConnectionManager:
         if room_id not in self.active_connections:
             self.active_connections[room_id] = []
         self.active_connections[room_id].append(websocket)
+        websocket_metrics.connected(len(self.active_connections[room_id]))
 
     def disconnect(self, websocket: WebSocket, room_id: str):
-        self.active_connections[room_id].remove(websocket)
-        if not self.active_connections[room_id]:
-            del self.active_connections[room_id]
+        connections = self.active_connections.get(room_id, [])
+        if websocket in connections:
+            connections.remove(websocket)
+            websocket_metrics.disconnected(len(connections))
+        if not connections:
+            self.active_connections.pop(room_id, None)
+
+    async def send_local(self, message: dict, room_id: str):
+        """Send to this process's connections in the room."""
+        payload = json.dumps(message)
+        for connection in list(self.active_connections.get(room_id, [])):
+            try:
+                await connection.send_text(payload)
+                websocket_metrics.messages_sent += 1
+            except Exception:
+                # Closed underneath us; the endpoint's receive loop also cleans up
+                self.disconnect(connection, room_id)
 
     async def broadcast(self, message: dict, room_id: str):
-        for connection in self.active_connections.get(room_id, []):
-            await connection.send_text(json.dumps(message))
\ No newline at end of file
+        await self.send_local(message, room_id)
+        if self._bus is not None:
+            self._bus.publish(message, room_id)
+
+    def start_relay(self, directory: str):
+        """Relay broadcasts to the other worker processes sharing `directory`."""
+        self._bus = RoomBus(directory, self.send_local)
+        self._bus.start()
+
+    def stop_relay(self):
+        if self._bus is not None:
+            self._bus.stop()
+            self._bus = None
+
+    async def drain(self, timeout_seconds: float = 5):
+        """
+        Close every connection with 1012 (service restart) so clients reconnect
+        to another worker, instead of having the socket dropped at shutdown.
+        """
+        connections = [
+            (websocket, room_id)
+            for room_id, websockets in list(self.active_connections.items())
+            for websocket in list(websockets)
+        ]
+        if not connections:
+            return
+
+        async def close(websocket: WebSocket, room_id: str):
+            try:
+                await websocket.close(code=1012, reason="Server restarting")
+            except Exception:
+                pass
+            self.disconnect(websocket, room_id)
+
+        try:
+            await asyncio.wait_for(
+                asyncio.gather(*(close(websocket, room_id) for websocket, room_id in connections)),
+                timeout=timeout_seconds
+            )
+        except asyncio.TimeoutError:
+            print(f"Warning: {len(self.active_connections)} chat rooms still open after draining for {timeout_seconds}s")
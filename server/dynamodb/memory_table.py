@@ -0,0 +1,316 @@
+"""
+In-memory DynamoDB table for offline benchmarks and tests.
+Keeps DynamoDB's key semantics: items are unique per (partition key, sort
+key), a query reads one partition in sort-key order, Limit counts items read
+before the filter is applied, and a page stops at `page_size` items (standing
+in for the 1 MB response limit) with a LastEvaluatedKey to resume from.
+Conditions are the same boto3 Key/Attr objects the DynamoDB table takes.
+Failed conditions raise the ClientError DynamoDB would.
+"""
+
+import bisect
+import copy
+import threading
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from botocore.exceptions import ClientError
+from boto3.dynamodb.conditions import ConditionBase, AttributeBase
+
+
+def _conditional_check_failed(operation: str) -> ClientError:
+    return ClientError(
+        {
+            "Error": {"Code": "ConditionalCheckFailedException", "Message": "The conditional request failed"},
+            "ResponseMetadata": {"HTTPStatusCode": 400}
+        },
+        operation
+    )
+
+
+def _to_dynamo(value):
+    """Normalize a value the way boto3 serializes it: ints become Decimal, floats are rejected."""
+    if isinstance(value, bool) or value is None or isinstance(value, (str, bytes, Decimal)):
+        return value
+    if isinstance(value, int):
+        return Decimal(value)
+    if isinstance(value, float):
+        raise TypeError("Float types are not supported. Use Decimal types instead.")
+    if isinstance(value, dict):
+        return {k: _to_dynamo(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_to_dynamo(v) for v in value]
+    if isinstance(value, (set, frozenset)):
+        return {_to_dynamo(v) for v in value}
+    raise TypeError(f"Unsupported type {type(value).__name__} for DynamoDB")
+
+
+def _sort_value(value):
+    """Key ordering: numbers numerically, strings and binary by their bytes."""
+    if isinstance(value, Decimal):
+        return (0, value)
+    if isinstance(value, str):
+        return (1, value.encode("utf-8"))
+    return (2, bytes(value))
+
+
+def _operand(item: Dict[str, Any], operand):
+    """(present, value) of an attribute reference or a literal."""
+    if isinstance(operand, AttributeBase):
+        if operand.name not in item:
+            return False, None
+        return True, item[operand.name]
+    if isinstance(operand, ConditionBase) and operand.expression_operator == "size":
+        present, value = _operand(item, operand._values[0])
+        return present, Decimal(len(value)) if present else None
+    return True, _to_dynamo(operand)
+
+
+def _comparable(left, right) -> bool:
+    return (isinstance(left, Decimal) and isinstance(right, Decimal)) or \
+        (isinstance(left, str) and isinstance(right, str)) or \
+        (isinstance(left, bytes) and isinstance(right, bytes))
+
+
+def evaluate(condition: ConditionBase, item: Dict[str, Any]) -> bool:
+    """Evaluate a boto3 condition against a stored item."""
+    operator = condition.expression_operator
+    values = condition._values
+
+    if operator == "AND":
+        return evaluate(values[0], item) and evaluate(values[1], item)
+    if operator == "OR":
+        return evaluate(values[0], item) or evaluate(values[1], item)
+    if operator == "NOT":
+        return not evaluate(values[0], item)
+    if operator == "attribute_exists":
+        return values[0].name in item
+    if operator == "attribute_not_exists":
+        return values[0].name not in item
+
+    present, left = _operand(item, values[0])
+    if not present:
+        return False
+
+    if operator == "=":
+        return left == _operand(item, values[1])[1]
+    if operator == "<>":
+        other_present, right = _operand(item, values[1])
+        return not other_present or left != right
+    if operator == "IN":
+        return any(left == _operand(item, value)[1] for value in values[1:])
+    if operator in ("<", "<=", ">", ">="):
+        right = _operand(item, values[1])[1]
+        if not _comparable(left, right):
+            return False
+        return {
+            "<": left < right, "<=": left <= right,
+            ">": left > right, ">=": left >= right
+        }[operator]
+    if operator == "BETWEEN":
+        low, high = _operand(item, values[1])[1], _operand(item, values[2])[1]
+        return _comparable(left, low) and _comparable(left, high) and low <= left <= high
+    if operator == "begins_with":
+        prefix = _operand(item, values[1])[1]
+        return isinstance(left, (str, bytes)) and _comparable(left, prefix) and left.startswith(prefix)
+    if operator == "contains":
+        right = _operand(item, values[1])[1]
+        if isinstance(left, str):
+            return isinstance(right, str) and right in left
+        if isinstance(left, (list, set)):
+            return right in left
+        return False
+    if operator == "attribute_type":
+        expected = values[1]
+        actual = {
+            str: "S", Decimal: "N", bytes: "B", bool: "BOOL", list: "L", dict: "M", type(None): "NULL"
+        }.get(type(left))
+        return actual == expected
+    raise ValueError(f"Unsupported condition operator: {operator}")
+
+
+class _Partition:
+    """Items of one partition, kept in sort-key order."""
+
+    __slots__ = ("order", "items")
+
+    def __init__(self):
+        self.order: List[Tuple] = []
+        self.items: Dict[Tuple, Dict[str, Any]] = {}
+
+
+class InMemoryTable:
+    """Storage and key semantics of one DynamoDB table with a partition and sort key."""
+
+    def __init__(self, name: str, partition_key: str, sort_key: str, page_size: int = 100):
+        self.name = name
+        self.partition_key = partition_key
+        self.sort_key = sort_key
+        self.page_size = page_size
+        self._partitions: Dict[Any, _Partition] = {}
+        self._lock = threading.RLock()
+
+    def _key_values(self, key: Dict[str, Any], operation: str):
+        try:
+            return _to_dynamo(key[self.partition_key]), _to_dynamo(key[self.sort_key])
+        except KeyError:
+            raise ClientError(
+                {
+                    "Error": {"Code": "ValidationException", "Message": "The provided key element does not match the schema"},
+                    "ResponseMetadata": {"HTTPStatusCode": 400}
+                },
+                operation
+            )
+
+    def _key_of(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        return {self.partition_key: item[self.partition_key], self.sort_key: item[self.sort_key]}
+
+    def _get(self, partition_value, sort_value) -> Optional[Dict[str, Any]]:
+        partition = self._partitions.get(partition_value)
+        if partition is None:
+            return None
+        return partition.items.get(_sort_value(sort_value))
+
+    def _store(self, item: Dict[str, Any]):
+        partition = self._partitions.setdefault(item[self.partition_key], _Partition())
+        position = _sort_value(item[self.sort_key])
+        if position not in partition.items:
+            bisect.insort(partition.order, position)
+        partition.items[position] = item
+
+    def _remove(self, partition_value, sort_value):
+        partition = self._partitions.get(partition_value)
+        if partition is None:
+            return
+        position = _sort_value(sort_value)
+        if partition.items.pop(position, None) is not None:
+            partition.order.pop(bisect.bisect_left(partition.order, position))
+            if not partition.items:
+                del self._partitions[partition_value]
+
+    def get_item(self, key: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            item = self._get(*self._key_values(key, "GetItem"))
+            return copy.deepcopy(item) if item is not None else None
+
+    def put_item(self, item: Dict[str, Any], condition: Optional[ConditionBase] = None):
+        item = _to_dynamo(item)
+        with self._lock:
+            partition_value, sort_value = self._key_values(item, "PutItem")
+            if condition is not None and not evaluate(condition, self._get(partition_value, sort_value) or {}):
+                raise _conditional_check_failed("PutItem")
+            self._store(copy.deepcopy(item))
+
+    def update_item(self, key: Dict[str, Any], set_values: Dict[str, Any],
+                    append_values: Optional[Dict[str, List[Any]]] = None,
+                    condition: Optional[ConditionBase] = None) -> Dict[str, Any]:
+        """SET attributes (and list_append to lists), creating the item if it does not exist."""
+        with self._lock:
+            partition_value, sort_value = self._key_values(key, "UpdateItem")
+            current = self._get(partition_value, sort_value)
+            if condition is not None and not evaluate(condition, current or {}):
+                raise _conditional_check_failed("UpdateItem")
+
+            updated = copy.deepcopy(current) if current is not None else {
+                self.partition_key: partition_value, self.sort_key: sort_value
+            }
+            for attribute, value in set_values.items():
+                updated[attribute] = _to_dynamo(value)
+            for attribute, values in (append_values or {}).items():
+                updated[attribute] = list(updated.get(attribute) or []) + _to_dynamo(list(values))
+
+            self._store(updated)
+            return copy.deepcopy(updated)
+
+    def delete_item(self, key: Dict[str, Any], condition: Optional[ConditionBase] = None) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            partition_value, sort_value = self._key_values(key, "DeleteItem")
+            current = self._get(partition_value, sort_value)
+            if condition is not None and not evaluate(condition, current or {}):
+                raise _conditional_check_failed("DeleteItem")
+            self._remove(partition_value, sort_value)
+            return current
+
+    def batch_write(self, puts: Iterable[Dict[str, Any]] = (), deletes: Iterable[Dict[str, Any]] = ()):
+        """All requests are processed; an in-process table never returns UnprocessedItems."""
+        with self._lock:
+            for item in puts:
+                self.put_item(item)
+            for key in deletes:
+                self.delete_item(key)
+
+    def _budget(self, limit: Optional[int]) -> int:
+        return min(limit, self.page_size) if limit else self.page_size
+
+    @staticmethod
+    def _read(positions: List[Tuple], items: Dict[Tuple, Dict[str, Any]], filter_condition,
+              budget: int, matches: List[Dict[str, Any]]):
+        """Read items until the budget runs out; returns (items read, last item read). Limit counts before the filter."""
+        read = 0
+        last = None
+        for position in positions[:budget]:
+            item = items[position]
+            read += 1
+            last = item
+            if filter_condition is None or evaluate(filter_condition, item):
+                matches.append(copy.deepcopy(item))
+        return read, last
+
+    def query(self, partition_value, filter_condition: Optional[ConditionBase] = None, forward: bool = True,
+              limit: Optional[int] = None, start_key: Optional[Dict[str, Any]] = None):
+        """One page of a partition in sort-key order: (items, LastEvaluatedKey or None)."""
+        with self._lock:
+            partition = self._partitions.get(_to_dynamo(partition_value))
+            if partition is None:
+                return [], None
+
+            order = partition.order
+            if start_key is not None:
+                position = _sort_value(_to_dynamo(start_key[self.sort_key]))
+                if forward:
+                    positions = order[bisect.bisect_right(order, position):]
+                else:
+                    positions = order[:bisect.bisect_left(order, position)][::-1]
+            else:
+                positions = order if forward else order[::-1]
+
+            budget = self._budget(limit)
+            matches: List[Dict[str, Any]] = []
+            read, last = self._read(positions, partition.items, filter_condition, budget, matches)
+            return matches, self._key_of(last) if read >= budget else None
+
+    def scan(self, filter_condition: Optional[ConditionBase] = None, limit: Optional[int] = None,
+             start_key: Optional[Dict[str, Any]] = None):
+        """One page of the whole table, partition by partition: (items, LastEvaluatedKey or None)."""
+        with self._lock:
+            partition_values = list(self._partitions)
+            start_index = 0
+            start_position = None
+            if start_key is not None:
+                start_partition = _to_dynamo(start_key[self.partition_key])
+                start_position = _sort_value(_to_dynamo(start_key[self.sort_key]))
+                if start_partition in self._partitions:
+                    start_index = partition_values.index(start_partition)
+                else:
+                    start_index = len(partition_values)
+
+            budget = self._budget(limit)
+            matches: List[Dict[str, Any]] = []
+            for index in range(start_index, len(partition_values)):
+                partition = self._partitions[partition_values[index]]
+                positions = partition.order
+                if index == start_index and start_position is not None:
+                    positions = positions[bisect.bisect_right(positions, start_position):]
+
+                read, last = self._read(positions, partition.items, filter_condition, budget, matches)
+                budget -= read
+                if budget <= 0:
+                    return matches, self._key_of(last)
+            return matches, None
+
+    def load(self, items: Iterable[Dict[str, Any]]):
+        for item in items:
+            self.put_item(item)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(len(partition.items) for partition in self._partitions.values())
@@ -0,0 +1,442 @@
+"""
+Repositories for the DynamoDB tables (messages, reviews, reports, notifications).
+Routes call typed methods here instead of building key conditions inline, so
+key design, pagination (LastEvaluatedKey is always followed) and write
+batching live in one place. Each repository sits on a table object with the
+same small interface in two implementations: DynamoTable over boto3 and
+InMemoryTable (dynamodb/memory_table.py) for offline benchmarks and tests.
+"""
+
+import contextvars
+import json
+import os
+import random
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+from boto3.dynamodb.conditions import Key, Attr, ConditionBase
+from botocore.exceptions import ClientError
+from core.config import DYNAMODB_CONFIG
+from core.aws import get_dynamodb_resource
+from dynamodb.memory_table import InMemoryTable
+
+# batch_write_item takes at most 25 requests per call
+BATCH_WRITE_LIMIT = 25
+
+
+@dataclass(frozen=True)
+class TableSpec:
+    name: str
+    partition_key: str
+    sort_key: str
+
+
+MESSAGE_TABLE = TableSpec("hackybara-message", "room_id", "created_at")
+REVIEW_TABLE = TableSpec("hackybara-review", "reviewee_id", "created_at")
+REPORT_TABLE = TableSpec("hackybara-report", "report_id", "created_at")
+NOTIFICATION_TABLE = TableSpec("hackybara-notification", "user_id", "timestamp")
+TABLES = [MESSAGE_TABLE, REVIEW_TABLE, REPORT_TABLE, NOTIFICATION_TABLE]
+
+
+class DynamoTable:
+    """A DynamoDB table through the boto3 resource, created on first use."""
+
+    def __init__(self, spec: TableSpec, resource=None):
+        self.name = spec.name
+        self.partition_key = spec.partition_key
+        self.sort_key = spec.sort_key
+        self._resource = resource
+        self._table = None
+        self._lock = threading.Lock()
+
+    @property
+    def table(self):
+        if self._table is None:
+            with self._lock:
+                if self._table is None:
+                    resource = self._resource or get_dynamodb_resource()
+                    self._table = resource.Table(self.name)  # type:ignore
+        return self._table
+
+    def get_item(self, key: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        return self.table.get_item(Key=key).get("Item")
+
+    def put_item(self, item: Dict[str, Any], condition: Optional[ConditionBase] = None):
+        kwargs: Dict[str, Any] = {"Item": item}
+        if condition is not None:
+            kwargs["ConditionExpression"] = condition
+        self.table.put_item(**kwargs)
+
+    def update_item(self, key: Dict[str, Any], set_values: Dict[str, Any],
+                    append_values: Optional[Dict[str, List[Any]]] = None,
+                    condition: Optional[ConditionBase] = None) -> Dict[str, Any]:
+        """SET attributes (and list_append to lists); returns the item as updated."""
+        names: Dict[str, str] = {}
+        values: Dict[str, Any] = {}
+        parts = []
+        # Placeholders for every name, so reserved words such as `status` are safe
+        for index, (attribute, value) in enumerate(set_values.items()):
+            names[f"#s{index}"] = attribute
+            values[f":s{index}"] = value
+            parts.append(f"#s{index} = :s{index}")
+        for index, (attribute, value) in enumerate((append_values or {}).items()):
+            names[f"#a{index}"] = attribute
+            values[f":a{index}"] = value
+            values[":empty_list"] = []
+            parts.append(f"#a{index} = list_append(if_not_exists(#a{index}, :empty_list), :a{index})")
+
+        kwargs: Dict[str, Any] = {
+            "Key": key,
+            "UpdateExpression": "SET " + ", ".join(parts),
+            "ExpressionAttributeNames": names,
+            "ExpressionAttributeValues": values,
+            "ReturnValues": "ALL_NEW"
+        }
+        if condition is not None:
+            kwargs["ConditionExpression"] = condition
+        return self.table.update_item(**kwargs)["Attributes"]
+
+    def delete_item(self, key: Dict[str, Any], condition: Optional[ConditionBase] = None) -> Optional[Dict[str, Any]]:
+        kwargs: Dict[str, Any] = {"Key": key, "ReturnValues": "ALL_OLD"}
+        if condition is not None:
+            kwargs["ConditionExpression"] = condition
+        return self.table.delete_item(**kwargs).get("Attributes")
+
+    def batch_write(self, puts: Iterable[Dict[str, Any]] = (), deletes: Iterable[Dict[str, Any]] = ()):
+        """
+        Write through batch_write_item in chunks of 25, retrying UnprocessedItems
+        with jittered exponential backoff. A batch may not touch one key twice,
+        so the last request per key wins. The backoff sleeps, so async callers
+        run this in a thread (asyncio.to_thread).
+        """
+        requests: "OrderedDict[tuple, Dict[str, Any]]" = OrderedDict()
+        for item in puts:
+            requests[(item[self.partition_key], item[self.sort_key])] = {"PutRequest": {"Item": item}}
+        for key in deletes:
+            requests[(key[self.partition_key], key[self.sort_key])] = {
+                "DeleteRequest": {"Key": {self.partition_key: key[self.partition_key], self.sort_key: key[self.sort_key]}}
+            }
+
+        pending = list(requests.values())
+        client = self.table.meta.client
+        for start in range(0, len(pending), BATCH_WRITE_LIMIT):
+            chunk = pending[start:start + BATCH_WRITE_LIMIT]
+            attempt = 0
+            while chunk:
+                response = client.batch_write_item(RequestItems={self.name: chunk})
+                chunk = response.get("UnprocessedItems", {}).get(self.name, [])
+                if not chunk:
+                    break
+                attempt += 1
+                if attempt > DYNAMODB_CONFIG["batch_max_retries"]:
+                    raise ClientError(
+                        {
+                            "Error": {
+                                "Code": "ProvisionedThroughputExceededException",
+                                "Message": f"{len(chunk)} writes left unprocessed after {attempt - 1} retries"
+                            },
+                            "ResponseMetadata": {"HTTPStatusCode": 503}
+                        },
+                        "BatchWriteItem"
+                    )
+                time.sleep(random.uniform(0, DYNAMODB_CONFIG["batch_backoff_seconds"] * (2 ** attempt)))
+
+    def query(self, partition_value, filter_condition: Optional[ConditionBase] = None, forward: bool = True,
+              limit: Optional[int] = None, start_key: Optional[Dict[str, Any]] = None):
+        """One page of a partition: (items, LastEvaluatedKey or None)."""
+        kwargs: Dict[str, Any] = {
+            "KeyConditionExpression": Key(self.partition_key).eq(partition_value),
+            "ScanIndexForward": forward
+        }
+        if filter_condition is not None:
+            kwargs["FilterExpression"] = filter_condition
+        if limit:
+            kwargs["Limit"] = limit
+        if start_key is not None:
+            kwargs["ExclusiveStartKey"] = start_key
+        response = self.table.query(**kwargs)
+        return response.get("Items", []), response.get("LastEvaluatedKey")
+
+    def scan(self, filter_condition: Optional[ConditionBase] = None, limit: Optional[int] = None,
+             start_key: Optional[Dict[str, Any]] = None):
+        """One page of the whole table: (items, LastEvaluatedKey or None)."""
+        kwargs: Dict[str, Any] = {}
+        if filter_condition is not None:
+            kwargs["FilterExpression"] = filter_condition
+        if limit:
+            kwargs["Limit"] = limit
+        if start_key is not None:
+            kwargs["ExclusiveStartKey"] = start_key
+        response = self.table.scan(**kwargs)
+        return response.get("Items", []), response.get("LastEvaluatedKey")
+
+
+def iter_query(table, partition_value, filter_condition: Optional[ConditionBase] = None,
+               forward: bool = True) -> Iterator[Dict[str, Any]]:
+    """Every matching item of a partition, following LastEvaluatedKey page by page."""
+    start_key = None
+    while True:
+        items, start_key = table.query(partition_value, filter_condition, forward, start_key=start_key)
+        yield from items
+        if start_key is None:
+            return
+
+
+def iter_scan(table, filter_condition: Optional[ConditionBase] = None) -> Iterator[Dict[str, Any]]:
+    """Every matching item of the table, following LastEvaluatedKey page by page."""
+    start_key = None
+    while True:
+        items, start_key = table.scan(filter_condition, start_key=start_key)
+        yield from items
+        if start_key is None:
+            return
+
+
+def update_all(table, items: List[Dict[str, Any]], set_values: Dict[str, Any],
+               condition_of: Callable[[Dict[str, Any]], ConditionBase]) -> List[Dict[str, Any]]:
+    """
+    SET `set_values` on each item with its own conditional update_item,
+    DYNAMODB_CONFIG["update_concurrency"] at a time. Only those attributes are
+    written, so concurrent edits to the rest of an item survive; items whose
+    condition fails (deleted, replaced or already updated since they were
+    read) are skipped. Returns the items as updated.
+    """
+    def update(item: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        key = {table.partition_key: item[table.partition_key], table.sort_key: item[table.sort_key]}
+        try:
+            return table.update_item(key, set_values, condition=condition_of(item))
+        except ClientError as e:
+            if e.response["Error"]["Code"] == "ConditionalCheckFailedException":
+                return None
+            raise
+
+    if len(items) <= 1:
+        results = [update(item) for item in items]
+    else:
+        with ThreadPoolExecutor(max_workers=min(DYNAMODB_CONFIG["update_concurrency"], len(items))) as executor:
+            # Each call runs in a copy of this context so the request ledger still sees it
+            futures = [executor.submit(contextvars.copy_context().run, update, item) for item in items]
+            results = [future.result() for future in futures]
+    return [item for item in results if item is not None]
+
+
+def query_all(table, partition_value, filter_condition: Optional[ConditionBase] = None,
+              forward: bool = True) -> List[Dict[str, Any]]:
+    return list(iter_query(table, partition_value, filter_condition, forward))
+
+
+def query_first(table, partition_value, filter_condition: ConditionBase) -> Optional[Dict[str, Any]]:
+    """First matching item of a partition; stops paging once it is found."""
+    return next(iter_query(table, partition_value, filter_condition), None)
+
+
+class MessageRepository:
+    """hackybara-message: partition room_id, sort created_at."""
+
+    def __init__(self, table):
+        self.table = table
+
+    def _key(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        return {"room_id": message["room_id"], "created_at": message["created_at"]}
+
+    def get(self, room_id: str, message_id: str) -> Optional[Dict[str, Any]]:
+        return query_first(self.table, room_id, Attr("message_id").eq(message_id))
+
+    def list_room(self, room_id: str) -> List[Dict[str, Any]]:
+        """Messages of a room with content or an image, oldest first."""
+        return query_all(self.table, room_id, Attr("content").exists() | Attr("image").exists())
+
+    def list_for_user(self, user_id: str) -> List[Dict[str, Any]]:
+        """Messages of every room the user is in (room ids embed both user ids)."""
+        return list(iter_scan(self.table, Attr("room_id").contains(user_id)))
+
+    def put(self, message: Dict[str, Any]):
+        self.table.put_item(message)
+
+    def update_content(self, message: Dict[str, Any], content: str, updated_at: str) -> Dict[str, Any]:
+        return self.table.update_item(
+            self._key(message),
+            {"content": content, "updated_at": updated_at},
+            condition=Attr("message_id").eq(message["message_id"])
+        )
+
+    def mark_read(self, room_id: str, receiver_id: str) -> List[Dict[str, Any]]:
+        """Mark the receiver's unread messages read; returns the messages this call updated."""
+        unread = query_all(self.table, room_id, Attr("receiver_id").eq(receiver_id) & Attr("read_status").eq(False))
+        return update_all(
+            self.table, unread, {"read_status": True},
+            lambda message: Attr("message_id").eq(message["message_id"]) & Attr("read_status").eq(False)
+        )
+
+    def delete(self, message: Dict[str, Any]):
+        self.table.delete_item(self._key(message))
+
+
+class ReviewRepository:
+    """hackybara-review: partition reviewee_id, sort created_at."""
+
+    def __init__(self, table):
+        self.table = table
+
+    def _key(self, review: Dict[str, Any]) -> Dict[str, Any]:
+        return {"reviewee_id": review["reviewee_id"], "created_at": review["created_at"]}
+
+    def get(self, reviewee_id: str, review_id: str) -> Optional[Dict[str, Any]]:
+        return query_first(self.table, reviewee_id, Attr("review_id").eq(review_id))
+
+    def get_by_reviewer(self, reviewee_id: str, reviewer_id: str, product_id: str) -> Optional[Dict[str, Any]]:
+        return query_first(
+            self.table, reviewee_id, Attr("reviewer_id").eq(reviewer_id) & Attr("product_id").eq(product_id)
+        )
+
+    def list_for_product(self, reviewee_id: str, product_id: str) -> List[Dict[str, Any]]:
+        return query_all(self.table, reviewee_id, Attr("product_id").eq(product_id))
+
+    def list_for_seller(self, reviewee_id: str) -> List[Dict[str, Any]]:
+        """Reviews of the seller themselves rather than one of their products."""
+        return query_all(self.table, reviewee_id, Attr("product_id").not_exists())
+
+    def put(self, review: Dict[str, Any]):
+        self.table.put_item(review)
+
+    def update(self, review: Dict[str, Any], set_values: Dict[str, Any],
+               append_values: Optional[Dict[str, List[Any]]] = None) -> Dict[str, Any]:
+        if not set_values and not append_values:
+            return review
+        return self.table.update_item(self._key(review), set_values, append_values)
+
+    def delete(self, review: Dict[str, Any]):
+        self.table.delete_item(self._key(review), condition=Attr("review_id").eq(review["review_id"]))
+
+
+class ReportRepository:
+    """hackybara-report: partition report_id, sort created_at."""
+
+    def __init__(self, table):
+        self.table = table
+
+    def _key(self, report: Dict[str, Any]) -> Dict[str, Any]:
+        return {"report_id": report["report_id"], "created_at": report["created_at"]}
+
+    def get(self, report_id: str) -> Optional[Dict[str, Any]]:
+        items, _ = self.table.query(report_id, limit=1)
+        return items[0] if items else None
+
+    def list_all(self) -> List[Dict[str, Any]]:
+        return list(iter_scan(self.table))
+
+    def put(self, report: Dict[str, Any]):
+        self.table.put_item(report)
+
+    def update_status(self, report: Dict[str, Any], status: str) -> Dict[str, Any]:
+        return self.table.update_item(self._key(report), {"status": status})
+
+    def delete(self, report: Dict[str, Any]):
+        self.table.delete_item(self._key(report))
+
+
+class NotificationRepository:
+    """hackybara-notification: partition user_id, sort timestamp."""
+
+    def __init__(self, table):
+        self.table = table
+
+    def _key(self, notification: Dict[str, Any]) -> Dict[str, Any]:
+        return {"user_id": notification["user_id"], "timestamp": notification["timestamp"]}
+
+    def get(self, user_id: str, notification_id: str) -> Optional[Dict[str, Any]]:
+        return query_first(self.table, user_id, Attr("notification_id").eq(notification_id))
+
+    def list_for_user(self, user_id: str) -> List[Dict[str, Any]]:
+        """Oldest first."""
+        return query_all(self.table, user_id)
+
+    def put(self, notification: Dict[str, Any]):
+        self.table.put_item(notification)
+
+    def mark_all_seen(self, user_id: str) -> List[Dict[str, Any]]:
+        """Mark every unseen notification seen; returns the notifications this call updated."""
+        unseen = query_all(self.table, user_id, Attr("seen").eq(False))
+        return update_all(
+            self.table, unseen, {"seen": True},
+            lambda notification: Attr("notification_id").eq(notification["notification_id"]) & Attr("seen").eq(False)
+        )
+
+    def delete(self, notification: Dict[str, Any]):
+        self.table.delete_item(
+            self._key(notification), condition=Attr("notification_id").eq(notification["notification_id"])
+        )
+
+    def delete_seen(self, user_id: str) -> List[Dict[str, Any]]:
+        """Delete every seen notification in batches; returns what was deleted."""
+        seen = query_all(self.table, user_id, Attr("seen").eq(True))
+        self.table.batch_write(deletes=[self._key(notification) for notification in seen])
+        return seen
+
+
+class Repositories:
+    """The four repositories over one set of tables."""
+
+    def __init__(self, tables: Dict[str, Any]):
+        self.tables = tables
+        self.messages = MessageRepository(tables[MESSAGE_TABLE.name])
+        self.reviews = ReviewRepository(tables[REVIEW_TABLE.name])
+        self.reports = ReportRepository(tables[REPORT_TABLE.name])
+        self.notifications = NotificationRepository(tables[NOTIFICATION_TABLE.name])
+
+
+def create_repositories(backend: str) -> Repositories:
+    if backend == "dynamodb":
+        return Repositories({spec.name: DynamoTable(spec) for spec in TABLES})
+    if backend == "memory":
+        tables = {
+            spec.name: InMemoryTable(spec.name, spec.partition_key, spec.sort_key, DYNAMODB_CONFIG["memory_page_size"])
+            for spec in TABLES
+        }
+        if DYNAMODB_CONFIG["memory_seed_path"]:
+            # Seed file: {"<table name>": [items...]}; numbers load as Decimal like DynamoDB returns them
+            with open(DYNAMODB_CONFIG["memory_seed_path"]) as seed_file:
+                seed = json.load(seed_file, parse_float=Decimal, parse_int=Decimal)
+            for name, items in seed.items():
+                tables[name].load(items)
+        return Repositories(tables)
+    raise ValueError(f"Unknown DynamoDB backend: {backend}")
+
+
+_repositories: Optional[Repositories] = None
+_repositories_lock = threading.Lock()
+
+
+def get_repositories() -> Repositories:
+    """The configured repositories, created on first use."""
+    global _repositories
+    if _repositories is None:
+        with _repositories_lock:
+            if _repositories is None:
+                _repositories = create_repositories(DYNAMODB_CONFIG["backend"])
+    return _repositories
+
+
+def set_repositories(repositories: Repositories):
+    """Replace the repositories, e.g. with seeded in-memory tables in a benchmark harness."""
+    global _repositories
+    with _repositories_lock:
+        _repositories = repositories
+
+
+def _reset_after_fork():
+    # Table handles belong to the parent's DynamoDB resource; core.aws recreates it in the child
+    global _repositories_lock
+    _repositories_lock = threading.Lock()
+    if _repositories is not None:
+        for table in _repositories.tables.values():
+            if isinstance(table, DynamoTable):
+                table._table = None
+                table._lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
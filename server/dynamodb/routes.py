@@ -1,15 +1,14 @@
+import asyncio
 from typing import Optional
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, HTTPException, UploadFile, File, Depends
 from fastapi.responses import HTMLResponse
-from dotenv import load_dotenv
 
-load_dotenv()
-
-import boto3
-from boto3.dynamodb.conditions import Key, Attr
 from botocore.exceptions import ClientError
 from dynamodb import client, utils, models
+from dynamodb.repository import get_repositories
 from core import config
+from core.aws import get_s3_client
+from core.metrics import websocket_metrics
 from s3 import utils as s3Utlis
 from auth.utils import get_current_user
 import os
@@ -150,21 +149,13 @@ html = """
 </html>
 """
 
-# Create client
-s3Client = boto3.client("s3")
-dynamodb = boto3.resource("dynamodb")
-tableMessage = dynamodb.Table("hackybara-message") #type:ignore
-tableReport = dynamodb.Table("hackybara-report") #type:ignore
-tableReview = dynamodb.Table("hackybara-review") #type:ignore
-tableNotification = dynamodb.Table("hackybara-notification") #type:ignore
-
 #TEMPORARY
 @router.post("/message-image/{room_id}")
 async def upload_message_image(room_id: str, image: UploadFile = File(...), current_user: dict = Depends(get_current_user)):
     try:
         processed_image = s3Utlis.create_image_url("messages", room_id, image)
 
-        s3Client.upload_fileobj(
+        get_s3_client().upload_fileobj(
             image.file,
             os.getenv("S3_BUCKET"),
             f"private/{processed_image}",  # Add private/ prefix
@@ -187,6 +178,7 @@ async def websocket_endpoint(websocket: WebSocket, room_id: str, sender_id: str,
     try:
         while True:
             data = await websocket.receive_text()
+            websocket_metrics.message_received()
             print(f"📨 Received WebSocket data: {data}")
             
             try:
@@ -240,21 +232,10 @@ async def get_messages(sender_id: str, receiver_id: str, current_user: dict = De
     room_id = utils.get_room(sender_id, receiver_id)
 
     try:
-        query = tableMessage.query(
-            KeyConditionExpression=Key("room_id").eq(room_id),
-            FilterExpression=Attr("content").exists(),
-            ScanIndexForward=True
-        )
-
-        messages = query.get("Items", [])
-
-        query = tableMessage.query(
-            KeyConditionExpression=Key("room_id").eq(room_id),
-            FilterExpression=Attr("image").exists(),
-            ScanIndexForward=True
-        )
+        # One read of the room, already in created_at order
+        allMessages = get_repositories().messages.list_room(room_id)
 
-        imageMessages = query.get("Items", [])
+        imageMessages = [message for message in allMessages if message.get("image")]
 
         URLs = []
         for message in imageMessages:
@@ -265,9 +246,6 @@ async def get_messages(sender_id: str, receiver_id: str, current_user: dict = De
         for message, url in zip(imageMessages, processedURLs):
             message["image"] = url
 
-        allMessages: list[dict] = messages + imageMessages
-        allMessages.sort(key=lambda x: x["created_at"])
-
         return allMessages
     
     except ClientError as e:
@@ -280,13 +258,11 @@ async def get_messages(sender_id: str, receiver_id: str, current_user: dict = De
 @router.get("/message/{room_id}/{message_id}", response_model=models.message)
 async def get_message(room_id: str, message_id: str, current_user: dict = Depends(get_current_user)):
     try:
-        query = tableMessage.query(
-            KeyConditionExpression=Key("room_id").eq(room_id),
-            FilterExpression=Attr("message_id").eq(message_id)
-        )
+        message = get_repositories().messages.get(room_id, message_id)
+
+        if not message:
+            raise HTTPException(status_code=404, detail="Message not found")
 
-        message = query.get("Items", [])[0]
-        print(f"test:")
         return message
     
     except ClientError as e:
@@ -307,11 +283,9 @@ async def serve_chat_html(sender_id: str, receiver_id: str, current_user: dict =
 @router.get("/contacts/{user_id}")
 async def get_contacts(user_id: str, current_user: dict = Depends(get_current_user)):
     try:
-        response = tableMessage.scan(
-            FilterExpression=Attr("room_id").contains(user_id)
-        )
+        items = get_repositories().messages.list_for_user(user_id)
 
-        sortedItems = sorted(response["Items"], key=lambda x: x["created_at"], reverse=True)
+        sortedItems = sorted(items, key=lambda x: x["created_at"], reverse=True)
 
         seen = set()
 
@@ -348,9 +322,7 @@ async def upload_message(room_id: str, form: models.raw_message, current_user: d
     try:
         processedForm = utils.process_message_form(room_id, form)
 
-        tableMessage.put_item(
-            Item=processedForm.model_dump(exclude_none=True)
-        )
+        get_repositories().messages.put(processedForm.model_dump(exclude_none=True))
 
         return processedForm
     
@@ -365,22 +337,15 @@ async def upload_message(room_id: str, form: models.raw_message, current_user: d
 async def update_message(room_id: str, message_id: str, content: str, current_user: dict = Depends(get_current_user)):
     currentDate = utils.get_current_date()
     try:
-        query = tableMessage.query(
-            KeyConditionExpression=Key("room_id").eq(room_id),
-            FilterExpression=Attr("message_id").eq(message_id)
-        )
+        messages = get_repositories().messages
+        message = messages.get(room_id, message_id)
 
-        message = query.get("Items", [])[0]
+        if not message:
+            raise HTTPException(status_code=404, detail="Message not found")
 
-        response = tableMessage.update_item(
-            Key={"room_id": room_id, "created_at": message["created_at"]},
-            ConditionExpression=Attr("message_id").eq(message_id),
-            UpdateExpression="set content=:content, updated_at=:updated_at",
-            ExpressionAttributeValues={":content": content, ":updated_at": currentDate},
-            ReturnValues="ALL_NEW"
-        )
+        updatedMessage = messages.update_content(message, content, currentDate)
 
-        return models.message(**response["Attributes"])        
+        return models.message(**updatedMessage)
     except ClientError as e:
         raise HTTPException(status_code=e.response["ResponseMetadata"]["HTTPStatusCode"], detail=f"Failed to fetch in hackybara-message: {e.response["Error"]["Message"]}")
     except HTTPException:
@@ -391,30 +356,9 @@ async def update_message(room_id: str, message_id: str, content: str, current_us
 @router.put("/messages-status-updates/{sender_id}/{receiver_id}")
 async def update_status_messages(sender_id: str, receiver_id: str, current_user: dict = Depends(get_current_user)):
     room_id = utils.get_room(sender_id, receiver_id)
-    updatedMessages = []
 
     try:
-        query = tableMessage.query(
-            KeyConditionExpression=Key("room_id").eq(room_id),
-            FilterExpression=Attr("receiver_id").eq(sender_id) & Attr("read_status").eq(False)
-        )
-
-        unreadMessages = query.get("Items", [])
-
-        keys = [{"room_id": room_id, "created_at": unreadMessage["created_at"]} for unreadMessage in unreadMessages]
-        messageIDs = [unreadMessage["message_id"] for unreadMessage in unreadMessages]
-
-
-        for key, messageID in zip(keys, messageIDs):
-            response = tableMessage.update_item(
-                Key=key,
-                ConditionExpression=Attr("message_id").eq(messageID),
-                UpdateExpression="set read_status=:read_status",
-                ExpressionAttributeValues={":read_status": True},
-                ReturnValues="ALL_NEW"
-            )
-
-            updatedMessages.append(response["Attributes"])
+        updatedMessages = await asyncio.to_thread(get_repositories().messages.mark_read, room_id, sender_id)
 
         return updatedMessages
     
@@ -431,21 +375,15 @@ async def delete_message(room_id: str, message_id: str, current_user: dict = Dep
     currentDate = utils.get_current_date()
     
     try:
-        query = tableMessage.query(
-            KeyConditionExpression=Key("room_id").eq(room_id),
-            FilterExpression=Attr("message_id").eq(message_id)
-        )
+        messages = get_repositories().messages
+        message = messages.get(room_id, message_id)
 
-        message = query.get("Items", [])[0]
+        if not message:
+            raise HTTPException(status_code=404, detail="Message not found")
 
-        response = tableMessage.update_item(
-            Key={"room_id": room_id, "created_at": message["created_at"]},
-            UpdateExpression="set content=:content, updated_at=:updated_at",
-            ExpressionAttributeValues={":content": "Unsent a message", ":updated_at": currentDate},
-            ReturnValues="ALL_NEW"
-        )
+        updatedMessage = messages.update_content(message, "Unsent a message", currentDate)
 
-        return models.message(**response["Attributes"])        
+        return models.message(**updatedMessage)
     except ClientError as e:
         raise HTTPException(status_code=e.response["ResponseMetadata"]["HTTPStatusCode"], detail=f"Failed to fetch in hackybara-message: {e.response["Error"]["Message"]}")
     except HTTPException:
@@ -457,18 +395,15 @@ async def delete_message(room_id: str, message_id: str, current_user: dict = Dep
 async def delete_full_message(room_id: str, message_id: str, current_user: dict = Depends(get_current_user)):
     
     try:
-        query = tableMessage.query(
-            KeyConditionExpression=Key("room_id").eq(room_id),
-            FilterExpression=Attr("message_id").eq(message_id)
-        )
+        messages = get_repositories().messages
+        message = messages.get(room_id, message_id)
 
-        message = query.get("Items", [])[0]
+        if not message:
+            raise HTTPException(status_code=404, detail="Message not found")
 
-        tableMessage.delete_item(
-            Key={"room_id": room_id, "created_at": message["created_at"]},
-        )
+        messages.delete(message)
 
-        return models.message(**message)        
+        return models.message(**message)
     except ClientError as e:
         raise HTTPException(status_code=e.response["ResponseMetadata"]["HTTPStatusCode"], detail=f"Failed to fetch in hackybara-message: {e.response["Error"]["Message"]}")
     except HTTPException:
@@ -481,12 +416,10 @@ async def delete_full_message(room_id: str, message_id: str, current_user: dict
 @router.get("/review/{reviewee_id}/{review_id}", response_model=models.review)
 async def get_review(reviewee_id: str, review_id: str, current_user: dict = Depends(get_current_user)):
     try:
-        query = tableReview.query(
-            KeyConditionExpression=Key("reviewee_id").eq(reviewee_id),
-            FilterExpression=Attr("review_id").eq(review_id)
-        )
+        review = get_repositories().reviews.get(reviewee_id, review_id)
 
-        review = query.get("Items", [])[0]
+        if not review:
+            raise HTTPException(status_code=404, detail="Review not found")
 
         images = review.get("images", [])
         if images:
@@ -505,17 +438,9 @@ async def get_review(reviewee_id: str, review_id: str, current_user: dict = Depe
 @router.get("/product-reviewee-reviewer/{reviewee_id}/{reviewer_id}/{product_id}", response_model=Optional[models.review])
 async def get_product_reviewee_reviewer(reviewee_id: str,reviewer_id: str, product_id: str, current_user: dict = Depends(get_current_user)):
     try:
-        query = tableReview.query(
-            KeyConditionExpression=Key('reviewee_id').eq(reviewee_id),
-            FilterExpression=Attr("reviewer_id").eq(reviewer_id) & Attr("product_id").eq(product_id)
-        )
+        review = get_repositories().reviews.get_by_reviewer(reviewee_id, reviewer_id, product_id)
 
-        review = query.get("Items", [])
-
-        if not review:
-            return None
-        
-        return review[0]
+        return review
     
     except ClientError as e:
         raise HTTPException(status_code=e.response["ResponseMetadata"]["HTTPStatusCode"], detail=f"Failed to fetch review of reviewer to specific product in hackybara-review: {e.response["Error"]["Message"]}")
@@ -527,12 +452,7 @@ async def get_product_reviewee_reviewer(reviewee_id: str,reviewer_id: str, produ
 @router.get("/product-review/{reviewee_id}/{product_id}")
 async def get_product_review(reviewee_id: str, product_id: str, current_user: dict = Depends(get_current_user)):
     try:
-        query = tableReview.query(
-            KeyConditionExpression=Key("reviewee_id").eq(reviewee_id),
-            FilterExpression=Attr("product_id").eq(product_id)
-        )
-
-        productReview = query.get("Items", [])
+        productReview = get_repositories().reviews.list_for_product(reviewee_id, product_id)
 
         imageURLs = []
         imageCountPerReview = []
@@ -562,12 +482,7 @@ async def get_product_review(reviewee_id: str, product_id: str, current_user: di
 @router.get("/seller-review/{reviewee_id}")
 async def get_seller_review(reviewee_id: str, current_user: dict = Depends(get_current_user)):
     try:
-        query = tableReview.query(
-            KeyConditionExpression=Key("reviewee_id").eq(reviewee_id),
-            FilterExpression=Attr("product_id").not_exists()
-        )
-
-        sellerReview = query.get("Items", [])
+        sellerReview = get_repositories().reviews.list_for_seller(reviewee_id)
 
         imageURLs = []
         imageCountPerReview = []
@@ -599,10 +514,8 @@ async def post_review(form: models.raw_review, current_user: dict = Depends(get_
     try:
         processedForm = utils.process_review_form(form)
 
-        # Post review in dynamodb hackybara-activity-feed
-        tableReview.put_item(
-             Item=processedForm.model_dump(exclude_none=True)
-        )
+        # Post review in dynamodb hackybara-review
+        get_repositories().reviews.put(processedForm.model_dump(exclude_none=True))
 
         return processedForm
     except ClientError as e:
@@ -616,48 +529,29 @@ async def post_review(form: models.raw_review, current_user: dict = Depends(get_
 @router.put("/review/{reviewee_id}/{review_id}", response_model=models.review)
 async def update_review(reviewee_id: str, review_id: str, form: models.update_review, current_user: dict = Depends(get_current_user)):
     try:
-        query = tableReview.query(
-            KeyConditionExpression=Key("reviewee_id").eq(reviewee_id),
-            FilterExpression=Attr("review_id").eq(review_id)
-        )
-        
-        review = query.get("Items", [])[0]
+        reviews = get_repositories().reviews
+        review = reviews.get(reviewee_id, review_id)
+
+        if not review:
+            raise HTTPException(status_code=404, detail="Review not found")
 
         # Review the submited form
-        expressionValues = {}
-        expressionName = {}
-        updateParts = []
+        setValues = {}
+        appendValues = {}
 
         if form.rating is not None:
-            updateParts.append("rating=:rating")
-            expressionValues[":rating"] = form.rating
+            setValues["rating"] = form.rating
         if form.description is not None:
-            updateParts.append("description=:description")
-            expressionValues[":description"] = form.description
+            setValues["description"] = form.description
         if form.images is not None:
-            updateParts.append("images=:images")            
-            expressionValues[":images"] = form.images
+            setValues["images"] = form.images
         if form.reported is not None:
-            updateParts.append("reported=:reported")            
-            expressionValues[":reported"] = form.reported
+            setValues["reported"] = form.reported
         if form.voted_as_helpful is not None:
-            updateParts.append("#n = list_append(if_not_exists(#n, :empty_list), :val)")
-            expressionName["#n"] = "voted_as_helpful"
-            expressionValues[":empty_list"] = []
-            expressionValues[":val"] = [form.voted_as_helpful]
-
-        updateExpression = "SET " + ", ".join(updateParts) if updateParts else None
+            appendValues["voted_as_helpful"] = [form.voted_as_helpful]
 
         # Update matched review id in dynamodb review
-        response = tableReview.update_item(
-            Key={"reviewee_id": reviewee_id, "created_at": review["created_at"]},
-            UpdateExpression=updateExpression,
-            ExpressionAttributeNames=expressionName,
-            ExpressionAttributeValues=expressionValues,
-            ReturnValues="ALL_NEW"
-        )
-
-        return response["Attributes"]
+        return reviews.update(review, setValues, appendValues)
     except ClientError as e:
         raise HTTPException(status_code=e.response["ResponseMetadata"]["HTTPStatusCode"], detail=f"Failed to update in hackybara-review: {e.response["Error"]["Message"]}")
     except HTTPException:
@@ -668,24 +562,17 @@ async def update_review(reviewee_id: str, review_id: str, form: models.update_re
 @router.delete("/review-helpful/{reviewee_id}/{review_id}/{user_id}", response_model=models.review)
 async def delete_user_helpful_vote(reviewee_id: str, review_id: str, user_id: str):
     try:
-        query = tableReview.query(
-            KeyConditionExpression=Key("reviewee_id").eq(reviewee_id),
-            FilterExpression=Attr("review_id").eq(review_id),
-        )
-        
-        review = query.get("Items", [])[0]
-        voters = review.get("voted_as_helpful", [])
+        reviews = get_repositories().reviews
+        review = reviews.get(reviewee_id, review_id)
 
-        updatedVoters = [voter for voter in voters if voter != user_id]
+        if not review:
+            raise HTTPException(status_code=404, detail="Review not found")
 
-        response = tableReview.update_item(
-            Key={"reviewee_id": reviewee_id, "created_at": review["created_at"]},
-            UpdateExpression="SET voted_as_helpful=:voted_as_helpful",
-            ExpressionAttributeValues={":voted_as_helpful": updatedVoters},
-            ReturnValues="ALL_NEW"
-        )
+        voters = review.get("voted_as_helpful", []) or []
+
+        updatedVoters = [voter for voter in voters if voter != user_id]
 
-        return response["Attributes"]
+        return reviews.update(review, {"voted_as_helpful": updatedVoters})
     
     except ClientError as e:
         raise HTTPException(status_code=e.response["ResponseMetadata"]["HTTPStatusCode"], detail=f"Failed to delete helpful vote review in hackybara-review: {e.response["Error"]["Message"]}")
@@ -698,17 +585,13 @@ async def delete_user_helpful_vote(reviewee_id: str, review_id: str, user_id: st
 @router.delete("/review/{reviewee_id}/{review_id}", response_model=models.review)
 async def delete_review(reviewee_id: str, review_id: str, current_user: dict = Depends(get_current_user)):
     try:
-        query = tableReview.query(
-            KeyConditionExpression=Key("reviewee_id").eq(reviewee_id),
-            FilterExpression=Attr("review_id").eq(review_id)
-        )
-    
-        review = query.get("Items", [])[0]
-        
-        tableReview.delete_item(
-            Key={"reviewee_id": reviewee_id, "created_at": review["created_at"]},
-            ConditionExpression=Attr("review_id").eq(review_id)
-        )
+        reviews = get_repositories().reviews
+        review = reviews.get(reviewee_id, review_id)
+
+        if not review:
+            raise HTTPException(status_code=404, detail="Review not found")
+
+        reviews.delete(review)
 
         return review
     
@@ -722,23 +605,15 @@ async def delete_review(reviewee_id: str, review_id: str, current_user: dict = D
 @router.delete("/review-image/{reviewee_id}/{review_id}", response_model=models.review)
 async def delete_image_review(reviewee_id: str, review_id: str, image: str, current_user: dict = Depends(get_current_user)):
     try:
-        query = tableReview.query(
-            KeyConditionExpression=Key("reviewee_id").eq(reviewee_id),
-            FilterExpression=Attr("review_id").eq(review_id)
-        )
-
-        review = query.get("Items", [])[0]
+        reviews = get_repositories().reviews
+        review = reviews.get(reviewee_id, review_id)
 
-        updatedImages = [reviewImage for reviewImage in review["images"] if reviewImage != image]
+        if not review:
+            raise HTTPException(status_code=404, detail="Review not found")
 
-        response = tableReview.update_item(
-            Key={"reviewee_id": reviewee_id, "created_at": review["created_at"]},
-            UpdateExpression="set images=:image",
-            ExpressionAttributeValues={":image": updatedImages},
-            ReturnValues="ALL_NEW"
-        )
+        updatedImages = [reviewImage for reviewImage in review.get("images") or [] if reviewImage != image]
 
-        return response.get("Attributes", {})
+        return reviews.update(review, {"images": updatedImages})
     
     except ClientError as e:
         raise HTTPException(status_code=e.response["ResponseMetadata"]["HTTPStatusCode"], detail=f"Failed to delete image review in hackybara-review: {e.response["Error"]["Message"]}")
@@ -750,23 +625,15 @@ async def delete_image_review(reviewee_id: str, review_id: str, image: str, curr
 @router.delete("/review-images/{reviewee_id}/{review_id}")
 async def delete_images_review(reviewee_id: str, review_id: str, images: list[str], current_user: dict = Depends(get_current_user)):
     try:
-        query = tableReview.query(
-            KeyConditionExpression=Key("reviewee_id").eq(reviewee_id),
-            FilterExpression=Attr("review_id").eq(review_id)
-        )
-
-        review = query.get("Items", [])[0]
+        reviews = get_repositories().reviews
+        review = reviews.get(reviewee_id, review_id)
 
-        updatedImages = [reviewImage for reviewImage in review["images"] if reviewImage not in images]
+        if not review:
+            raise HTTPException(status_code=404, detail="Review not found")
 
-        response = tableReview.update_item(
-            Key={"reviewee_id": reviewee_id, "created_at": review["created_at"]},
-            UpdateExpression="set images=:image",
-            ExpressionAttributeValues={":image": updatedImages},
-            ReturnValues="ALL_NEW"
-        )
+        updatedImages = [reviewImage for reviewImage in review.get("images") or [] if reviewImage not in images]
 
-        return response.get("Attributes", {})
+        return reviews.update(review, {"images": updatedImages})
     
     except ClientError as e:
         raise HTTPException(status_code=e.response["ResponseMetadata"]["HTTPStatusCode"], detail=f"Failed to delete images review in hackybara-review: {e.response["Error"]["Message"]}")
@@ -780,11 +647,10 @@ async def delete_images_review(reviewee_id: str, review_id: str, images: list[st
 @router.get("/report/{report_id}", response_model=models.report)
 async def get_report(report_id: str, current_user: dict = Depends(get_current_user)):
     try:
-        query = tableReport.query(
-            KeyConditionExpression=Key("report_id").eq(report_id)
-        )
+        report = get_repositories().reports.get(report_id)
 
-        report = query.get("Items", [])[0]
+        if not report:
+            raise HTTPException(status_code=404, detail="Report not found")
 
         return report
     
@@ -798,15 +664,7 @@ async def get_report(report_id: str, current_user: dict = Depends(get_current_us
 @router.get("/reports")
 async def get_all_report(current_user: dict = Depends(get_current_user)):
     try:
-        items = []
-        response = tableReport.scan()
-        items.extend(response.get("Items", []))
-
-        while "LastEvaluatedKey" in response:
-            response = tableReport.scan(
-                ExclusiveStartKey=response["LastEvaluatedKey"]
-            )
-            items.extend(response.get("Items", []))
+        items = get_repositories().reports.list_all()
 
         return items
     
@@ -822,9 +680,7 @@ async def post_report(form: models.raw_report, current_user: dict = Depends(get_
     try:
         processedForm = utils.process_report_form(form)
 
-        tableReport.put_item(
-            Item=processedForm.model_dump()
-        )
+        get_repositories().reports.put(processedForm.model_dump())
 
         return processedForm
     
@@ -838,20 +694,13 @@ async def post_report(form: models.raw_report, current_user: dict = Depends(get_
 @router.put("/report/{report_id}", response_model=models.report)
 async def update_report(report_id: str, status: str, current_user: dict = Depends(get_current_user)):
     try:
-        query = tableReport.query(
-            KeyConditionExpression=Key("report_id").eq(report_id)
-        )
-
-        report = query.get("Items", [])[0]
+        reports = get_repositories().reports
+        report = reports.get(report_id)
 
-        response = tableReport.update_item(
-            Key={"report_id": report_id, "created_at": report["created_at"]},
-            UpdateExpression="set status=:status",
-            ExpressionAttributeValues={":status": status},
-            ReturnValues="ALL_NEW"
-        )
+        if not report:
+            raise HTTPException(status_code=404, detail="Report not found")
 
-        return response
+        return reports.update_status(report, status)
     
     except ClientError as e:
         raise HTTPException(status_code=e.response["ResponseMetadata"]["HTTPStatusCode"], detail=f"Failed to update report in hackybara-report: {e.response["Error"]["Message"]}")
@@ -863,20 +712,18 @@ async def update_report(report_id: str, status: str, current_user: dict = Depend
 @router.delete("/report/{report_id}", response_model=models.report)
 async def delete_report(report_id: str, current_user: dict = Depends(get_current_user)):
     try:
-        query = tableReport.query(
-            KeyConditionExpression=Key("report_id").eq(report_id)
-        )
+        reports = get_repositories().reports
+        report = reports.get(report_id)
 
-        report = query.get("Items", [])[0]
+        if not report:
+            raise HTTPException(status_code=404, detail="Report not found")
 
-        tableReport.delete_item(
-            Key={"report_id": report_id, "created_at": report["created_at"]}
-        )
+        reports.delete(report)
 
         return report
     
     except ClientError as e:
-        raise HTTPException(status_code=e.response["RespnseMetadata"]["HTTPStatusCode"], detail=f"Failed to delete report in hackybara-report: {e.response["Error"]["Message"]}")
+        raise HTTPException(status_code=e.response["ResponseMetadata"]["HTTPStatusCode"], detail=f"Failed to delete report in hackybara-report: {e.response["Error"]["Message"]}")
     except HTTPException:
         raise
     except Exception as e:
@@ -886,12 +733,10 @@ async def delete_report(report_id: str, current_user: dict = Depends(get_current
 @router.get("/notification/{user_id}/{notification_id}", response_model=models.notification)
 async def get_notification(user_id: str, notification_id: str, current_user: dict = Depends(get_current_user)):
     try:
-        query = tableNotification.query(
-            KeyConditionExpression=Key("user_id").eq(user_id),
-            FilterExpression=Attr("notification_id").eq(notification_id)
-        )
+        notification = get_repositories().notifications.get(user_id, notification_id)
 
-        notification = query.get("Items", [])[0]
+        if not notification:
+            raise HTTPException(status_code=404, detail="Notification not found")
 
         return notification
     
@@ -905,12 +750,7 @@ async def get_notification(user_id: str, notification_id: str, current_user: dic
 @router.get("/notifications/{user_id}")
 async def get_all_user_notification(user_id: str, current_user: dict = Depends(get_current_user)):
     try:
-        query = tableNotification.query(
-            KeyConditionExpression=Key("user_id").eq(user_id),
-            ScanIndexForward=True
-        )
-
-        notifications = query.get("Items", [])
+        notifications = get_repositories().notifications.list_for_user(user_id)
 
         return notifications
     
@@ -926,9 +766,7 @@ async def post_notification(form: models.raw_notification, current_user: dict =
     try:
         processedForm = utils.process_notification_form(form)
 
-        tableNotification.put_item(
-            Item=processedForm.model_dump()
-        )
+        get_repositories().notifications.put(processedForm.model_dump())
 
         return processedForm
     
@@ -942,28 +780,7 @@ async def post_notification(form: models.raw_notification, current_user: dict =
 @router.put("/notification-seen-update/{user_id}")
 async def notification_seen_update(user_id: str, current_user: dict = Depends(get_current_user)):
     try:
-        items = []
-
-        query = tableNotification.query(
-            KeyConditionExpression=Key("user_id").eq(user_id),
-            FilterExpression=Attr("seen").eq(False)
-        )
-
-        notifications = query.get("Items", [])
-
-        keys = [
-            {"user_id": notification["user_id"], "timestamp": notification["timestamp"]} for notification in notifications
-        ]
-
-        for key in keys:
-            response = tableNotification.update_item(
-                Key=key,
-                UpdateExpression="set seen=:seen",
-                ExpressionAttributeValues={":seen": True},
-                ReturnValues="ALL_NEW"
-            )
-
-            items.append(response["Attributes"])
+        items = await asyncio.to_thread(get_repositories().notifications.mark_all_seen, user_id)
 
         return items
     
@@ -977,17 +794,13 @@ async def notification_seen_update(user_id: str, current_user: dict = Depends(ge
 @router.delete("/notification/{user_id}/{notification_id}", response_model=models.notification)
 async def delete_notification(user_id: str, notification_id: str, current_user: dict = Depends(get_current_user)):
     try:
-        query = tableNotification.query(
-            KeyConditionExpression=Key("user_id").eq(user_id),
-            FilterExpression=Attr("notification_id").eq(notification_id)
-        )
+        notifications = get_repositories().notifications
+        notification = notifications.get(user_id, notification_id)
 
-        notification = query.get("Items", [])[0]
+        if not notification:
+            raise HTTPException(status_code=404, detail="Notification not found")
 
-        tableNotification.delete_item(
-            Key={"user_id": user_id, "timestamp": notification["timestamp"]},
-            ConditionExpression=Attr("notification_id").eq(notification_id)
-        )
+        notifications.delete(notification)
 
         return notification
 
@@ -1001,27 +814,12 @@ async def delete_notification(user_id: str, notification_id: str, current_user:
 @router.delete("/notifications/{user_id}")
 async def delete_all_read_notification(user_id: str, current_user: dict = Depends(get_current_user)):
     try:
-        query = tableNotification.query(
-            KeyConditionExpression=Key("user_id").eq(user_id),
-            FilterExpression=Attr("seen").eq(True)
-        )
-
-        notifications = query.get("Items", [])
-
-        keys = [
-            {"user_id": notification["user_id"], "timestamp": notification["timestamp"]} for notification in notifications
-        ]
-
-        with tableNotification.batch_writer() as batch:
-            for key in keys:
-                batch.delete_item(
-                    Key=key
-                )
+        notifications = await asyncio.to_thread(get_repositories().notifications.delete_seen, user_id)
 
         return notifications
     
     except ClientError as e:
-        raise HTTPException(status_code=e.response["ProcessMetadata"]["HTTPStatusCode"], detail=f"Failed to delete all read notification in hackybara-notification: {e.response["Error"]["Message"]}")
+        raise HTTPException(status_code=e.response["ResponseMetadata"]["HTTPStatusCode"], detail=f"Failed to delete all read notification in hackybara-notification: {e.response["Error"]["Message"]}")
     except HTTPException:
         raise
     except Exception as e:
@@ -1,31 +1,82 @@
+import time
+_import_started_at = time.perf_counter()
+
 from dotenv import load_dotenv
 load_dotenv()
 
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from supabase_client.routes import router as supabase_router
-from dynamodb.routes import router as dynamodb_router
+from dynamodb.routes import router as dynamodb_router, manager as chat_manager
 from auth.routes import router as auth_router
 from s3.routes import router as s3_router
-from core.utils import log_request_performance
+from core.utils import log_request_performance, get_performance_stats
+from core.metrics import request_metrics, render_prometheus, start_snapshot_writer, stop_snapshot_writer
+from core.aws import get_pool_metrics
+from core.startup import startup_state, record_import_time, start_warm_up
+from core.config import SERVER_CONFIG, BACKEND_LEDGER_CONFIG, METRICS_CONFIG
+from core.ledger import start_request_ledger, end_request_ledger, check_round_trip_budget, install_postgrest_hooks
+from supabase_client.database import popularity, postgres
 import os
-import time
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm clients, pools and indexes before taking traffic
+    warm_up_task = await start_warm_up()
+    # Flush buffered listing popularity counters in the background
+    popularity.start_popularity_flusher()
+    # Share chat broadcasts with the other workers (set by serve.py)
+    if SERVER_CONFIG["chat_relay_dir"]:
+        chat_manager.start_relay(SERVER_CONFIG["chat_relay_dir"])
+    # Publish this worker's metrics for /metrics to merge (set by serve.py)
+    if METRICS_CONFIG["dir"]:
+        start_snapshot_writer(METRICS_CONFIG["dir"])
+    yield
+    if warm_up_task is not None and not warm_up_task.done():
+        warm_up_task.cancel()
+    await chat_manager.drain(SERVER_CONFIG["websocket_drain_seconds"])
+    chat_manager.stop_relay()
+    await popularity.stop_popularity_flusher()
+    await postgres.close_pool()
+    if METRICS_CONFIG["dir"]:
+        await stop_snapshot_writer(METRICS_CONFIG["dir"])
+
+app = FastAPI(lifespan=lifespan)
+
+# Count PostgREST round trips per request (boto3 clients are hooked in core/aws.py)
+if BACKEND_LEDGER_CONFIG["enabled"]:
+    install_postgrest_hooks()
 
 # Performance monitoring middleware
 @app.middleware("http")
 async def performance_middleware(request: Request, call_next):
     start_time = time.time()
-    response = await call_next(request)
+    # Counted under the route template so path IDs do not create new series
+    route = request_metrics.resolve_route(request.app, request.scope)
+    route_stats = request_metrics.started(request.method, route)
+    # Backend calls made while handling this request (see core/ledger.py)
+    ledger, ledger_token = start_request_ledger()
+    try:
+        response = await call_next(request)
+    except Exception:
+        request_metrics.finished(route_stats, 500, time.time() - start_time)
+        raise
+    finally:
+        end_request_ledger(ledger_token)
     response_time = time.time() - start_time
+    request_metrics.finished(route_stats, response.status_code, response_time)
     
-    # Log slow requests
+    # Log slow requests and requests over the round-trip budget
     log_request_performance(request, response_time)
+    check_round_trip_budget(ledger, request.method, route, BACKEND_LEDGER_CONFIG["round_trip_budget"])
     
-    # Add performance header
+    # Add performance headers
     response.headers["X-Response-Time"] = str(response_time)
+    if BACKEND_LEDGER_CONFIG["server_timing"]:
+        response.headers["Server-Timing"] = ledger.server_timing(response_time)
     
     return response
 
@@ -57,7 +108,31 @@ app.include_router(dynamodb_router, prefix="/dynamodb", tags=["DyanamoDB"])
 app.include_router(auth_router, prefix="/auth", tags=["Authentication"])
 app.include_router(s3_router, prefix="/s3", tags=["S3 File Uploads"])
 
-# Health check endpoint
+# Health check endpoint (503 until warm-up has finished)
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy", "timestamp": time.time()}
+    if not startup_state.ready:
+        return JSONResponse(status_code=503, content={"status": "warming_up", "pid": os.getpid(), "timestamp": time.time()})
+    return {"status": "healthy", "pid": os.getpid(), "timestamp": time.time()}
+
+# Import and warm-up timings of this worker
+@app.get("/health/startup")
+async def startup_report():
+    return {"pid": os.getpid(), **startup_state.snapshot()}
+
+# AWS connection pool usage (in-flight requests vs pool size per shared client)
+@app.get("/health/aws-pools")
+async def aws_pool_metrics():
+    return {"pools": get_pool_metrics(), "timestamp": time.time()}
+
+# Prometheus metrics of all workers (per-route counts, in-flight, latency histograms, chat WebSockets)
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
+
+# Per-route request counts and p50/p95/p99 latency as JSON
+@app.get("/health/performance")
+async def performance_stats():
+    return {"pid": os.getpid(), **get_performance_stats()}
+
+record_import_time(_import_started_at)
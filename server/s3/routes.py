@@ -1,21 +1,17 @@
 from fastapi import APIRouter, HTTPException, UploadFile, File, Depends
-import boto3
 from s3 import utils
 from botocore.exceptions import ClientError
-from dotenv import load_dotenv
 import os
 
 from urllib.parse import urlparse
 from auth.utils import get_current_user
 from core.utils import create_standardized_response
 from core.config import generate_private_url, convert_s3_key_to_public_url
+from core.aws import get_s3_client
 from supabase_client.database.users import create_user_verification_documents, update_user_verification_documents, get_user_verification_status
 from supabase_client.auth_client import get_authenticated_supabase_client
 
-load_dotenv()
-
 router = APIRouter()
-s3_client = boto3.client("s3")
 
 @router.post("/review/{reviewee_id}")
 async def upload_review_images(reviewee_id: str, images: list[UploadFile] = File(...), current_user: dict = Depends(get_current_user)):
@@ -23,7 +19,7 @@ async def upload_review_images(reviewee_id: str, images: list[UploadFile] = File
         processed_images = [utils.create_image_url("reviews", reviewee_id, image) for image in images]
 
         for image, file in zip(processed_images, images):
-            s3_client.upload_fileobj(
+            get_s3_client().upload_fileobj(
                 file.file,
                 os.getenv("S3_BUCKET"),
                 f"public/{image}",  # Add public/ prefix
@@ -44,7 +40,7 @@ async def upload_message_image(room_id: str, image: UploadFile = File(...), curr
     try:
         processed_image = utils.create_image_url("messages", room_id, image)
 
-        s3_client.upload_fileobj(
+        get_s3_client().upload_fileobj(
             image.file,
             os.getenv("S3_BUCKET"),
             f"private/{processed_image}",  # Add private/ prefix
@@ -520,7 +516,7 @@ async def delete_message_image(image: str, current_user: dict = Depends(get_curr
         parsedImage = urlparse(image)
         key = parsedImage.path.lstrip("/")
 
-        s3_client.delete_object(
+        get_s3_client().delete_object(
             Bucket=os.getenv("S3_BUCKET"),
             Key=key  # Add private/ prefix if not already present
         )
@@ -540,7 +536,7 @@ async def delete_review_images(images: list[str], current_user: dict = Depends(g
         parsedImages = [urlparse(image) for image in images]
         keys = [parsedImage.path.lstrip('/') for parsedImage in parsedImages]  # Add public/ prefix
     
-        s3_client.delete_objects(
+        get_s3_client().delete_objects(
             Bucket=os.getenv("S3_BUCKET"), 
             Delete={"Objects": [{"Key": key} for key in keys]}
         )
@@ -560,7 +556,7 @@ async def delete_review_image(image: str, current_user: dict = Depends(get_curre
         parsedImage = urlparse(image)
         key = parsedImage.path.lstrip("/")
 
-        s3_client.delete_object(
+        get_s3_client().delete_object(
             Bucket=os.getenv("S3_BUCKET"),
             Key=key  # Add public/ prefix
         )
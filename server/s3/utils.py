@@ -1,13 +1,7 @@
 from fastapi import UploadFile, File, HTTPException
 import uuid
-import boto3
+from core.aws import get_s3_client
 import os
-from dotenv import load_dotenv
-
-load_dotenv()
-
-# Create S3 client
-s3_client = boto3.client("s3")
 
 def create_image_url(types: str, id: str, file: UploadFile = File(...)) -> str:
     """Create a unique image URL path for S3 storage"""
@@ -37,7 +31,7 @@ async def upload_file_to_s3(
         if not bucket_name:
             raise ValueError("S3 bucket name not configured")
         
-        s3_client.put_object(Bucket=bucket_name, Key=s3_key, Body=file_content)
+        get_s3_client().put_object(Bucket=bucket_name, Key=s3_key, Body=file_content)
         
         if is_public:
             return f"https://{bucket_name}.s3.{os.getenv('AWS_REGION')}.amazonaws.com/{s3_key}"
@@ -55,7 +49,7 @@ def generate_presigned_url(s3_key: str, expiration: int = 3600) -> str:
         if not bucket_name:
             raise ValueError("S3 bucket name not configured")
         
-        url = s3_client.generate_presigned_url(
+        url = get_s3_client().generate_presigned_url(
             'get_object',
             Params={'Bucket': bucket_name, 'Key': s3_key},
             ExpiresIn=expiration
@@ -81,7 +75,7 @@ async def delete_file_from_s3(s3_key: str) -> bool:
         if not bucket_name:
             raise ValueError("S3 bucket name not configured")
         
-        s3_client.delete_object(Bucket=bucket_name, Key=s3_key)
+        get_s3_client().delete_object(Bucket=bucket_name, Key=s3_key)
         print(f"Successfully deleted S3 file: {s3_key}")
         return True
         
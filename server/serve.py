@@ -0,0 +1,99 @@
+"""
+Production entrypoint: python serve.py
+
+Runs main:app on uvicorn with uvloop and httptools (when installed) across
+WEB_CONCURRENCY worker processes, defaulting to the CPUs this container may
+use. Workers share the listening socket; each one finishes its warm-up
+(see core/startup.py) before it starts accepting, so only ready workers get
+connections. Chat broadcasts are relayed between workers through
+CHAT_RELAY_DIR, /metrics merges every worker's snapshot from METRICS_DIR,
+idempotency keys default to the shared local_kv store, and on shutdown open WebSockets are closed with 1012 so clients reconnect
+instead of being dropped.
+"""
+
+import importlib.util
+import math
+import os
+import shutil
+import socket
+import tempfile
+from typing import List, Optional
+import uvicorn
+from uvicorn.supervisors import Multiprocess
+from core.config import SERVER_CONFIG, IDEMPOTENCY_CONFIG
+
+
+class DrainingServer(uvicorn.Server):
+    """Stops accepting, drains chat WebSockets, then runs uvicorn's usual shutdown."""
+
+    async def shutdown(self, sockets: Optional[List[socket.socket]] = None) -> None:
+        for server in self.servers:
+            server.close()
+        from dynamodb.routes import manager
+        await manager.drain(SERVER_CONFIG["websocket_drain_seconds"])
+        await super().shutdown(sockets=sockets)
+
+
+def available_cpus() -> int:
+    """CPUs this process may run on, capped by a cgroup v2 CPU quota when one is set."""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:  # Not available on macOS
+        cpus = os.cpu_count() or 1
+
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as cpu_max:
+            quota, period = cpu_max.read().split()
+        if quota != "max":
+            cpus = min(cpus, max(1, math.ceil(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return cpus
+
+
+def main():
+    workers = SERVER_CONFIG["workers"] or available_cpus()
+
+    # Directories shared by the workers for this run; spawned workers read them from the environment
+    shared_dirs = []
+    if workers > 1:
+        for variable, prefix in (("CHAT_RELAY_DIR", "polymart-chat-"), ("METRICS_DIR", "polymart-metrics-")):
+            if not os.environ.get(variable):
+                shared_dirs.append(tempfile.mkdtemp(prefix=prefix))
+                os.environ[variable] = shared_dirs[-1]
+
+    if workers > 1:
+        # A per-process store would let a retry routed to another worker run the operation again
+        if "IDEMPOTENCY_BACKEND" not in os.environ:
+            os.environ["IDEMPOTENCY_BACKEND"] = "local_kv"
+        elif IDEMPOTENCY_CONFIG["backend"] == "memory":
+            print(f"Warning: IDEMPOTENCY_BACKEND=memory keeps idempotency keys per worker; "
+                  f"retries reaching another of the {workers} workers are not deduplicated")
+
+    config = uvicorn.Config(
+        "main:app",
+        host=SERVER_CONFIG["host"],
+        port=SERVER_CONFIG["port"],
+        workers=workers,
+        loop="uvloop" if importlib.util.find_spec("uvloop") else "asyncio",
+        http="httptools" if importlib.util.find_spec("httptools") else "h11",
+        timeout_keep_alive=SERVER_CONFIG["keep_alive_seconds"],
+        timeout_graceful_shutdown=SERVER_CONFIG["graceful_shutdown_seconds"],
+        proxy_headers=True
+    )
+    server = DrainingServer(config)
+
+    print(f"Starting {workers} worker(s) on {config.host}:{config.port} (loop={config.loop}, http={config.http})")
+    try:
+        if workers > 1:
+            sock = config.bind_socket()
+            Multiprocess(config, target=server.run, sockets=[sock]).run()
+        else:
+            server.run()
+    finally:
+        for directory in shared_dirs:
+            shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
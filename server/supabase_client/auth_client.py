@@ -1,11 +1,14 @@
-from supabase import create_client, Client
 import os
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, TYPE_CHECKING
 import jwt
 from datetime import datetime, timedelta
 from uuid import UUID
 import threading
 from collections import OrderedDict
+from supabase_client.storage_backends import get_storage_backend
+
+if TYPE_CHECKING:
+    from supabase import Client
 
 # Thread-safe LRU cache with automatic cleanup
 class SupabaseClientCache:
@@ -16,7 +19,7 @@ class SupabaseClientCache:
         self._expiry = {}
         self._lock = threading.RLock()  # Reentrant lock for thread safety
     
-    def get(self, cache_key: str) -> Optional[Client]:
+    def get(self, cache_key: str) -> Optional["Client"]:
         with self._lock:
             current_time = datetime.utcnow()
             
@@ -34,7 +37,7 @@ class SupabaseClientCache:
             
             return None
     
-    def put(self, cache_key: str, client: Client):
+    def put(self, cache_key: str, client: "Client"):
         with self._lock:
             current_time = datetime.utcnow()
             
@@ -75,10 +78,19 @@ class SupabaseClientCache:
         with self._lock:
             return len(self._cache)
 
-# Global cache instance
+# Global cache instance (per process)
 _client_cache = SupabaseClientCache(max_size=50, cache_ttl_minutes=15)
 
 
+def _reset_client_cache_after_fork():
+    # Cached clients hold the parent's connection pools and may hold its lock mid-use
+    global _client_cache
+    _client_cache = SupabaseClientCache(max_size=_client_cache.max_size, cache_ttl_minutes=15)
+
+
+os.register_at_fork(after_in_child=_reset_client_cache_after_fork)
+
+
 def create_supabase_compatible_jwt(user_id: UUID) -> str:
     """
     Create a JWT token that Supabase RLS can understand.
@@ -106,7 +118,17 @@ def create_supabase_compatible_jwt(user_id: UUID) -> str:
         print(f"Error creating Supabase-compatible JWT: {e}")
         return None
 
-def get_authenticated_supabase_client(user_id: Optional[UUID] = None) -> Client:
+def get_authenticated_supabase_client(user_id: Optional[UUID] = None) -> "Client":
+    """
+    Get a client for the specified user from the configured storage backend.
+    
+    Args:
+        user_id: The current user's ID to create JWT token for.
+                If None, returns an unauthenticated client.
+    """
+    return get_storage_backend().get_client(user_id)
+
+def create_supabase_client(user_id: Optional[UUID] = None) -> "Client":
     """
     Get a Supabase client with JWT authentication for the specified user.
     Implements thread-safe LRU caching to reduce repeated client creation.
@@ -127,6 +149,9 @@ def get_authenticated_supabase_client(user_id: Optional[UUID] = None) -> Client:
         if cached_client:
             return cached_client
         
+        # The SDK is imported on first use so the in-memory backend never loads it
+        from supabase import create_client
+
         url = os.getenv("SUPABASE_URL")
         key = os.getenv("SUPABASE_ANON_KEY") 
         
@@ -161,7 +186,7 @@ def get_authenticated_supabase_client(user_id: Optional[UUID] = None) -> Client:
         print(f"Error creating authenticated Supabase client: {e}")
         return None
     
-def get_unauthenticated_supabase_client() -> Client:
+def get_unauthenticated_supabase_client() -> "Client":
     """
     Get a Supabase client without authentication context.
     Useful for operations that don't require authentication like signup.
@@ -169,12 +194,20 @@ def get_unauthenticated_supabase_client() -> Client:
     """
     return get_authenticated_supabase_client(None)
 
-def get_service_role_supabase_client() -> Optional[Client]:
+def get_service_role_supabase_client() -> Optional["Client"]:
     """
-    Get a Supabase client with service role privileges (bypasses RLS).
+    Get a client with service role privileges (bypasses RLS) from the configured storage backend.
     Use only for specific operations like email verification that need to bypass RLS.
     """
+    return get_storage_backend().get_service_client()
+
+def create_service_role_client() -> Optional["Client"]:
+    """
+    Get a Supabase client with service role privileges (bypasses RLS).
+    """
     try:
+        from supabase import create_client
+
         supabase_url = os.getenv("SUPABASE_URL")
         service_role_key = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
         
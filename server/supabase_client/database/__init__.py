@@ -11,7 +11,34 @@ from . import orders
 from . import favorites
 from . import meetups
 from . import images
+from . import sales
+from . import availability
+from . import popularity
+from . import listing_events
+from . import listing_index
+from . import search
+from . import suggestions
+from . import facets
+from . import listing_snapshot
+from . import landing_feeds
+from . import tags
+from . import listing_cards
+from . import listing_ownership
+from . import postgres
+
+# Time every data-layer entry point; modules imported later with `from .x import f` get the wrapped functions
+from core.utils import monitor_module
+for _module in (
+    users, listings, orders, favorites, meetups, images, sales, availability, popularity, listing_events,
+    listing_index, search, suggestions, facets, listing_snapshot, landing_feeds, tags, listing_cards,
+    listing_ownership, postgres
+):
+    monitor_module(_module)
+del _module
 
 __all__ = [
-    "base", "users", "listings", "orders", "favorites", "meetups", "images"
+    "base", "users", "listings", "orders", "favorites", "meetups", "images", "sales", "availability",
+    "popularity", "listing_events", "listing_index", "search",
+    "suggestions", "facets", "listing_snapshot",
+    "landing_feeds", "tags", "listing_cards", "listing_ownership", "postgres"
 ]
@@ -0,0 +1,272 @@
+"""
+Seller meetup availability operations.
+Keeps a per-seller interval index over offered listing time slots and scheduled
+meetups, built lazily from the database and invalidated on writes, to answer
+free-slot and double-booking queries without re-reading or re-parsing rows.
+Indexes are shared by every user, so they are built with the service-role
+client (all of the seller's meetups, not just those the requester can see) and
+conflicts are reported as the blocked window only, never another order.
+"""
+
+import time
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, List, Optional, Tuple
+from fastapi import HTTPException
+from uuid import UUID
+from core.config import AVAILABILITY_CONFIG
+from core.cache import TTLCache
+from supabase_client.schemas import MeetupSchedule
+from supabase_client.utils.converters import timestamp_to_time_slot
+from .base import get_authenticated_client, get_service_client, handle_database_error, validate_record_exists
+
+
+ACTIVE_ORDER_STATUSES = ["pending", "confirmed"]
+MEETUP_DURATION = timedelta(minutes=AVAILABILITY_CONFIG["meetup_duration_minutes"])
+
+
+def parse_timestamp(value) -> datetime:
+    """Parse a database timestamp (or datetime) into an aware UTC datetime."""
+    if isinstance(value, datetime):
+        parsed = value
+    else:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
+
+
+class SellerAvailabilityIndex:
+    """
+    Interval index for one seller.
+    Booked meetups all last MEETUP_DURATION, so the bookings overlapping
+    [start, end) are exactly those starting in (start - duration, end), found
+    with two bisections over the sorted start times.
+    """
+
+    def __init__(self, seller_id: str, slots_by_listing: Dict[int, List[Dict[str, Any]]], meetups: List[Dict[str, Any]]):
+        self.seller_id = seller_id
+        self.built_at = time.time()
+        self.slots_by_listing: Dict[int, List[Tuple[datetime, datetime]]] = {}
+        self.schedules_by_listing: Dict[int, List[MeetupSchedule]] = {}
+
+        for listing_id, rows in slots_by_listing.items():
+            rows = sorted(rows, key=lambda row: parse_timestamp(row["start_time"]))
+            self.slots_by_listing[listing_id] = [
+                (parse_timestamp(row["start_time"]), parse_timestamp(row["end_time"])) for row in rows
+            ]
+
+            # Group once at build time instead of on every conversion
+            date_groups: Dict[str, List[str]] = {}
+            for row, (start, _) in zip(rows, self.slots_by_listing[listing_id]):
+                date_groups.setdefault(start.strftime('%Y-%m-%d'), []).append(
+                    timestamp_to_time_slot(row["start_time"], row["end_time"])
+                )
+            self.schedules_by_listing[listing_id] = [
+                MeetupSchedule(date=date, times=times) for date, times in date_groups.items()
+            ]
+
+        bookings = sorted(
+            (parse_timestamp(meetup["scheduled_at"]), meetup["order_id"])
+            for meetup in meetups
+            if meetup.get("scheduled_at")
+        )
+        self.booking_starts = [start for start, _ in bookings]
+        self.booking_orders = [order_id for _, order_id in bookings]
+        self.order_ids = set(self.booking_orders)
+
+    def _overlapping(self, start: datetime, end: datetime) -> range:
+        low = bisect_right(self.booking_starts, start - MEETUP_DURATION)
+        high = bisect_left(self.booking_starts, end)
+        return range(low, high)
+
+    def find_conflict(self, proposed_at: datetime, exclude_order_id: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """Return the window blocked by the booking a meetup at `proposed_at` would overlap, if any."""
+        proposed_at = parse_timestamp(proposed_at)
+        for i in self._overlapping(proposed_at, proposed_at + MEETUP_DURATION):
+            if self.booking_orders[i] != exclude_order_id:
+                return {
+                    "blocked_from": self.booking_starts[i].isoformat(),
+                    "blocked_until": (self.booking_starts[i] + MEETUP_DURATION).isoformat()
+                }
+        return None
+
+    def free_slots(self, listing_id: int) -> List[Dict[str, str]]:
+        """Offered slots for a listing with booked meetup intervals cut out."""
+        free = []
+        for slot_start, slot_end in self.slots_by_listing.get(listing_id, []):
+            cursor = slot_start
+            for i in self._overlapping(slot_start, slot_end):
+                booking_start = self.booking_starts[i]
+                if booking_start > cursor:
+                    free.append((cursor, booking_start))
+                cursor = max(cursor, booking_start + MEETUP_DURATION)
+            if cursor < slot_end:
+                free.append((cursor, slot_end))
+
+        return [{"start_time": start.isoformat(), "end_time": end.isoformat()} for start, end in free]
+
+
+class AvailabilityIndexCache(TTLCache):
+    """
+    Thread-safe LRU of seller availability indexes.
+    Writes in this process invalidate immediately; the max age bounds how long
+    writes handled by other workers can go unseen. The listing and order to
+    seller lookups are bounded LRUs too: a listing's or order's seller never
+    changes, so a dropped lookup only costs a re-read.
+    """
+
+    def __init__(self, max_sellers: int = 1000, max_age_seconds: int = 300, max_lookups: int = 50000):
+        super().__init__(max_entries=max_sellers, ttl_seconds=max_age_seconds)
+        self._seller_by_listing = TTLCache(max_entries=max_lookups, ttl_seconds=max_age_seconds)
+        self._seller_by_order = TTLCache(max_entries=max_lookups, ttl_seconds=max_age_seconds)
+
+    def put_index(self, index: SellerAvailabilityIndex):
+        with self._lock:
+            self.put(index.seller_id, index)
+            for listing_id in index.slots_by_listing:
+                self._seller_by_listing.put(listing_id, index.seller_id)
+            for order_id in index.order_ids:
+                self._seller_by_order.put(order_id, index.seller_id)
+
+    def seller_for_listing(self, listing_id: int) -> Optional[str]:
+        return self._seller_by_listing.get(listing_id)
+
+    def remember_listing(self, listing_id: int, seller_id: str):
+        self._seller_by_listing.put(listing_id, seller_id)
+
+    def seller_for_order(self, order_id: int) -> Optional[str]:
+        return self._seller_by_order.get(order_id)
+
+    def remember_order(self, order_id: int, seller_id: str):
+        self._seller_by_order.put(order_id, seller_id)
+
+    def invalidate_seller(self, seller_id: str):
+        self.invalidate(str(seller_id))
+
+    def invalidate_order(self, order_id: int):
+        """Drop the index of the seller this order belongs to, if known."""
+        seller_id = self._seller_by_order.get(order_id)
+        if seller_id is not None:
+            self.invalidate(seller_id)
+
+    def clear(self):
+        with self._lock:
+            super().clear()
+            self._seller_by_listing.clear()
+            self._seller_by_order.clear()
+
+
+# Global cache instance
+_availability_cache = AvailabilityIndexCache(
+    max_sellers=AVAILABILITY_CONFIG["max_sellers"],
+    max_age_seconds=AVAILABILITY_CONFIG["max_age_seconds"],
+    max_lookups=AVAILABILITY_CONFIG["max_lookups"]
+)
+
+
+async def build_seller_index(seller_id: str) -> SellerAvailabilityIndex:
+    """
+    Load a seller's offered slots and active scheduled meetups and index them.
+    Reads bypass RLS: the index is cached for everyone and must hold every
+    buyer's meetups, whoever triggered the build.
+    """
+    try:
+        supabase = get_service_client()
+
+        listings_result = supabase.table("listings").select("listing_id").eq("seller_id", seller_id).execute()
+        listing_ids = [listing["listing_id"] for listing in listings_result.data or []]
+
+        slots_by_listing = {listing_id: [] for listing_id in listing_ids}
+        if listing_ids:
+            slots_result = supabase.table("listing_meetup_time_details").select(
+                "listing_id, start_time, end_time"
+            ).in_("listing_id", listing_ids).execute()
+            for slot in slots_result.data or []:
+                slots_by_listing[slot["listing_id"]].append(slot)
+
+        meetups = []
+        orders_result = supabase.table("orders").select("order_id").eq(
+            "seller_id", seller_id
+        ).in_("status", ACTIVE_ORDER_STATUSES).execute()
+        order_ids = [order["order_id"] for order in orders_result.data or []]
+        if order_ids:
+            meetups_result = supabase.table("meetups").select(
+                "order_id, scheduled_at"
+            ).in_("order_id", order_ids).eq("is_current", True).neq("status", "cancelled").execute()
+            meetups = meetups_result.data or []
+
+        index = SellerAvailabilityIndex(str(seller_id), slots_by_listing, meetups)
+        _availability_cache.put_index(index)
+        return index
+    except Exception as e:
+        handle_database_error("build seller availability index", e)
+
+
+async def get_seller_index(seller_id: str) -> SellerAvailabilityIndex:
+    """Get a seller's availability index, building it on first use."""
+    index = _availability_cache.get(str(seller_id))
+    if index is None:
+        index = await build_seller_index(seller_id)
+    return index
+
+
+async def get_listing_seller_id(user_id: UUID, listing_id: int) -> str:
+    """Resolve (and remember) the seller of a listing."""
+    seller_id = _availability_cache.seller_for_listing(listing_id)
+    if seller_id is not None:
+        return seller_id
+
+    try:
+        supabase = get_authenticated_client(user_id)
+
+        result = supabase.table("listings").select("seller_id").eq("listing_id", listing_id).execute()
+        validate_record_exists(result.data, "Listing not found")
+
+        seller_id = str(result.data[0]["seller_id"])
+        _availability_cache.remember_listing(listing_id, seller_id)
+        return seller_id
+    except HTTPException:
+        raise
+    except Exception as e:
+        handle_database_error("get listing seller", e)
+
+
+async def get_listing_availability(user_id: UUID, listing_id: int, proposed_at: Optional[datetime] = None) -> Dict[str, Any]:
+    """
+    Get offered schedules and free slots for a listing, and whether
+    `proposed_at` (if given) conflicts with the seller's other meetups.
+    """
+    seller_id = await get_listing_seller_id(user_id, listing_id)
+    index = await get_seller_index(seller_id)
+
+    availability = {
+        "listing_id": listing_id,
+        "available_schedules": index.schedules_by_listing.get(listing_id, []),
+        "free_slots": index.free_slots(listing_id),
+        "conflict": None
+    }
+    if proposed_at is not None:
+        availability["conflict"] = index.find_conflict(proposed_at)
+    return availability
+
+
+async def find_meetup_conflict(order_id: int, seller_id: str, proposed_at: datetime) -> Optional[Dict[str, Any]]:
+    """
+    Find another active meetup of the order's seller that a meetup for
+    `order_id` at `proposed_at` would overlap. Callers must already have
+    checked that the user is a party to the order (its seller_id comes from that check).
+    """
+    _availability_cache.remember_order(order_id, str(seller_id))
+    index = await get_seller_index(str(seller_id))
+    return index.find_conflict(proposed_at, exclude_order_id=order_id)
+
+
+def invalidate_seller(seller_id) -> None:
+    """Invalidate after a seller's slots or meetups change."""
+    _availability_cache.invalidate_seller(str(seller_id))
+
+
+def invalidate_order(order_id: int) -> None:
+    """Invalidate after an order's meetup changes when only the order is known."""
+    _availability_cache.invalidate_order(order_id)
@@ -6,7 +6,18 @@ Contains shared database operations and helper functions.
 from typing import Optional, Dict, Any
 from fastapi import HTTPException
 from uuid import UUID
-from supabase_client.auth_client import get_authenticated_supabase_client, get_unauthenticated_supabase_client
+from postgrest.exceptions import APIError
+from supabase_client.auth_client import get_authenticated_supabase_client, get_unauthenticated_supabase_client, get_service_role_supabase_client
+
+
+# SQLSTATEs raised by the functions in sql/ and the HTTP status they map to
+RPC_ERROR_STATUS = {
+    "P0002": 404,  # no_data_found
+    "42501": 403,  # insufficient_privilege
+    "22023": 400,  # invalid_parameter_value
+    "23505": 409,  # unique_violation
+    "23P01": 409   # exclusion_violation (meetup overlaps another of the seller's)
+}
 
 
 def get_authenticated_client(user_id: UUID):
@@ -25,6 +36,14 @@ def get_unauthenticated_client():
     return supabase
 
 
+def get_service_client():
+    """Get the service-role Supabase client (bypasses RLS) with error handling."""
+    supabase = get_service_role_supabase_client()
+    if not supabase:
+        raise HTTPException(status_code=500, detail="Database connection failed")
+    return supabase
+
+
 def calculate_pagination_offset(page: int, page_size: int) -> int:
     """Calculate pagination offset."""
     return (page - 1) * page_size
@@ -59,3 +78,17 @@ def validate_user_access(record_user_id: UUID, current_user_id: UUID, error_mess
     """Validate that user has access to a record."""
     if record_user_id != current_user_id:
         raise HTTPException(status_code=403, detail=error_message)
+
+
+def call_rpc(supabase, function_name: str, params: Dict[str, Any]):
+    """Call a Postgres function, mapping its SQLSTATEs to HTTP errors."""
+    try:
+        result = supabase.rpc(function_name, params).execute()
+    except APIError as e:
+        status_code = RPC_ERROR_STATUS.get(e.code)
+        if status_code:
+            raise HTTPException(status_code=status_code, detail=e.message)
+        raise
+    
+    validate_record_exists(result.data, f"{function_name} returned no data")
+    return result.data
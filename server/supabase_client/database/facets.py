@@ -0,0 +1,66 @@
+"""
+Listing feed facet operations.
+Per-category, payment method and transaction method counts plus a price
+histogram for the public listings feed, computed by one aggregate query
+(sql/facets.sql) and cached per filter combination for a short TTL.
+"""
+
+from typing import Dict, Any, Optional
+from fastapi import HTTPException
+from uuid import UUID
+from core.config import FACETS_CONFIG
+from core.cache import TTLCache
+from .base import get_authenticated_client, handle_database_error, call_rpc
+from . import search as listing_search
+
+
+class FacetsCache(TTLCache):
+    """Thread-safe LRU of facet results keyed by user and filter combination."""
+
+    def __init__(self, max_entries: int = 2000, ttl_seconds: int = 30):
+        super().__init__(max_entries=max_entries, ttl_seconds=ttl_seconds)
+
+
+# Global cache instance
+_facets_cache = FacetsCache(
+    max_entries=FACETS_CONFIG["max_entries"],
+    ttl_seconds=FACETS_CONFIG["ttl_seconds"]
+)
+
+
+async def get_listing_facets(user_id: UUID, category: Optional[str] = None, search: Optional[str] = None,
+                             min_price: Optional[float] = None, max_price: Optional[float] = None,
+                             bucket_count: int = 10) -> Dict[str, Any]:
+    """
+    Get facet counts for the public listings feed under the given filters.
+    Search is resolved through the search index, the same as the feed itself.
+    """
+    cache_key = (str(user_id), category, (search or "").strip().lower() or None, min_price, max_price, bucket_count)
+    facets = _facets_cache.get(cache_key)
+    if facets is not None:
+        return facets
+
+    try:
+        supabase = get_authenticated_client(user_id)
+
+        listing_ids = None
+        if search:
+            listing_ids = list(await listing_search.match_listings(
+                user_id, search, status="active", exclude_seller_id=user_id
+            ))
+
+        facets = call_rpc(supabase, "listing_facets", {
+            "p_user_id": str(user_id),
+            "p_category": category,
+            "p_min_price": min_price,
+            "p_max_price": max_price,
+            "p_listing_ids": listing_ids,
+            "p_bucket_count": bucket_count
+        })
+
+        _facets_cache.put(cache_key, facets)
+        return facets
+    except HTTPException:
+        raise
+    except Exception as e:
+        handle_database_error("get listing facets", e)
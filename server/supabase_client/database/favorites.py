@@ -5,45 +5,148 @@ Handles user favorite listings management.
 
 from typing import Dict, Any, List, Optional
 from fastapi import HTTPException
+from postgrest.exceptions import APIError
 from uuid import UUID
-from .base import get_authenticated_client, handle_database_error, validate_record_exists
+from core.config import FAVORITES_CACHE_CONFIG
+from core.cache import TTLCache
+from . import popularity
+from . import postgres
+from .base import get_authenticated_client, handle_database_error, validate_record_exists, calculate_pagination_offset, call_rpc
+
+
+class FavoritesSetCache(TTLCache):
+    """
+    Thread-safe LRU of per-user favorite sets (listing_id -> favorited_at).
+    A user's set is loaded once and then kept in sync by add, remove, toggle
+    and clear; the TTL bounds staleness from writes made by other workers.
+    """
+
+    def __init__(self, max_users: int = 5000, ttl_seconds: int = 300):
+        super().__init__(max_entries=max_users, ttl_seconds=ttl_seconds)
+
+    def get(self, user_id) -> Optional[Dict[int, str]]:
+        return super().get(str(user_id))
+
+    def put(self, user_id, favorites: Dict[int, str]):
+        super().put(str(user_id), favorites)
+
+    def invalidate(self, user_id):
+        super().invalidate(str(user_id))
+
+    def add(self, user_id, listing_id: int, favorited_at: Optional[str]):
+        with self._lock:
+            favorites = self.peek(str(user_id))
+            if favorites is not None:
+                favorites[listing_id] = favorited_at
+
+    def remove(self, user_id, listing_id: int):
+        with self._lock:
+            favorites = self.peek(str(user_id))
+            if favorites is not None:
+                favorites.pop(listing_id, None)
+
+
+# Global cache instance
+_favorites_cache = FavoritesSetCache(
+    max_users=FAVORITES_CACHE_CONFIG["max_users"],
+    ttl_seconds=FAVORITES_CACHE_CONFIG["ttl_seconds"]
+)
+
+
+async def get_favorites_set(user_id: UUID) -> Dict[int, str]:
+    """
+    Get the user's favorites as a listing_id -> favorited_at mapping.
+    Loaded with one query on first use, then served from memory.
+    """
+    favorites = _favorites_cache.get(user_id)
+    if favorites is not None:
+        return favorites
+
+    try:
+        supabase = get_authenticated_client(user_id)
+        
+        result = supabase.table("user_favorites").select(
+            "listing_id,favorited_at"
+        ).eq("user_id", user_id).execute()
+        
+        favorites = {row["listing_id"]: row["favorited_at"] for row in result.data or []}
+        _favorites_cache.put(user_id, favorites)
+        return favorites
+    except Exception as e:
+        handle_database_error("get favorites set", e)
 
 
 async def check_favorite_exists(user_id: UUID, listing_id: int) -> bool:
     """
     Check if a listing is already in user's favorites.
     """
+    return listing_id in await get_favorites_set(user_id)
+
+
+async def get_favorite_statuses(user_id: UUID, listing_ids: List[int]) -> List[Dict[str, Any]]:
+    """
+    Get favorited state for many listings at once, one set lookup per id.
+    """
+    favorites = await get_favorites_set(user_id)
+    return [
+        {
+            "listing_id": listing_id,
+            "is_favorited": listing_id in favorites,
+            "favorited_at": favorites.get(listing_id)
+        }
+        for listing_id in listing_ids
+    ]
+
+
+async def toggle_favorite(user_id: UUID, listing_id: int) -> Dict[str, Any]:
+    """
+    Remove the favorite if present, otherwise validate the listing and add it.
+    Runs as a single conditional delete-or-insert in the database.
+    Returns listing_id, is_favorited and favorited_at.
+    """
     try:
         supabase = get_authenticated_client(user_id)
         
-        existing_favorite = supabase.table("user_favorites").select(
-            "user_id"
-        ).eq("user_id", user_id).eq("listing_id", listing_id).execute()
+        result = call_rpc(supabase, "toggle_favorite", {"p_listing_id": listing_id})
         
-        return bool(existing_favorite.data and len(existing_favorite.data) > 0)
+        if result["is_favorited"]:
+            _favorites_cache.add(user_id, listing_id, result["favorited_at"])
+            popularity.record_favorite(listing_id)
+        else:
+            _favorites_cache.remove(user_id, listing_id)
+            popularity.record_favorite(listing_id, -1)
+        return result
+    except HTTPException:
+        raise
     except Exception as e:
-        handle_database_error("check favorite exists", e)
+        handle_database_error("toggle favorite", e)
 
 
 async def add_favorite(user_id: UUID, listing_id: int) -> Dict[str, Any]:
     """
     Add a listing to user's favorites.
+    Whether it was already favorited is decided by the insert itself, not the cached set.
     """
     try:
         supabase = get_authenticated_client(user_id)
         
-        # Check if already favorited
-        if await check_favorite_exists(user_id, listing_id):
-            raise HTTPException(status_code=400, detail="Listing is already in favorites")
-        
         favorite_data = {
             "user_id": user_id,
             "listing_id": listing_id
         }
         
-        result = supabase.table("user_favorites").insert(favorite_data).execute()
+        try:
+            result = supabase.table("user_favorites").insert(favorite_data).execute()
+        except APIError as e:
+            if e.code != "23505":
+                raise
+            # The cached set missed a favorite added elsewhere; reload it on next use
+            _favorites_cache.invalidate(user_id)
+            raise HTTPException(status_code=400, detail="Listing is already in favorites")
         
         validate_record_exists(result.data, "Failed to add to favorites")
+        _favorites_cache.add(user_id, listing_id, result.data[0].get("favorited_at"))
+        popularity.record_favorite(listing_id)
         return result.data[0]
     except HTTPException:
         raise
@@ -54,17 +157,17 @@ async def add_favorite(user_id: UUID, listing_id: int) -> Dict[str, Any]:
 async def remove_favorite(user_id: UUID, listing_id: int) -> bool:
     """
     Remove a listing from user's favorites.
-    Returns True if removed, False if wasn't favorited.
+    Returns True if removed, False if wasn't favorited, going by the rows the delete returned.
     """
     try:
         supabase = get_authenticated_client(user_id)
         
-        # Check if favorited
-        if not await check_favorite_exists(user_id, listing_id):
-            return False
-        
         result = supabase.table("user_favorites").delete().eq("user_id", user_id).eq("listing_id", listing_id).execute()
+        _favorites_cache.remove(user_id, listing_id)
+        if not result.data:
+            return False
         
+        popularity.record_favorite(listing_id, -1)
         return True
     except Exception as e:
         handle_database_error("remove favorite", e)
@@ -90,6 +193,43 @@ def get_user_favorites(supabase, user_id: str, include_listing_details: bool = F
         return {"success": False, "error": str(e)}
 
 
+async def get_user_favorites_page(user_id: UUID, page: int = 1, page_size: Optional[int] = None,
+                                  sort_order: str = "newest", include_listings: bool = False) -> Dict[str, Any]:
+    """
+    Get a page of the user's favorites ordered by favorited_at.
+    When page_size is None all favorites are returned.
+    With include_listings, the direct Postgres path (when enabled) also embeds
+    each favorite's listing card as `listing` in the same query.
+    """
+    try:
+        if include_listings and postgres.is_enabled():
+            return await postgres.fetch_favorite_listings_page(user_id, page, page_size, sort_order)
+        
+        supabase = get_authenticated_client(user_id)
+        
+        query = supabase.table("user_favorites").select(
+            "listing_id,favorited_at", count="exact"
+        ).eq("user_id", user_id).order("favorited_at", desc=sort_order != "oldest")
+        
+        if page_size is not None:
+            offset = calculate_pagination_offset(page, page_size)
+            query = query.range(offset, offset + page_size - 1)
+        
+        result = query.execute()
+        favorites = result.data or []
+        
+        total_count = getattr(result, 'count', None)
+        if total_count is None:
+            total_count = len(favorites)
+        
+        return {
+            "favorites": favorites,
+            "total_count": total_count
+        }
+    except Exception as e:
+        handle_database_error("get user favorites page", e)
+
+
 async def get_favorite_listing_details(user_id: UUID, listing_id: int) -> Optional[Dict[str, Any]]:
     """
     Get detailed listing information for a favorited item.
@@ -131,14 +271,7 @@ async def get_favorites_count(user_id: UUID) -> int:
     """
     Get the total count of user's favorite listings.
     """
-    try:
-        supabase = get_authenticated_client(user_id)
-        
-        result = supabase.table("user_favorites").select("listing_id").eq("user_id", user_id).execute()
-        
-        return len(result.data) if result.data else 0
-    except Exception as e:
-        handle_database_error("get favorites count", e)
+    return len(await get_favorites_set(user_id))
 
 
 async def clear_user_favorites(user_id: UUID) -> int:
@@ -149,11 +282,15 @@ async def clear_user_favorites(user_id: UUID) -> int:
     try:
         supabase = get_authenticated_client(user_id)
         
-        # Get count before deletion
-        count = await get_favorites_count(user_id)
+        # Get favorites before deletion
+        favorited_ids = list(await get_favorites_set(user_id))
+        count = len(favorited_ids)
         
         # Delete all favorites
         supabase.table("user_favorites").delete().eq("user_id", user_id).execute()
+        _favorites_cache.put(user_id, {})
+        for listing_id in favorited_ids:
+            popularity.record_favorite(listing_id, -1)
         
         return count
     except Exception as e:
@@ -6,6 +6,7 @@ Handles listing images and file references in the database.
 from typing import Dict, Any, List, Optional
 from fastapi import HTTPException
 from .base import get_authenticated_client, handle_database_error, validate_record_exists
+from . import listing_ownership
 
 
 async def add_listing_image(user_id: int, listing_id: int, image_data: Dict[str, Any]) -> Dict[str, Any]:
@@ -16,11 +17,9 @@ async def add_listing_image(user_id: int, listing_id: int, image_data: Dict[str,
         supabase = get_authenticated_client(user_id)
         
         # Verify listing ownership
-        listing_check = supabase.table("listings").select("seller_id").eq("listing_id", listing_id).execute()
-        validate_record_exists(listing_check.data, "Listing not found")
-        
-        if listing_check.data[0]["seller_id"] != user_id:
-            raise HTTPException(status_code=403, detail="You can only add images to your own listings")
+        await listing_ownership.ensure_listing_owner(
+            user_id, listing_id, "You can only add images to your own listings"
+        )
         
         # Add listing_id to image data
         image_data["listing_id"] = listing_id
@@ -140,11 +139,7 @@ async def set_primary_image(user_id: int, listing_id: int, image_id: int) -> Dic
         supabase = get_authenticated_client(user_id)
         
         # Verify listing ownership
-        listing_check = supabase.table("listings").select("seller_id").eq("listing_id", listing_id).execute()
-        validate_record_exists(listing_check.data, "Listing not found")
-        
-        if listing_check.data[0]["seller_id"] != user_id:
-            raise HTTPException(status_code=403, detail="You can only modify your own listings")
+        await listing_ownership.ensure_listing_owner(user_id, listing_id)
         
         # First, unset all other images as primary for this listing
         supabase.table("listing_images").update({
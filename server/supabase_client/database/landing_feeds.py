@@ -0,0 +1,189 @@
+"""
+Precomputed category landing feeds.
+Keeps the first listings of each category (and of the unfiltered feed) per
+sort mode as pre-serialized ProductListing JSON, served immediately and
+refreshed in the background once past a soft TTL (stale-while-revalidate).
+Per-user parts are applied as an overlay on the cached payload: the user's
+own listings are skipped and favorited listings are marked.
+"""
+
+import asyncio
+import time
+from typing import Dict, Any, List, Optional, Tuple
+from uuid import UUID
+from core.config import LANDING_FEED_CONFIG
+from .base import get_authenticated_client, handle_database_error
+from . import favorites
+from . import listing_cards
+
+
+# Sort modes the landing feeds are precomputed for, as (column, descending)
+LANDING_SORTS = listing_cards.RANGE_SORTS
+
+FAVORITED_SUFFIX = b',"is_favorited":true}'
+NOT_FAVORITED_SUFFIX = b',"is_favorited":false}'
+
+
+class LandingFeed:
+    """One precomputed feed: serialized products in feed order."""
+
+    def __init__(self, listing_ids: List[int], seller_ids: List[str], products_json: List[bytes], total_count: int):
+        self.built_at = time.time()
+        self.listing_ids = listing_ids
+        self.seller_ids = seller_ids
+        self.products_json = products_json
+        self.total_count = total_count
+        # Every matching listing is cached, so any page can be served
+        self.complete = len(listing_ids) >= total_count
+
+
+_landing_feeds: Dict[Tuple[Optional[str], str], LandingFeed] = {}
+_refresh_tasks: Dict[Tuple[Optional[str], str], asyncio.Task] = {}
+
+
+def is_landing_request(sort_by: Optional[str], search: Optional[str], min_price: Optional[float],
+                       max_price: Optional[float], page: int, page_size: int) -> bool:
+    """Whether a feed request is a plain category browse the landing cache covers."""
+    return (
+        (sort_by or "newest") in LANDING_SORTS
+        and not search
+        and min_price is None
+        and max_price is None
+        and page * page_size <= LANDING_FEED_CONFIG["items"]
+    )
+
+
+async def build_landing_feed(user_id: UUID, category: Optional[str], sort_by: str) -> LandingFeed:
+    """
+    Load the first listings of a category (all active listings, nobody
+    excluded) and serialize them. Extra items beyond the served range cover
+    the user's own listings being skipped.
+    """
+    from supabase_client.utils.converters import convert_listings_to_products
+
+    try:
+        supabase = get_authenticated_client(user_id)
+
+        capacity = LANDING_FEED_CONFIG["items"] + LANDING_FEED_CONFIG["overfetch"]
+
+        query = supabase.table("listing_cards").select(listing_cards.CARD_COLUMNS, count="exact").eq("status", "active")
+        if category:
+            query = query.eq("category", category)
+        result = listing_cards.apply_range_sort(query, sort_by).range(0, capacity - 1).execute()
+
+        listings = [listing_cards.card_to_listing(card) for card in result.data or []]
+        total_count = getattr(result, 'count', None)
+        if total_count is None:
+            total_count = len(listings)
+
+        products = await convert_listings_to_products(supabase, listings, user_id)
+
+        feed = LandingFeed(
+            listing_ids=[product.listing_id for product in products],
+            seller_ids=[str(product.seller_id) for product in products],
+            products_json=[
+                # Without the closing brace so the favorite overlay can be appended
+                product.model_dump_json(exclude={"is_favorited"}).encode()[:-1]
+                for product in products
+            ],
+            total_count=total_count
+        )
+        _landing_feeds[(category, sort_by)] = feed
+        return feed
+    except Exception as e:
+        handle_database_error("build landing feed", e)
+
+
+def _log_refresh_failure(task: asyncio.Task):
+    if not task.cancelled() and task.exception() is not None:
+        print(f"Warning: Failed to refresh landing feed: {task.exception()}")
+
+
+def _start_refresh(user_id: UUID, category: Optional[str], sort_by: str) -> asyncio.Task:
+    """Start a build for the feed unless one is already running; return it."""
+    key = (category, sort_by)
+    task = _refresh_tasks.get(key)
+    if task is None or task.done():
+        task = asyncio.create_task(build_landing_feed(user_id, category, sort_by))
+        task.add_done_callback(_log_refresh_failure)
+        _refresh_tasks[key] = task
+    return task
+
+
+async def get_landing_feed(user_id: UUID, category: Optional[str], sort_by: str) -> LandingFeed:
+    """
+    Get a landing feed: fresh ones are served as is, ones past the soft TTL
+    are served while a background refresh runs (stale ones are kept until the
+    hard TTL), and missing or expired ones are waited for. Concurrent
+    requests share one build.
+    """
+    feed = _landing_feeds.get((category, sort_by))
+    age = time.time() - feed.built_at if feed else None
+
+    if feed is None or age >= LANDING_FEED_CONFIG["hard_ttl_seconds"]:
+        return await asyncio.shield(_start_refresh(user_id, category, sort_by))
+
+    if age >= LANDING_FEED_CONFIG["soft_ttl_seconds"]:
+        _start_refresh(user_id, category, sort_by)
+
+    return feed
+
+
+async def _count_own_active_listings(user_id: UUID, category: Optional[str]) -> int:
+    supabase = get_authenticated_client(user_id)
+    query = supabase.table("listings").select("listing_id", count="exact").eq(
+        "seller_id", user_id
+    ).eq("status", "active")
+    if category:
+        query = query.eq("category", category)
+    result = query.limit(1).execute()
+    return getattr(result, 'count', None) or 0
+
+
+async def _has_open_orders_on_inactive_listings(user_id: UUID) -> bool:
+    supabase = get_authenticated_client(user_id)
+    result = supabase.table("orders").select("order_id, listings!inner(status)").eq(
+        "buyer_id", user_id
+    ).in_("status", ["pending", "confirmed"]).eq("listings.status", "inactive").limit(1).execute()
+    return bool(result.data)
+
+
+async def get_landing_page(user_id: UUID, category: Optional[str], sort_by: Optional[str],
+                           page: int, page_size: int) -> Optional[bytes]:
+    """
+    Serve one feed page from the landing cache as a ProductListingsResponse
+    JSON body, or None when the request has to go through the regular feed
+    (the user has open orders on inactive listings, which the regular feed
+    also shows, or too many of the cached listings are the user's own).
+    """
+    try:
+        if await _has_open_orders_on_inactive_listings(user_id):
+            return None
+
+        feed = await get_landing_feed(user_id, category, sort_by or "newest")
+
+        user_key = str(user_id)
+        visible = [i for i, seller_id in enumerate(feed.seller_ids) if seller_id != user_key]
+        offset = (page - 1) * page_size
+        if offset + page_size > len(visible) and not feed.complete:
+            return None
+
+        if feed.complete:
+            total_count = len(visible)
+        else:
+            total_count = feed.total_count - await _count_own_active_listings(user_id, category)
+
+        favorited = await favorites.get_favorites_set(user_id)
+        parts = [
+            feed.products_json[i] + (FAVORITED_SUFFIX if feed.listing_ids[i] in favorited else NOT_FAVORITED_SUFFIX)
+            for i in visible[offset:offset + page_size]
+        ]
+
+        return b''.join([
+            b'{"products":[', b','.join(parts), b'],',
+            f'"total_count":{max(total_count, 0)},"page":{page},"page_size":{page_size}}}'.encode()
+        ])
+    except Exception as e:
+        # The regular feed is always a valid fallback
+        print(f"Warning: Failed to serve landing feed page: {e}")
+        return None
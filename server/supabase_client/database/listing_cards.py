@@ -0,0 +1,137 @@
+"""
+Listing card projection operations.
+`listing_cards` (sql/listing_cards.sql) holds one denormalized row per listing
+with its primary image, seller username and photo and seller active listing
+count, kept current by database triggers. Grid views read cards with a single
+query; full images and meetup schedules are only loaded for listing details.
+"""
+
+import base64
+import json
+from typing import Dict, Any, List, Optional
+from fastapi import HTTPException
+from uuid import UUID
+from .base import get_authenticated_client, handle_database_error
+
+
+CARD_COLUMNS = (
+    "listing_id,seller_id,name,description,category,tags,price_min,price_max,"
+    "total_stock,sold_count,status,created_at,updated_at,seller_meetup_locations,"
+    "transaction_methods,payment_methods,primary_image_id,primary_image_url,"
+    "seller_username,seller_profile_photo_url,seller_listing_count"
+)
+
+# Fields of a storefront summary card
+SUMMARY_COLUMNS = (
+    "listing_id,seller_id,name,category,price_min,price_max,total_stock,"
+    "sold_count,status,created_at,primary_image_url"
+)
+
+# Feed sorts a card query can order and page in the database, as (column, descending)
+RANGE_SORTS = {
+    "newest": ("created_at", True),
+    "date_oldest": ("created_at", False),
+    "price_low_high": ("price_min", False),
+    "price_high_low": ("price_min", True),
+    "name_a_z": ("name", False),
+    "name_z_a": ("name", True),
+}
+
+
+def apply_range_sort(query, sort_by: str):
+    """Order a card query by a RANGE_SORTS mode, with listing_id as the tiebreaker."""
+    column, descending = RANGE_SORTS[sort_by]
+    direction = "desc" if descending else "asc"
+    query.params = query.params.add("order", f"{column}.{direction},listing_id.{direction}")
+    return query
+
+
+def encode_cursor(row: Dict[str, Any], sort_by: str) -> str:
+    """Opaque keyset cursor pointing just after `row` in `sort_by` order."""
+    column, _ = RANGE_SORTS[sort_by]
+    payload = json.dumps({"sort": sort_by, "value": row.get(column), "id": row["listing_id"]})
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str, sort_by: str) -> Dict[str, Any]:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        int(payload["id"])
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if payload.get("sort") != sort_by:
+        raise HTTPException(status_code=400, detail="Cursor was issued for a different sort order")
+    return payload
+
+
+def _quote(value) -> str:
+    return '"' + str(value).replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+
+def apply_cursor(query, sort_by: str, cursor: str):
+    """
+    Restrict a card query sorted by apply_range_sort to the rows after the
+    cursor. NULLs sort last ascending and first descending, as in Postgres.
+    """
+    payload = _decode_cursor(cursor, sort_by)
+    column, descending = RANGE_SORTS[sort_by]
+    op = "lt" if descending else "gt"
+    value, listing_id = payload["value"], int(payload["id"])
+
+    if value is None:
+        conditions = [f"and({column}.is.null,listing_id.{op}.{listing_id})"]
+        if descending:
+            conditions.append(f"{column}.not.is.null")
+    else:
+        conditions = [
+            f"{column}.{op}.{_quote(value)}",
+            f"and({column}.eq.{_quote(value)},listing_id.{op}.{listing_id})"
+        ]
+        if not descending:
+            conditions.append(f"{column}.is.null")
+
+    query.params = query.params.add("or", f"({','.join(conditions)})")
+    return query
+
+
+def card_to_listing(card: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Reshape a card row into the listing dict the converters expect: the
+    primary image as the only image, the seller profile and listing count
+    attached, and no meetup schedules.
+    """
+    image_id = card.pop("primary_image_id", None)
+    image_url = card.pop("primary_image_url", None)
+    username = card.pop("seller_username", None)
+    profile_photo_url = card.pop("seller_profile_photo_url", None)
+
+    card["listing_images"] = (
+        [{"image_id": image_id, "image_url": image_url, "is_primary": True}]
+        if image_url else []
+    )
+    card["user_profile"] = (
+        {"username": username, "profile_photo_url": profile_photo_url}
+        if username else {}
+    )
+    card["seller_listing_count"] = card.get("seller_listing_count") or 0
+    card["meetup_data"] = []
+    return card
+
+
+async def get_listing_cards_by_ids(user_id: UUID, listing_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+    """
+    Get listing cards for several listings in one query.
+    Returns a dictionary mapping listing_id to listing data in converter shape.
+    """
+    try:
+        supabase = get_authenticated_client(user_id)
+
+        if not listing_ids:
+            return {}
+
+        result = supabase.table("listing_cards").select(CARD_COLUMNS).in_("listing_id", listing_ids).execute()
+
+        return {card["listing_id"]: card_to_listing(card) for card in result.data or []}
+    except Exception as e:
+        handle_database_error("get listing cards by IDs", e)
+        return {}
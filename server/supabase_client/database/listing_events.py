@@ -0,0 +1,34 @@
+"""
+Listing change notifications.
+In-process indexes over listings subscribe here and are kept in step by the
+database functions that create, update or delete listing rows.
+"""
+
+from typing import Any, Callable, Dict, List, Tuple
+
+
+_listeners: List[Tuple[Callable[[Dict[str, Any]], None], Callable[[int], None]]] = []
+
+
+def subscribe(on_changed: Callable[[Dict[str, Any]], None], on_deleted: Callable[[int], None]) -> None:
+    """Register callbacks for listing inserts/updates and deletes."""
+    _listeners.append((on_changed, on_deleted))
+
+
+def publish_listing_changed(listing: Dict[str, Any]) -> None:
+    """Notify listeners that a listing row was inserted or updated."""
+    for on_changed, _ in _listeners:
+        try:
+            on_changed(listing)
+        except Exception as e:
+            # Indexes self-heal on their next rebuild; never fail the write
+            print(f"Warning: Listing change listener failed for listing {listing.get('listing_id')}: {e}")
+
+
+def publish_listing_deleted(listing_id: int) -> None:
+    """Notify listeners that a listing row was deleted."""
+    for _, on_deleted in _listeners:
+        try:
+            on_deleted(listing_id)
+        except Exception as e:
+            print(f"Warning: Listing delete listener failed for listing {listing_id}: {e}")
@@ -0,0 +1,138 @@
+"""
+Shared lifecycle for in-process indexes over the listings table.
+An index is built from the table on first use, kept current by listing change
+events, and rebuilt in the background once it is older than its rebuild
+interval so writes handled by other workers are picked up.
+"""
+
+import asyncio
+import time
+from typing import Any, Callable, List, Optional, Tuple
+from uuid import UUID
+from supabase_client.auth_client import get_service_role_supabase_client
+from . import listing_events
+from .base import get_authenticated_client, handle_database_error
+
+
+LOAD_PAGE_SIZE = 1000
+
+# Every holder, so startup can build them before the first request needs one
+_holders: List["ListingIndexHolder"] = []
+
+
+class ListingIndexHolder:
+    """
+    Owns one index object exposing add(listing), remove(listing_id), a
+    built_at timestamp and optionally finish_loading() (called after the bulk
+    load). Events arriving while a rebuild is reading the table
+    are replayed onto the new index before it replaces the old one.
+    `warm` says whether warm_indexes() builds it at startup.
+    """
+
+    def __init__(self, name: str, factory: Callable[[], Any], columns: str,
+                 rebuild_interval_seconds: int, status: Optional[str] = None, warm: bool = True):
+        self.name = name
+        self.factory = factory
+        self.columns = columns
+        self.rebuild_interval_seconds = rebuild_interval_seconds
+        self.status = status
+        self.warm = warm
+        self.index = None
+        self._build_lock = asyncio.Lock()
+        self._rebuild_task: Optional[asyncio.Task] = None
+        self._events_during_rebuild: Optional[List[Tuple[str, Any]]] = None
+        listing_events.subscribe(self._on_listing_changed, self._on_listing_deleted)
+        _holders.append(self)
+
+    def _load(self, supabase):
+        index = self.factory()
+        offset = 0
+        while True:
+            query = supabase.table("listings").select(self.columns)
+            if self.status is not None:
+                query = query.eq("status", self.status)
+            result = query.order("listing_id").range(offset, offset + LOAD_PAGE_SIZE - 1).execute()
+            rows = result.data or []
+
+            for row in rows:
+                index.add(row)
+
+            if len(rows) < LOAD_PAGE_SIZE:
+                finish_loading = getattr(index, "finish_loading", None)
+                if finish_loading is not None:
+                    finish_loading()
+                index.built_at = time.time()
+                return index
+            offset += LOAD_PAGE_SIZE
+
+    async def build(self, user_id: Optional[UUID] = None):
+        """
+        Build the index from the listings table.
+        Uses the service role client so every listing is indexed regardless of RLS.
+        """
+        try:
+            supabase = get_service_role_supabase_client() or get_authenticated_client(user_id)
+
+            self._events_during_rebuild = []
+            index = await asyncio.to_thread(self._load, supabase)
+
+            for kind, payload in self._events_during_rebuild:
+                if kind == "changed":
+                    index.add(payload)
+                else:
+                    index.remove(payload)
+
+            self.index = index
+            return index
+        except Exception as e:
+            handle_database_error(f"build {self.name}", e)
+        finally:
+            self._events_during_rebuild = None
+
+    async def _rebuild_in_background(self, user_id: Optional[UUID]):
+        async with self._build_lock:
+            try:
+                await self.build(user_id)
+            except Exception as e:
+                # Keep serving the current index; try again on a later read
+                print(f"Warning: Failed to rebuild {self.name}: {e}")
+                if self.index is not None:
+                    self.index.built_at = time.time()
+
+    async def get(self, user_id: Optional[UUID] = None):
+        """
+        Get the index, building it on first use. Once it is older than the
+        rebuild interval it keeps being served while a fresh one is built.
+        """
+        if self.index is None:
+            async with self._build_lock:
+                if self.index is None:
+                    return await self.build(user_id)
+
+        if (time.time() - self.index.built_at >= self.rebuild_interval_seconds
+                and (self._rebuild_task is None or self._rebuild_task.done())):
+            self._rebuild_task = asyncio.create_task(self._rebuild_in_background(user_id))
+
+        return self.index
+
+    def _on_listing_changed(self, listing):
+        if self._events_during_rebuild is not None:
+            self._events_during_rebuild.append(("changed", listing))
+        if self.index is not None:
+            self.index.add(listing)
+
+    def _on_listing_deleted(self, listing_id: int):
+        if self._events_during_rebuild is not None:
+            self._events_during_rebuild.append(("deleted", listing_id))
+        if self.index is not None:
+            self.index.remove(listing_id)
+
+
+async def warm_indexes() -> List[str]:
+    """Build every index marked `warm` that is not built yet; returns the names built."""
+    built = []
+    for holder in _holders:
+        if holder.warm and holder.index is None:
+            await holder.get(None)
+            built.append(holder.name)
+    return built
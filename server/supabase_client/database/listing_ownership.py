@@ -0,0 +1,94 @@
+"""
+Listing ownership resolution for mutations.
+Caches listing_id -> (seller_id, status) so owner checks cost at most one
+narrow query instead of a full listing fetch. Entries follow listing change
+events: status changes update them and deletes drop them. Writes that can
+carry the owner predicate themselves (`.eq("seller_id", ...)`) use
+raise_for_missed_write to tell a missing listing from someone else's.
+"""
+
+from typing import Dict, Any, Optional
+from fastapi import HTTPException
+from uuid import UUID
+from core.config import LISTING_OWNERSHIP_CACHE_CONFIG
+from core.cache import TTLCache
+from . import listing_events
+from .base import get_authenticated_client
+
+
+class ListingOwnershipCache(TTLCache):
+    """Thread-safe LRU of listing_id -> {"seller_id", "status"} with a TTL."""
+
+    def __init__(self, max_entries: int = 50000, ttl_seconds: int = 600):
+        super().__init__(max_entries=max_entries, ttl_seconds=ttl_seconds)
+
+    def put_owner(self, listing_id: int, seller_id, status: Optional[str]):
+        self.put(listing_id, {"seller_id": str(seller_id), "status": status})
+
+    def on_listing_changed(self, listing: Dict[str, Any]):
+        if "seller_id" in listing:
+            self.put_owner(listing["listing_id"], listing["seller_id"], listing.get("status"))
+        elif "status" in listing:
+            # Partial row: keep the owner, refresh the status
+            with self._lock:
+                owner = self.peek(listing["listing_id"])
+                if owner is not None:
+                    owner["status"] = listing["status"]
+
+
+# Global cache instance
+_ownership_cache = ListingOwnershipCache(
+    max_entries=LISTING_OWNERSHIP_CACHE_CONFIG["max_entries"],
+    ttl_seconds=LISTING_OWNERSHIP_CACHE_CONFIG["ttl_seconds"]
+)
+listing_events.subscribe(_ownership_cache.on_listing_changed, _ownership_cache.invalidate)
+
+
+def remember_listing_owner(listing: Dict[str, Any]):
+    """Seed the cache from a listing row fetched elsewhere (needs listing_id and seller_id)."""
+    _ownership_cache.put_owner(listing["listing_id"], listing["seller_id"], listing.get("status"))
+
+
+async def get_listing_owner(user_id: UUID, listing_id: int, use_cache: bool = True) -> Optional[Dict[str, Any]]:
+    """
+    Get {"seller_id", "status"} for a listing, or None if it does not exist
+    (or is not visible to the user).
+    """
+    if use_cache:
+        owner = _ownership_cache.get(listing_id)
+        if owner is not None:
+            return owner
+
+    supabase = get_authenticated_client(user_id)
+    result = supabase.table("listings").select("listing_id,seller_id,status").eq("listing_id", listing_id).execute()
+    if not result.data:
+        _ownership_cache.invalidate(listing_id)
+        return None
+
+    listing = result.data[0]
+    remember_listing_owner(listing)
+    return {"seller_id": str(listing["seller_id"]), "status": listing["status"]}
+
+
+async def ensure_listing_owner(user_id: UUID, listing_id: int,
+                               error_message: str = "You can only modify your own listings") -> Dict[str, Any]:
+    """Raise 404 if the listing does not exist and 403 if the user does not own it."""
+    owner = await get_listing_owner(user_id, listing_id)
+    if owner is None:
+        raise HTTPException(status_code=404, detail="Listing not found")
+    if owner["seller_id"] != str(user_id):
+        raise HTTPException(status_code=403, detail=error_message)
+    return owner
+
+
+async def raise_for_missed_write(user_id: UUID, listing_id: int, error_message: str, failure_message: str):
+    """
+    Explain an owner-scoped write that matched no rows: 404 when the listing
+    is gone, 403 when it belongs to someone else, otherwise `failure_message`.
+    """
+    owner = await get_listing_owner(user_id, listing_id, use_cache=False)
+    if owner is None:
+        raise HTTPException(status_code=404, detail="Listing not found")
+    if owner["seller_id"] != str(user_id):
+        raise HTTPException(status_code=403, detail=error_message)
+    raise HTTPException(status_code=404, detail=failure_message)
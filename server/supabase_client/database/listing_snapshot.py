@@ -0,0 +1,254 @@
+"""
+Columnar in-memory snapshot of active listings.
+Keeps the fields the browse feed filters and sorts on as NumPy arrays so a
+category / price / sort page is selected with vectorized mask and argsort
+operations; only the rows of the selected page are then read from the
+database. Optional: disabled when NumPy is not installed or via
+LISTING_SNAPSHOT_ENABLED.
+"""
+
+import time
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
+from uuid import UUID
+from core.config import LISTING_SNAPSHOT_CONFIG
+from .listing_index import ListingIndexHolder
+from . import popularity
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+
+SNAPSHOT_COLUMNS = "listing_id,seller_id,name,category,price_min,price_max,created_at,sold_count,status"
+
+INITIAL_CAPACITY = 1024
+# Removed rows are compacted away once they make up this share of the arrays
+COMPACT_RATIO = 0.25
+
+
+def is_enabled() -> bool:
+    return np is not None and LISTING_SNAPSHOT_CONFIG["enabled"]
+
+
+def _epoch(value) -> float:
+    if not value:
+        return 0.0
+    return datetime.fromisoformat(str(value).replace('Z', '+00:00')).timestamp()
+
+
+def _price(value) -> float:
+    return float("nan") if value is None else float(value)
+
+
+class ActiveListingSnapshot:
+    """
+    Array-backed columns for active listings. Rows are appended into spare
+    capacity, updated in place and tombstoned on removal; seller IDs and
+    categories are stored as small integer codes.
+    """
+
+    def __init__(self, capacity: int = INITIAL_CAPACITY):
+        self.built_at = time.time()
+        self.size = 0
+        self.removed = 0
+        self.positions: Dict[int, int] = {}
+        self.seller_codes_by_id: Dict[str, int] = {}
+        self.category_codes_by_name: Dict[str, int] = {}
+
+        self.ids = np.zeros(capacity, dtype=np.int64)
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.seller_codes = np.zeros(capacity, dtype=np.int32)
+        self.category_codes = np.zeros(capacity, dtype=np.int16)
+        self.price_min = np.full(capacity, np.nan)
+        self.price_max = np.full(capacity, np.nan)
+        self.created_at = np.zeros(capacity, dtype=np.float64)
+        self.sold_count = np.zeros(capacity, dtype=np.int64)
+        self.names = np.empty(capacity, dtype=object)
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def _columns(self) -> Tuple[str, ...]:
+        return ("ids", "alive", "seller_codes", "category_codes", "price_min",
+                "price_max", "created_at", "sold_count", "names")
+
+    def _grow(self):
+        capacity = len(self.ids) * 2
+        for column in self._columns():
+            current = getattr(self, column)
+            if current.dtype == object:
+                grown = np.empty(capacity, dtype=object)
+            elif column in ("price_min", "price_max"):
+                grown = np.full(capacity, np.nan)
+            else:
+                grown = np.zeros(capacity, dtype=current.dtype)
+            grown[:len(current)] = current
+            setattr(self, column, grown)
+
+    def _code(self, codes: Dict[str, int], value) -> int:
+        return codes.setdefault(str(value), len(codes))
+
+    def _set(self, position: int, listing: Dict[str, Any]):
+        if "seller_id" in listing:
+            self.seller_codes[position] = self._code(self.seller_codes_by_id, listing["seller_id"])
+        if "category" in listing:
+            self.category_codes[position] = self._code(self.category_codes_by_name, listing["category"])
+        if "price_min" in listing:
+            self.price_min[position] = _price(listing["price_min"])
+        if "price_max" in listing:
+            self.price_max[position] = _price(listing["price_max"])
+        if "created_at" in listing:
+            self.created_at[position] = _epoch(listing["created_at"])
+        if "sold_count" in listing:
+            self.sold_count[position] = listing["sold_count"] or 0
+        if "name" in listing:
+            self.names[position] = (listing["name"] or "").lower()
+
+    def add(self, listing: Dict[str, Any]):
+        """Insert or update an active listing; other statuses are removed."""
+        listing_id = listing["listing_id"]
+        if "status" in listing and listing["status"] != "active":
+            self.remove(listing_id)
+            return
+
+        position = self.positions.get(listing_id)
+        if position is None:
+            if "seller_id" not in listing or "created_at" not in listing:
+                # Partial row for a listing not in the snapshot; the next rebuild picks it up
+                return
+            if self.size == len(self.ids):
+                self._grow()
+            position = self.size
+            self.size += 1
+            self.ids[position] = listing_id
+            self.alive[position] = True
+            self.positions[listing_id] = position
+
+        self._set(position, listing)
+
+    def remove(self, listing_id: int):
+        position = self.positions.pop(listing_id, None)
+        if position is None:
+            return
+
+        self.alive[position] = False
+        self.removed += 1
+        if self.removed > INITIAL_CAPACITY and self.removed > self.size * COMPACT_RATIO:
+            self._compact()
+
+    def _compact(self):
+        keep = np.flatnonzero(self.alive[:self.size])
+        for column in self._columns():
+            values = getattr(self, column)
+            values[:len(keep)] = values[keep]
+        self.alive[len(keep):self.size] = False
+        self.size = len(keep)
+        self.removed = 0
+        self.positions = {int(listing_id): position for position, listing_id in enumerate(self.ids[:self.size])}
+
+    def select(self, exclude_seller_id: Optional[UUID] = None, category: Optional[str] = None,
+               min_price: Optional[float] = None, max_price: Optional[float] = None,
+               listing_ids: Optional[List[int]] = None) -> "np.ndarray":
+        """Positions of rows matching the feed filters."""
+        size = self.size
+        mask = self.alive[:size].copy()
+
+        if exclude_seller_id is not None and str(exclude_seller_id) in self.seller_codes_by_id:
+            mask &= self.seller_codes[:size] != self.seller_codes_by_id[str(exclude_seller_id)]
+        if category:
+            code = self.category_codes_by_name.get(category)
+            if code is None:
+                return np.zeros(0, dtype=np.int64)
+            mask &= self.category_codes[:size] == code
+        with np.errstate(invalid="ignore"):
+            if min_price is not None:
+                mask &= self.price_min[:size] >= min_price
+            if max_price is not None:
+                mask &= self.price_max[:size] <= max_price
+        if listing_ids is not None:
+            mask &= np.isin(self.ids[:size], np.fromiter(listing_ids, dtype=np.int64, count=len(listing_ids)))
+
+        return np.flatnonzero(mask)
+
+    def order(self, positions: "np.ndarray", sort_by: Optional[str],
+              scores: Optional["np.ndarray"] = None) -> "np.ndarray":
+        """
+        Sort selected positions the way the feed sorts (see get_public_listings).
+        `scores` holds per-position relevance or popularity when sorting by those.
+        """
+        ids = self.ids[positions]
+        created_at = self.created_at[positions]
+
+        if sort_by in ("price_low_high", "price_high_low"):
+            prices = np.nan_to_num(self.price_min[positions], nan=0.0)
+            keys = (ids, prices) if sort_by == "price_low_high" else (-ids, -prices)
+            order = np.lexsort(keys)
+        elif sort_by in ("name_a_z", "name_z_a"):
+            order = np.argsort(self.names[positions], kind="stable")
+            if sort_by == "name_z_a":
+                order = order[::-1]
+        elif sort_by == "date_oldest":
+            order = np.lexsort((ids, created_at))
+        elif scores is not None:
+            order = np.lexsort((-created_at, -scores))
+        else:  # Default to newest
+            order = np.lexsort((-ids, -created_at))
+
+        return positions[order]
+
+
+# Global snapshot instance (active listings only)
+_listing_snapshot = ListingIndexHolder(
+    "active listing snapshot",
+    ActiveListingSnapshot,
+    SNAPSHOT_COLUMNS,
+    rebuild_interval_seconds=LISTING_SNAPSHOT_CONFIG["rebuild_interval_seconds"],
+    status="active",
+    warm=is_enabled()
+)
+
+
+async def select_listing_page(user_id: UUID, page: int, page_size: int, category: Optional[str] = None,
+                              min_price: Optional[float] = None, max_price: Optional[float] = None,
+                              sort_by: Optional[str] = "newest",
+                              search_scores: Optional[Dict[int, float]] = None,
+                              listing_ids: Optional[List[int]] = None) -> Dict[str, Any]:
+    """
+    Pick one feed page of active listings not owned by the user.
+    Returns the page's listing IDs in order and the total number of matches.
+    When `search_scores` and/or `listing_ids` (e.g. tag matches) are given
+    only listings in all of them are considered.
+    """
+    candidates = None
+    if search_scores is not None:
+        candidates = list(search_scores)
+    if listing_ids is not None:
+        candidates = listing_ids if candidates is None else list(set(candidates).intersection(listing_ids))
+
+    snapshot = await _listing_snapshot.get(user_id)
+    positions = snapshot.select(
+        exclude_seller_id=user_id,
+        category=category,
+        min_price=min_price,
+        max_price=max_price,
+        listing_ids=candidates
+    )
+
+    scores = None
+    if sort_by == "relevance" and search_scores:
+        scores = np.fromiter((search_scores.get(int(i), 0.0) for i in snapshot.ids[positions]),
+                             dtype=np.float64, count=len(positions))
+    elif sort_by == "popular":
+        selected_ids = [int(i) for i in snapshot.ids[positions]]
+        counts = await popularity.get_listing_popularity(selected_ids)
+        scores = np.fromiter((popularity.popularity_score(counts[i]) for i in selected_ids),
+                             dtype=np.float64, count=len(selected_ids))
+
+    ordered = snapshot.order(positions, sort_by, scores)
+    offset = (page - 1) * page_size
+    return {
+        "listing_ids": [int(i) for i in snapshot.ids[ordered[offset:offset + page_size]]],
+        "total_count": len(positions)
+    }
@@ -6,7 +6,16 @@ Handles product listing CRUD operations and queries.
 from typing import Dict, Any, List, Optional
 from fastapi import HTTPException
 from uuid import UUID
-from .base import get_authenticated_client, handle_database_error, validate_record_exists, calculate_pagination_offset
+from .base import get_authenticated_client, handle_database_error, validate_record_exists, calculate_pagination_offset, call_rpc
+from . import availability
+from . import popularity
+from . import listing_events
+from . import search as listing_search
+from . import listing_snapshot
+from . import tags as listing_tags
+from . import listing_cards
+from . import listing_ownership
+from . import postgres
 
 
 async def create_listing(user_id: UUID, listing_data: Dict[str, Any]) -> Dict[str, Any]:
@@ -26,6 +35,7 @@ async def create_listing(user_id: UUID, listing_data: Dict[str, Any]) -> Dict[st
         result = supabase.table("listings").insert(listing_data).execute()
         
         validate_record_exists(result.data, "Failed to create listing")
+        listing_events.publish_listing_changed(result.data[0])
         return result.data[0]
     except HTTPException:
         raise
@@ -33,6 +43,41 @@ async def create_listing(user_id: UUID, listing_data: Dict[str, Any]) -> Dict[st
         handle_database_error("create listing", e)
 
 
+async def create_listings(user_id: UUID, listings_data: List[Dict[str, Any]],
+                          meetup_time_slots: List[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """
+    Create several listings and all of their meetup time slots in one RPC
+    (sql/listings.sql), so either everything is created or nothing is.
+    `meetup_time_slots[i]` holds the slots of `listings_data[i]`.
+    Returns the created rows in input order.
+    """
+    try:
+        supabase = get_authenticated_client(user_id)
+        
+        if not listings_data:
+            return []
+        
+        created = call_rpc(supabase, "create_listings_with_slots", {
+            "p_listings": [
+                {**listing_data, "meetup_time_slots": slots}
+                for listing_data, slots in zip(listings_data, meetup_time_slots)
+            ]
+        })
+        if len(created) != len(listings_data):
+            raise HTTPException(status_code=500, detail="Failed to create listings")
+        
+        for listing in created:
+            listing_events.publish_listing_changed(listing)
+        if any(meetup_time_slots):
+            availability.invalidate_seller(user_id)
+        
+        return created
+    except HTTPException:
+        raise
+    except Exception as e:
+        handle_database_error("create listings", e)
+
+
 async def get_listings_by_ids(user_id: UUID, listing_ids: List[int], include_seller_info: bool = True) -> Dict[int, Dict[str, Any]]:
     """
     Get multiple listings by IDs with optimized batch queries.
@@ -190,36 +235,45 @@ async def get_listing_by_id(user_id: UUID, listing_id: int, include_seller_info:
         handle_database_error("get listing by ID", e)
 
 
+async def get_listing_summary(user_id: UUID, listing_id: int) -> Optional[Dict[str, Any]]:
+    """
+    Get the listing fields mutation routes need (owner, status, name, prices)
+    in one narrow query, without images, meetups or the seller profile.
+    Seeds the ownership cache.
+    """
+    try:
+        supabase = get_authenticated_client(user_id)
+        
+        result = supabase.table("listings").select(
+            "listing_id,seller_id,name,status,price_min,price_max,updated_at"
+        ).eq("listing_id", listing_id).execute()
+        
+        if not result.data:
+            return None
+        
+        listing_ownership.remember_listing_owner(result.data[0])
+        return result.data[0]
+    except Exception as e:
+        handle_database_error("get listing summary", e)
+
+
 async def get_public_listings(user_id: Optional[UUID] = None, page: int = 1, page_size: int = 20, 
                              category: Optional[str] = None, search: Optional[str] = None,
                              min_price: Optional[float] = None, max_price: Optional[float] = None,
-                             sort_by: Optional[str] = "newest") -> Dict[str, Any]:
+                             sort_by: Optional[str] = "newest", tags: Optional[List[str]] = None,
+                             match_all_tags: bool = True) -> Dict[str, Any]:
     """
     Get public listings (excluding user's own listings) with optimized batch queries.
     Includes inactive listings if the user has pending orders on them.
+    `tags` (normalized) filters to listings with all of them, or any when match_all_tags is False.
     """
     try:
         supabase = get_authenticated_client(user_id)
         
-        # First, get listings with active status
-        active_query = supabase.table("listings").select("""
-            listing_id,
-            seller_id,
-            name,
-            description,
-            category,
-            tags,
-            price_min,
-            price_max,
-            total_stock,
-            sold_count,
-            status,
-            created_at,
-            updated_at,
-            seller_meetup_locations,
-            transaction_methods,
-            payment_methods
-        """).eq("status", "active").neq("seller_id", user_id)
+        # First, get listing cards with active status
+        active_query = supabase.table("listing_cards").select(
+            listing_cards.CARD_COLUMNS, count="exact"
+        ).eq("status", "active").neq("seller_id", user_id)
         
         # Also get inactive listings where user has pending orders
         inactive_listings_with_orders = []
@@ -233,28 +287,60 @@ async def get_public_listings(user_id: Optional[UUID] = None, page: int = 1, pag
                 listing_ids_with_orders = list(set([order["listing_id"] for order in orders_result.data]))
                 
                 # Get inactive listings where user has pending orders
-                inactive_query = supabase.table("listings").select("""
-                    listing_id,
-                    seller_id,
-                    name,
-                    description,
-                    category,
-                    tags,
-                    price_min,
-                    price_max,
-                    total_stock,
-                    sold_count,
-                    status,
-                    created_at,
-                    updated_at,
-                    seller_meetup_locations,
-                    transaction_methods,
-                    payment_methods
-                """).eq("status", "inactive").neq("seller_id", user_id).in_("listing_id", listing_ids_with_orders)
+                inactive_query = supabase.table("listing_cards").select(
+                    listing_cards.CARD_COLUMNS
+                ).eq("status", "inactive").neq("seller_id", user_id).in_("listing_id", listing_ids_with_orders)
                 
                 inactive_result = inactive_query.execute()
                 inactive_listings_with_orders = inactive_result.data if inactive_result.data else []
         
+        tag_matches = await listing_tags.match_listings(user_id, tags, match_all_tags) if tags else None
+        
+        # Match listings with the search index under every filter, so no match is lost to the result cap;
+        # queries that send the IDs through the URL only take the best SEARCH_MAX_RESULTS of them
+        search_scores = {}
+        if search:
+            search_scores = await listing_search.match_listings(
+                user_id, search, status="active", exclude_seller_id=user_id,
+                category=category, min_price=min_price, max_price=max_price, listing_ids=tag_matches
+            )
+            if inactive_listings_with_orders:
+                search_scores.update(await listing_search.match_listings(
+                    user_id, search, category=category, min_price=min_price, max_price=max_price,
+                    listing_ids=[listing["listing_id"] for listing in inactive_listings_with_orders]
+                ))
+        
+        range_sort = not inactive_listings_with_orders and (sort_by or "newest") in listing_cards.RANGE_SORTS
+        
+        # Direct Postgres, when configured, takes precedence: one query returns the page and its count
+        if range_sort and postgres.is_enabled():
+            return await postgres.fetch_public_listing_page(
+                user_id, page, page_size, sort_by or "newest",
+                category=category,
+                min_price=min_price,
+                max_price=max_price,
+                listing_ids=list(search_scores) if search else None,
+                tags=tags,
+                match_all_tags=match_all_tags
+            )
+        
+        # Browse path: pick the page from the columnar snapshot and only hydrate its rows
+        if listing_snapshot.is_enabled() and not inactive_listings_with_orders:
+            selection = await listing_snapshot.select_listing_page(
+                user_id, page, page_size,
+                category=category,
+                min_price=min_price,
+                max_price=max_price,
+                sort_by=sort_by,
+                search_scores=search_scores if search else None,
+                listing_ids=tag_matches
+            )
+            listings_by_id = await listing_cards.get_listing_cards_by_ids(user_id, selection["listing_ids"])
+            return {
+                "listings": [listings_by_id[i] for i in selection["listing_ids"] if i in listings_by_id],
+                "total_count": selection["total_count"]
+            }
+        
         # Build the main query for active listings
         query = active_query
         
@@ -263,8 +349,10 @@ async def get_public_listings(user_id: Optional[UUID] = None, page: int = 1, pag
             query = query.eq("category", category)
         
         if search:
-            search_pattern = f"%{search}%"
-            query = query.ilike("name", search_pattern)
+            query = query.in_("listing_id", list(listing_search.best_matches(search_scores)))
+        
+        if tags:
+            query = listing_tags.filter_tag_list(query, tags, match_all_tags)
         
         if min_price is not None:
             query = query.gte("price_min", min_price)
@@ -272,6 +360,19 @@ async def get_public_listings(user_id: Optional[UUID] = None, page: int = 1, pag
         if max_price is not None:
             query = query.lte("price_max", max_price)
         
+        offset = calculate_pagination_offset(page, page_size)
+        
+        # Active listings only and a plain sort: the page and count come from one range query
+        if range_sort:
+            result = listing_cards.apply_range_sort(query, sort_by or "newest").range(
+                offset, offset + page_size - 1
+            ).execute()
+            total_count = getattr(result, 'count', None)
+            return {
+                "listings": [listing_cards.card_to_listing(card) for card in result.data or []],
+                "total_count": total_count if total_count is not None else len(result.data or [])
+            }
+        
         # Execute active listings query
         active_result = query.execute()
         active_listings = active_result.data if active_result.data else []
@@ -285,8 +386,14 @@ async def get_public_listings(user_id: Optional[UUID] = None, page: int = 1, pag
                     continue
                     
                 # Apply search filter
-                if search and search.lower() not in listing.get("name", "").lower():
+                if search and listing["listing_id"] not in search_scores:
                     continue
+                
+                # Apply tag filter
+                if tags:
+                    listing_tag_set = set(listing_tags.normalize_tags(listing.get("tags")))
+                    if not (listing_tag_set.issuperset(tags) if match_all_tags else listing_tag_set.intersection(tags)):
+                        continue
                     
                 # Apply price filters
                 if min_price is not None and listing.get("price_min", 0) < min_price:
@@ -301,23 +408,9 @@ async def get_public_listings(user_id: Optional[UUID] = None, page: int = 1, pag
         all_listings = active_listings + filtered_inactive_listings
         
         # Get total count for pagination (active + inactive with orders)
-        # For count query, we need to do the same logic
-        count_query = supabase.table("listings").select("listing_id", count="exact").eq("status", "active").neq("seller_id", user_id)
-        
-        # Apply same filters to count query for active listings
-        if category:
-            count_query = count_query.eq("category", category)
-        if search:
-            count_query = count_query.ilike("name", f"%{search}%")
-        if min_price is not None:
-            count_query = count_query.gte("price_min", min_price)
-        if max_price is not None:
-            count_query = count_query.lte("price_max", max_price)
-        
-        count_result = count_query.execute()
-        active_count = getattr(count_result, 'count', None)
+        active_count = getattr(active_result, 'count', None)
         if active_count is None:
-            active_count = len(count_result.data) if count_result.data else 0
+            active_count = len(active_listings)
         
         # Add count of filtered inactive listings with orders
         total_count = active_count + len(filtered_inactive_listings)
@@ -333,61 +426,23 @@ async def get_public_listings(user_id: Optional[UUID] = None, page: int = 1, pag
             all_listings.sort(key=lambda x: x.get("name", "").lower(), reverse=True)
         elif sort_by == "date_oldest":
             all_listings.sort(key=lambda x: x.get("created_at", ""))
+        elif sort_by == "relevance" and search:
+            listing_search.sort_by_relevance(all_listings, search_scores)
+        elif sort_by == "popular":
+            counts = await popularity.get_listing_popularity([listing["listing_id"] for listing in all_listings])
+            for listing in all_listings:
+                popularity.attach_popularity_fields(listing, counts[listing["listing_id"]])
+            all_listings.sort(
+                key=lambda x: (popularity.popularity_score(counts[x["listing_id"]]), x.get("created_at", "")),
+                reverse=True
+            )
         else:  # Default to newest
             all_listings.sort(key=lambda x: x.get("created_at", ""), reverse=True)
         
         # Apply pagination to combined and sorted listings
-        offset = calculate_pagination_offset(page, page_size)
         paginated_listings = all_listings[offset:offset + page_size]
         
-        listings = paginated_listings
-        
-        # Batch fetch related data for all listings
-        if listings:
-            # Get all unique seller IDs
-            seller_ids = list(set([listing["seller_id"] for listing in listings]))
-            listing_ids = [listing["listing_id"] for listing in listings]
-            
-            # Batch fetch user profiles
-            user_profiles = {}
-            if seller_ids:
-                user_result = supabase.table("user_profile").select("user_id, username, profile_photo_url").in_("user_id", seller_ids).execute()
-                if user_result.data:
-                    user_profiles = {str(profile["user_id"]): profile for profile in user_result.data}
-            
-            # Batch fetch images for all listings
-            images_result = supabase.table("listing_images").select("listing_id, image_id, image_url, is_primary").in_("listing_id", listing_ids).order("is_primary", desc=True).execute()
-            images_by_listing = {}
-            if images_result.data:
-                for img in images_result.data:
-                    listing_id = img["listing_id"]
-                    if listing_id not in images_by_listing:
-                        images_by_listing[listing_id] = []
-                    images_by_listing[listing_id].append(img)
-            
-            # Batch fetch meetup schedules for all listings
-            meetup_result = supabase.table("listing_meetup_time_details").select("listing_id, start_time, end_time").in_("listing_id", listing_ids).execute()
-            meetups_by_listing = {}
-            if meetup_result.data:
-                for meetup in meetup_result.data:
-                    listing_id = meetup["listing_id"]
-                    if listing_id not in meetups_by_listing:
-                        meetups_by_listing[listing_id] = []
-                    meetups_by_listing[listing_id].append(meetup)
-            
-            # Attach related data to each listing
-            for listing in listings:
-                seller_id = str(listing["seller_id"])
-                listing_id = listing["listing_id"]
-                
-                # Add user profile data
-                listing["user_profile"] = user_profiles.get(seller_id, {})
-                
-                # Add images data
-                listing["listing_images"] = images_by_listing.get(listing_id, [])
-                
-                # Add meetup data
-                listing["meetup_data"] = meetups_by_listing.get(listing_id, [])
+        listings = [listing_cards.card_to_listing(listing) for listing in paginated_listings]
         
         return {
             "listings": listings,
@@ -399,109 +454,88 @@ async def get_public_listings(user_id: Optional[UUID] = None, page: int = 1, pag
 
 async def get_user_listings(user_id: UUID, category: Optional[str] = None, 
                            search: Optional[str] = None, status: Optional[str] = None,
-                           sort_by: Optional[str] = "newest") -> List[Dict[str, Any]]:
+                           sort_by: Optional[str] = "newest", page: int = 1, page_size: int = 20,
+                           cursor: Optional[str] = None, summary: bool = False) -> Dict[str, Any]:
     """
-    Get user's own listings with optimized batch queries.
+    Get one page of a seller's listings from the listing cards.
+    Pages by offset (`page`) or, for the plain sorts, by keyset `cursor`;
+    `next_cursor` is set when more listings follow. The total count comes
+    from the count header of the page query. With `summary` only the
+    storefront summary columns are read and rows are returned as is.
     """
     try:
         supabase = get_authenticated_client(user_id)
+        columns = listing_cards.SUMMARY_COLUMNS if summary else listing_cards.CARD_COLUMNS
         
-        # Build base query for listings
-        query = supabase.table("listings").select("""
-            listing_id,
-            seller_id,
-            name,
-            description,
-            category,
-            tags,
-            price_min,
-            price_max,
-            total_stock,
-            sold_count,
-            status,
-            created_at,
-            updated_at,
-            seller_meetup_locations,
-            transaction_methods,
-            payment_methods
-        """).eq("seller_id", user_id)
-        
-        # Apply filters
-        if category:
-            query = query.eq("category", category)
-        
+        search_scores = {}
         if search:
-            search_pattern = f"%{search}%"
-            query = query.ilike("name", search_pattern)
+            search_scores = await listing_search.search_listings(
+                user_id, search, status=status, seller_id=user_id, category=category
+            )
         
-        if status:
-            query = query.eq("status", status)
-        
-        # Apply sorting
-        if sort_by == "price_low_high":
-            query = query.order("price_min", desc=False)
-        elif sort_by == "price_high_low":
-            query = query.order("price_min", desc=True)
-        elif sort_by == "name_a_z":
-            query = query.order("name", desc=False)
-        elif sort_by == "name_z_a":
-            query = query.order("name", desc=True)
-        elif sort_by == "date_oldest":
-            query = query.order("created_at", desc=False)
-        else:  # Default to newest
-            query = query.order("created_at", desc=True)
+        def build_query(select_columns: str):
+            # Build base query for listing cards
+            query = supabase.table("listing_cards").select(select_columns, count="exact").eq("seller_id", user_id)
+            
+            # Apply filters
+            if category:
+                query = query.eq("category", category)
+            if search:
+                query = query.in_("listing_id", list(search_scores))
+            if status:
+                query = query.eq("status", status)
+            return query
         
-        result = query.execute()
-        listings = result.data if result.data else []
+        offset = calculate_pagination_offset(page, page_size)
         
-        # Batch fetch related data for all listings
-        if listings:
-            # Get all unique seller IDs (should be just one for user listings)
-            seller_ids = list(set([listing["seller_id"] for listing in listings]))
-            listing_ids = [listing["listing_id"] for listing in listings]
+        if sort_by == "relevance" and search:
+            if cursor:
+                raise HTTPException(status_code=400, detail="Cursor pagination is not available for relevance sorting")
             
-            # Batch fetch user profiles
-            user_profiles = {}
-            if seller_ids:
-                user_result = supabase.table("user_profile").select("user_id, username, profile_photo_url").in_("user_id", seller_ids).execute()
-                if user_result.data:
-                    user_profiles = {str(profile["user_id"]): profile for profile in user_result.data}
-            
-            # Batch fetch images for all listings
-            images_result = supabase.table("listing_images").select("listing_id, image_id, image_url, is_primary").in_("listing_id", listing_ids).order("is_primary", desc=True).execute()
-            images_by_listing = {}
-            if images_result.data:
-                for img in images_result.data:
-                    listing_id = img["listing_id"]
-                    if listing_id not in images_by_listing:
-                        images_by_listing[listing_id] = []
-                    images_by_listing[listing_id].append(img)
+            # Rank the matching IDs, then read only the page's rows
+            matched = build_query("listing_id").execute().data or []
+            ranked = sorted(
+                (row["listing_id"] for row in matched),
+                key=lambda listing_id: -search_scores.get(listing_id, 0.0)
+            )
+            page_ids = ranked[offset:offset + page_size]
+            rows = []
+            if page_ids:
+                rows_by_id = {
+                    row["listing_id"]: row
+                    for row in supabase.table("listing_cards").select(columns).in_("listing_id", page_ids).execute().data or []
+                }
+                rows = [rows_by_id[listing_id] for listing_id in page_ids if listing_id in rows_by_id]
+            total_count = len(ranked)
+            next_cursor = None
+        else:
+            sort_key = sort_by if sort_by in listing_cards.RANGE_SORTS else "newest"
+            query = listing_cards.apply_range_sort(build_query(columns), sort_key)
             
-            # Batch fetch meetup schedules for all listings
-            meetup_result = supabase.table("listing_meetup_time_details").select("listing_id, start_time, end_time").in_("listing_id", listing_ids).execute()
-            meetups_by_listing = {}
-            if meetup_result.data:
-                for meetup in meetup_result.data:
-                    listing_id = meetup["listing_id"]
-                    if listing_id not in meetups_by_listing:
-                        meetups_by_listing[listing_id] = []
-                    meetups_by_listing[listing_id].append(meetup)
+            if cursor:
+                # Keyset page: one extra row tells whether another page follows
+                result = listing_cards.apply_cursor(query, sort_key, cursor).limit(page_size + 1).execute()
+                rows = result.data or []
+                has_more = len(rows) > page_size
+                rows = rows[:page_size]
+                total_count = getattr(build_query("listing_id").limit(1).execute(), 'count', None) or 0
+            else:
+                result = query.range(offset, offset + page_size - 1).execute()
+                rows = result.data or []
+                total_count = getattr(result, 'count', None)
+                if total_count is None:
+                    total_count = offset + len(rows)
+                has_more = offset + len(rows) < total_count
             
-            # Attach related data to each listing
-            for listing in listings:
-                seller_id = str(listing["seller_id"])
-                listing_id = listing["listing_id"]
-                
-                # Add user profile data
-                listing["user_profile"] = user_profiles.get(seller_id, {})
-                
-                # Add images data
-                listing["listing_images"] = images_by_listing.get(listing_id, [])
-                
-                # Add meetup data
-                listing["meetup_data"] = meetups_by_listing.get(listing_id, [])
+            next_cursor = listing_cards.encode_cursor(rows[-1], sort_key) if has_more and rows else None
         
-        return listings
+        return {
+            "listings": rows if summary else [listing_cards.card_to_listing(row) for row in rows],
+            "total_count": total_count,
+            "next_cursor": next_cursor
+        }
+    except HTTPException:
+        raise
     except Exception as e:
         handle_database_error("get user listings", e)
 
@@ -513,23 +547,17 @@ async def update_listing_status(user_id: UUID, listing_id: int, new_status: str)
     try:
         supabase = get_authenticated_client(user_id)
         
-        # First check if listing exists and belongs to user
-        listing_check = supabase.table("listings").select("listing_id,seller_id,name,status").eq("listing_id", listing_id).execute()
-        
-        validate_record_exists(listing_check.data, "Listing not found")
-        listing = listing_check.data[0]
-        
-        # Check ownership
-        if listing["seller_id"] != user_id:
-            raise HTTPException(status_code=403, detail="You can only update your own listings")
-        
-        # Update the status
+        # Update the status; the seller predicate is the ownership check
         result = supabase.table("listings").update({
             "status": new_status,
             "updated_at": "now()"
         }).eq("listing_id", listing_id).eq("seller_id", user_id).execute()
         
-        validate_record_exists(result.data, "Failed to update listing status")
+        if not result.data:
+            await listing_ownership.raise_for_missed_write(
+                user_id, listing_id, "You can only update your own listings", "Failed to update listing status"
+            )
+        listing_events.publish_listing_changed(result.data[0])
         return result.data[0]
     except HTTPException:
         raise
@@ -537,6 +565,70 @@ async def update_listing_status(user_id: UUID, listing_id: int, new_status: str)
         handle_database_error("update listing status", e)
 
 
+async def update_listings_status(user_id: UUID, listing_ids: List[int], new_status: str) -> List[Dict[str, Any]]:
+    """
+    Set the status of many listings owned by the user with one filtered
+    update. Returns one result per requested listing ID, in order, with
+    `success`, `old_status`, `new_status` and `error`.
+    """
+    try:
+        supabase = get_authenticated_client(user_id)
+        
+        listing_ids = list(dict.fromkeys(listing_ids))
+        if not listing_ids:
+            return []
+        
+        current = supabase.table("listings").select("listing_id,seller_id,status").in_("listing_id", listing_ids).execute()
+        current_by_id = {listing["listing_id"]: listing for listing in current.data or []}
+        
+        to_update = [
+            listing_id for listing_id in listing_ids
+            if listing_id in current_by_id
+            and str(current_by_id[listing_id]["seller_id"]) == str(user_id)
+            and current_by_id[listing_id]["status"] != new_status
+        ]
+        
+        updated_by_id = {}
+        if to_update:
+            # The seller predicate keeps the write owner-scoped
+            result = supabase.table("listings").update({
+                "status": new_status,
+                "updated_at": "now()"
+            }).in_("listing_id", to_update).eq("seller_id", user_id).execute()
+            
+            for listing in result.data or []:
+                updated_by_id[listing["listing_id"]] = listing
+                listing_events.publish_listing_changed(listing)
+        
+        results = []
+        for listing_id in listing_ids:
+            listing = current_by_id.get(listing_id)
+            item = {
+                "listing_id": listing_id,
+                "success": False,
+                "old_status": listing["status"] if listing else None,
+                "new_status": None,
+                "error": None
+            }
+            if listing is None:
+                item["error"] = "Listing not found"
+            elif str(listing["seller_id"]) != str(user_id):
+                item["error"] = "You can only update your own listings"
+            elif listing["status"] == new_status:
+                item.update(success=True, new_status=new_status)
+            elif listing_id in updated_by_id:
+                item.update(success=True, new_status=updated_by_id[listing_id]["status"])
+            else:
+                item["error"] = "Failed to update listing status"
+            results.append(item)
+        
+        return results
+    except HTTPException:
+        raise
+    except Exception as e:
+        handle_database_error("update listings status", e)
+
+
 async def update_listing(user_id: UUID, listing_id: int, update_data: Dict[str, Any]) -> Dict[str, Any]:
     """
     Update listing information. Only the owner can update.
@@ -544,19 +636,17 @@ async def update_listing(user_id: UUID, listing_id: int, update_data: Dict[str,
     try:
         supabase = get_authenticated_client(user_id)
         
-        # First check ownership
-        listing = await get_listing_by_id(user_id, listing_id, include_seller_info=False)
-        validate_record_exists(listing, "Listing not found")
-        
-        if listing["seller_id"] != user_id:
-            raise HTTPException(status_code=403, detail="You can only update your own listings")
-        
         # Add updated timestamp
         update_data["updated_at"] = "now()"
         
-        result = supabase.table("listings").update(update_data).eq("listing_id", listing_id).execute()
+        # The seller predicate is the ownership check
+        result = supabase.table("listings").update(update_data).eq("listing_id", listing_id).eq("seller_id", user_id).execute()
         
-        validate_record_exists(result.data, "Failed to update listing")
+        if not result.data:
+            await listing_ownership.raise_for_missed_write(
+                user_id, listing_id, "You can only update your own listings", "Failed to update listing"
+            )
+        listing_events.publish_listing_changed(result.data[0])
         return result.data[0]
     except HTTPException:
         raise
@@ -571,16 +661,15 @@ async def delete_listing(user_id: UUID, listing_id: int) -> bool:
     try:
         supabase = get_authenticated_client(user_id)
         
-        # First check ownership
-        listing = await get_listing_by_id(user_id, listing_id, include_seller_info=False)
-        validate_record_exists(listing, "Listing not found")
-        
-        if listing["seller_id"] != user_id:
-            raise HTTPException(status_code=403, detail="You can only delete your own listings")
-        
-        # Delete the listing
+        # Delete the listing; the seller predicate is the ownership check
         result = supabase.table("listings").delete().eq("listing_id", listing_id).eq("seller_id", user_id).execute()
         
+        if not result.data:
+            await listing_ownership.raise_for_missed_write(
+                user_id, listing_id, "You can only delete your own listings", "Listing not found"
+            )
+        listing_events.publish_listing_deleted(listing_id)
+        
         return True
     except HTTPException:
         raise
@@ -602,27 +691,32 @@ async def get_listing_meetup_times(user_id: UUID, listing_id: int) -> List[Dict[
         handle_database_error("get listing meetup times", e)
 
 
+def _insert_listing_meetup_times(user_id: UUID, listing_id: int, time_slots: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    supabase = get_authenticated_client(user_id)
+    
+    # Add listing_id to each time slot
+    for slot in time_slots:
+        slot["listing_id"] = listing_id
+    
+    result = supabase.table("listing_meetup_time_details").insert(time_slots).execute()
+    availability.invalidate_seller(user_id)
+    
+    return result.data if result.data else []
+
+
+def _delete_listing_meetup_times(user_id: UUID, listing_id: int):
+    supabase = get_authenticated_client(user_id)
+    supabase.table("listing_meetup_time_details").delete().eq("listing_id", listing_id).execute()
+    availability.invalidate_seller(user_id)
+
+
 async def add_listing_meetup_times(user_id: UUID, listing_id: int, time_slots: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     """
     Add meetup time slots to a listing.
     """
     try:
-        supabase = get_authenticated_client(user_id)
-        
-        # First verify ownership
-        listing = await get_listing_by_id(user_id, listing_id, include_seller_info=False)
-        validate_record_exists(listing, "Listing not found")
-        
-        if listing["seller_id"] != user_id:
-            raise HTTPException(status_code=403, detail="You can only modify your own listings")
-        
-        # Add listing_id to each time slot
-        for slot in time_slots:
-            slot["listing_id"] = listing_id
-        
-        result = supabase.table("listing_meetup_time_details").insert(time_slots).execute()
-        
-        return result.data if result.data else []
+        await listing_ownership.ensure_listing_owner(user_id, listing_id)
+        return _insert_listing_meetup_times(user_id, listing_id, time_slots)
     except HTTPException:
         raise
     except Exception as e:
@@ -634,18 +728,8 @@ async def delete_listing_meetup_times(user_id: UUID, listing_id: int) -> bool:
     Delete all meetup time slots for a listing.
     """
     try:
-        supabase = get_authenticated_client(user_id)
-        
-        # First verify ownership
-        listing = await get_listing_by_id(user_id, listing_id, include_seller_info=False)
-        validate_record_exists(listing, "Listing not found")
-        
-        if listing["seller_id"] != user_id:
-            raise HTTPException(status_code=403, detail="You can only modify your own listings")
-        
-        # Delete all meetup time slots for this listing
-        result = supabase.table("listing_meetup_time_details").delete().eq("listing_id", listing_id).execute()
-        
+        await listing_ownership.ensure_listing_owner(user_id, listing_id)
+        _delete_listing_meetup_times(user_id, listing_id)
         return True
     except HTTPException:
         raise
@@ -656,14 +740,17 @@ async def delete_listing_meetup_times(user_id: UUID, listing_id: int) -> bool:
 async def update_listing_meetup_times(user_id: UUID, listing_id: int, time_slots: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     """
     Replace all meetup time slots for a listing with new ones.
+    Ownership is checked once for both steps.
     """
     try:
+        await listing_ownership.ensure_listing_owner(user_id, listing_id)
+        
         # First delete existing time slots
-        await delete_listing_meetup_times(user_id, listing_id)
+        _delete_listing_meetup_times(user_id, listing_id)
         
         # Then add new time slots if any are provided
         if time_slots:
-            return await add_listing_meetup_times(user_id, listing_id, time_slots)
+            return _insert_listing_meetup_times(user_id, listing_id, time_slots)
         
         return []
     except HTTPException:
@@ -753,3 +840,28 @@ async def get_seller_listing_count(user_id: UUID, seller_id: UUID) -> int:
     except Exception as e:
         handle_database_error("get seller listing count", e)
         return 0
+
+
+async def get_seller_listing_counts(user_id: UUID, seller_ids: List[UUID]) -> Dict[str, int]:
+    """
+    Get active listing counts for several sellers in one query.
+    Returns a dictionary mapping str(seller_id) to count.
+    """
+    try:
+        supabase = get_authenticated_client(user_id)
+        
+        if not seller_ids:
+            return {}
+        
+        result = supabase.table("listings").select(
+            "seller_id"
+        ).in_("seller_id", [str(seller_id) for seller_id in seller_ids]).eq("status", "active").execute()
+        
+        counts = {str(seller_id): 0 for seller_id in seller_ids}
+        for listing in result.data or []:
+            counts[str(listing["seller_id"])] = counts.get(str(listing["seller_id"]), 0) + 1
+        
+        return counts
+    except Exception as e:
+        handle_database_error("get seller listing counts", e)
+        return {}
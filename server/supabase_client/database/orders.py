@@ -7,6 +7,8 @@ from typing import Dict, Any, List, Optional
 from fastapi import HTTPException
 from uuid import UUID
 from .base import get_authenticated_client, handle_database_error, calculate_pagination_offset, validate_record_exists, validate_user_access
+from . import listing_events
+from . import postgres
 
 
 async def check_existing_pending_orders(user_id: UUID, listing_id: int) -> bool:
@@ -131,6 +133,9 @@ async def get_user_orders(user_id: UUID, page: int = 1, page_size: int = 20,
     Get user's orders with pagination and filtering.
     """
     try:
+        if postgres.is_enabled():
+            return await postgres.fetch_user_orders(user_id, page, page_size, status=status, as_buyer=as_buyer)
+        
         supabase = get_authenticated_client(user_id)
         
         # Build base query
@@ -352,6 +357,7 @@ async def update_listing_stock(user_id: UUID, listing_id: int, quantity: int) ->
         result = supabase.table("listings").update(update_data).eq("listing_id", listing_id).execute()
         
         validate_record_exists(result.data, "Failed to update listing stock")
+        listing_events.publish_listing_changed(result.data[0])
     except HTTPException:
         raise
     except Exception as e:
@@ -394,6 +400,7 @@ async def restore_listing_stock(user_id: UUID, listing_id: int, quantity: int) -
         result = supabase.table("listings").update(update_data).eq("listing_id", listing_id).execute()
         
         validate_record_exists(result.data, "Failed to restore listing stock")
+        listing_events.publish_listing_changed(result.data[0])
     except HTTPException:
         raise
     except Exception as e:
@@ -426,6 +433,7 @@ async def set_listing_sold_out(user_id: UUID, listing_id: int) -> None:
             }).eq("listing_id", listing_id).execute()
             
             validate_record_exists(result.data, "Failed to update listing to sold_out")
+            listing_events.publish_listing_changed(result.data[0])
             
     except HTTPException:
         raise
@@ -0,0 +1,247 @@
+"""
+Listing popularity counter operations.
+Favorite, view and order increments are combined in an in-memory buffer and
+flushed periodically as one batched upsert, so request handlers never write
+counters synchronously. Reads are served from a periodically reloaded
+snapshot of the counters table plus the deltas not yet flushed.
+"""
+
+import asyncio
+import threading
+import time
+from typing import Dict, Any, List, Optional
+from core.config import POPULARITY_CONFIG
+from supabase_client.auth_client import get_service_role_supabase_client
+
+
+POPULARITY_FIELDS = ("favorites", "views", "orders")
+POPULARITY_COLUMNS = {"favorites": "favorite_count", "views": "view_count", "orders": "order_count"}
+
+# Weights used by the `popular` sort mode
+POPULARITY_WEIGHTS = {"favorites": 3, "views": 1, "orders": 5}
+
+SNAPSHOT_PAGE_SIZE = 1000
+
+
+class PopularityCounterBuffer:
+    """
+    Thread-safe write-combining buffer of pending counter deltas.
+    Many increments to the same listing collapse into a single entry.
+    """
+
+    def __init__(self):
+        self._pending: Dict[int, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, listing_id: int, field: str, delta: int = 1):
+        with self._lock:
+            counts = self._pending.setdefault(listing_id, dict.fromkeys(POPULARITY_FIELDS, 0))
+            counts[field] += delta
+
+    def pending_for(self, listing_id: int) -> Optional[Dict[str, int]]:
+        with self._lock:
+            counts = self._pending.get(listing_id)
+            return dict(counts) if counts else None
+
+    def drain(self) -> Dict[int, Dict[str, int]]:
+        """Take all pending deltas, leaving the buffer empty."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            return pending
+
+    def restore(self, deltas: Dict[int, Dict[str, int]]):
+        """Merge deltas from a failed flush back in so they are retried."""
+        with self._lock:
+            for listing_id, counts in deltas.items():
+                merged = self._pending.setdefault(listing_id, dict.fromkeys(POPULARITY_FIELDS, 0))
+                for field in POPULARITY_FIELDS:
+                    merged[field] += counts[field]
+
+    def size(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+
+class PopularitySnapshot:
+    """
+    In-memory copy of the listing_popularity table.
+    Flushed deltas are applied to it directly; a full reload after the max
+    age picks up increments flushed by other workers.
+    """
+
+    def __init__(self, max_age_seconds: int = 60):
+        self.max_age_seconds = max_age_seconds
+        self.loaded_at = 0.0
+        self._counts: Dict[int, Dict[str, int]] = {}
+        self._lock = threading.RLock()
+
+    def is_stale(self) -> bool:
+        return time.time() - self.loaded_at >= self.max_age_seconds
+
+    def replace(self, counts: Dict[int, Dict[str, int]]):
+        with self._lock:
+            self._counts = counts
+            self.loaded_at = time.time()
+
+    def apply(self, deltas: Dict[int, Dict[str, int]]):
+        with self._lock:
+            for listing_id, delta in deltas.items():
+                counts = self._counts.setdefault(listing_id, dict.fromkeys(POPULARITY_FIELDS, 0))
+                for field in POPULARITY_FIELDS:
+                    counts[field] = max(counts[field] + delta[field], 0)
+
+    def get(self, listing_id: int) -> Dict[str, int]:
+        with self._lock:
+            counts = self._counts.get(listing_id)
+            return dict(counts) if counts else dict.fromkeys(POPULARITY_FIELDS, 0)
+
+
+# Global instances
+_counter_buffer = PopularityCounterBuffer()
+_popularity_snapshot = PopularitySnapshot(max_age_seconds=POPULARITY_CONFIG["snapshot_max_age_seconds"])
+_snapshot_lock = asyncio.Lock()
+_flush_task: Optional[asyncio.Task] = None
+
+
+def record_favorite(listing_id: int, delta: int = 1) -> None:
+    """Buffer a favorite being added (delta=1) or removed (delta=-1)."""
+    _counter_buffer.record(listing_id, "favorites", delta)
+
+
+def record_view(listing_id: int) -> None:
+    """Buffer a listing detail view."""
+    _counter_buffer.record(listing_id, "views")
+
+
+def record_order(listing_id: int) -> None:
+    """Buffer an order being placed on a listing."""
+    _counter_buffer.record(listing_id, "orders")
+
+
+def _load_snapshot_rows() -> Dict[int, Dict[str, int]]:
+    supabase = get_service_role_supabase_client()
+    if not supabase:
+        raise Exception("Service role client is not configured")
+
+    counts = {}
+    offset = 0
+    while True:
+        result = supabase.table("listing_popularity").select(
+            "listing_id,favorite_count,view_count,order_count"
+        ).order("listing_id").range(offset, offset + SNAPSHOT_PAGE_SIZE - 1).execute()
+        rows = result.data or []
+
+        for row in rows:
+            counts[row["listing_id"]] = {
+                field: row[column] or 0 for field, column in POPULARITY_COLUMNS.items()
+            }
+
+        if len(rows) < SNAPSHOT_PAGE_SIZE:
+            return counts
+        offset += SNAPSHOT_PAGE_SIZE
+
+
+async def refresh_popularity_snapshot(force: bool = False) -> None:
+    """Reload the counters snapshot if it is stale (or when forced)."""
+    if not force and not _popularity_snapshot.is_stale():
+        return
+
+    async with _snapshot_lock:
+        if not force and not _popularity_snapshot.is_stale():
+            return
+        try:
+            _popularity_snapshot.replace(await asyncio.to_thread(_load_snapshot_rows))
+        except Exception as e:
+            # Keep serving the previous snapshot; retry on the next read
+            print(f"Warning: Failed to load listing popularity snapshot: {e}")
+            _popularity_snapshot.loaded_at = time.time()
+
+
+async def get_listing_popularity(listing_ids: List[int]) -> Dict[int, Dict[str, int]]:
+    """
+    Get favorites, views and orders for each listing, including increments
+    still waiting in the buffer.
+    """
+    await refresh_popularity_snapshot()
+
+    popularity = {}
+    for listing_id in listing_ids:
+        counts = _popularity_snapshot.get(listing_id)
+        pending = _counter_buffer.pending_for(listing_id)
+        if pending:
+            for field in POPULARITY_FIELDS:
+                counts[field] = max(counts[field] + pending[field], 0)
+        popularity[listing_id] = counts
+    return popularity
+
+
+def popularity_score(counts: Dict[str, int]) -> int:
+    """Weighted popularity used by the `popular` sort mode."""
+    return sum(POPULARITY_WEIGHTS[field] * counts[field] for field in POPULARITY_FIELDS)
+
+
+def attach_popularity_fields(listing: Dict[str, Any], counts: Dict[str, int]) -> None:
+    """Set favorite_count, view_count and order_count on a listing record."""
+    for field, column in POPULARITY_COLUMNS.items():
+        listing[column] = counts[field]
+
+
+def _apply_deltas(deltas: Dict[int, Dict[str, int]]) -> None:
+    supabase = get_service_role_supabase_client()
+    if not supabase:
+        raise Exception("Service role client is not configured")
+
+    supabase.rpc("apply_listing_popularity_deltas", {
+        "p_deltas": [{"listing_id": listing_id, **counts} for listing_id, counts in deltas.items()]
+    }).execute()
+
+
+async def flush_popularity_counters() -> int:
+    """
+    Write all buffered deltas as one batched upsert.
+    Returns the number of listings flushed; on failure the deltas are put
+    back into the buffer for the next flush.
+    """
+    deltas = {
+        listing_id: counts
+        for listing_id, counts in _counter_buffer.drain().items()
+        if any(counts.values())
+    }
+    if not deltas:
+        return 0
+
+    try:
+        await asyncio.to_thread(_apply_deltas, deltas)
+    except Exception as e:
+        print(f"Warning: Failed to flush listing popularity counters: {e}")
+        _counter_buffer.restore(deltas)
+        return 0
+
+    _popularity_snapshot.apply(deltas)
+    return len(deltas)
+
+
+async def _flush_loop(interval_seconds: float):
+    while True:
+        await asyncio.sleep(interval_seconds)
+        await flush_popularity_counters()
+
+
+def start_popularity_flusher() -> None:
+    """Start the periodic flush task on the running event loop."""
+    global _flush_task
+    if _flush_task is None or _flush_task.done():
+        _flush_task = asyncio.create_task(_flush_loop(POPULARITY_CONFIG["flush_interval_seconds"]))
+
+
+async def stop_popularity_flusher() -> None:
+    """Stop the periodic flush task and write out what is still buffered."""
+    global _flush_task
+    if _flush_task is not None:
+        _flush_task.cancel()
+        try:
+            await _flush_task
+        except asyncio.CancelledError:
+            pass
+        _flush_task = None
+    await flush_popularity_counters()
@@ -0,0 +1,278 @@
+"""
+Direct Postgres read path for heavy read endpoints.
+Runs single joined queries over a pooled async psycopg connection instead of
+one PostgREST request per table. Each query runs in its own transaction as
+the `authenticated` role with the caller's JWT claims set, so the same RLS
+policies apply as through PostgREST. Optional: used only when
+POSTGRES_DIRECT_READS_ENABLED is set, SUPABASE_DB_URL is configured and
+psycopg_pool is installed; otherwise callers keep using PostgREST.
+"""
+
+import asyncio
+import json
+import time
+from typing import Dict, Any, List, Optional
+from uuid import UUID
+from core.config import POSTGRES_CONFIG, STORAGE_BACKEND_CONFIG
+from core.ledger import record_call
+from .base import handle_database_error
+from . import listing_cards
+
+# psycopg is optional and slow to import, so it is imported on first use
+sql = None
+dict_row = None
+AsyncConnectionPool = None
+
+
+def _import_driver() -> bool:
+    global sql, dict_row, AsyncConnectionPool
+    if AsyncConnectionPool is None:
+        try:
+            from psycopg import sql as psycopg_sql
+            from psycopg.rows import dict_row as psycopg_dict_row
+            from psycopg_pool import AsyncConnectionPool as PsycopgAsyncConnectionPool
+        except ImportError:  # pragma: no cover - optional dependency
+            return False
+        sql, dict_row, AsyncConnectionPool = psycopg_sql, psycopg_dict_row, PsycopgAsyncConnectionPool
+    return True
+
+
+_pool: Optional["AsyncConnectionPool"] = None
+_pool_lock = asyncio.Lock()
+
+
+def is_enabled() -> bool:
+    return (
+        POSTGRES_CONFIG["enabled"] and bool(POSTGRES_CONFIG["dsn"])
+        and STORAGE_BACKEND_CONFIG["backend"] == "postgrest" and _import_driver()
+    )
+
+
+async def get_pool() -> "AsyncConnectionPool":
+    """Open the shared connection pool on first use."""
+    global _pool
+    if _pool is None:
+        async with _pool_lock:
+            if _pool is None:
+                pool = AsyncConnectionPool(
+                    POSTGRES_CONFIG["dsn"],
+                    min_size=POSTGRES_CONFIG["min_size"],
+                    max_size=POSTGRES_CONFIG["max_size"],
+                    # Server-side prepared statements break behind a transaction-mode pooler
+                    kwargs={"row_factory": dict_row, "prepare_threshold": None},
+                    open=False
+                )
+                await pool.open()
+                _pool = pool
+    return _pool
+
+
+async def close_pool():
+    global _pool
+    if _pool is not None:
+        await _pool.close()
+        _pool = None
+
+
+async def fetch_all(user_id: UUID, query, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Run one read query as `user_id` (RLS claims set for the transaction only)."""
+    pool = await get_pool()
+    started_at = time.perf_counter()
+    async with pool.connection() as conn:
+        async with conn.transaction():
+            await conn.execute(
+                "select set_config('role', 'authenticated', true),"
+                " set_config('request.jwt.claims', %(claims)s, true),"
+                " set_config('request.jwt.claim.sub', %(sub)s, true),"
+                " set_config('statement_timeout', %(timeout)s, true)",
+                {
+                    "claims": json.dumps({"sub": str(user_id), "role": "authenticated"}),
+                    "sub": str(user_id),
+                    "timeout": str(POSTGRES_CONFIG["statement_timeout_ms"])
+                }
+            )
+            cursor = await conn.execute(query, params)
+            rows = await cursor.fetchall()
+    record_call("postgres", "query", time.perf_counter() - started_at)
+    return rows
+
+
+def _card_columns(alias: str) -> "sql.Composed":
+    return sql.SQL(", ").join(
+        sql.Identifier(alias, column) for column in listing_cards.CARD_COLUMNS.split(",")
+    )
+
+
+async def _fetch_page(user_id: UUID, select_list, from_clause, where_clause, order_clause,
+                      params: Dict[str, Any], limit: Optional[int], offset: int) -> Dict[str, Any]:
+    """
+    Run a paged query with a window count. A page past the end carries no
+    count, so only then is a separate count query run.
+    """
+    rows = await fetch_all(user_id, sql.SQL(
+        "select {select_list}, count(*) over () as total_count from {from_clause}"
+        " where {where_clause} order by {order_clause} limit %(limit)s offset %(offset)s"
+    ).format(
+        select_list=select_list, from_clause=from_clause,
+        where_clause=where_clause, order_clause=order_clause
+    ), {**params, "limit": limit, "offset": offset})
+
+    if rows:
+        total_count = rows[0]["total_count"]
+        for row in rows:
+            del row["total_count"]
+    elif offset == 0:
+        total_count = 0
+    else:
+        count_rows = await fetch_all(user_id, sql.SQL(
+            "select count(*) as total_count from {from_clause} where {where_clause}"
+        ).format(from_clause=from_clause, where_clause=where_clause), params)
+        total_count = count_rows[0]["total_count"]
+
+    return {"rows": rows, "total_count": total_count}
+
+
+async def fetch_public_listing_page(user_id: UUID, page: int, page_size: int, sort_by: str,
+                                    category: Optional[str] = None, min_price: Optional[float] = None,
+                                    max_price: Optional[float] = None, listing_ids: Optional[List[int]] = None,
+                                    tags: Optional[List[str]] = None, match_all_tags: bool = True) -> Dict[str, Any]:
+    """
+    One feed page of active listing cards not owned by the user, with the
+    total match count, in a single query. `sort_by` must be a RANGE_SORTS mode.
+    """
+    try:
+        column, descending = listing_cards.RANGE_SORTS[sort_by]
+        direction = sql.SQL("desc" if descending else "asc")
+
+        result = await _fetch_page(
+            user_id,
+            _card_columns("c"),
+            sql.SQL("listing_cards c"),
+            sql.SQL("""
+                c.status = 'active'
+                and c.seller_id <> %(user_id)s
+                and (%(category)s::text is null or c.category = %(category)s)
+                and (%(min_price)s::numeric is null or c.price_min >= %(min_price)s)
+                and (%(max_price)s::numeric is null or c.price_max <= %(max_price)s)
+                and (%(listing_ids)s::bigint[] is null or c.listing_id = any(%(listing_ids)s))
+                and (%(tags)s::text[] is null
+                     or (%(match_all)s and c.tag_list @> %(tags)s)
+                     or (not %(match_all)s and c.tag_list && %(tags)s))
+            """),
+            sql.SQL("{column} {direction}, c.listing_id {direction}").format(
+                column=sql.Identifier("c", column), direction=direction
+            ),
+            {
+                "user_id": str(user_id),
+                "category": category,
+                "min_price": min_price,
+                "max_price": max_price,
+                "listing_ids": listing_ids,
+                "tags": tags,
+                "match_all": match_all_tags
+            },
+            page_size,
+            (page - 1) * page_size
+        )
+        return {
+            "listings": [listing_cards.card_to_listing(row) for row in result["rows"]],
+            "total_count": result["total_count"]
+        }
+    except Exception as e:
+        handle_database_error("fetch public listing page", e)
+
+
+async def fetch_user_orders(user_id: UUID, page: int, page_size: int, status: Optional[str] = None,
+                            as_buyer: Optional[bool] = None) -> Dict[str, Any]:
+    """
+    One page of the user's orders, each with its listing card, buyer profile
+    and meetups embedded, plus the total count, in a single query.
+    """
+    try:
+        result = await _fetch_page(
+            user_id,
+            sql.SQL("""
+                o.order_id, o.buyer_id, o.seller_id, o.listing_id, o.quantity,
+                o.buyer_requested_price, o.price_at_purchase, o.status,
+                o.transaction_method, o.payment_method, o.placed_at,
+                (select to_jsonb(c) - 'tag_list' from listing_cards c where c.listing_id = o.listing_id) as listing_data,
+                coalesce((select jsonb_agg(to_jsonb(m) order by m.changed_at desc)
+                          from meetups m where m.order_id = o.order_id), '[]'::jsonb) as meetups_data,
+                (select jsonb_build_object('username', b.username, 'profile_photo_url', b.profile_photo_url)
+                 from user_profile b where b.user_id = o.buyer_id) as buyer_data
+            """),
+            sql.SQL("orders o"),
+            sql.SQL("""
+                case
+                    when %(as_buyer)s::boolean is null then o.buyer_id = %(user_id)s or o.seller_id = %(user_id)s
+                    when %(as_buyer)s::boolean then o.buyer_id = %(user_id)s
+                    else o.seller_id = %(user_id)s
+                end
+                and (%(status)s::text is null or o.status = %(status)s)
+            """),
+            sql.SQL("o.placed_at desc, o.order_id desc"),
+            {"user_id": str(user_id), "as_buyer": as_buyer, "status": status},
+            page_size,
+            (page - 1) * page_size
+        )
+
+        rows = result["rows"]
+        for row in rows:
+            if row["listing_data"] is not None:
+                row["listing_data"] = listing_cards.card_to_listing(row["listing_data"])
+            row["buyer_data"] = row["buyer_data"] or {}
+
+        return {
+            "orders": rows,
+            "total_count": result["total_count"],
+            "page": page,
+            "page_size": page_size
+        }
+    except Exception as e:
+        handle_database_error("fetch user orders", e)
+
+
+async def fetch_favorite_listings_page(user_id: UUID, page: int = 1, page_size: Optional[int] = None,
+                                       sort_order: str = "newest") -> Dict[str, Any]:
+    """
+    A page of the user's favorites joined to their listing cards (`listing`)
+    with the total count, in a single query.
+    """
+    try:
+        result = await _fetch_page(
+            user_id,
+            sql.SQL("""
+                f.listing_id, f.favorited_at,
+                (select to_jsonb(c) - 'tag_list' from listing_cards c where c.listing_id = f.listing_id) as listing
+            """),
+            sql.SQL("user_favorites f"),
+            sql.SQL("f.user_id = %(user_id)s"),
+            sql.SQL("f.favorited_at asc" if sort_order == "oldest" else "f.favorited_at desc"),
+            {"user_id": str(user_id)},
+            page_size,
+            (page - 1) * page_size if page_size is not None else 0
+        )
+
+        rows = result["rows"]
+        for row in rows:
+            if row["listing"] is not None:
+                row["listing"] = listing_cards.card_to_listing(row["listing"])
+
+        return {
+            "favorites": rows,
+            "total_count": result["total_count"]
+        }
+    except Exception as e:
+        handle_database_error("fetch favorite listings page", e)
+
+
+async def fetch_seller_orders_for_rollup(user_id: UUID) -> List[Dict[str, Any]]:
+    """The columns of a seller's orders the sales aggregates are built from."""
+    try:
+        return await fetch_all(user_id, sql.SQL("""
+            select listing_id, quantity, price_at_purchase, status, placed_at::text as placed_at
+            from orders
+            where seller_id = %(user_id)s
+        """), {"user_id": str(user_id)})
+    except Exception as e:
+        handle_database_error("fetch seller orders for rollup", e)
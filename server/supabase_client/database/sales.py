@@ -0,0 +1,163 @@
+"""
+Seller sales aggregate operations.
+Maintains per-seller dashboard aggregates (status counts, revenue, units per
+listing, daily series) incrementally as orders are created and transition,
+with a periodic full rollup from the orders table to bound drift.
+"""
+
+from datetime import date, timedelta
+from typing import Dict, Any, Optional
+from uuid import UUID
+from core.config import SALES_SUMMARY_CONFIG
+from core.cache import TTLCache
+from .base import get_authenticated_client, handle_database_error
+from . import postgres
+
+
+REVENUE_STATUS = "completed"
+
+
+class SellerSalesAggregates:
+    """Running totals for one seller's orders."""
+
+    def __init__(self):
+        self.status_counts: Dict[str, int] = {}
+        self.gross_revenue = 0.0
+        self.listings: Dict[int, Dict[str, float]] = {}
+        self.daily: Dict[str, Dict[str, float]] = {}
+
+    def apply(self, order: Dict[str, Any], sign: int):
+        """Add (sign=1) or remove (sign=-1) a single order's contribution."""
+        status = order.get("status") or "pending"
+        quantity = order.get("quantity") or 0
+        day = str(order.get("placed_at") or "")[:10]
+
+        self.status_counts[status] = self.status_counts.get(status, 0) + sign
+        if self.status_counts[status] <= 0:
+            self.status_counts.pop(status)
+
+        day_bucket = self.daily.setdefault(day, {"orders": 0, "completed": 0, "units_sold": 0, "revenue": 0.0})
+        day_bucket["orders"] += sign
+
+        if status == REVENUE_STATUS:
+            revenue = float(order.get("price_at_purchase") or 0) * quantity
+            self.gross_revenue += sign * revenue
+
+            listing_bucket = self.listings.setdefault(order["listing_id"], {"units_sold": 0, "revenue": 0.0})
+            listing_bucket["units_sold"] += sign * quantity
+            listing_bucket["revenue"] += sign * revenue
+            if listing_bucket["units_sold"] <= 0:
+                self.listings.pop(order["listing_id"])
+
+            day_bucket["completed"] += sign
+            day_bucket["units_sold"] += sign * quantity
+            day_bucket["revenue"] += sign * revenue
+
+        if day_bucket["orders"] <= 0:
+            self.daily.pop(day)
+
+    def to_dict(self, days: int) -> Dict[str, Any]:
+        start_day = (date.today() - timedelta(days=days - 1)).isoformat()
+        daily_series = [
+            {"date": day, **{key: round(value, 2) if key == "revenue" else value for key, value in bucket.items()}}
+            for day, bucket in sorted(self.daily.items())
+            if day >= start_day
+        ]
+        units_by_listing = sorted(
+            (
+                {"listing_id": listing_id, "units_sold": bucket["units_sold"], "revenue": round(bucket["revenue"], 2)}
+                for listing_id, bucket in self.listings.items()
+            ),
+            key=lambda item: item["units_sold"],
+            reverse=True
+        )
+
+        return {
+            "status_counts": dict(self.status_counts),
+            "total_orders": sum(self.status_counts.values()),
+            "gross_revenue": round(self.gross_revenue, 2),
+            "units_sold": sum(item["units_sold"] for item in units_by_listing),
+            "units_sold_by_listing": units_by_listing,
+            "daily_series": daily_series
+        }
+
+
+class SellerSalesCache(TTLCache):
+    """
+    Thread-safe LRU of seller aggregates. Entries are rebuilt from the orders
+    table once they are older than the resync interval, which also reconciles
+    transitions applied by other worker processes.
+    """
+
+    def __init__(self, max_sellers: int = 1000, resync_seconds: int = 300):
+        super().__init__(max_entries=max_sellers, ttl_seconds=resync_seconds)
+
+    def apply_transition(self, seller_id: str, before: Optional[Dict[str, Any]], after: Dict[str, Any]):
+        """Move an order's contribution from its previous state to its new one."""
+        with self._lock:
+            aggregates = self.peek(seller_id)
+            if aggregates is None:
+                # Not loaded; the next dashboard read rolls up from the table
+                return
+
+            if before is not None:
+                aggregates.apply(before, -1)
+            aggregates.apply(after, 1)
+
+
+# Global cache instance
+_sales_cache = SellerSalesCache(
+    max_sellers=SALES_SUMMARY_CONFIG["max_sellers"],
+    resync_seconds=SALES_SUMMARY_CONFIG["resync_seconds"]
+)
+
+
+async def rollup_seller_sales(user_id: UUID) -> SellerSalesAggregates:
+    """
+    Rebuild a seller's aggregates from the orders table.
+    Only the columns the aggregates need are selected.
+    """
+    try:
+        if postgres.is_enabled():
+            orders = await postgres.fetch_seller_orders_for_rollup(user_id)
+        else:
+            supabase = get_authenticated_client(user_id)
+            result = supabase.table("orders").select(
+                "listing_id,quantity,price_at_purchase,status,placed_at"
+            ).eq("seller_id", user_id).execute()
+            orders = result.data or []
+
+        aggregates = SellerSalesAggregates()
+        for order in orders:
+            aggregates.apply(order, 1)
+
+        _sales_cache.put(str(user_id), aggregates)
+        return aggregates
+    except Exception as e:
+        handle_database_error("roll up seller sales", e)
+
+
+async def get_seller_sales_summary(user_id: UUID, days: int = 30) -> Dict[str, Any]:
+    """
+    Get the dashboard summary for a seller.
+    Served from the incrementally maintained aggregates; the orders table is
+    only read when the seller's aggregates are missing or due for a resync.
+    """
+    aggregates = _sales_cache.get(str(user_id))
+    if aggregates is None:
+        aggregates = await rollup_seller_sales(user_id)
+
+    return aggregates.to_dict(days)
+
+
+def record_order_transition(before: Optional[Dict[str, Any]], after: Dict[str, Any]) -> None:
+    """
+    Fold an order insert (before=None) or status transition into the seller's aggregates.
+    `before` and `after` are order rows carrying seller_id, listing_id, quantity,
+    price_at_purchase, status and placed_at.
+    """
+    try:
+        _sales_cache.apply_transition(str(after["seller_id"]), before, after)
+    except Exception as e:
+        # Aggregates self-heal on the next resync; never fail the order flow
+        print(f"Warning: Failed to record order transition for sales summary: {e}")
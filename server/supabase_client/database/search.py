@@ -0,0 +1,244 @@
+"""
+Listing full-text search.
+Keeps an in-process inverted index over listing name, tags, category and
+description, maintained through listing_index. Queries are tokenized, matched
+by prefix and ranked with BM25 weighted per field.
+"""
+
+import math
+import re
+import time
+import unicodedata
+from bisect import bisect_left
+from typing import Dict, Any, List, Optional, Tuple
+from uuid import UUID
+from core.config import SEARCH_CONFIG
+from .listing_index import ListingIndexHolder
+
+
+# Relative importance of each indexed field
+FIELD_WEIGHTS = {"name": 3.0, "tags": 2.0, "category": 1.0, "description": 1.0}
+
+# BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Matches through a longer term ("phone" -> "phones") score lower than exact ones
+PREFIX_MATCH_FACTOR = 0.7
+MIN_PREFIX_LENGTH = 2
+MAX_PREFIX_EXPANSIONS = 64
+
+INDEX_COLUMNS = "listing_id,seller_id,name,description,category,tags,status,price_min,price_max"
+
+# Row fields kept per listing so matches can be filtered before they are truncated
+META_FIELDS = ("status", "seller_id", "category", "price_min", "price_max")
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Lowercase, strip accents and split into alphanumeric tokens."""
+    if not text:
+        return []
+    normalized = unicodedata.normalize("NFKD", str(text)).encode("ascii", "ignore").decode("ascii")
+    return _TOKEN_PATTERN.findall(normalized.lower())
+
+
+class ListingSearchIndex:
+    """
+    Inverted index of listing_id -> weighted term frequency per term, with a
+    sorted vocabulary for prefix lookups. Also keeps each listing's status,
+    seller, category and price range (META_FIELDS) so results can be filtered
+    before they are truncated.
+    """
+
+    def __init__(self):
+        self.built_at = time.time()
+        self.postings: Dict[str, Dict[int, float]] = {}
+        self.vocabulary: List[str] = []
+        self.doc_terms: Dict[int, List[str]] = {}
+        self.doc_lengths: Dict[int, float] = {}
+        self.doc_meta: Dict[int, Dict[str, Any]] = {}
+        self.total_length = 0.0
+
+    def __len__(self) -> int:
+        return len(self.doc_lengths)
+
+    def add(self, listing: Dict[str, Any]):
+        """Index (or re-index) one listing row."""
+        listing_id = listing["listing_id"]
+        if not any(field in listing for field in FIELD_WEIGHTS):
+            # Partial row (e.g. a status-only update): text is unchanged
+            meta = self.doc_meta.get(listing_id)
+            if meta is not None:
+                meta.update({field: listing[field] for field in META_FIELDS if field in listing})
+            return
+
+        self.remove(listing_id)
+
+        frequencies: Dict[str, float] = {}
+        length = 0.0
+        for field, weight in FIELD_WEIGHTS.items():
+            for term in tokenize(listing.get(field)):
+                frequencies[term] = frequencies.get(term, 0.0) + weight
+                length += weight
+
+        for term, frequency in frequencies.items():
+            postings = self.postings.get(term)
+            if postings is None:
+                postings = self.postings[term] = {}
+                self.vocabulary.insert(bisect_left(self.vocabulary, term), term)
+            postings[listing_id] = frequency
+
+        self.doc_terms[listing_id] = list(frequencies)
+        self.doc_lengths[listing_id] = length
+        self.doc_meta[listing_id] = {field: listing.get(field) for field in META_FIELDS}
+        self.total_length += length
+
+    def remove(self, listing_id: int):
+        terms = self.doc_terms.pop(listing_id, None)
+        if terms is None:
+            return
+
+        for term in terms:
+            postings = self.postings[term]
+            postings.pop(listing_id, None)
+            if not postings:
+                del self.postings[term]
+                self.vocabulary.pop(bisect_left(self.vocabulary, term))
+
+        self.total_length -= self.doc_lengths.pop(listing_id)
+        self.doc_meta.pop(listing_id, None)
+
+    def expand(self, token: str) -> List[Tuple[str, float]]:
+        """Terms matched by a query token, with their match factor."""
+        matches = [(token, 1.0)] if token in self.postings else []
+        if len(token) < MIN_PREFIX_LENGTH:
+            return matches
+
+        position = bisect_left(self.vocabulary, token)
+        while position < len(self.vocabulary) and len(matches) < MAX_PREFIX_EXPANSIONS:
+            term = self.vocabulary[position]
+            if not term.startswith(token):
+                break
+            if term != token:
+                matches.append((term, PREFIX_MATCH_FACTOR))
+            position += 1
+        return matches
+
+    def search(self, query: str) -> Dict[int, float]:
+        """
+        Score every listing matching all query tokens.
+        Each token contributes its best-scoring matched term.
+        """
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens or not self.doc_lengths:
+            return {}
+
+        doc_count = len(self.doc_lengths)
+        average_length = self.total_length / doc_count or 1.0
+
+        scores: Optional[Dict[int, float]] = None
+        for token in tokens:
+            token_scores: Dict[int, float] = {}
+            for term, factor in self.expand(token):
+                postings = self.postings[term]
+                idf = math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for listing_id, frequency in postings.items():
+                    if scores is not None and listing_id not in scores:
+                        continue
+                    norm = BM25_K1 * (1 - BM25_B + BM25_B * self.doc_lengths[listing_id] / average_length)
+                    score = factor * idf * frequency * (BM25_K1 + 1) / (frequency + norm)
+                    if score > token_scores.get(listing_id, 0.0):
+                        token_scores[listing_id] = score
+
+            if scores is None:
+                scores = token_scores
+            else:
+                scores = {listing_id: scores[listing_id] + score for listing_id, score in token_scores.items()}
+            if not scores:
+                return {}
+
+        return scores
+
+
+# Global index instance
+_search_index = ListingIndexHolder(
+    "listing search index",
+    ListingSearchIndex,
+    INDEX_COLUMNS,
+    rebuild_interval_seconds=SEARCH_CONFIG["rebuild_interval_seconds"]
+)
+
+
+async def get_search_index(user_id: UUID) -> ListingSearchIndex:
+    """Get the search index, building it on first use."""
+    return await _search_index.get(user_id)
+
+
+def _price_in_range(meta: Dict[str, Any], min_price: Optional[float], max_price: Optional[float]) -> bool:
+    """Same comparisons as the price_min >= / price_max <= query filters (a missing price never matches)."""
+    if min_price is not None and (meta["price_min"] is None or float(meta["price_min"]) < min_price):
+        return False
+    if max_price is not None and (meta["price_max"] is None or float(meta["price_max"]) > max_price):
+        return False
+    return True
+
+
+async def match_listings(user_id: UUID, query: str, status: Optional[str] = None,
+                         seller_id: Optional[UUID] = None, exclude_seller_id: Optional[UUID] = None,
+                         category: Optional[str] = None, min_price: Optional[float] = None,
+                         max_price: Optional[float] = None,
+                         listing_ids: Optional[List[int]] = None) -> Dict[int, float]:
+    """
+    Score every listing matching `query`, optionally restricted by status,
+    seller, category, price range or a set of listing IDs (e.g. tag matches).
+    Returns listing_id -> relevance score, untruncated.
+    """
+    index = await get_search_index(user_id)
+    scores = index.search(query)
+
+    if listing_ids is not None:
+        scores = {listing_id: scores[listing_id] for listing_id in listing_ids if listing_id in scores}
+
+    if any(value is not None for value in (status, seller_id, exclude_seller_id, category, min_price, max_price)):
+        meta = index.doc_meta
+        scores = {
+            listing_id: score for listing_id, score in scores.items()
+            if (status is None or meta[listing_id]["status"] == status)
+            and (seller_id is None or str(meta[listing_id]["seller_id"]) == str(seller_id))
+            and (exclude_seller_id is None or str(meta[listing_id]["seller_id"]) != str(exclude_seller_id))
+            and (category is None or meta[listing_id]["category"] == category)
+            and _price_in_range(meta[listing_id], min_price, max_price)
+        }
+    return scores
+
+
+def best_matches(scores: Dict[int, float], limit: Optional[int] = None) -> Dict[int, float]:
+    """The `limit` best scored listings (SEARCH_CONFIG["max_results"] by default)."""
+    limit = limit or SEARCH_CONFIG["max_results"]
+    if len(scores) <= limit:
+        return scores
+    return dict(sorted(scores.items(), key=lambda item: item[1], reverse=True)[:limit])
+
+
+async def search_listings(user_id: UUID, query: str, status: Optional[str] = None,
+                          seller_id: Optional[UUID] = None, exclude_seller_id: Optional[UUID] = None,
+                          category: Optional[str] = None, min_price: Optional[float] = None,
+                          max_price: Optional[float] = None,
+                          listing_ids: Optional[List[int]] = None, limit: Optional[int] = None) -> Dict[int, float]:
+    """
+    Rank listings matching `query` under the same filters as match_listings.
+    Returns listing_id -> relevance score for the `limit` best matches
+    (SEARCH_CONFIG["max_results"] by default); the cap applies after filtering.
+    """
+    scores = await match_listings(
+        user_id, query, status=status, seller_id=seller_id, exclude_seller_id=exclude_seller_id,
+        category=category, min_price=min_price, max_price=max_price, listing_ids=listing_ids
+    )
+    return best_matches(scores, limit)
+
+
+def sort_by_relevance(listings: List[Dict[str, Any]], scores: Dict[int, float]) -> None:
+    """Sort listings in place by relevance, newest first among equal scores."""
+    listings.sort(key=lambda x: (scores.get(x["listing_id"], 0.0), x.get("created_at", "")), reverse=True)
@@ -0,0 +1,88 @@
+-- Facet counts for the public listings feed in one aggregate query.
+-- Covers active listings not owned by p_user_id, optionally restricted to
+-- p_listing_ids (search matches). Each facet ignores its own filter so the
+-- sidebar keeps showing the alternatives: category counts ignore p_category
+-- and the price histogram ignores the price range.
+
+create or replace function listing_facets(
+    p_user_id uuid,
+    p_category text default null,
+    p_min_price numeric default null,
+    p_max_price numeric default null,
+    p_listing_ids bigint[] default null,
+    p_bucket_count integer default 10
+)
+returns jsonb
+language sql
+stable
+as $$
+    with base as (
+        select listing_id, category, price_min, price_max, payment_methods, transaction_methods
+        from listings
+        where status = 'active'
+          and seller_id <> p_user_id
+          and (p_listing_ids is null or listing_id = any(p_listing_ids))
+    ),
+    in_price as (
+        select * from base
+        where (p_min_price is null or price_min >= p_min_price)
+          and (p_max_price is null or price_max <= p_max_price)
+    ),
+    in_category as (
+        select * from base
+        where p_category is null or category = p_category
+    ),
+    filtered as (
+        select * from in_price
+        where p_category is null or category = p_category
+    ),
+    bounds as (
+        select min(price_min) as low, max(price_min) as high
+        from in_category
+        where price_min is not null
+    ),
+    buckets as (
+        select least(
+                   width_bucket(c.price_min, b.low, b.high + 0.000001, greatest(p_bucket_count, 1)),
+                   greatest(p_bucket_count, 1)
+               ) as bucket,
+               count(*) as listing_count
+        from in_category c, bounds b
+        where c.price_min is not null
+        group by 1
+    )
+    select jsonb_build_object(
+        'total_count', (select count(*) from filtered),
+        'categories', coalesce((
+            select jsonb_object_agg(category, listing_count)
+            from (select category, count(*) as listing_count from in_price group by category) c
+        ), '{}'::jsonb),
+        'payment_methods', coalesce((
+            select jsonb_object_agg(method, listing_count)
+            from (
+                select method, count(*) as listing_count
+                from filtered, unnest(payment_methods) as method
+                group by method
+            ) p
+        ), '{}'::jsonb),
+        'transaction_methods', coalesce((
+            select jsonb_object_agg(method, listing_count)
+            from (
+                select method, count(*) as listing_count
+                from filtered, unnest(transaction_methods) as method
+                group by method
+            ) t
+        ), '{}'::jsonb),
+        'price_histogram', coalesce((
+            select jsonb_agg(jsonb_build_object(
+                       'min', round(b.low + (s.bucket - 1) * (b.high - b.low) / greatest(p_bucket_count, 1), 2),
+                       'max', round(b.low + s.bucket * (b.high - b.low) / greatest(p_bucket_count, 1), 2),
+                       'count', coalesce(k.listing_count, 0)
+                   ) order by s.bucket)
+            from bounds b
+            cross join generate_series(1, greatest(p_bucket_count, 1)) as s(bucket)
+            left join buckets k on k.bucket = s.bucket
+            where b.low is not null
+        ), '[]'::jsonb)
+    );
+$$;
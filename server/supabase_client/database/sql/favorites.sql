@@ -0,0 +1,45 @@
+-- Favorite toggle function.
+-- Removes the favorite if it exists, otherwise validates the listing and adds
+-- it, all in one RPC. Runs as the caller so RLS on user_favorites applies, and
+-- acts on auth.uid()'s favorites rather than a user id the caller passes in.
+-- Errors: P0002 -> 404, 22023 -> 400, 23505 (concurrent duplicate) -> 409
+
+-- The earlier version took the user as a parameter; drop it so it cannot be called.
+drop function if exists toggle_favorite(uuid, bigint);
+
+create or replace function toggle_favorite(p_listing_id bigint)
+returns jsonb
+language plpgsql
+as $$
+declare
+    v_listing record;
+    v_favorited_at timestamptz;
+begin
+    delete from user_favorites
+    where user_id = auth.uid() and listing_id = p_listing_id;
+
+    if found then
+        return jsonb_build_object('listing_id', p_listing_id, 'is_favorited', false, 'favorited_at', null);
+    end if;
+
+    select seller_id, status into v_listing from listings where listing_id = p_listing_id;
+
+    if not found then
+        raise exception 'Listing not found' using errcode = 'P0002';
+    end if;
+
+    if v_listing.seller_id = auth.uid() then
+        raise exception 'You cannot favorite your own listing.' using errcode = '22023';
+    end if;
+
+    if v_listing.status <> 'active' then
+        raise exception 'Cannot favorite inactive listings' using errcode = '22023';
+    end if;
+
+    insert into user_favorites (user_id, listing_id)
+    values (auth.uid(), p_listing_id)
+    returning favorited_at into v_favorited_at;
+
+    return jsonb_build_object('listing_id', p_listing_id, 'is_favorited', true, 'favorited_at', v_favorited_at);
+end;
+$$;
@@ -0,0 +1,183 @@
+-- Denormalized listing cards.
+-- One row per listing with the listing's scalar fields, its primary image,
+-- the seller's username and photo and the seller's active listing count, so a
+-- grid page is one range query. Kept current by triggers on listings,
+-- listing_images and user_profile; full images and meetup schedules are only
+-- loaded by the listing detail endpoint.
+
+create or replace view listing_card_source
+with (security_invoker = true) as
+select l.listing_id,
+       l.seller_id,
+       l.name,
+       l.description,
+       l.category,
+       l.tags,
+       l.tag_list,
+       l.price_min,
+       l.price_max,
+       l.total_stock,
+       l.sold_count,
+       l.status,
+       l.created_at,
+       l.updated_at,
+       l.seller_meetup_locations,
+       l.transaction_methods,
+       l.payment_methods,
+       img.image_id as primary_image_id,
+       img.image_url as primary_image_url,
+       p.username as seller_username,
+       p.profile_photo_url as seller_profile_photo_url,
+       (select count(*) from listings s
+        where s.seller_id = l.seller_id and s.status = 'active')::integer as seller_listing_count
+from listings l
+left join lateral (
+    select i.image_id, i.image_url
+    from listing_images i
+    where i.listing_id = l.listing_id
+    order by i.is_primary desc, i.image_id
+    limit 1
+) img on true
+left join user_profile p on p.user_id = l.seller_id;
+
+revoke all on listing_card_source from public, anon, authenticated;
+
+create table if not exists listing_cards as
+select * from listing_card_source with no data;
+
+create unique index if not exists listing_cards_listing_id_idx on listing_cards (listing_id);
+create index if not exists listing_cards_status_created_idx on listing_cards (status, created_at desc, listing_id desc);
+create index if not exists listing_cards_seller_idx on listing_cards (seller_id);
+create index if not exists listing_cards_category_idx on listing_cards (category);
+create index if not exists listing_cards_tag_list_gin on listing_cards using gin (tag_list);
+
+-- Active cards are readable by everyone signed in; other cards only by their
+-- seller and by users who ordered or favorited the listing, whose order and
+-- favorite pages embed them. Written only by the triggers below.
+alter table listing_cards enable row level security;
+drop policy if exists "listing cards are readable" on listing_cards;
+create policy "listing cards are readable" on listing_cards
+    for select to authenticated using (
+        status = 'active'
+        or seller_id = auth.uid()
+        or exists (
+            select 1 from orders o
+            where o.listing_id = listing_cards.listing_id and o.buyer_id = auth.uid()
+        )
+        or exists (
+            select 1 from user_favorites f
+            where f.listing_id = listing_cards.listing_id and f.user_id = auth.uid()
+        )
+    );
+revoke insert, update, delete on listing_cards from public, anon, authenticated;
+
+create or replace function refresh_listing_card(p_listing_id bigint)
+returns void
+language plpgsql
+security definer
+set search_path = public
+as $$
+begin
+    delete from listing_cards where listing_id = p_listing_id;
+    insert into listing_cards
+    select * from listing_card_source where listing_id = p_listing_id;
+end;
+$$;
+
+create or replace function refresh_seller_listing_cards(p_seller_id uuid)
+returns void
+language plpgsql
+security definer
+set search_path = public
+as $$
+begin
+    update listing_cards c set
+        seller_listing_count = (select count(*) from listings s
+                                where s.seller_id = p_seller_id and s.status = 'active'),
+        seller_username = p.username,
+        seller_profile_photo_url = p.profile_photo_url
+    from (select p_seller_id as user_id) s
+    left join user_profile p on p.user_id = s.user_id
+    where c.seller_id = p_seller_id;
+end;
+$$;
+
+revoke execute on function refresh_listing_card(bigint) from public, anon, authenticated;
+revoke execute on function refresh_seller_listing_cards(uuid) from public, anon, authenticated;
+
+create or replace function listing_cards_on_listing_change()
+returns trigger
+language plpgsql
+security definer
+set search_path = public
+as $$
+begin
+    if tg_op = 'DELETE' then
+        delete from listing_cards where listing_id = old.listing_id;
+        perform refresh_seller_listing_cards(old.seller_id);
+        return old;
+    end if;
+
+    perform refresh_listing_card(new.listing_id);
+    if tg_op = 'INSERT' or new.status is distinct from old.status then
+        perform refresh_seller_listing_cards(new.seller_id);
+    end if;
+    if tg_op = 'UPDATE' and new.seller_id is distinct from old.seller_id then
+        perform refresh_seller_listing_cards(old.seller_id);
+        perform refresh_seller_listing_cards(new.seller_id);
+    end if;
+    return new;
+end;
+$$;
+
+create or replace function listing_cards_on_image_change()
+returns trigger
+language plpgsql
+security definer
+set search_path = public
+as $$
+begin
+    if tg_op in ('UPDATE', 'DELETE') then
+        perform refresh_listing_card(old.listing_id);
+    end if;
+    if tg_op in ('INSERT', 'UPDATE') and (tg_op = 'INSERT' or new.listing_id is distinct from old.listing_id) then
+        perform refresh_listing_card(new.listing_id);
+    end if;
+    return null;
+end;
+$$;
+
+create or replace function listing_cards_on_profile_change()
+returns trigger
+language plpgsql
+security definer
+set search_path = public
+as $$
+begin
+    update listing_cards set
+        seller_username = new.username,
+        seller_profile_photo_url = new.profile_photo_url
+    where seller_id = new.user_id;
+    return null;
+end;
+$$;
+
+drop trigger if exists listing_cards_listing_change on listings;
+create trigger listing_cards_listing_change
+    after insert or update or delete on listings
+    for each row execute function listing_cards_on_listing_change();
+
+drop trigger if exists listing_cards_image_change on listing_images;
+create trigger listing_cards_image_change
+    after insert or update or delete on listing_images
+    for each row execute function listing_cards_on_image_change();
+
+drop trigger if exists listing_cards_profile_change on user_profile;
+create trigger listing_cards_profile_change
+    after update of username, profile_photo_url on user_profile
+    for each row execute function listing_cards_on_profile_change();
+
+-- Backfill
+insert into listing_cards
+select * from listing_card_source
+on conflict (listing_id) do nothing;
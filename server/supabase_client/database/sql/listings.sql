@@ -0,0 +1,43 @@
+-- Bulk listing creation.
+-- Inserts several listings and all of their meetup time slots in one RPC, so
+-- one transaction: a failed slot insert leaves no listing behind, and a retry
+-- cannot duplicate listings. Created listings are returned in input order.
+-- Runs as the caller (SECURITY INVOKER): listings belong to auth.uid() and RLS
+-- on listings and listing_meetup_time_details applies.
+--
+-- p_listings: [{"name": ..., "category": ..., ..., "meetup_time_slots": [{"start_time": ..., "end_time": ...}]}, ...]
+
+create or replace function create_listings_with_slots(p_listings jsonb)
+returns jsonb
+language plpgsql
+as $$
+declare
+    v_item jsonb;
+    v_listing listings%rowtype;
+    v_created jsonb := '[]'::jsonb;
+begin
+    for v_item in
+        select item from jsonb_array_elements(p_listings) with ordinality as items(item, position)
+        order by position
+    loop
+        insert into listings (
+            seller_id, name, description, category, tags, price_min, price_max, total_stock,
+            seller_meetup_locations, transaction_methods, payment_methods, status, sold_count
+        )
+        select auth.uid(), r.name, r.description, r.category, r.tags, r.price_min, r.price_max, r.total_stock,
+               r.seller_meetup_locations, r.transaction_methods, r.payment_methods,
+               coalesce(r.status, 'active'), coalesce(r.sold_count, 0)
+        from jsonb_populate_record(null::listings, v_item) as r
+        returning * into v_listing;
+
+        insert into listing_meetup_time_details (listing_id, start_time, end_time)
+        select v_listing.listing_id, s.start_time, s.end_time
+        from jsonb_to_recordset(coalesce(v_item -> 'meetup_time_slots', '[]'::jsonb))
+             as s(start_time timestamptz, end_time timestamptz);
+
+        v_created := v_created || jsonb_build_array(to_jsonb(v_listing));
+    end loop;
+
+    return v_created;
+end;
+$$;
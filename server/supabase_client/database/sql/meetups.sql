@@ -0,0 +1,253 @@
+-- Meetup transition functions.
+-- Each meetup action (update/reschedule, confirm, cancel) is a single RPC that
+-- authorizes the acting user against the order and applies the transition in
+-- one transaction. The order row is locked so concurrent actions on the same
+-- order serialize, and the partial unique index guarantees at most one
+-- is_current meetup per order.
+--
+-- Functions run as the caller (SECURITY INVOKER) so existing RLS policies on
+-- orders and meetups still apply, and the acting party is decided from
+-- auth.uid() rather than from a parameter the caller could set. Errors use SQLSTATEs the API maps to HTTP:
+--   P0002 -> 404, 42501 -> 403, 22023 -> 400, 23P01 -> 409
+
+-- Older data can have several is_current meetups per order, which would make the
+-- index below fail to build; keep only the most recently changed one current.
+with ranked as (
+    select meetup_id,
+           row_number() over (
+               partition by order_id
+               order by changed_at desc nulls last, meetup_id desc
+           ) as position
+    from meetups
+    where is_current
+)
+update meetups
+set is_current = false
+from ranked
+where meetups.meetup_id = ranked.meetup_id
+  and ranked.position > 1;
+
+create unique index if not exists meetups_one_current_per_order
+    on meetups (order_id)
+    where is_current;
+
+
+-- Earlier versions took the acting user as a parameter; drop them so they cannot be called.
+drop function if exists update_current_meetup(bigint, uuid, text, timestamptz, text, text);
+drop function if exists confirm_current_meetup(bigint, uuid);
+drop function if exists cancel_current_meetup(bigint, uuid, text);
+drop function if exists meetup_acting_party(bigint, uuid);
+
+
+-- Lock the order and return the caller's party ('buyer' or 'seller').
+create or replace function meetup_acting_party(p_order_id bigint)
+returns text
+language plpgsql
+as $$
+declare
+    v_order orders%rowtype;
+begin
+    select * into v_order from orders where order_id = p_order_id for update;
+
+    if not found then
+        raise exception 'Order not found' using errcode = 'P0002';
+    end if;
+
+    if v_order.buyer_id = auth.uid() then
+        return 'buyer';
+    elsif v_order.seller_id = auth.uid() then
+        return 'seller';
+    end if;
+
+    raise exception 'Access denied to this order' using errcode = '42501';
+end;
+$$;
+
+
+-- Length of a booked meetup; keep in sync with MEETUP_DURATION_MINUTES.
+create or replace function meetup_duration()
+returns interval
+language sql
+immutable
+as $$ select interval '30 minutes' $$;
+
+
+-- Start of another active meetup of the order's seller that a meetup at
+-- p_scheduled_at would overlap, or null. Runs as the owner (SECURITY DEFINER)
+-- because RLS hides other buyers' orders from the caller, so only the start
+-- time is returned, never the order. A per-seller transaction lock makes
+-- concurrent reschedules for the same seller check one after the other.
+create or replace function seller_meetup_conflict(p_order_id bigint, p_scheduled_at timestamptz)
+returns timestamptz
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+    v_seller_id uuid;
+    v_blocked_from timestamptz;
+begin
+    select seller_id into v_seller_id
+    from orders
+    where order_id = p_order_id and auth.uid() in (buyer_id, seller_id);
+
+    if not found then
+        raise exception 'Access denied to this order' using errcode = '42501';
+    end if;
+
+    perform pg_advisory_xact_lock(hashtext('seller_meetups:' || v_seller_id::text));
+
+    select m.scheduled_at into v_blocked_from
+    from meetups m
+    join orders o on o.order_id = m.order_id
+    where o.seller_id = v_seller_id
+      and o.order_id <> p_order_id
+      and o.status in ('pending', 'confirmed')
+      and m.is_current
+      and m.status <> 'cancelled'
+      and m.scheduled_at > p_scheduled_at - meetup_duration()
+      and m.scheduled_at < p_scheduled_at + meetup_duration()
+    order by m.scheduled_at
+    limit 1;
+
+    return v_blocked_from;
+end;
+$$;
+
+revoke execute on function seller_meetup_conflict(bigint, timestamptz) from public, anon;
+
+
+-- Reschedule (when p_scheduled_at is given) or update the current meetup in place.
+-- Only this action requires the order to use the Meet-up transaction method;
+-- confirm and cancel never checked it. A reschedule that would overlap another
+-- of the seller's meetups is rejected before anything is written.
+create or replace function update_current_meetup(
+    p_order_id bigint,
+    p_location text default null,
+    p_scheduled_at timestamptz default null,
+    p_remarks text default null,
+    p_proposed_by text default null
+)
+returns jsonb
+language plpgsql
+as $$
+declare
+    v_party text := meetup_acting_party(p_order_id);
+    v_previous meetups%rowtype;
+    v_meetup meetups%rowtype;
+    v_blocked_from timestamptz;
+begin
+    if (select transaction_method from orders where order_id = p_order_id) <> 'Meet-up' then
+        raise exception 'This order does not use meetup transaction method' using errcode = '22023';
+    end if;
+
+    if p_scheduled_at is null then
+        update meetups
+        set location = coalesce(p_location, location),
+            remarks = coalesce(p_remarks, remarks),
+            proposed_by = coalesce(p_proposed_by, proposed_by),
+            changed_at = now()
+        where order_id = p_order_id and is_current
+        returning * into v_meetup;
+
+        if not found then
+            raise exception 'Meetup not found or failed to update' using errcode = 'P0002';
+        end if;
+    else
+        v_blocked_from := seller_meetup_conflict(p_order_id, p_scheduled_at);
+        if v_blocked_from is not null then
+            raise exception 'The seller is already booked from % to %',
+                v_blocked_from, v_blocked_from + meetup_duration()
+                using errcode = '23P01';
+        end if;
+
+        update meetups
+        set is_current = false,
+            changed_at = now()
+        where order_id = p_order_id and is_current
+        returning * into v_previous;
+
+        if not found then
+            raise exception 'No existing meetup found to reschedule' using errcode = 'P0002';
+        end if;
+
+        insert into meetups (
+            order_id, location, scheduled_at, status, remarks, proposed_by,
+            confirmed_by_buyer, confirmed_by_seller, is_current
+        )
+        values (
+            p_order_id,
+            coalesce(p_location, v_previous.location),
+            p_scheduled_at,
+            'rescheduled',
+            coalesce(p_remarks, v_previous.remarks),
+            coalesce(p_proposed_by, v_party),
+            v_previous.confirmed_by_buyer,
+            v_previous.confirmed_by_seller,
+            true
+        )
+        returning * into v_meetup;
+    end if;
+
+    return to_jsonb(v_meetup) || jsonb_build_object('acting_party', v_party);
+end;
+$$;
+
+
+-- Confirm the current meetup for the caller's party; both confirmations make it 'confirmed'.
+create or replace function confirm_current_meetup(p_order_id bigint)
+returns jsonb
+language plpgsql
+as $$
+declare
+    v_party text := meetup_acting_party(p_order_id);
+    v_meetup meetups%rowtype;
+begin
+    update meetups
+    set confirmed_by_buyer = case when v_party = 'buyer' then true else confirmed_by_buyer end,
+        confirmed_by_seller = case when v_party = 'seller' then true else confirmed_by_seller end,
+        status = case
+            when (v_party = 'buyer' or coalesce(confirmed_by_buyer, false))
+             and (v_party = 'seller' or coalesce(confirmed_by_seller, false))
+            then 'confirmed'
+            else status
+        end,
+        changed_at = now()
+    where order_id = p_order_id and is_current
+    returning * into v_meetup;
+
+    if not found then
+        raise exception 'Current meetup not found' using errcode = 'P0002';
+    end if;
+
+    return to_jsonb(v_meetup) || jsonb_build_object('acting_party', v_party);
+end;
+$$;
+
+
+-- Cancel the current meetup, storing the reason in remarks when given.
+create or replace function cancel_current_meetup(
+    p_order_id bigint,
+    p_reason text default null
+)
+returns jsonb
+language plpgsql
+as $$
+declare
+    v_party text := meetup_acting_party(p_order_id);
+    v_meetup meetups%rowtype;
+begin
+    update meetups
+    set status = 'cancelled',
+        remarks = coalesce(p_reason, remarks),
+        changed_at = now()
+    where order_id = p_order_id and is_current
+    returning * into v_meetup;
+
+    if not found then
+        raise exception 'Failed to cancel meetup' using errcode = 'P0002';
+    end if;
+
+    return to_jsonb(v_meetup) || jsonb_build_object('acting_party', v_party);
+end;
+$$;
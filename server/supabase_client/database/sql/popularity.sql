@@ -0,0 +1,50 @@
+-- Listing popularity counters.
+-- Written only by the server's periodic flush (service role) as one batched
+-- additive upsert; counts never go below zero.
+
+create table if not exists listing_popularity (
+    listing_id bigint primary key references listings(listing_id) on delete cascade,
+    favorite_count integer not null default 0,
+    view_count bigint not null default 0,
+    order_count integer not null default 0,
+    updated_at timestamptz not null default now()
+);
+
+-- Backfill from existing favorites and orders
+insert into listing_popularity (listing_id, favorite_count, order_count)
+select l.listing_id,
+       (select count(*) from user_favorites f where f.listing_id = l.listing_id),
+       (select count(*) from orders o where o.listing_id = l.listing_id)
+from listings l
+on conflict (listing_id) do nothing;
+
+-- p_deltas: [{"listing_id": 1, "favorites": 1, "views": 3, "orders": 0}, ...]
+-- with at most one entry per listing. Returns the number of rows updated.
+create or replace function apply_listing_popularity_deltas(p_deltas jsonb)
+returns integer
+language plpgsql
+as $$
+declare
+    v_count integer;
+begin
+    insert into listing_popularity (listing_id)
+    select d.listing_id
+    from jsonb_to_recordset(p_deltas) as d(listing_id bigint)
+    join listings l on l.listing_id = d.listing_id
+    on conflict (listing_id) do nothing;
+
+    update listing_popularity p set
+        favorite_count = greatest(p.favorite_count + coalesce(d.favorites, 0), 0),
+        view_count = greatest(p.view_count + coalesce(d.views, 0), 0),
+        order_count = greatest(p.order_count + coalesce(d.orders, 0), 0),
+        updated_at = now()
+    from jsonb_to_recordset(p_deltas) as d(listing_id bigint, favorites integer, views bigint, orders integer)
+    where p.listing_id = d.listing_id;
+
+    get diagnostics v_count = row_count;
+    return v_count;
+end;
+$$;
+
+revoke execute on function apply_listing_popularity_deltas(jsonb) from public, anon, authenticated;
+grant execute on function apply_listing_popularity_deltas(jsonb) to service_role;
@@ -0,0 +1,23 @@
+-- Normalized listing tags.
+-- listings.tags stays the free-text column clients write; tag_list is derived
+-- from it (lowercased, trimmed, deduplicated, split on , ; #) and indexed with
+-- GIN so tag filters use @> (all) and && (any) instead of scans.
+
+create or replace function normalize_listing_tags(p_tags text)
+returns text[]
+language sql
+immutable
+as $$
+    select coalesce(array_agg(distinct tag order by tag), '{}')
+    from (
+        select lower(btrim(part)) as tag
+        from regexp_split_to_table(coalesce(p_tags, ''), '[,;#]') as part
+    ) parts
+    where tag <> '';
+$$;
+
+alter table listings
+    add column if not exists tag_list text[]
+    generated always as (normalize_listing_tags(tags)) stored;
+
+create index if not exists listings_tag_list_gin on listings using gin (tag_list);
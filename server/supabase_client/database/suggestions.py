@@ -0,0 +1,163 @@
+"""
+Listing search typeahead.
+Keeps a sorted array of normalized phrase keys (active listing names, tags
+and categories) answered with bisect, so suggestions never hit the database
+once the index is built. Every word start of a phrase is a key, so "charger"
+also suggests "iPhone 12 charger".
+"""
+
+import re
+import time
+import unicodedata
+from bisect import bisect_left, insort
+from typing import Dict, Any, List, Optional, Tuple
+from uuid import UUID
+from core.config import SUGGEST_CONFIG
+from .listing_index import ListingIndexHolder
+from .tags import split_tags
+
+
+SUGGESTION_KINDS = ("category", "tag", "name")
+INDEX_COLUMNS = "listing_id,name,tags,category,status"
+
+# How many prefix matches are examined before ranking
+MAX_CANDIDATES = 200
+
+_WORD_STARTS = re.compile(r"(?<![a-z0-9])[a-z0-9]")
+
+
+def normalize_phrase(text: Optional[str]) -> str:
+    """Lowercase, strip accents and collapse whitespace."""
+    if not text:
+        return ""
+    normalized = unicodedata.normalize("NFKD", str(text)).encode("ascii", "ignore").decode("ascii")
+    return " ".join(normalized.lower().split())
+
+
+def listing_phrases(listing: Dict[str, Any]) -> List[Tuple[str, str]]:
+    """The (kind, text) phrases an active listing contributes."""
+    phrases = []
+    if listing.get("category"):
+        phrases.append(("category", listing["category"].strip()))
+    for tag in split_tags(listing.get("tags")):
+        phrases.append(("tag", tag))
+    if listing.get("name"):
+        phrases.append(("name", " ".join(listing["name"].split())))
+    return phrases
+
+
+class SuggestionIndex:
+    """
+    Reference-counted phrases over active listings. Each phrase holds the
+    display text and number of listings using it; its keys live in one
+    sorted list of (key, kind, normalized phrase) tuples.
+    """
+
+    def __init__(self):
+        self.built_at = time.time()
+        self.keys: List[Tuple[str, str, str]] = []
+        self.phrases: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self.listing_phrases: Dict[int, List[Tuple[str, str]]] = {}
+        # While bulk loading, keys are appended and sorted once at the end
+        self.loading = True
+
+    def finish_loading(self):
+        if self.loading:
+            self.keys.sort()
+            self.loading = False
+
+    def add(self, listing: Dict[str, Any]):
+        """Index a listing row; rows that are not active are removed."""
+        listing_id = listing["listing_id"]
+        if "status" in listing and listing["status"] != "active":
+            self.remove(listing_id)
+            return
+        if "name" not in listing:
+            # Partial row without text fields: nothing to re-index
+            return
+
+        self.remove(listing_id)
+        phrase_ids = []
+        for kind, text in listing_phrases(listing):
+            normalized = normalize_phrase(text)
+            if not normalized or (kind, normalized) in phrase_ids:
+                continue
+            phrase_ids.append((kind, normalized))
+
+            phrase = self.phrases.get((kind, normalized))
+            if phrase is None:
+                phrase = self.phrases[(kind, normalized)] = {"text": text, "kind": kind, "listing_count": 0}
+                for match in _WORD_STARTS.finditer(normalized):
+                    entry = (normalized[match.start():], kind, normalized)
+                    if self.loading:
+                        self.keys.append(entry)
+                    else:
+                        insort(self.keys, entry)
+            phrase["listing_count"] += 1
+
+        self.listing_phrases[listing_id] = phrase_ids
+
+    def remove(self, listing_id: int):
+        for kind, normalized in self.listing_phrases.pop(listing_id, []):
+            phrase = self.phrases[(kind, normalized)]
+            phrase["listing_count"] -= 1
+            if phrase["listing_count"] > 0:
+                continue
+
+            del self.phrases[(kind, normalized)]
+            self.finish_loading()
+            for match in _WORD_STARTS.finditer(normalized):
+                entry = (normalized[match.start():], kind, normalized)
+                position = bisect_left(self.keys, entry)
+                if position < len(self.keys) and self.keys[position] == entry:
+                    self.keys.pop(position)
+
+    def suggest(self, query: str, limit: int = 8) -> List[Dict[str, Any]]:
+        """
+        Phrases with a word starting with `query`. Phrases that start with it
+        come first, then more widely used ones, then shorter ones.
+        """
+        prefix = normalize_phrase(query)
+        if not prefix:
+            return []
+        self.finish_loading()
+
+        candidates = {}
+        position = bisect_left(self.keys, (prefix,))
+        while position < len(self.keys) and len(candidates) < MAX_CANDIDATES:
+            key, kind, normalized = self.keys[position]
+            if not key.startswith(prefix):
+                break
+            starts_phrase = len(key) == len(normalized)
+            candidates[(kind, normalized)] = candidates.get((kind, normalized), False) or starts_phrase
+            position += 1
+
+        ranked = sorted(
+            candidates.items(),
+            key=lambda item: (
+                not item[1],
+                -self.phrases[item[0]]["listing_count"],
+                SUGGESTION_KINDS.index(item[0][0]),
+                len(item[0][1])
+            )
+        )
+        return [dict(self.phrases[phrase_id]) for phrase_id, _ in ranked[:limit]]
+
+
+# Global index instance (active listings only)
+_suggestion_index = ListingIndexHolder(
+    "listing suggestion index",
+    SuggestionIndex,
+    INDEX_COLUMNS,
+    rebuild_interval_seconds=SUGGEST_CONFIG["rebuild_interval_seconds"],
+    status="active"
+)
+
+
+async def suggest_listings(user_id: UUID, query: str, limit: int = 8) -> List[Dict[str, Any]]:
+    """
+    Typeahead suggestions (listing names, tags and categories) for `query`.
+    Returns text, kind and the number of active listings using the phrase.
+    """
+    index = await _suggestion_index.get(user_id)
+    return index.suggest(query, limit)
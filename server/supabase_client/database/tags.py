@@ -0,0 +1,133 @@
+"""
+Listing tag operations.
+Tags are parsed from the free-text `listings.tags` column the same way the
+database derives `tag_list` (sql/tags.sql). An in-process inverted index from
+tag to sorted active listing IDs answers tag filters and top-tag counts
+without scanning listings.
+"""
+
+import re
+import time
+from bisect import bisect_left, insort
+from typing import Dict, Any, List, Optional, Set
+from uuid import UUID
+from fastapi import HTTPException
+from core.config import TAG_INDEX_CONFIG
+from .listing_index import ListingIndexHolder
+
+
+TAG_MATCH_MODES = {"all", "any"}
+INDEX_COLUMNS = "listing_id,tags,status"
+
+TAG_SEPARATORS = re.compile(r"[,;#]")
+
+
+def split_tags(tags: Optional[str]) -> List[str]:
+    """Split a free-text tags value into trimmed tags, keeping their case."""
+    return [tag.strip() for tag in TAG_SEPARATORS.split(tags or "") if tag.strip()]
+
+
+def normalize_tags(tags: Optional[str]) -> List[str]:
+    """Lowercased, deduplicated, sorted tags; matches normalize_listing_tags in SQL."""
+    return sorted({tag.lower() for tag in split_tags(tags)})
+
+
+def validate_tag_mode(tag_mode: str) -> None:
+    """Validate tag filter mode against allowed values."""
+    if tag_mode not in TAG_MATCH_MODES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid tag mode. Valid modes are: {', '.join(sorted(TAG_MATCH_MODES))}"
+        )
+
+
+def filter_tag_list(query, tags: List[str], match_all: bool = True):
+    """Filter a listings query on the GIN-indexed `tag_list` column (@> for all, && for any)."""
+    # Quote elements so tags containing spaces, quotes or braces stay valid array literals
+    quoted = ['"' + tag.replace('\\', '\\\\').replace('"', '\\"') + '"' for tag in tags]
+    return query.contains("tag_list", quoted) if match_all else query.ov("tag_list", quoted)
+
+
+class TagIndex:
+    """Inverted index of tag -> sorted active listing IDs."""
+
+    def __init__(self):
+        self.built_at = time.time()
+        self.postings: Dict[str, List[int]] = {}
+        self.listing_tags: Dict[int, List[str]] = {}
+        self._top_tags: Optional[List[Dict[str, Any]]] = None
+
+    def add(self, listing: Dict[str, Any]):
+        """Index an active listing; rows with another status are removed."""
+        listing_id = listing["listing_id"]
+        if "status" in listing and listing["status"] != "active":
+            self.remove(listing_id)
+            return
+        if "tags" not in listing:
+            # Partial row without tags: nothing to re-index
+            return
+
+        self.remove(listing_id)
+        tags = normalize_tags(listing["tags"])
+        for tag in tags:
+            insort(self.postings.setdefault(tag, []), listing_id)
+        self.listing_tags[listing_id] = tags
+        self._top_tags = None
+
+    def remove(self, listing_id: int):
+        for tag in self.listing_tags.pop(listing_id, []):
+            postings = self.postings[tag]
+            position = bisect_left(postings, listing_id)
+            if position < len(postings) and postings[position] == listing_id:
+                postings.pop(position)
+            if not postings:
+                del self.postings[tag]
+            self._top_tags = None
+
+    def match(self, tags: List[str], match_all: bool = True) -> List[int]:
+        """Sorted IDs of listings having all (or any) of the given tags."""
+        postings = [self.postings.get(tag, []) for tag in tags]
+        if not postings:
+            return []
+
+        if match_all:
+            postings.sort(key=len)
+            matched: Set[int] = set(postings[0])
+            for other in postings[1:]:
+                if not matched:
+                    break
+                matched.intersection_update(other)
+        else:
+            matched = set().union(*postings)
+        return sorted(matched)
+
+    def top_tags(self, limit: int) -> List[Dict[str, Any]]:
+        """Most used tags over active listings; the ranking is cached until the next change."""
+        if self._top_tags is None:
+            self._top_tags = [
+                {"tag": tag, "listing_count": len(listing_ids)}
+                for tag, listing_ids in sorted(self.postings.items(), key=lambda item: (-len(item[1]), item[0]))
+            ]
+        return self._top_tags[:limit]
+
+
+# Global index instance (active listings only)
+_tag_index = ListingIndexHolder(
+    "listing tag index",
+    TagIndex,
+    INDEX_COLUMNS,
+    rebuild_interval_seconds=TAG_INDEX_CONFIG["rebuild_interval_seconds"],
+    status="active"
+)
+
+
+async def match_listings(user_id: UUID, tags: List[str], match_all: bool = True) -> List[int]:
+    """IDs of active listings with all (match_all) or any of `tags`."""
+    index = await _tag_index.get(user_id)
+    return index.match(tags, match_all)
+
+
+async def get_top_tags(user_id: UUID, limit: int = 20) -> List[Dict[str, Any]]:
+    """Most used tags over active listings with their listing counts."""
+    index = await _tag_index.get(user_id)
+    return index.top_tags(limit)
@@ -0,0 +1,1013 @@
+"""
+In-memory PostgREST store for load tests and profiling.
+Answers the HTTP requests the Supabase query builder sends (filters, embeds,
+ordering, ranges, exact counts, inserts, upserts, updates, deletes and the
+RPCs in database/sql/) from Python dicts through an httpx transport, so the
+database modules run unchanged with no network. The listing_cards projection
+is kept current the way its triggers do. RLS is not emulated: every client
+sees every row, and the caller's id only matters to the RPCs.
+"""
+
+import inspect
+import json
+import math
+import re
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, List, Optional, Tuple
+
+import httpx
+from postgrest import SyncPostgrestClient
+from postgrest.utils import SyncClient
+
+from core.config import AVAILABILITY_CONFIG
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+# Primary key, identity column (assigned on insert) and column defaults per table;
+# nullable columns default to None so rows come back with every column, as from Postgres.
+# Tables not listed are stored schema-less without a key.
+TABLES = {
+    "user_profile": {
+        "primary_key": ("user_id",),
+        "defaults": {
+            "middle_name": None, "pronouns": None, "course": None, "university_branch": None, "college": None,
+            "is_verified_student": False, "profile_photo_url": None, "bio": None, "created_at": _now
+        }
+    },
+    "user_verification": {"primary_key": ("user_id",), "defaults": {"created_at": _now}},
+    "email_verification_requests": {"primary_key": ("email",), "defaults": {"is_used": False, "created_at": _now}},
+    "listings": {
+        "primary_key": ("listing_id",),
+        "identity": "listing_id",
+        "defaults": {
+            "description": None, "tags": None, "price_min": None, "price_max": None, "total_stock": None,
+            "sold_count": 0, "status": "active", "seller_meetup_locations": None, "transaction_methods": None,
+            "payment_methods": None, "created_at": _now, "updated_at": _now
+        }
+    },
+    "listing_images": {
+        "primary_key": ("image_id",),
+        "identity": "image_id",
+        "defaults": {"is_primary": False, "uploaded_at": _now}
+    },
+    "listing_meetup_time_details": {"primary_key": ("time_detail_id",), "identity": "time_detail_id", "defaults": {}},
+    "orders": {
+        "primary_key": ("order_id",),
+        "identity": "order_id",
+        "defaults": {
+            "buyer_requested_price": None, "price_at_purchase": None, "status": "pending",
+            "placed_at": _now, "completed_at": None
+        }
+    },
+    "meetups": {
+        "primary_key": ("meetup_id",),
+        "identity": "meetup_id",
+        "defaults": {
+            "location": None, "status": "pending", "remarks": None, "proposed_by": None,
+            "confirmed_by_buyer": None, "confirmed_by_seller": None, "changed_at": _now, "is_current": True
+        }
+    },
+    "user_favorites": {"primary_key": ("user_id", "listing_id"), "defaults": {"favorited_at": _now}},
+    "listing_popularity": {
+        "primary_key": ("listing_id",),
+        "defaults": {"favorite_count": 0, "view_count": 0, "order_count": 0, "updated_at": _now}
+    },
+    "listing_cards": {"primary_key": ("listing_id",), "defaults": {}},
+}
+
+# Many-to-one relationships as (table, column, referenced table, referenced column)
+FOREIGN_KEYS = [
+    ("listings", "seller_id", "user_profile", "user_id"),
+    ("listing_cards", "seller_id", "user_profile", "user_id"),
+    ("listing_images", "listing_id", "listings", "listing_id"),
+    ("listing_meetup_time_details", "listing_id", "listings", "listing_id"),
+    ("orders", "listing_id", "listings", "listing_id"),
+    ("meetups", "order_id", "orders", "order_id"),
+    ("user_favorites", "listing_id", "listings", "listing_id"),
+    ("listing_popularity", "listing_id", "listings", "listing_id"),
+]
+
+# Rows removed with their listing (on delete cascade)
+LISTING_CASCADE_TABLES = ("listing_images", "listing_meetup_time_details", "user_favorites", "listing_popularity")
+
+# Columns with an equality index, besides single-column primary keys
+INDEXED_COLUMNS = {
+    "listings": ("seller_id", "status"),
+    "listing_cards": ("seller_id", "status"),
+    "listing_images": ("listing_id",),
+    "listing_meetup_time_details": ("listing_id",),
+    "orders": ("buyer_id", "seller_id", "listing_id"),
+    "meetups": ("order_id",),
+    "user_favorites": ("user_id", "listing_id"),
+    "email_verification_requests": ("token",),
+}
+
+# Length of a booked meetup (meetup_duration() in sql/meetups.sql)
+MEETUP_DURATION = timedelta(minutes=AVAILABILITY_CONFIG["meetup_duration_minutes"])
+
+TIMESTAMP_COLUMNS = {
+    "created_at", "updated_at", "placed_at", "completed_at", "scheduled_at", "changed_at",
+    "favorited_at", "uploaded_at", "start_time", "end_time", "expires_at"
+}
+
+CARD_LISTING_COLUMNS = (
+    "listing_id", "seller_id", "name", "description", "category", "tags", "tag_list", "price_min",
+    "price_max", "total_stock", "sold_count", "status", "created_at", "updated_at",
+    "seller_meetup_locations", "transaction_methods", "payment_methods"
+)
+
+# Query parameters that are not row filters
+RESERVED_PARAMS = {"select", "order", "limit", "offset", "on_conflict", "columns"}
+
+
+class StoreError(Exception):
+    """A PostgREST-style error; `code` is the SQLSTATE the API layer maps."""
+
+    def __init__(self, code: str, message: str, status_code: int = 400, details: Optional[str] = None):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+        self.status_code = status_code
+        self.details = details
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"code": self.code, "message": self.message, "details": self.details, "hint": None}
+
+
+def _normalize_timestamp(value):
+    if not isinstance(value, str):
+        return value
+    if value.lower() in ("now", "now()"):
+        return _now()
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return value
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc).isoformat()
+
+
+def _split_top_level(text: str) -> List[str]:
+    """Split on commas outside parentheses, braces and double quotes."""
+    parts, current, depth, quoted, escaped = [], [], 0, False, False
+    for char in text:
+        if escaped:
+            current.append(char)
+            escaped = False
+        elif char == "\\" and quoted:
+            current.append(char)
+            escaped = True
+        elif char == '"':
+            current.append(char)
+            quoted = not quoted
+        elif char in "({" and not quoted:
+            depth += 1
+            current.append(char)
+        elif char in ")}" and not quoted:
+            depth -= 1
+            current.append(char)
+        elif char == "," and depth == 0 and not quoted:
+            parts.append("".join(current))
+            current = []
+        else:
+            current.append(char)
+    if current or parts:
+        parts.append("".join(current))
+    return parts
+
+
+def _unquote(value: str) -> str:
+    if len(value) >= 2 and value[0] == value[-1] == '"':
+        return re.sub(r"\\(.)", r"\1", value[1:-1])
+    return value
+
+
+def _parse_list(literal: str) -> List[str]:
+    """Items of an `in.(...)` list or a `{...}` array literal."""
+    inner = literal.strip()
+    if inner[:1] in "({" and inner[-1:] in ")}":
+        inner = inner[1:-1]
+    return [_unquote(item.strip()) for item in _split_top_level(inner) if item.strip()]
+
+
+def _parse_operator(expression: str) -> Tuple[bool, str, str]:
+    """`[not.]op.value` -> (negate, op, value)."""
+    negate = expression.startswith("not.")
+    if negate:
+        expression = expression[4:]
+    op, _, value = expression.partition(".")
+    return negate, op, value
+
+
+def _parse_logic(kind: str, negate: bool, literal: str) -> Tuple:
+    """`(cond,cond,...)` of an or/and filter into a condition tree."""
+    conditions = []
+    for part in _parse_group(literal):
+        inner_negate = part.startswith("not.")
+        body = part[4:] if inner_negate else part
+        match = re.match(r"^(and|or)(\(.*\))$", body, re.S)
+        if match:
+            conditions.append(_parse_logic(match.group(1), inner_negate, match.group(2)))
+        else:
+            column, _, expression = part.partition(".")
+            column_negate, op, value = _parse_operator(expression)
+            conditions.append(("column", column, column_negate, op, value if op == "in" else _unquote(value)))
+    return (kind, conditions, negate)
+
+
+def _parse_group(literal: str) -> List[str]:
+    literal = literal.strip()
+    if literal.startswith("(") and literal.endswith(")"):
+        literal = literal[1:-1]
+    return [part.strip() for part in _split_top_level(literal) if part.strip()]
+
+
+def _parse_select(select: Optional[str]) -> List[Tuple]:
+    """Select list into ("column", alias, name) and ("embed", alias, table, inner, fields) entries."""
+    fields = []
+    for item in _split_top_level(re.sub(r"\s+", "", select or "*")):
+        if not item:
+            continue
+        match = re.fullmatch(r"(?:(\w+):)?(\w+)(?:!(\w+))?\((.*)\)", item)
+        if match:
+            alias, table, hint, inner_select = match.groups()
+            fields.append(("embed", alias or table, table, hint == "inner", _parse_select(inner_select)))
+        else:
+            alias, _, name = item.rpartition(":")
+            name = name.split("::")[0]
+            fields.append(("column", alias or name, name))
+    return fields
+
+
+def _like_pattern(pattern: str, ignore_case: bool):
+    regex = "".join(".*" if char in "*%" else "." if char == "_" else re.escape(char) for char in pattern)
+    return re.compile(regex, re.S | (re.I if ignore_case else 0))
+
+
+def _coerce(literal: str, sample, column: str):
+    """Filter literal as the type of the stored value it is compared with."""
+    if isinstance(sample, bool):
+        return literal.lower() in ("true", "t", "1")
+    if isinstance(sample, (int, float)):
+        try:
+            return float(literal)
+        except ValueError:
+            return literal
+    if column in TIMESTAMP_COLUMNS:
+        return _normalize_timestamp(literal)
+    return literal
+
+
+def _compare(op: str, value, literal: str, column: str) -> Optional[bool]:
+    """SQL comparison of a stored value with a filter literal (None for unknown)."""
+    if op == "is":
+        target = literal.lower()
+        if target == "null":
+            return value is None
+        if target in ("true", "false"):
+            return value is (target == "true")
+        return value is None
+    if value is None:
+        return None
+    try:
+        if op == "in":
+            return any(value == _coerce(item, value, column) for item in _parse_list(literal))
+        if op in ("cs", "cd", "ov"):
+            stored = {str(item) for item in value or []}
+            items = set(_parse_list(literal))
+            if op == "cs":
+                return items <= stored
+            if op == "cd":
+                return stored <= items
+            return bool(stored & items)
+        if op in ("like", "ilike"):
+            return bool(_like_pattern(literal, op == "ilike").fullmatch(str(value)))
+
+        target = _coerce(literal, value, column)
+        if op == "eq":
+            return value == target
+        if op == "neq":
+            return value != target
+        if op == "gt":
+            return value > target
+        if op == "gte":
+            return value >= target
+        if op == "lt":
+            return value < target
+        if op == "lte":
+            return value <= target
+    except TypeError:
+        return None
+    raise StoreError("PGRST100", f'"{op}" is not a supported operator', 400)
+
+
+def _matches(row: Dict[str, Any], condition: Tuple) -> bool:
+    return _evaluate(row, condition) is True
+
+
+def _evaluate(row: Dict[str, Any], condition: Tuple) -> Optional[bool]:
+    if condition[0] == "column":
+        _, column, negate, op, literal = condition
+        result = _compare(op, row.get(column), literal, column)
+    else:
+        kind, conditions, negate = condition
+        results = [_evaluate(row, inner) for inner in conditions]
+        if kind == "or":
+            result = True if True in results else (None if None in results else False)
+        else:
+            result = False if False in results else (None if None in results else True)
+    if negate and result is not None:
+        return not result
+    return result
+
+
+def _sort_rows(rows: List[Dict[str, Any]], order: List[str]) -> List[Dict[str, Any]]:
+    """Order rows like Postgres: NULLs last ascending and first descending unless told otherwise."""
+    terms = []
+    for clause in order:
+        for term in clause.split(","):
+            column, *modifiers = term.strip().split(".")
+            descending = "desc" in modifiers
+            if "nullsfirst" in modifiers:
+                nulls_first = True
+            elif "nullslast" in modifiers:
+                nulls_first = False
+            else:
+                nulls_first = descending
+            terms.append((column, descending, nulls_first))
+
+    for column, descending, nulls_first in reversed(terms):
+        null_high = nulls_first == descending
+        rows.sort(
+            key=lambda row: ((row.get(column) is None) == null_high, row.get(column)),
+            reverse=descending
+        )
+    return rows
+
+
+class InMemoryDatabase:
+    """Tables of rows keyed by primary key, with equality indexes and the listing card triggers."""
+
+    def __init__(self):
+        self.tables: Dict[str, Dict[Any, Dict[str, Any]]] = {}
+        self._indexes: Dict[str, Dict[str, Dict[str, set]]] = {}
+        self._sequences: Dict[str, int] = {}
+        self._lock = threading.RLock()
+
+    # Storage
+
+    def _table(self, table: str) -> Dict[Any, Dict[str, Any]]:
+        rows = self.tables.get(table)
+        if rows is None:
+            rows = self.tables[table] = {}
+            spec = TABLES.get(table, {})
+            indexed = list(INDEXED_COLUMNS.get(table, ()))
+            if len(spec.get("primary_key", ())) == 1:
+                indexed.append(spec["primary_key"][0])
+            self._indexes[table] = {column: {} for column in indexed}
+        return rows
+
+    def _row_key(self, table: str, row: Dict[str, Any]):
+        """Storage key of a new row: its primary key, or a running number for keyless tables."""
+        primary_key = TABLES.get(table, {}).get("primary_key")
+        if primary_key:
+            return tuple(str(row.get(column)) for column in primary_key)
+        self._sequences[f"{table}#key"] = self._sequences.get(f"{table}#key", 0) + 1
+        return self._sequences[f"{table}#key"]
+
+    def _key_of(self, table: str, row: Dict[str, Any]):
+        """Storage key of a stored row."""
+        if TABLES.get(table, {}).get("primary_key"):
+            return self._row_key(table, row)
+        return next((key for key, stored in self._table(table).items() if stored == row), None)
+
+    def _store(self, table: str, key, row: Dict[str, Any]):
+        rows = self._table(table)
+        if key in rows:
+            self._unindex(table, key, rows[key])
+        rows[key] = row
+        for column, index in self._indexes[table].items():
+            index.setdefault(str(row.get(column)), set()).add(key)
+
+    def _remove(self, table: str, key) -> Optional[Dict[str, Any]]:
+        row = self._table(table).pop(key, None)
+        if row is not None:
+            self._unindex(table, key, row)
+        return row
+
+    def _unindex(self, table: str, key, row: Dict[str, Any]):
+        for column, index in self._indexes[table].items():
+            keys = index.get(str(row.get(column)))
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del index[str(row.get(column))]
+
+    def _lookup(self, table: str, column: str, value) -> List[Dict[str, Any]]:
+        rows = self._table(table)
+        index = self._indexes[table].get(column)
+        if index is not None:
+            return [rows[key] for key in index.get(str(value), ())]
+        return [row for row in rows.values() if str(row.get(column)) == str(value)]
+
+    def _candidates(self, table: str, conditions: List[Tuple]) -> List[Dict[str, Any]]:
+        """Rows an indexed eq/in filter narrows the scan to, else the whole table."""
+        rows = self._table(table)
+        indexes = self._indexes[table]
+        for condition in conditions:
+            if condition[0] != "column" or condition[2] or condition[1] not in indexes:
+                continue
+            _, column, _, op, literal = condition
+            if op == "eq":
+                return [rows[key] for key in indexes[column].get(literal, ())]
+            if op == "in":
+                keys = set()
+                for item in _parse_list(literal):
+                    keys.update(indexes[column].get(item, ()))
+                return [rows[key] for key in keys]
+        return list(rows.values())
+
+    def _prepare(self, table: str, values: Dict[str, Any]) -> Dict[str, Any]:
+        row = {
+            column: _normalize_timestamp(value) if column in TIMESTAMP_COLUMNS else value
+            for column, value in values.items()
+        }
+        if table == "listings" and "tags" in row:
+            from supabase_client.database.tags import normalize_tags
+            row["tag_list"] = normalize_tags(row["tags"])
+        return row
+
+    # Writes
+
+    def insert(self, table: str, payload, upsert: bool = False, on_conflict: Optional[str] = None,
+               ignore_duplicates: bool = False) -> List[Dict[str, Any]]:
+        """Insert one row or a list of rows atomically; upsert merges into rows matching on_conflict."""
+        with self._lock:
+            spec = TABLES.get(table, {})
+            conflict_columns = on_conflict.split(",") if on_conflict else list(spec.get("primary_key", ()))
+            written, undo = [], []
+            try:
+                for values in payload if isinstance(payload, list) else [payload]:
+                    values = self._prepare(table, values)
+                    existing = self._find_conflict(table, conflict_columns, values)
+                    if existing is not None:
+                        if not upsert:
+                            raise StoreError(
+                                "23505", f'duplicate key value violates unique constraint "{table}_pkey"', 409
+                            )
+                        if ignore_duplicates:
+                            continue
+                        key = self._key_of(table, existing)
+                        row = {**existing, **values}
+                        if table == "listings":
+                            row = {**row, **self._prepare(table, {"tags": row.get("tags")})}
+                        undo.append((key, existing))
+                        self._store(table, key, row)
+                        written.append((existing, row))
+                        continue
+
+                    row = {}
+                    for column, default in spec.get("defaults", {}).items():
+                        row[column] = default() if callable(default) else default
+                    row.update(values)
+                    if table == "listings" and "tag_list" not in row:
+                        row["tag_list"] = []
+                    identity = spec.get("identity")
+                    if identity:
+                        if row.get(identity) is None:
+                            self._sequences[table] = self._sequences.get(table, 0) + 1
+                            row[identity] = self._sequences[table]
+                        else:
+                            self._sequences[table] = max(self._sequences.get(table, 0), int(row[identity]))
+                    key = self._row_key(table, row)
+                    undo.append((key, None))
+                    self._store(table, key, row)
+                    written.append((None, row))
+            except Exception:
+                for key, previous in reversed(undo):
+                    if previous is None:
+                        self._remove(table, key)
+                    else:
+                        self._store(table, key, previous)
+                raise
+
+            self._after_write(table, written)
+            return [row for _, row in written]
+
+    def _find_conflict(self, table: str, columns: List[str], values: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        if not columns or any(values.get(column) is None for column in columns):
+            return None
+        if tuple(columns) == TABLES.get(table, {}).get("primary_key"):
+            return self._table(table).get(tuple(str(values[column]) for column in columns))
+        candidates = self._lookup(table, columns[0], values[columns[0]])
+        for row in candidates:
+            if all(str(row.get(column)) == str(values[column]) for column in columns):
+                return row
+        return None
+
+    def update(self, table: str, rows: List[Dict[str, Any]], values: Dict[str, Any]) -> List[Dict[str, Any]]:
+        with self._lock:
+            values = self._prepare(table, values)
+            written = []
+            for row in rows:
+                key = self._key_of(table, row)
+                updated = {**row, **values}
+                self._store(table, key, updated)
+                written.append((row, updated))
+            self._after_write(table, written)
+            return [row for _, row in written]
+
+    def delete(self, table: str, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        with self._lock:
+            written = []
+            for row in rows:
+                removed = self._remove(table, self._key_of(table, row))
+                if removed is not None:
+                    written.append((removed, None))
+            self._after_write(table, written)
+            return [row for row, _ in written]
+
+    def load(self, data: Dict[str, List[Dict[str, Any]]]):
+        """Seed tables from {table: [rows]}; listings before the rows that reference them."""
+        order = ["user_profile", "listings"]
+        for table in order + [table for table in data if table not in order]:
+            if data.get(table):
+                self.insert(table, data[table], upsert=True)
+
+    def load_file(self, path: str):
+        with open(path) as seed_file:
+            self.load(json.load(seed_file))
+
+    # Triggers
+
+    def _after_write(self, table: str, written: List[Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]]):
+        if table == "listings":
+            for before, after in written:
+                if after is None:
+                    self._remove("listing_cards", (str(before["listing_id"]),))
+                    for child in LISTING_CASCADE_TABLES:
+                        self.delete(child, self._lookup(child, "listing_id", before["listing_id"]))
+                    self._refresh_seller_cards(before.get("seller_id"))
+                    continue
+                self._refresh_card(after["listing_id"])
+                if before is None or before.get("status") != after.get("status"):
+                    self._refresh_seller_cards(after.get("seller_id"))
+                if before is not None and before.get("seller_id") != after.get("seller_id"):
+                    self._refresh_seller_cards(before.get("seller_id"))
+        elif table == "listing_images":
+            listing_ids = set()
+            for before, after in written:
+                for row in (before, after):
+                    if row is not None:
+                        listing_ids.add(row.get("listing_id"))
+            for listing_id in listing_ids:
+                self._refresh_card(listing_id)
+        elif table == "user_profile":
+            for _, after in written:
+                if after is not None:
+                    self._refresh_seller_cards(after["user_id"])
+
+    def _refresh_card(self, listing_id):
+        listing = self._table("listings").get((str(listing_id),))
+        if listing is None:
+            self._remove("listing_cards", (str(listing_id),))
+            return
+
+        images = self._lookup("listing_images", "listing_id", listing_id)
+        primary = min(images, key=lambda image: (not image.get("is_primary"), image["image_id"])) if images else None
+        card = {column: listing.get(column) for column in CARD_LISTING_COLUMNS}
+        card.update(
+            primary_image_id=primary["image_id"] if primary else None,
+            primary_image_url=primary.get("image_url") if primary else None,
+            **self._seller_card_fields(listing.get("seller_id"))
+        )
+        self._store("listing_cards", (str(listing_id),), card)
+
+    def _seller_card_fields(self, seller_id) -> Dict[str, Any]:
+        profile = self._table("user_profile").get((str(seller_id),)) or {}
+        active = sum(1 for row in self._lookup("listings", "seller_id", seller_id) if row.get("status") == "active")
+        return {
+            "seller_username": profile.get("username"),
+            "seller_profile_photo_url": profile.get("profile_photo_url"),
+            "seller_listing_count": active
+        }
+
+    def _refresh_seller_cards(self, seller_id):
+        if seller_id is None:
+            return
+        fields = self._seller_card_fields(seller_id)
+        for card in self._lookup("listing_cards", "seller_id", seller_id):
+            self._store("listing_cards", (str(card["listing_id"]),), {**card, **fields})
+
+    # Reads
+
+    def select(self, table: str, conditions: List[Tuple], fields: List[Tuple],
+               embed_conditions: Dict[str, List[Tuple]], order: List[str]) -> List[Dict[str, Any]]:
+        """
+        Stored rows matching the filters and any !inner embeds, in `order`.
+        Rows are projected by the caller, so only the returned page pays for it.
+        """
+        rows = [row for row in self._candidates(table, conditions) if all(_matches(row, c) for c in conditions)]
+        if any(field[0] == "embed" and field[3] for field in fields):
+            rows = [row for row in rows if self._project(table, row, fields, embed_conditions) is not None]
+        if order:
+            _sort_rows(rows, order)
+        return rows
+
+    def _project(self, table: str, row: Dict[str, Any], fields: List[Tuple],
+                 embed_conditions: Dict[str, List[Tuple]], path: str = "") -> Optional[Dict[str, Any]]:
+        """Project a row; None when an !inner embed has no matching rows."""
+        projected = {}
+        for field in fields:
+            if field[0] == "column":
+                _, alias, name = field
+                if name == "*":
+                    projected.update(row)
+                else:
+                    projected[alias] = row.get(name)
+                continue
+
+            _, alias, embedded, inner, embedded_fields = field
+            embed_path = f"{path}{alias}"
+            conditions = embed_conditions.get(embed_path, [])
+            related, to_one = self._related(table, row, embedded)
+            matched = []
+            for related_row in related:
+                if all(_matches(related_row, c) for c in conditions):
+                    nested = self._project(embedded, related_row, embedded_fields, embed_conditions, f"{embed_path}.")
+                    if nested is not None:
+                        matched.append(nested)
+            if inner and not matched:
+                return None
+            projected[alias] = (matched[0] if matched else None) if to_one else matched
+        return projected
+
+    def _related(self, table: str, row: Dict[str, Any], embedded: str) -> Tuple[List[Dict[str, Any]], bool]:
+        for source, column, target, target_column in FOREIGN_KEYS:
+            if source == table and target == embedded:
+                if row.get(column) is None:
+                    return [], True
+                return self._lookup(embedded, target_column, row[column]), True
+        for source, column, target, target_column in FOREIGN_KEYS:
+            if source == embedded and target == table:
+                return self._lookup(embedded, column, row.get(target_column)), False
+        raise StoreError(
+            "PGRST200", f"Could not find a relationship between '{table}' and '{embedded}'", 400
+        )
+
+    # Requests
+
+    def handle(self, method: str, path: str, params: List[Tuple[str, str]], headers: httpx.Headers,
+               payload, user_id: Optional[str]) -> Tuple[int, Any, Dict[str, str]]:
+        """Serve one PostgREST request: (status, JSON body or None, extra headers)."""
+        with self._lock:
+            name = path.rstrip("/").rsplit("/", 1)[-1]
+            if "/rpc/" in path:
+                return 200, self.call_rpc(name, payload or {}, user_id), {}
+
+            prefer = headers.get("prefer", "")
+            select_param = None
+            order, conditions, embed_conditions = [], [], {}
+            limit = offset = on_conflict = None
+            for key, value in params:
+                if key == "select":
+                    select_param = value
+                elif key == "order":
+                    order.append(value)
+                elif key == "limit":
+                    limit = int(value)
+                elif key == "offset":
+                    offset = int(value)
+                elif key == "on_conflict":
+                    on_conflict = value
+                elif key in RESERVED_PARAMS:
+                    continue
+                elif key.split(".")[-1] in ("or", "and"):
+                    conditions.append(_parse_logic(key.split(".")[-1], key.startswith("not."), value))
+                else:
+                    embed, _, column = key.rpartition(".")
+                    condition = ("column", column) + _parse_operator(value)
+                    if embed:
+                        embed_conditions.setdefault(embed, []).append(condition)
+                    else:
+                        conditions.append(condition)
+
+            fields = _parse_select(select_param)
+            returning = "return=minimal" not in prefer
+
+            if method in ("GET", "HEAD"):
+                rows = self.select(name, conditions, fields, embed_conditions, order)
+            elif method == "POST":
+                rows = self.insert(
+                    name, payload,
+                    upsert="resolution=" in prefer,
+                    on_conflict=on_conflict,
+                    ignore_duplicates="resolution=ignore-duplicates" in prefer
+                )
+            elif method == "PATCH":
+                rows = self.update(name, self.select(name, conditions, [], {}, []), payload or {})
+            elif method == "DELETE":
+                rows = self.delete(name, self.select(name, conditions, [], {}, []))
+            else:
+                raise StoreError("PGRST000", f"Unsupported method {method}", 405)
+
+            total = len(rows)
+            range_header = headers.get("range")
+            if range_header:
+                first, _, last = range_header.partition("-")
+                start = int(first)
+                end = int(last) + 1 if last else total
+            else:
+                start = offset or 0
+                end = start + limit if limit is not None else total
+            page = [
+                projected for projected in (
+                    self._project(name, row, fields, embed_conditions) for row in rows[start:end]
+                )
+                if projected is not None
+            ]
+
+            response_headers = {}
+            if "count=" in prefer:
+                content_range = f"{start}-{start + len(page) - 1}" if page else "*"
+                response_headers["content-range"] = f"{content_range}/{total}"
+
+            status = 201 if method == "POST" else 200
+            if method == "HEAD" or (method != "GET" and not returning):
+                return status, None, response_headers
+
+            if "vnd.pgrst.object" in headers.get("accept", ""):
+                if len(page) != 1:
+                    raise StoreError(
+                        "PGRST116", "JSON object requested, multiple (or no) rows returned", 406,
+                        details=f"The result contains {len(page)} rows"
+                    )
+                return status, page[0], response_headers
+            return status, page, response_headers
+
+    # RPCs (mirror the functions in database/sql/)
+
+    def call_rpc(self, function_name: str, params: Dict[str, Any], user_id: Optional[str]):
+        handler = getattr(self, f"_rpc_{function_name}", None)
+        if handler is None:
+            raise StoreError("PGRST202", f"Could not find the function public.{function_name}", 404)
+        if "auth_uid" in inspect.signature(handler).parameters:
+            # Stands in for auth.uid(): always the caller, never a value from the request
+            params = {**params, "auth_uid": user_id}
+        try:
+            return handler(**params)
+        except TypeError as e:
+            raise StoreError("PGRST202", f"Could not call public.{function_name}: {e}", 404)
+
+    def _rpc_toggle_favorite(self, auth_uid, p_listing_id):
+        existing = self._table("user_favorites").get((str(auth_uid), str(p_listing_id)))
+        if existing is not None:
+            self.delete("user_favorites", [existing])
+            return {"listing_id": p_listing_id, "is_favorited": False, "favorited_at": None}
+
+        listing = self._table("listings").get((str(p_listing_id),))
+        if listing is None:
+            raise StoreError("P0002", "Listing not found")
+        if str(listing["seller_id"]) == str(auth_uid):
+            raise StoreError("22023", "You cannot favorite your own listing.")
+        if listing.get("status") != "active":
+            raise StoreError("22023", "Cannot favorite inactive listings")
+
+        favorite = self.insert("user_favorites", {"user_id": auth_uid, "listing_id": p_listing_id})[0]
+        return {"listing_id": p_listing_id, "is_favorited": True, "favorited_at": favorite["favorited_at"]}
+
+    def _rpc_create_listings_with_slots(self, auth_uid, p_listings):
+        created = []
+        try:
+            for item in p_listings or []:
+                values = {column: value for column, value in item.items() if column != "meetup_time_slots"}
+                listing = self.insert("listings", {
+                    **values,
+                    "seller_id": auth_uid,
+                    "status": values.get("status") or "active",
+                    "sold_count": values.get("sold_count") or 0
+                })[0]
+                created.append(listing)
+                slots = item.get("meetup_time_slots") or []
+                if slots:
+                    self.insert("listing_meetup_time_details", [
+                        {"listing_id": listing["listing_id"], "start_time": slot["start_time"], "end_time": slot["end_time"]}
+                        for slot in slots
+                    ])
+        except Exception:
+            # The function is one transaction in Postgres: undo the listings already inserted
+            self.delete("listings", created)
+            raise
+        return created
+
+    def _meetup_acting_party(self, p_order_id, auth_uid) -> str:
+        order = self._table("orders").get((str(p_order_id),))
+        if order is None:
+            raise StoreError("P0002", "Order not found")
+        if auth_uid is not None and str(order["buyer_id"]) == auth_uid:
+            return "buyer"
+        if auth_uid is not None and str(order["seller_id"]) == auth_uid:
+            return "seller"
+        raise StoreError("42501", "Access denied to this order")
+
+    def _current_meetup(self, order_id) -> Optional[Dict[str, Any]]:
+        return next((m for m in self._lookup("meetups", "order_id", order_id) if m.get("is_current")), None)
+
+    def _seller_meetup_conflict(self, p_order_id, p_scheduled_at) -> Optional[datetime]:
+        order = self._table("orders").get((str(p_order_id),))
+        scheduled_at = datetime.fromisoformat(_normalize_timestamp(p_scheduled_at))
+        for other in self._lookup("orders", "seller_id", order["seller_id"]):
+            if str(other["order_id"]) == str(p_order_id) or other.get("status") not in ("pending", "confirmed"):
+                continue
+            meetup = self._current_meetup(other["order_id"])
+            if meetup is None or meetup.get("status") == "cancelled" or not meetup.get("scheduled_at"):
+                continue
+            booked_at = datetime.fromisoformat(meetup["scheduled_at"])
+            if abs(booked_at - scheduled_at) < MEETUP_DURATION:
+                return booked_at
+        return None
+
+    def _rpc_update_current_meetup(self, auth_uid, p_order_id, p_location=None, p_scheduled_at=None,
+                                   p_remarks=None, p_proposed_by=None):
+        party = self._meetup_acting_party(p_order_id, auth_uid)
+        if self._table("orders").get((str(p_order_id),)).get("transaction_method") != "Meet-up":
+            raise StoreError("22023", "This order does not use meetup transaction method")
+        current = self._current_meetup(p_order_id)
+
+        if p_scheduled_at is None:
+            if current is None:
+                raise StoreError("P0002", "Meetup not found or failed to update")
+            meetup = self.update("meetups", [current], {
+                "location": p_location if p_location is not None else current.get("location"),
+                "remarks": p_remarks if p_remarks is not None else current.get("remarks"),
+                "proposed_by": p_proposed_by if p_proposed_by is not None else current.get("proposed_by"),
+                "changed_at": _now()
+            })[0]
+        else:
+            blocked_from = self._seller_meetup_conflict(p_order_id, p_scheduled_at)
+            if blocked_from is not None:
+                raise StoreError(
+                    "23P01", f"The seller is already booked from {blocked_from} to {blocked_from + MEETUP_DURATION}", 409
+                )
+            if current is None:
+                raise StoreError("P0002", "No existing meetup found to reschedule")
+            previous = self.update("meetups", [current], {"is_current": False, "changed_at": _now()})[0]
+            meetup = self.insert("meetups", {
+                "order_id": p_order_id,
+                "location": p_location if p_location is not None else previous.get("location"),
+                "scheduled_at": p_scheduled_at,
+                "status": "rescheduled",
+                "remarks": p_remarks if p_remarks is not None else previous.get("remarks"),
+                "proposed_by": p_proposed_by if p_proposed_by is not None else party,
+                "confirmed_by_buyer": previous.get("confirmed_by_buyer"),
+                "confirmed_by_seller": previous.get("confirmed_by_seller"),
+                "is_current": True
+            })[0]
+
+        return {**meetup, "acting_party": party}
+
+    def _rpc_confirm_current_meetup(self, auth_uid, p_order_id):
+        party = self._meetup_acting_party(p_order_id, auth_uid)
+        current = self._current_meetup(p_order_id)
+        if current is None:
+            raise StoreError("P0002", "Current meetup not found")
+
+        by_buyer = True if party == "buyer" else current.get("confirmed_by_buyer")
+        by_seller = True if party == "seller" else current.get("confirmed_by_seller")
+        meetup = self.update("meetups", [current], {
+            "confirmed_by_buyer": by_buyer,
+            "confirmed_by_seller": by_seller,
+            "status": "confirmed" if by_buyer and by_seller else current.get("status"),
+            "changed_at": _now()
+        })[0]
+        return {**meetup, "acting_party": party}
+
+    def _rpc_cancel_current_meetup(self, auth_uid, p_order_id, p_reason=None):
+        party = self._meetup_acting_party(p_order_id, auth_uid)
+        current = self._current_meetup(p_order_id)
+        if current is None:
+            raise StoreError("P0002", "Failed to cancel meetup")
+
+        meetup = self.update("meetups", [current], {
+            "status": "cancelled",
+            "remarks": p_reason if p_reason is not None else current.get("remarks"),
+            "changed_at": _now()
+        })[0]
+        return {**meetup, "acting_party": party}
+
+    def _rpc_listing_facets(self, p_user_id, p_category=None, p_min_price=None, p_max_price=None,
+                            p_listing_ids=None, p_bucket_count=10):
+        listing_ids = {str(listing_id) for listing_id in p_listing_ids} if p_listing_ids is not None else None
+        base = [
+            row for row in self._lookup("listings", "status", "active")
+            if str(row.get("seller_id")) != str(p_user_id)
+            and (listing_ids is None or str(row["listing_id"]) in listing_ids)
+        ]
+        in_price = [
+            row for row in base
+            if (p_min_price is None or (row.get("price_min") is not None and row["price_min"] >= p_min_price))
+            and (p_max_price is None or (row.get("price_max") is not None and row["price_max"] <= p_max_price))
+        ]
+        in_category = [row for row in base if p_category is None or row.get("category") == p_category]
+        filtered = [row for row in in_price if p_category is None or row.get("category") == p_category]
+
+        def count_by(rows, values_of):
+            counts = {}
+            for row in rows:
+                for value in values_of(row):
+                    counts[value] = counts.get(value, 0) + 1
+            return counts
+
+        bucket_count = max(p_bucket_count, 1)
+        prices = [row["price_min"] for row in in_category if row.get("price_min") is not None]
+        histogram = []
+        if prices:
+            low, high = min(prices), max(prices)
+            width = (high + 0.000001 - low) / bucket_count
+            buckets = {}
+            for price in prices:
+                bucket = min(math.floor((price - low) / width) + 1, bucket_count)
+                buckets[bucket] = buckets.get(bucket, 0) + 1
+            histogram = [
+                {
+                    "min": round(low + (bucket - 1) * (high - low) / bucket_count, 2),
+                    "max": round(low + bucket * (high - low) / bucket_count, 2),
+                    "count": buckets.get(bucket, 0)
+                }
+                for bucket in range(1, bucket_count + 1)
+            ]
+
+        return {
+            "total_count": len(filtered),
+            "categories": count_by(in_price, lambda row: [row.get("category")]),
+            "payment_methods": count_by(filtered, lambda row: row.get("payment_methods") or []),
+            "transaction_methods": count_by(filtered, lambda row: row.get("transaction_methods") or []),
+            "price_histogram": histogram
+        }
+
+    def _rpc_apply_listing_popularity_deltas(self, p_deltas):
+        updated = 0
+        for delta in p_deltas or []:
+            listing_id = delta["listing_id"]
+            if (str(listing_id),) not in self._table("listings"):
+                continue
+            row = self._table("listing_popularity").get((str(listing_id),))
+            if row is None:
+                row = self.insert("listing_popularity", {"listing_id": listing_id})[0]
+            self.update("listing_popularity", [row], {
+                "favorite_count": max(row["favorite_count"] + (delta.get("favorites") or 0), 0),
+                "view_count": max(row["view_count"] + (delta.get("views") or 0), 0),
+                "order_count": max(row["order_count"] + (delta.get("orders") or 0), 0),
+                "updated_at": _now()
+            })
+            updated += 1
+        return updated
+
+    def _rpc_verify_email_token(self, p_token):
+        for request in self._lookup("email_verification_requests", "token", p_token):
+            if not request.get("is_used") and str(request.get("expires_at") or "") > _now():
+                self.update("email_verification_requests", [request], {"is_used": True})
+                return True
+        return False
+
+
+class InMemoryPostgrestTransport(httpx.BaseTransport):
+    """httpx transport answering PostgREST requests from an InMemoryDatabase."""
+
+    def __init__(self, database: InMemoryDatabase, user_id: Optional[str] = None):
+        self.database = database
+        self.user_id = user_id
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        body = request.read()
+        try:
+            status, data, headers = self.database.handle(
+                request.method,
+                request.url.path,
+                list(request.url.params.multi_items()),
+                request.headers,
+                json.loads(body) if body else None,
+                self.user_id
+            )
+        except StoreError as e:
+            return httpx.Response(e.status_code, json=e.to_dict(), request=request)
+
+        content = b"" if data is None else json.dumps(data, default=str).encode()
+        headers = {"content-type": "application/json", **headers}
+        return httpx.Response(status, content=content, headers=headers, request=request)
+
+
+class InMemoryPostgrestClient(SyncPostgrestClient):
+    """The regular PostgREST client, with its HTTP session served by an InMemoryDatabase."""
+
+    def __init__(self, database: InMemoryDatabase, user_id: Optional[str] = None):
+        self._transport = InMemoryPostgrestTransport(database, user_id)
+        super().__init__("http://memory-store")
+
+    def create_session(self, base_url, headers, timeout) -> SyncClient:
+        return SyncClient(base_url=base_url, headers=headers, timeout=timeout, transport=self._transport)
@@ -8,6 +8,7 @@ from .listings import router as listings_router
 from .favorites import router as favorites_router
 from .orders import router as orders_router
 from .users import router as users_router
+from .sales import router as sales_router
 
 # Create main router that combines all sub-routers
 router = APIRouter()
@@ -17,3 +18,4 @@ router.include_router(listings_router)
 router.include_router(favorites_router)
 router.include_router(orders_router)
 router.include_router(users_router)
+router.include_router(sales_router)
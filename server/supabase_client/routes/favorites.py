@@ -1,18 +1,17 @@
 """
 Favorites-related routes for the Supabase client.
-Handles favorite listing operations including toggle, list, and status check.
+Handles favorite listing operations including toggle, list, and single or bulk status check.
 """
 
 from fastapi import APIRouter, Depends, HTTPException, Query
-from typing import Optional
+from typing import Literal, Optional
 from supabase_client.schemas import (
-    FavoriteRequest, FavoriteResponse, UserFavorite, UserFavoritesResponse
+    FavoriteRequest, FavoriteResponse, UserFavorite, UserFavoritesResponse,
+    BulkFavoriteStatusRequest, FavoriteStatus, BulkFavoriteStatusResponse
 )
-from supabase_client.database import favorites as favorites_db, listings as listings_db
-from supabase_client.database.favorites import (
-    build_favorites_query, build_favorite_listing_detail_query
-)
-from supabase_client.utils import convert_listing_to_product
+from supabase_client.database import favorites as favorites_db, listing_cards as listing_cards_db
+from supabase_client.database.base import get_authenticated_client
+from supabase_client.utils import convert_listings_to_products
 from auth.utils import get_current_user
 from core.utils import create_standardized_response
 
@@ -25,41 +24,18 @@ async def toggle_favorite_listing(
 ):
     """
     Toggle favorite status for a listing. If already favorited, remove from favorite listings.
-    If not favorited, add to favorite listings.
+    If not favorited, add to favorite listings (the listing must be active and not your own).
     """
     try:
-        # Check if listing exists and user can't favorite their own listing
-        listing = await listings_db.get_listing_by_id(current_user["user_id"], favorite_data.listing_id, include_seller_info=False)
-        if not listing:
-            raise HTTPException(status_code=404, detail="Listing not found")
-        
-        if listing["seller_id"] == current_user["user_id"]:
-            raise HTTPException(status_code=400, detail="You cannot favorite your own listing.")
-        
-        if listing["status"] != "active":
-            raise HTTPException(status_code=400, detail="Cannot favorite inactive listings")
+        # Listing validation and the delete-or-insert run in one database call
+        result = await favorites_db.toggle_favorite(current_user["user_id"], favorite_data.listing_id)
 
-        # Check if already favorited
-        is_favorited = await favorites_db.check_favorite_exists(current_user["user_id"], favorite_data.listing_id)
-
-        if is_favorited:
-            # Remove from favorites
-            await favorites_db.remove_favorite(current_user["user_id"], favorite_data.listing_id)
-            return FavoriteResponse(
-                success=True,
-                message="Listing removed from favorite listings",
-                is_favorited=False,
-                listing_id=favorite_data.listing_id
-            )
-        else:
-            # Add to favorites
-            await favorites_db.add_favorite(current_user["user_id"], favorite_data.listing_id)
-            return FavoriteResponse(
-                success=True,
-                message="Listing added to favorite listings",
-                is_favorited=True,
-                listing_id=favorite_data.listing_id
-            )
+        return FavoriteResponse(
+            success=True,
+            message="Listing added to favorite listings" if result["is_favorited"] else "Listing removed from favorite listings",
+            is_favorited=result["is_favorited"],
+            listing_id=favorite_data.listing_id
+        )
     except HTTPException:
         raise
     except Exception as e:
@@ -69,58 +45,70 @@ async def toggle_favorite_listing(
 @router.get("/favorite-listings", response_model=UserFavoritesResponse)
 async def get_user_favorite_listings(
     include_listing_details: bool = Query(True, description="Include full listing details in response"),
+    page: int = Query(1, ge=1, description="Page number"),
+    page_size: Optional[int] = Query(None, ge=1, le=100, description="Number of items per page (omit to get all favorites)"),
+    sort_order: Literal["newest", "oldest"] = Query("newest", description="Sort by favorited_at: newest or oldest"),
     current_user: dict = Depends(get_current_user)
 ):
     """
-    Get the current user's favorite listings. Optionally includes full listing details.
+    Get the current user's favorite listings, ordered by when they were favorited.
+    Optionally includes full listing details, hydrated for the whole page in one batch.
     """
     try:
-        # Get user's favorites (just the relationships)
-        from supabase_client.database.base import get_authenticated_client
-        supabase = get_authenticated_client(current_user["user_id"])
-        favorites_result = favorites_db.get_user_favorites(supabase, current_user["user_id"], include_listing_details=False)
+        favorites_data = await favorites_db.get_user_favorites_page(
+            current_user["user_id"],
+            page=page,
+            page_size=page_size,
+            sort_order=sort_order,
+            include_listings=include_listing_details
+        )
         
-        if not favorites_result["success"]:
-            raise HTTPException(status_code=500, detail=favorites_result.get("error", "Failed to fetch favorites"))
-
-        favorites_data = favorites_result["data"]
-        if not favorites_data:
+        favorite_rows = favorites_data["favorites"]
+        if not favorite_rows:
             return UserFavoritesResponse(
                 favorites=[],
-                total_count=0,
-                page=1,
-                page_size=0
+                total_count=favorites_data["total_count"],
+                page=page,
+                page_size=page_size or 0
             )
 
-        favorites = []
-        for favorite in favorites_data:
-            listing_details = None
-            
-            # If listing details are requested, fetch them separately
-            if include_listing_details:
-                try:
-                    listing_result = await listings_db.get_listing_by_id(
-                        current_user["user_id"], 
-                        favorite["listing_id"], 
-                        include_seller_info=True
+        # Hydrate all listings on this page with one batched fetch
+        products_by_id = {}
+        if include_listing_details:
+            try:
+                if all("listing" in favorite for favorite in favorite_rows):
+                    listings_by_id = {
+                        favorite["listing_id"]: favorite["listing"]
+                        for favorite in favorite_rows if favorite["listing"] is not None
+                    }
+                else:
+                    listings_by_id = await listing_cards_db.get_listing_cards_by_ids(
+                        current_user["user_id"],
+                        [favorite["listing_id"] for favorite in favorite_rows]
                     )
-                    if listing_result:
-                        listing_details = await convert_listing_to_product(supabase, listing_result, current_user["user_id"])
-                except Exception as e:
-                    print(f"Error fetching listing details for {favorite['listing_id']}: {e}")
-                    # Continue without listing details for this item
-            
-            favorites.append(UserFavorite(
+                supabase = get_authenticated_client(current_user["user_id"])
+                products = await convert_listings_to_products(
+                    supabase, list(listings_by_id.values()), current_user["user_id"]
+                )
+                products_by_id = {product.listing_id: product for product in products}
+            except Exception as e:
+                print(f"Error fetching listing details for favorites: {e}")
+                # Continue without listing details
+        
+        favorites = [
+            UserFavorite(
                 listing_id=favorite["listing_id"],
                 favorited_at=favorite["favorited_at"],
-                listing=listing_details
-            ))
+                listing=products_by_id.get(favorite["listing_id"])
+            )
+            for favorite in favorite_rows
+        ]
 
         return UserFavoritesResponse(
             favorites=favorites,
-            total_count=len(favorites),
-            page=1,
-            page_size=len(favorites)
+            total_count=favorites_data["total_count"],
+            page=page,
+            page_size=page_size or len(favorites)
         )
     except HTTPException:
         raise
@@ -137,20 +125,9 @@ async def check_favorite_listing_status(
     Check if a specific listing is in the current user's favorite listings.
     """
     try:
-        # Check if favorited
-        is_favorited = await favorites_db.check_favorite_exists(current_user["user_id"], listing_id)
-        
-        favorited_at = None
-        if is_favorited:
-            # Get the favorite details including timestamp
-            from supabase_client.database.base import get_authenticated_client
-            supabase = get_authenticated_client(current_user["user_id"])
-            favorites_result = favorites_db.get_user_favorites(supabase, current_user["user_id"], include_listing_details=False)
-            if favorites_result["success"]:
-                for favorite in favorites_result["data"]:
-                    if favorite["listing_id"] == listing_id:
-                        favorited_at = favorite["favorited_at"]
-                        break
+        favorites = await favorites_db.get_favorites_set(current_user["user_id"])
+        is_favorited = listing_id in favorites
+        favorited_at = favorites.get(listing_id)
         
         return create_standardized_response(
             message="Favorite listing status retrieved",
@@ -166,3 +143,25 @@ async def check_favorite_listing_status(
     except Exception as e:
         print(f"Error checking favorite listing status: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to check favorite listing status: {str(e)}")
+
+@router.post("/favorite-listings/status", response_model=BulkFavoriteStatusResponse)
+async def check_favorite_listing_statuses(
+    status_request: BulkFavoriteStatusRequest,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Check favorite status for many listings at once (e.g. a product grid).
+    """
+    try:
+        statuses = await favorites_db.get_favorite_statuses(current_user["user_id"], status_request.listing_ids)
+
+        return BulkFavoriteStatusResponse(
+            success=True,
+            message="Favorite listing statuses retrieved",
+            data=[FavoriteStatus(**status) for status in statuses]
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error checking favorite listing statuses: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to check favorite listing statuses: {str(e)}")
@@ -3,13 +3,23 @@ Listing-related routes for the Supabase client.
 Handles product listing operations including CRUD and filtering.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Header, Response
+from typing import Optional, Union
+from datetime import datetime
 from supabase_client.schemas import (
     ProductListingsResponse, ProductListing, CreateListingRequest, CreateListingResponse,
-    UpdateListingStatusRequest, UpdateListingStatusResponse, UpdateListingRequest, UpdateListingResponse
+    UpdateListingStatusRequest, UpdateListingStatusResponse, UpdateListingRequest, UpdateListingResponse,
+    ListingAvailability, ListingAvailabilityResponse, ListingSuggestion, ListingSuggestionsResponse,
+    ListingFacets, ListingFacetsResponse, TagCount, TopTagsResponse,
+    BulkCreateListingsRequest, BulkCreateListingsResponse, BulkListingResult,
+    BulkUpdateListingStatusRequest, BulkUpdateListingStatusResponse, BulkListingStatusResult,
+    ListingSummary, ListingSummariesResponse
+)
+from supabase_client.database import (
+    listings as listings_db, availability as availability_db, popularity as popularity_db,
+    suggestions as suggestions_db, facets as facets_db, favorites as favorites_db,
+    landing_feeds as landing_feeds_db, tags as tags_db
 )
-from supabase_client.database import listings as listings_db
 from supabase_client.database.base import get_authenticated_client
 from supabase_client.utils import (
     validate_category, validate_status, validate_price_range,
@@ -18,6 +28,8 @@ from supabase_client.utils import (
 )
 from auth.utils import get_current_user
 from core.utils import create_standardized_response
+from core.idempotency import run_idempotent, IDEMPOTENCY_HEADER, IDEMPOTENCY_REPLAYED_HEADER
+from core.config import BULK_LISTINGS_CONFIG, ensure_proper_image_urls
 
 router = APIRouter()
 
@@ -26,19 +38,29 @@ async def get_product_listings(
     page: int = Query(1, ge=1, description="Page number"),
     page_size: int = Query(20, ge=1, le=100, description="Number of items per page"),
     category: Optional[str] = Query(None, description="Filter by category"),
-    search: Optional[str] = Query(None, description="Search in product name and description"),
+    search: Optional[str] = Query(None, description="Search in product name, description and tags"),
     min_price: Optional[float] = Query(None, ge=0, description="Minimum price filter"),
     max_price: Optional[float] = Query(None, ge=0, description="Maximum price filter"),
-    sort_by: Optional[str] = Query("newest", description="Sort by: newest, date_oldest, name_a_z, name_z_a, price_low_high, price_high_low"),
+    sort_by: Optional[str] = Query("newest", description="Sort by: newest, date_oldest, name_a_z, name_z_a, price_low_high, price_high_low, popular, relevance"),
+    tags: Optional[str] = Query(None, description="Comma-separated tags to filter by"),
+    tag_mode: str = Query("all", description="Tag matching: all (listing has every tag) or any"),
     current_user: dict = Depends(get_current_user)
 ):
     """
     Get all product listings excluding the ones owned by the current user.
     Supports pagination, filtering, and search.
+    Plain category browsing is served from the precomputed landing feeds.
     """
     try:
         # Validate parameters
         validate_category(category)
+        tags_db.validate_tag_mode(tag_mode)
+        tag_filter = tags_db.normalize_tags(tags)
+        
+        if not tag_filter and landing_feeds_db.is_landing_request(sort_by, search, min_price, max_price, page, page_size):
+            body = await landing_feeds_db.get_landing_page(current_user["user_id"], category, sort_by, page, page_size)
+            if body is not None:
+                return Response(content=body, media_type="application/json")
         
         # Get public listings using database function
         listings_data = await listings_db.get_public_listings(
@@ -49,7 +71,9 @@ async def get_product_listings(
             search=search,
             min_price=min_price,
             max_price=max_price,
-            sort_by=sort_by
+            sort_by=sort_by,
+            tags=tag_filter or None,
+            match_all_tags=tag_mode == "all"
         )
         
         if not listings_data["listings"]:
@@ -64,6 +88,10 @@ async def get_product_listings(
         supabase = get_authenticated_client(current_user["user_id"])
         products = await convert_listings_to_products(supabase, listings_data["listings"], current_user["user_id"])
         
+        favorited = await favorites_db.get_favorites_set(current_user["user_id"])
+        for product in products:
+            product.is_favorited = product.listing_id in favorited
+        
         return ProductListingsResponse(
             products=products,
             total_count=listings_data["total_count"],
@@ -77,19 +105,110 @@ async def get_product_listings(
         print(f"Error fetching product listings: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to fetch product listings: {str(e)}")
 
-@router.get("/listings/user/{user_id}", response_model=ProductListingsResponse)
+@router.get("/listings/suggest", response_model=ListingSuggestionsResponse)
+async def suggest_listings(
+    q: str = Query(..., min_length=1, max_length=100, description="Text typed so far"),
+    limit: int = Query(8, ge=1, le=20, description="Maximum number of suggestions"),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Typeahead suggestions for the marketplace search box, drawn from active
+    listing names, tags and categories. Served from memory.
+    """
+    try:
+        suggestions = await suggestions_db.suggest_listings(current_user["user_id"], q, limit)
+
+        return ListingSuggestionsResponse(
+            success=True,
+            message="Suggestions retrieved",
+            data=[ListingSuggestion(**suggestion) for suggestion in suggestions]
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error fetching listing suggestions: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to fetch listing suggestions: {str(e)}")
+
+@router.get("/listings/tags/top", response_model=TopTagsResponse)
+async def get_top_tags(
+    limit: int = Query(20, ge=1, le=100, description="Maximum number of tags"),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Get the most used tags across active listings with their listing counts.
+    Served from the in-memory tag index.
+    """
+    try:
+        top_tags = await tags_db.get_top_tags(current_user["user_id"], limit)
+
+        return TopTagsResponse(
+            success=True,
+            message="Top tags retrieved",
+            data=[TagCount(**tag) for tag in top_tags]
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error fetching top tags: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to fetch top tags: {str(e)}")
+
+@router.get("/listings/facets", response_model=ListingFacetsResponse)
+async def get_listing_facets(
+    category: Optional[str] = Query(None, description="Filter by category"),
+    search: Optional[str] = Query(None, description="Search in product name, description and tags"),
+    min_price: Optional[float] = Query(None, ge=0, description="Minimum price filter"),
+    max_price: Optional[float] = Query(None, ge=0, description="Maximum price filter"),
+    buckets: int = Query(10, ge=1, le=50, description="Number of price histogram buckets"),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Get category, payment method and transaction method counts and a price
+    histogram for the listings feed under the same filters as GET /listings.
+    Category counts ignore the category filter and the histogram ignores the
+    price range, so the sidebar can show the alternatives.
+    """
+    try:
+        validate_category(category)
+
+        facets = await facets_db.get_listing_facets(
+            current_user["user_id"],
+            category=category,
+            search=search,
+            min_price=min_price,
+            max_price=max_price,
+            bucket_count=buckets
+        )
+
+        return ListingFacetsResponse(
+            success=True,
+            message="Listing facets retrieved",
+            data=ListingFacets(**facets)
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error fetching listing facets: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to fetch listing facets: {str(e)}")
+
+@router.get("/listings/user/{user_id}", response_model=Union[ProductListingsResponse, ListingSummariesResponse])
 async def get_user_listings(
     user_id: str,
+    page: int = Query(1, ge=1, description="Page number (ignored when a cursor is given)"),
+    page_size: int = Query(20, ge=1, le=100, description="Number of items per page"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    summary: bool = Query(False, description="Return only card summary fields"),
     category: Optional[str] = Query(None, description="Filter by category"),
-    search: Optional[str] = Query(None, description="Search in product name and description"),
+    search: Optional[str] = Query(None, description="Search in product name, description and tags"),
     status: Optional[str] = Query(None, description="Filter by status (active, inactive, sold_out, archived)"),
-    sort_by: Optional[str] = Query("newest", description="Sort by: newest, date_oldest, name_a_z, name_z_a, price_low_high, price_high_low"),
+    sort_by: Optional[str] = Query("newest", description="Sort by: newest, date_oldest, name_a_z, name_z_a, price_low_high, price_high_low, relevance"),
     current_user: dict = Depends(get_current_user)
 ):
     """
-    Get product listings for a specific user by user ID. 
+    Get one page of product listings for a specific user by user ID.
     If requesting own listings, returns all listings including private ones.
     If requesting another user's listings, returns only public/active listings.
+    Pages by `page` or by `cursor` (keyset, not available for relevance);
+    `summary=true` returns only the fields a storefront card shows.
     """
     try:
         # Validate parameters
@@ -99,45 +218,47 @@ async def get_user_listings(
         # Check if requesting own listings or another user's listings
         is_own_listings = user_id == current_user["user_id"]
         
-        # Get user's listings using database function
-        if is_own_listings:
-            # For own listings, get all listings regardless of status
-            listings_data = await listings_db.get_user_listings(
-                user_id=user_id,
-                category=category,
-                search=search,
-                status=status,
-                sort_by=sort_by
-            )
-        else:
-            # For other users' listings, only get public/active listings
-            # Filter to only active status if no specific status is requested
-            filtered_status = status if status else "active"
-            listings_data = await listings_db.get_user_listings(
-                user_id=user_id,
-                category=category,
-                search=search,
-                status=filtered_status,
-                sort_by=sort_by
-            )
+        # For own listings, get all listings regardless of status;
+        # for other users' listings, only active ones unless a status is requested
+        listings_data = await listings_db.get_user_listings(
+            user_id=user_id,
+            category=category,
+            search=search,
+            status=status if is_own_listings or status else "active",
+            sort_by=sort_by,
+            page=page,
+            page_size=page_size,
+            cursor=cursor,
+            summary=summary
+        )
 
-        if not listings_data:
-            return ProductListingsResponse(
-                products=[],
-                total_count=0,
-                page=1,
-                page_size=0
+        if summary:
+            image_urls = ensure_proper_image_urls(
+                [row["primary_image_url"] for row in listings_data["listings"] if row.get("primary_image_url")],
+                is_private=False
+            )
+            proper_urls = iter(image_urls)
+            return ListingSummariesResponse(
+                products=[
+                    ListingSummary(**{**row, "primary_image_url": next(proper_urls) if row.get("primary_image_url") else None})
+                    for row in listings_data["listings"]
+                ],
+                total_count=listings_data["total_count"],
+                page=page,
+                page_size=page_size,
+                next_cursor=listings_data["next_cursor"]
             )
 
         # Convert listings to products
         supabase = get_authenticated_client(current_user["user_id"])
-        products = await convert_listings_to_products(supabase, listings_data, current_user["user_id"])
+        products = await convert_listings_to_products(supabase, listings_data["listings"], current_user["user_id"])
 
         return ProductListingsResponse(
             products=products,
-            total_count=len(products),
-            page=1,
-            page_size=len(products)
+            total_count=listings_data["total_count"],
+            page=page,
+            page_size=page_size,
+            next_cursor=listings_data["next_cursor"]
         )
     except HTTPException:
         raise
@@ -164,6 +285,10 @@ async def get_product_by_id(
         if not listing:
             raise HTTPException(status_code=404, detail="Product not found or not accessible")
         
+        # Sellers opening their own listing don't count as views
+        if str(listing["seller_id"]) != str(current_user["user_id"]):
+            popularity_db.record_view(listing_id)
+        
         # Convert to product object
         supabase = get_authenticated_client(current_user["user_id"])
         product = await convert_listing_to_product(supabase, listing, current_user["user_id"])
@@ -176,14 +301,75 @@ async def get_product_by_id(
         print(f"Error fetching product: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to fetch product: {str(e)}")
 
+@router.get("/listings/{listing_id}/availability", response_model=ListingAvailabilityResponse)
+async def get_listing_availability(
+    listing_id: int,
+    proposed_at: Optional[datetime] = Query(None, description="Check whether a meetup at this time conflicts with the seller's other meetups"),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Get the seller's offered meetup schedules for a listing, the free slots left
+    after their already scheduled meetups, and optionally whether `proposed_at` conflicts.
+    """
+    try:
+        availability = await availability_db.get_listing_availability(
+            user_id=current_user["user_id"],
+            listing_id=listing_id,
+            proposed_at=proposed_at
+        )
+        
+        return ListingAvailabilityResponse(
+            success=True,
+            message="Listing availability retrieved successfully",
+            data=ListingAvailability(**availability)
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error fetching listing availability: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to fetch listing availability: {str(e)}")
+
 @router.post("/listings", response_model=CreateListingResponse)
 async def create_listing(
     listing_data: CreateListingRequest,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, alias=IDEMPOTENCY_HEADER),
     current_user: dict = Depends(get_current_user)
 ):
     """
     Create a new product listing for the current user.
+    Retries carrying the same `Idempotency-Key` replay the original response.
     """
+    result, replayed = await run_idempotent(
+        f"{current_user['user_id']}:create_listing",
+        idempotency_key,
+        listing_data,
+        lambda: _create_listing(listing_data, current_user)
+    )
+    
+    if replayed:
+        response.headers[IDEMPOTENCY_REPLAYED_HEADER] = "true"
+    
+    return result
+
+def _listing_insert_data(listing_data: CreateListingRequest) -> dict:
+    """Listing columns for an insert from a create request."""
+    return {
+        "name": listing_data.name,
+        "description": listing_data.description,
+        "category": listing_data.category,
+        "tags": listing_data.tags,
+        "price_min": listing_data.price_min,
+        "price_max": listing_data.price_max,
+        "total_stock": listing_data.total_stock,
+        "seller_meetup_locations": listing_data.seller_meetup_locations,
+        "transaction_methods": listing_data.transaction_methods,
+        "payment_methods": listing_data.payment_methods
+    }
+
+async def _create_listing(listing_data: CreateListingRequest, current_user: dict) -> CreateListingResponse:
+    """Validate and insert a listing along with its meetup time slots, in one transaction."""
     try:
         # Validate parameters
         validate_category(listing_data.category)
@@ -191,47 +377,24 @@ async def create_listing(
         validate_listing_transaction_methods(listing_data.transaction_methods)
         validate_listing_payment_methods(listing_data.payment_methods)
         
-        # Prepare listing data for insertion
-        listing_insert_data = {
-            "name": listing_data.name,
-            "description": listing_data.description,
-            "category": listing_data.category,
-            "tags": listing_data.tags,
-            "price_min": listing_data.price_min,
-            "price_max": listing_data.price_max,
-            "total_stock": listing_data.total_stock,
-            "seller_meetup_locations": listing_data.seller_meetup_locations,
-            "transaction_methods": listing_data.transaction_methods,
-            "payment_methods": listing_data.payment_methods
-        }
-        
-        # Create the listing using database function
-        created_listing = await listings_db.create_listing(current_user["user_id"], listing_insert_data)
-        listing_id = created_listing["listing_id"]
-        
-        # Insert meetup time slots if provided
-        if listing_data.meetup_time_slots:
-            meetup_time_data = []
-            for time_slot in listing_data.meetup_time_slots:
-                # Validate that start_time is before end_time
-                if time_slot.start_time >= time_slot.end_time:
-                    raise HTTPException(
-                        status_code=400,
-                        detail="Start time must be before end time for all meetup slots"
-                    )
-                
-                meetup_time_data.append({
-                    "start_time": time_slot.start_time.isoformat(),
-                    "end_time": time_slot.end_time.isoformat()
-                })
+        meetup_time_data = []
+        for time_slot in listing_data.meetup_time_slots or []:
+            # Validate that start_time is before end_time
+            if time_slot.start_time >= time_slot.end_time:
+                raise HTTPException(
+                    status_code=400,
+                    detail="Start time must be before end time for all meetup slots"
+                )
             
-            # Insert all meetup time slots using database function
-            if meetup_time_data:
-                try:
-                    await listings_db.add_listing_meetup_times(current_user["user_id"], listing_id, meetup_time_data)
-                except Exception as e:
-                    # Log warning but don't fail the entire listing creation
-                    print(f"Warning: Failed to insert meetup time details for listing {listing_id}: {e}")
+            meetup_time_data.append({
+                "start_time": time_slot.start_time.isoformat(),
+                "end_time": time_slot.end_time.isoformat()
+            })
+        
+        # The listing and its slots are created together, like bulk creation: a slot failure creates nothing
+        [created_listing] = await listings_db.create_listings(
+            current_user["user_id"], [_listing_insert_data(listing_data)], [meetup_time_data]
+        )
         
         return CreateListingResponse(
             success=True,
@@ -242,7 +405,7 @@ async def create_listing(
                 "category": created_listing["category"],
                 "status": created_listing["status"],
                 "created_at": created_listing["created_at"],
-                "meetup_slots_created": len(listing_data.meetup_time_slots) if listing_data.meetup_time_slots else 0
+                "meetup_slots_created": len(meetup_time_data)
             }
         )
         
@@ -252,6 +415,127 @@ async def create_listing(
         print(f"Error creating listing: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to create listing: {str(e)}")
 
+@router.post("/listings/bulk", response_model=BulkCreateListingsResponse)
+async def create_listings_bulk(
+    bulk_data: BulkCreateListingsRequest,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, alias=IDEMPOTENCY_HEADER),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Create many listings with their meetup time slots in one request.
+    Each item is validated on its own; valid items are inserted together and
+    the response reports a result per item, in request order.
+    Retries carrying the same `Idempotency-Key` replay the original response.
+    """
+    if len(bulk_data.listings) > BULK_LISTINGS_CONFIG["max_items"]:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {BULK_LISTINGS_CONFIG['max_items']} listings can be created per request"
+        )
+    
+    result, replayed = await run_idempotent(
+        f"{current_user['user_id']}:create_listings_bulk",
+        idempotency_key,
+        bulk_data,
+        lambda: _create_listings_bulk(bulk_data, current_user)
+    )
+    
+    if replayed:
+        response.headers[IDEMPOTENCY_REPLAYED_HEADER] = "true"
+    
+    return result
+
+async def _create_listings_bulk(bulk_data: BulkCreateListingsRequest, current_user: dict) -> BulkCreateListingsResponse:
+    """Validate every item, then insert the valid ones and their meetup slots in one transaction."""
+    try:
+        results = [BulkListingResult(index=index, success=False) for index in range(len(bulk_data.listings))]
+        valid_indexes = []
+        listings_to_insert = []
+        slots_to_insert = []
+        
+        for index, listing_data in enumerate(bulk_data.listings):
+            try:
+                validate_category(listing_data.category)
+                validate_price_range(listing_data.price_min, listing_data.price_max)
+                validate_listing_transaction_methods(listing_data.transaction_methods)
+                validate_listing_payment_methods(listing_data.payment_methods)
+                
+                meetup_time_data = []
+                for time_slot in listing_data.meetup_time_slots or []:
+                    if time_slot.start_time >= time_slot.end_time:
+                        raise HTTPException(
+                            status_code=400,
+                            detail="Start time must be before end time for all meetup slots"
+                        )
+                    meetup_time_data.append({
+                        "start_time": time_slot.start_time.isoformat(),
+                        "end_time": time_slot.end_time.isoformat()
+                    })
+            except HTTPException as e:
+                results[index].error = e.detail
+                continue
+            
+            valid_indexes.append(index)
+            listings_to_insert.append(_listing_insert_data(listing_data))
+            slots_to_insert.append(meetup_time_data)
+        
+        created_listings = await listings_db.create_listings(
+            current_user["user_id"], listings_to_insert, slots_to_insert
+        )
+        for index, created_listing in zip(valid_indexes, created_listings):
+            results[index].success = True
+            results[index].listing_id = created_listing["listing_id"]
+        
+        created_count = len(created_listings)
+        return BulkCreateListingsResponse(
+            success=created_count > 0,
+            message=f"Created {created_count} of {len(results)} listings",
+            data=results
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error creating listings in bulk: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to create listings: {str(e)}")
+
+@router.patch("/listings/bulk/status", response_model=BulkUpdateListingStatusResponse)
+async def update_listings_status_bulk(
+    status_data: BulkUpdateListingStatusRequest,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Set the status of many of the current user's listings in one filtered
+    update. Listings that are missing or owned by someone else are reported
+    per item instead of failing the request.
+    """
+    try:
+        validate_status(status_data.status)
+        
+        if len(status_data.listing_ids) > BULK_LISTINGS_CONFIG["max_items"]:
+            raise HTTPException(
+                status_code=400,
+                detail=f"At most {BULK_LISTINGS_CONFIG['max_items']} listings can be updated per request"
+            )
+        
+        results = await listings_db.update_listings_status(
+            user_id=current_user["user_id"],
+            listing_ids=status_data.listing_ids,
+            new_status=status_data.status
+        )
+        
+        updated_count = sum(1 for item in results if item["success"])
+        return BulkUpdateListingStatusResponse(
+            success=updated_count > 0,
+            message=f"Set status '{status_data.status}' on {updated_count} of {len(results)} listings",
+            data=[BulkListingStatusResult(**item) for item in results]
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error updating listing statuses in bulk: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to update listing statuses: {str(e)}")
+
 @router.patch("/listings/{listing_id}/status", response_model=UpdateListingStatusResponse)
 async def update_listing_status(
     listing_id: int,
@@ -267,10 +551,9 @@ async def update_listing_status(
         validate_status(status_data.status)
         
         # Get current listing to check status and ownership
-        current_listing = await listings_db.get_listing_by_id(
+        current_listing = await listings_db.get_listing_summary(
             user_id=current_user["user_id"],
-            listing_id=listing_id,
-            include_seller_info=False
+            listing_id=listing_id
         )
         
         if not current_listing:
@@ -331,10 +614,9 @@ async def update_listing(
     """
     try:
         # Get current listing to check ownership and get current values
-        current_listing = await listings_db.get_listing_by_id(
+        current_listing = await listings_db.get_listing_summary(
             user_id=current_user["user_id"],
-            listing_id=listing_id,
-            include_seller_info=False
+            listing_id=listing_id
         )
         
         if not current_listing:
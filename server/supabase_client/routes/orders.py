@@ -3,14 +3,17 @@ Order-related routes for the Supabase client.
 Handles order operations including creation, retrieval, and status updates.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Header, Response
 from typing import Optional
 from supabase_client.schemas import (
     CreateOrderRequest, CreateOrderResponse, Order, OrdersResponse,
     UpdateMeetupRequest, CreateMeetupRequest, MeetupResponse,
     UpdateOrderStatusRequest, UpdateOrderStatusResponse
 )
-from supabase_client.database import orders as order_db, meetups as meetup_db
+from supabase_client.database import (
+    orders as order_db, meetups as meetup_db, sales as sales_db, availability as availability_db,
+    popularity as popularity_db
+)
 from supabase_client.database.base import get_authenticated_client
 from supabase_client.utils import (
     validate_order_transaction_method, validate_order_payment_method,
@@ -19,18 +22,36 @@ from supabase_client.utils import (
 )
 from auth.utils import get_current_user
 from core.utils import create_standardized_response
+from core.idempotency import run_idempotent, IDEMPOTENCY_HEADER, IDEMPOTENCY_REPLAYED_HEADER
 
 router = APIRouter()
 
 @router.post("/orders", response_model=CreateOrderResponse)
 async def create_order(
     order_request: CreateOrderRequest,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, alias=IDEMPOTENCY_HEADER),
     current_user: dict = Depends(get_current_user)
 ):
     """
     Create a new order for a product listing.
     Validates listing availability, stock, and order requirements.
+    Retries carrying the same `Idempotency-Key` replay the original response.
     """
+    result, replayed = await run_idempotent(
+        f"{current_user['user_id']}:create_order",
+        idempotency_key,
+        order_request,
+        lambda: _create_order(order_request, current_user)
+    )
+    
+    if replayed:
+        response.headers[IDEMPOTENCY_REPLAYED_HEADER] = "true"
+    
+    return result
+
+async def _create_order(order_request: CreateOrderRequest, current_user: dict) -> CreateOrderResponse:
+    """Run the order creation pipeline: validation, insert and stock update."""
     try:
         # Validate payment and transaction methods
         validate_order_transaction_method(order_request.transaction_method)
@@ -118,6 +139,9 @@ async def create_order(
                 detail="Failed to update inventory. Order creation aborted."
             )
         
+        sales_db.record_order_transition(None, order_data)
+        popularity_db.record_order(order_data["listing_id"])
+        
         # Note: Meetup creation is now handled separately via POST /orders/{order_id}/meetup
         
         # Convert to response format
@@ -343,7 +367,7 @@ async def update_order_status(
         # Handle setting listing to sold_out when order is completed
         elif status == "completed":
             # Set the final price when order is completed
-            await order_db.set_order_completion_price(
+            completed_order = await order_db.set_order_completion_price(
                 user_id=current_user["user_id"],
                 order_id=order_id
             )
@@ -354,6 +378,16 @@ async def update_order_status(
                 listing_id=order_data["listing_id"]
             )
         
+        # Cancelled and completed orders no longer hold a meetup slot
+        if status in ("cancelled", "completed"):
+            availability_db.invalidate_seller(order_data["seller_id"])
+        
+        # Keep the seller's dashboard aggregates in step with the transition
+        sales_db.record_order_transition(
+            order_data,
+            completed_order if status == "completed" else updated_order
+        )
+        
         # Convert to response format
         supabase = get_authenticated_client(current_user["user_id"])
         order_response = await convert_order_to_response(supabase, updated_order)
@@ -389,19 +423,11 @@ async def update_meetup_details(
     **REGULAR UPDATES** (no `scheduled_at`):
     - Updates current record in-place (location, remarks)
     
-    Only accessible to buyer or seller of the order.
+    Only accessible to buyer or seller of the order. Access, transaction method
+    and (for reschedules) double-booking checks run inside the same database
+    call as the update, under the order's and the seller's locks.
     """
     try:
-        # Verify user has access to this order
-        order_data = await order_db.get_order_by_id(current_user["user_id"], order_id)
-        
-        # Check if order has meetup transaction method
-        if order_data["transaction_method"] != "Meet-up":
-            raise HTTPException(
-                status_code=400,
-                detail="This order does not use meetup transaction method"
-            )
-        
         # Build update data from the request model
         update_data = {}
         if meetup_update.location is not None:
@@ -411,18 +437,17 @@ async def update_meetup_details(
         if meetup_update.remarks is not None:
             update_data["remarks"] = meetup_update.remarks
         
-        # Handle proposed_by field - determine who is making the update if not provided
+        # When rescheduling without proposed_by, the acting party is recorded as the proposer
         if meetup_update.proposed_by is not None:
             update_data["proposed_by"] = meetup_update.proposed_by
-        elif meetup_update.scheduled_at is not None:  # Only set for rescheduling
-            is_buyer = order_data["buyer_id"] == current_user["user_id"]
-            update_data["proposed_by"] = "buyer" if is_buyer else "seller"
         
         if not update_data:
             raise HTTPException(status_code=400, detail="No valid fields to update")
         
         # Update meetup using database function
         meetup_data = await meetup_db.update_meetup(current_user["user_id"], order_id, update_data)
+        if meetup_update.scheduled_at is not None:
+            availability_db.invalidate_order(order_id)
         
         # Convert to proper response format
         from supabase_client.schemas import Meetup
@@ -467,15 +492,9 @@ async def confirm_meetup(
     When both confirm → `status="confirmed"`.
     """
     try:
-        # Verify user has access to this order
-        order_data = await order_db.get_order_by_id(current_user["user_id"], order_id)
-        
-        # Determine if user is buyer or seller
-        is_buyer = order_data["buyer_id"] == current_user["user_id"]
-        is_seller = order_data["seller_id"] == current_user["user_id"]
-        
-        # Confirm meetup using database function
-        meetup_data = await meetup_db.confirm_meetup_by_user(current_user["user_id"], order_id, is_buyer)
+        # Confirm meetup; the database call resolves whether the user is buyer or seller
+        meetup_data = await meetup_db.confirm_meetup_by_user(current_user["user_id"], order_id)
+        is_buyer = meetup_data["acting_party"] == "buyer"
         
         # Convert to proper response format
         from supabase_client.schemas import Meetup
@@ -549,6 +568,16 @@ async def create_meetup(
             if "not found" not in str(e.detail).lower():
                 raise
         
+        # Reject meetups that would double-book the seller
+        conflict = await availability_db.find_meetup_conflict(
+            order_id, order_data["seller_id"], meetup_request.scheduled_at
+        )
+        if conflict:
+            raise HTTPException(
+                status_code=409,
+                detail=f"The seller is already booked from {conflict['blocked_from']} to {conflict['blocked_until']}"
+            )
+        
         # Determine who is proposing the meetup
         is_buyer = order_data["buyer_id"] == current_user["user_id"]
         proposed_by = meetup_request.proposed_by or ("buyer" if is_buyer else "seller")
@@ -564,6 +593,7 @@ async def create_meetup(
                 "proposed_by": proposed_by
             }
         )
+        availability_db.invalidate_seller(order_data["seller_id"])
         
         # Convert to proper response format
         from supabase_client.schemas import Meetup
@@ -655,11 +685,9 @@ async def cancel_meetup(
     Cancel the current meetup for an order.
     """
     try:
-        # Verify user has access to this order
-        order_data = await order_db.get_order_by_id(current_user["user_id"], order_id)
-        
-        # Cancel meetup using database function
+        # Cancel meetup using database function (also verifies access to the order)
         meetup_data = await meetup_db.cancel_meetup(current_user["user_id"], order_id, cancellation_reason)
+        availability_db.invalidate_order(order_id)
         
         # Convert to proper response format
         from supabase_client.schemas import Meetup
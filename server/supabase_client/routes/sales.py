@@ -0,0 +1,35 @@
+"""
+Seller sales routes for the Supabase client.
+Handles the seller dashboard built from incrementally maintained order aggregates.
+"""
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from supabase_client.schemas import SellerDashboard, SellerDashboardResponse
+from supabase_client.database import sales as sales_db
+from auth.utils import get_current_user
+
+router = APIRouter()
+
+@router.get("/seller-dashboard", response_model=SellerDashboardResponse)
+async def get_seller_dashboard(
+    days: int = Query(30, ge=1, le=365, description="Number of days to include in the daily time series"),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Get the current user's sales dashboard as a seller:
+    order counts by status, gross revenue, units sold per listing and a daily time series.
+    """
+    try:
+        summary = await sales_db.get_seller_sales_summary(current_user["user_id"], days=days)
+        
+        return SellerDashboardResponse(
+            success=True,
+            message="Seller dashboard retrieved successfully",
+            data=SellerDashboard(**summary)
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error fetching seller dashboard: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to fetch seller dashboard: {str(e)}")
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional, List
+from typing import Optional, List, Dict
 from datetime import datetime
 from uuid import UUID
 
@@ -64,6 +64,36 @@ class UpdateListingStatusResponse(BaseModel):
     message: str
     data: dict
 
+class BulkCreateListingsRequest(BaseModel):
+    listings: List[CreateListingRequest] = Field(..., min_length=1, description="Listings to create")
+
+class BulkListingResult(BaseModel):
+    index: int
+    success: bool
+    listing_id: Optional[int] = None
+    error: Optional[str] = None
+
+class BulkCreateListingsResponse(BaseModel):
+    success: bool
+    message: str
+    data: List[BulkListingResult]
+
+class BulkUpdateListingStatusRequest(BaseModel):
+    listing_ids: List[int] = Field(..., min_length=1, description="Listings to update")
+    status: str = Field(..., description="New status for the listings (active, inactive, sold_out, archived)")
+
+class BulkListingStatusResult(BaseModel):
+    listing_id: int
+    success: bool
+    old_status: Optional[str] = None
+    new_status: Optional[str] = None
+    error: Optional[str] = None
+
+class BulkUpdateListingStatusResponse(BaseModel):
+    success: bool
+    message: str
+    data: List[BulkListingStatusResult]
+
 class UpdateListingRequest(BaseModel):
     name: Optional[str] = Field(None, min_length=1, max_length=100, description="Product name")
     description: Optional[str] = Field(None, description="Product description")
@@ -111,12 +141,75 @@ class ProductListing(BaseModel):
     payment_methods: Optional[List[str]]
     available_schedules: List[MeetupSchedule] = []
     images: List[ListingImage] = []
+    favorite_count: int = 0
+    view_count: int = 0
+    order_count: int = 0
+    # Set on feed responses for the requesting user
+    is_favorited: Optional[bool] = None
 
 class ProductListingsResponse(BaseModel):
     products: List[ProductListing]
     total_count: int
     page: int
     page_size: int
+    # Set on cursor-paginated responses when another page follows
+    next_cursor: Optional[str] = None
+
+class ListingSummary(BaseModel):
+    listing_id: int
+    seller_id: UUID
+    name: str
+    category: str
+    price_min: Optional[float]
+    price_max: Optional[float]
+    total_stock: Optional[int]
+    sold_count: int
+    status: str
+    created_at: datetime
+    primary_image_url: Optional[str] = None
+
+class ListingSummariesResponse(BaseModel):
+    products: List[ListingSummary]
+    total_count: int
+    page: int
+    page_size: int
+    next_cursor: Optional[str] = None
+
+class ListingSuggestion(BaseModel):
+    text: str
+    kind: str  # "category", "tag" or "name"
+    listing_count: int
+
+class ListingSuggestionsResponse(BaseModel):
+    success: bool
+    message: str
+    data: List[ListingSuggestion]
+
+class PriceBucket(BaseModel):
+    min: float
+    max: float
+    count: int
+
+class ListingFacets(BaseModel):
+    total_count: int
+    categories: Dict[str, int]
+    payment_methods: Dict[str, int]
+    transaction_methods: Dict[str, int]
+    price_histogram: List[PriceBucket]
+
+class ListingFacetsResponse(BaseModel):
+    success: bool
+    message: str
+    data: ListingFacets
+
+class TagCount(BaseModel):
+    tag: str
+    listing_count: int
+
+class TopTagsResponse(BaseModel):
+    success: bool
+    message: str
+    data: List[TagCount]
 
 class FavoriteRequest(BaseModel):
     listing_id: int = Field(..., description="ID of the listing to favorite/unfavorite")
@@ -138,6 +231,19 @@ class UserFavoritesResponse(BaseModel):
     page: int
     page_size: int
 
+class BulkFavoriteStatusRequest(BaseModel):
+    listing_ids: List[int] = Field(..., max_length=500, description="IDs of the listings to check")
+
+class FavoriteStatus(BaseModel):
+    listing_id: int
+    is_favorited: bool
+    favorited_at: Optional[datetime] = None
+
+class BulkFavoriteStatusResponse(BaseModel):
+    success: bool
+    message: str
+    data: List[FavoriteStatus]
+
 class CreateOrderRequest(BaseModel):
     listing_id: int = Field(..., description="ID of the listing to order")
     quantity: int = Field(..., ge=1, description="Quantity to order")
@@ -211,5 +317,46 @@ class UpdateOrderStatusResponse(BaseModel):
     message: str
     data: Order
 
+class MeetupConflict(BaseModel):
+    # Only the window the seller's other meetup blocks; which order holds it is not exposed
+    blocked_from: datetime
+    blocked_until: datetime
+
+class ListingAvailability(BaseModel):
+    listing_id: int
+    available_schedules: List[MeetupSchedule] = []
+    free_slots: List[MeetupTimeSlot] = []  # Offered slots with the seller's booked meetups cut out
+    conflict: Optional[MeetupConflict] = None  # Set when proposed_at overlaps another meetup
+
+class ListingAvailabilityResponse(BaseModel):
+    success: bool
+    message: str
+    data: ListingAvailability
+
+class ListingSales(BaseModel):
+    listing_id: int
+    units_sold: int
+    revenue: float
+
+class DailySales(BaseModel):
+    date: str
+    orders: int
+    completed: int
+    units_sold: int
+    revenue: float
+
+class SellerDashboard(BaseModel):
+    status_counts: Dict[str, int]
+    total_orders: int
+    gross_revenue: float  # Sum of price_at_purchase * quantity over completed orders
+    units_sold: int
+    units_sold_by_listing: List[ListingSales]
+    daily_series: List[DailySales]
+
+class SellerDashboardResponse(BaseModel):
+    success: bool
+    message: str
+    data: SellerDashboard
+
 # Update forward references
 Order.model_rebuild()
\ No newline at end of file
@@ -0,0 +1,127 @@
+"""
+Storage backends for the Supabase database modules.
+Every database module gets its client through auth_client, which asks the
+configured backend for one. The PostgREST backend talks to Supabase; the
+in-memory backend serves the same query builder from an InMemoryDatabase so
+hot paths can be load tested and profiled with no network.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional
+from uuid import UUID
+from core.config import STORAGE_BACKEND_CONFIG
+
+
+class StorageBackend:
+    """Source of query-builder clients (objects with `table()` and `rpc()`)."""
+
+    name = "base"
+
+    def get_client(self, user_id: Optional[UUID] = None):
+        """Client acting as `user_id`, or anonymous when None."""
+        raise NotImplementedError
+
+    def get_service_client(self):
+        """Client that bypasses RLS."""
+        raise NotImplementedError
+
+
+class PostgrestBackend(StorageBackend):
+    """Supabase over PostgREST."""
+
+    name = "postgrest"
+
+    def __init__(self):
+        self._service_client = None
+        self._lock = threading.Lock()
+
+    def get_client(self, user_id: Optional[UUID] = None):
+        from supabase_client.auth_client import create_supabase_client
+        return create_supabase_client(user_id)
+
+    def get_service_client(self):
+        # One shared service client (and connection pool) instead of a new one per call
+        if self._service_client is None:
+            from supabase_client.auth_client import create_service_role_client
+            with self._lock:
+                if self._service_client is None:
+                    self._service_client = create_service_role_client()
+        return self._service_client
+
+
+class InMemoryBackend(StorageBackend):
+    """An in-process InMemoryDatabase behind the regular PostgREST client."""
+
+    name = "memory"
+
+    def __init__(self, database=None, max_clients: int = 1000):
+        from supabase_client.memory_store import InMemoryDatabase
+        self.database = database if database is not None else InMemoryDatabase()
+        self.max_clients = max_clients
+        self._clients: "OrderedDict[str, object]" = OrderedDict()
+        self._lock = threading.RLock()
+
+    def get_client(self, user_id: Optional[UUID] = None):
+        from supabase_client.memory_store import InMemoryPostgrestClient
+        cache_key = str(user_id) if user_id else "anonymous"
+        with self._lock:
+            client = self._clients.get(cache_key)
+            if client is None:
+                client = InMemoryPostgrestClient(self.database, str(user_id) if user_id else None)
+                while len(self._clients) >= self.max_clients:
+                    self._clients.popitem(last=False)
+                self._clients[cache_key] = client
+            else:
+                self._clients.move_to_end(cache_key)
+            return client
+
+    def get_service_client(self):
+        return self.get_client(None)
+
+
+_backend: Optional[StorageBackend] = None
+_backend_lock = threading.Lock()
+
+
+def create_storage_backend(name: str) -> StorageBackend:
+    if name == PostgrestBackend.name:
+        return PostgrestBackend()
+    if name == InMemoryBackend.name:
+        backend = InMemoryBackend()
+        if STORAGE_BACKEND_CONFIG["memory_seed_path"]:
+            backend.database.load_file(STORAGE_BACKEND_CONFIG["memory_seed_path"])
+        return backend
+    raise ValueError(f"Unknown storage backend: {name}")
+
+
+def get_storage_backend() -> StorageBackend:
+    """The configured backend, created on first use."""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = create_storage_backend(STORAGE_BACKEND_CONFIG["backend"])
+    return _backend
+
+
+def set_storage_backend(backend: StorageBackend):
+    """Replace the backend, e.g. with a freshly seeded InMemoryBackend in a load-test harness."""
+    global _backend
+    with _backend_lock:
+        _backend = backend
+
+
+def _reset_after_fork():
+    # Locks may be held by a parent thread, and a PostgREST service client's pool belongs to the parent
+    global _backend_lock
+    _backend_lock = threading.Lock()
+    if isinstance(_backend, PostgrestBackend):
+        _backend._lock = threading.Lock()
+        _backend._service_client = None
+    elif isinstance(_backend, InMemoryBackend):
+        _backend._lock = threading.RLock()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
@@ -135,10 +135,10 @@ async def convert_listing_to_product(supabase, listing: Dict[str, Any], current_
         # This should not happen with the new batch approach
         print(f"Warning: No user profile found for listing {listing['listing_id']}")
     
-    # Get seller listing count from batch data if available, otherwise skip
-    seller_listing_count = 0
+    # Get seller listing count from batch data if available, otherwise query it
+    seller_listing_count = listing.get("seller_listing_count", 0)
     # Fetch seller's listing count if current_user_id is provided
-    if current_user_id:
+    if current_user_id and "seller_listing_count" not in listing:
         try:
             from supabase_client.database.listings import get_seller_listing_count
             seller_listing_count = await get_seller_listing_count(
@@ -149,6 +149,15 @@ async def convert_listing_to_product(supabase, listing: Dict[str, Any], current_
             print(f"Warning: Could not fetch seller listing count: {e}")
             seller_listing_count = 0
     
+    # Get popularity counters from batch data if available, otherwise from the in-memory snapshot
+    if "favorite_count" not in listing:
+        try:
+            from supabase_client.database import popularity
+            counts = await popularity.get_listing_popularity([listing["listing_id"]])
+            popularity.attach_popularity_fields(listing, counts[listing["listing_id"]])
+        except Exception as e:
+            print(f"Warning: Could not fetch listing popularity: {e}")
+    
     # Get meetup schedules from batch data - no more separate queries
     available_schedules = []
     if "meetup_data" in listing and listing["meetup_data"]:
@@ -199,14 +208,40 @@ async def convert_listing_to_product(supabase, listing: Dict[str, Any], current_
         transaction_methods=listing.get("transaction_methods"),
         payment_methods=listing.get("payment_methods"),
         available_schedules=available_schedules,
-        images=images
+        images=images,
+        favorite_count=listing.get("favorite_count", 0),
+        view_count=listing.get("view_count", 0),
+        order_count=listing.get("order_count", 0)
     )
 
 
 async def convert_listings_to_products(supabase, listings: List[Dict[str, Any]], current_user_id: Optional[UUID] = None) -> List[ProductListing]:
     """
     Convert multiple database listing records to ProductListing objects.
+    Seller listing counts (unless already on the rows, as on listing cards) and
+    popularity counters are fetched in one batch for all listings.
     """
+    missing_counts = [listing for listing in listings if "seller_listing_count" not in listing]
+    if current_user_id and missing_counts:
+        from supabase_client.database.listings import get_seller_listing_counts
+        try:
+            seller_counts = await get_seller_listing_counts(
+                current_user_id, list({listing["seller_id"] for listing in missing_counts})
+            )
+            for listing in missing_counts:
+                listing["seller_listing_count"] = seller_counts.get(str(listing["seller_id"]), 0)
+        except Exception as e:
+            print(f"Warning: Could not batch fetch seller listing counts: {e}")
+    
+    if listings:
+        from supabase_client.database import popularity
+        try:
+            counts = await popularity.get_listing_popularity([listing["listing_id"] for listing in listings])
+            for listing in listings:
+                popularity.attach_popularity_fields(listing, counts[listing["listing_id"]])
+        except Exception as e:
+            print(f"Warning: Could not batch fetch listing popularity: {e}")
+    
     products = []
     for listing in listings:
         product = await convert_listing_to_product(supabase, listing, current_user_id)
@@ -347,6 +382,16 @@ async def convert_orders_to_response(supabase, orders_data: List[Dict[str, Any]]
     if not orders_data:
         return []
     
+    # Orders from the direct Postgres path already carry their related rows
+    if all("listing_data" in order and "meetups_data" in order and "buyer_data" in order for order in orders_data):
+        return [
+            await convert_order_to_response_with_batch_data(
+                supabase, order_data, order_data["listing_data"], order_data["meetups_data"],
+                order_data["buyer_data"], current_user_id
+            )
+            for order_data in orders_data
+        ]
+    
     # Collect all unique IDs for batch processing
     order_ids = [order["order_id"] for order in orders_data]
     listing_ids = list(set([order["listing_id"] for order in orders_data]))  # Remove duplicates
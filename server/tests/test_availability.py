@@ -0,0 +1,89 @@
+"""
+Conflict and free-slot bisection of the seller availability index, and the
+bounds of its cache.
+"""
+
+from datetime import datetime, timezone
+
+import pytest
+
+from supabase_client.database.availability import (
+    MEETUP_DURATION, AvailabilityIndexCache, SellerAvailabilityIndex
+)
+
+
+def at(hour, minute=0):
+    return datetime(2026, 11, 2, hour, minute, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def index():
+    # Bookings at 10:00 (order 1), 11:00 (order 2) and 11:15 (order 3), each MEETUP_DURATION long
+    return SellerAvailabilityIndex(
+        "seller",
+        {7: [{"start_time": "2026-11-02T09:00:00+00:00", "end_time": "2026-11-02T12:00:00+00:00"}]},
+        [
+            {"order_id": 2, "scheduled_at": "2026-11-02T11:00:00Z"},
+            {"order_id": 1, "scheduled_at": "2026-11-02T10:00:00+00:00"},
+            {"order_id": 3, "scheduled_at": "2026-11-02T20:15:00+09:00"},
+            {"order_id": 4, "scheduled_at": None},
+        ]
+    )
+
+
+def test_bookings_are_sorted_by_start(index):
+    assert index.booking_starts == [at(10), at(11), at(11, 15)]
+    assert index.booking_orders == [1, 2, 3]
+
+
+@pytest.mark.parametrize("proposed_at, blocked_from", [
+    (at(10), at(10)),
+    (at(9, 45), at(10)),
+    (at(10, 29), at(10)),
+    (at(11, 10), at(11)),
+])
+def test_overlapping_proposals_report_the_blocked_window(index, proposed_at, blocked_from):
+    assert index.find_conflict(proposed_at) == {
+        "blocked_from": blocked_from.isoformat(),
+        "blocked_until": (blocked_from + MEETUP_DURATION).isoformat()
+    }
+
+
+@pytest.mark.parametrize("proposed_at", [at(9, 30), at(10, 30), at(11, 45), at(8)])
+def test_back_to_back_and_free_proposals_do_not_conflict(index, proposed_at):
+    assert index.find_conflict(proposed_at) is None
+
+
+def test_the_orders_own_meetup_is_not_a_conflict(index):
+    assert index.find_conflict(at(10, 10), exclude_order_id=1) is None
+    # 11:10 still overlaps order 3 when order 2 is the one being rescheduled
+    assert index.find_conflict(at(11, 10), exclude_order_id=2)["blocked_from"] == at(11, 15).isoformat()
+
+
+def test_free_slots_cut_out_bookings(index):
+    assert index.free_slots(7) == [
+        {"start_time": at(9).isoformat(), "end_time": at(10).isoformat()},
+        {"start_time": at(10, 30).isoformat(), "end_time": at(11).isoformat()},
+        {"start_time": at(11, 45).isoformat(), "end_time": at(12).isoformat()},
+    ]
+    assert index.free_slots(8) == []
+
+
+def test_seller_lookups_are_bounded():
+    cache = AvailabilityIndexCache(max_sellers=2, max_lookups=3)
+    for listing_id in range(10):
+        cache.remember_listing(listing_id, "seller")
+        cache.remember_order(listing_id, "seller")
+
+    assert [cache.seller_for_listing(listing_id) for listing_id in range(10)] == [None] * 7 + ["seller"] * 3
+    assert cache.seller_for_order(0) is None
+    assert cache.seller_for_order(9) == "seller"
+
+
+def test_invalidate_order_drops_its_sellers_index(index):
+    cache = AvailabilityIndexCache()
+    cache.put_index(index)
+    assert cache.seller_for_listing(7) == "seller"
+
+    cache.invalidate_order(2)
+    assert cache.get("seller") is None
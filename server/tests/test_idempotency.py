@@ -0,0 +1,180 @@
+"""
+Claims, replays and payload fingerprints of core.idempotency.IdempotencyStore.
+"""
+
+import asyncio
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from core import idempotency
+from core.idempotency import IdempotencyStore, InMemoryIdempotencyBackend, LocalKVIdempotencyBackend
+
+
+@pytest.fixture
+def store():
+    return IdempotencyStore(InMemoryIdempotencyBackend())
+
+
+@pytest.fixture
+def kv_path(tmp_path):
+    return str(tmp_path / "idempotency.sqlite3")
+
+
+def counting_operation(result="created", delay=0.0):
+    calls = []
+
+    async def operation():
+        calls.append(1)
+        await asyncio.sleep(delay)
+        return {"result": result}
+
+    return operation, calls
+
+
+def test_retry_replays_the_stored_response(store):
+    operation, calls = counting_operation()
+
+    async def run():
+        first = await store.execute("listings:u1", "key-1", "fp", operation)
+        second = await store.execute("listings:u1", "key-1", "fp", operation)
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first == ({"result": "created"}, False)
+    assert second == ({"result": "created"}, True)
+    assert len(calls) == 1
+
+
+def test_reusing_a_key_with_another_payload_is_rejected(store):
+    operation, _ = counting_operation()
+
+    async def run():
+        await store.execute("listings:u1", "key-1", "fp", operation)
+        await store.execute("listings:u1", "key-1", "other-fp", operation)
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(run())
+    assert error.value.status_code == 422
+
+
+def test_keys_are_scoped(store):
+    operation, calls = counting_operation()
+
+    async def run():
+        await store.execute("listings:u1", "key-1", "fp", operation)
+        return await store.execute("listings:u2", "key-1", "fp", operation)
+
+    assert asyncio.run(run()) == ({"result": "created"}, False)
+    assert len(calls) == 2
+
+
+def test_concurrent_duplicates_wait_for_the_first_execution(store):
+    operation, calls = counting_operation(delay=0.05)
+
+    async def run():
+        return await asyncio.gather(*(store.execute("orders:u1", "key-1", "fp", operation) for _ in range(3)))
+
+    results = asyncio.run(run())
+    assert len(calls) == 1
+    assert sorted(replayed for _, replayed in results) == [False, True, True]
+
+
+def test_failed_attempt_is_not_stored(store):
+    attempts = []
+
+    async def flaky():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError("database unavailable")
+        return {"result": "created"}
+
+    async def run():
+        with pytest.raises(RuntimeError):
+            await store.execute("orders:u1", "key-1", "fp", flaky)
+        return await store.execute("orders:u1", "key-1", "fp", flaky)
+
+    assert asyncio.run(run()) == ({"result": "created"}, False)
+
+
+def test_waiters_get_a_retryable_error_when_the_first_request_is_cancelled(store):
+    operation, calls = counting_operation(delay=10)
+
+    async def run():
+        first = asyncio.create_task(store.execute("orders:u1", "key-1", "fp", operation))
+        await asyncio.sleep(0.01)
+        duplicate = asyncio.create_task(store.execute("orders:u1", "key-1", "fp", operation))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        with pytest.raises(HTTPException) as error:
+            await duplicate
+        assert first.cancelled()
+        return error.value
+
+    error = asyncio.run(run())
+    assert error.status_code == 409
+    assert len(calls) == 1
+
+
+def test_local_kv_claim_blocks_other_workers_until_released(kv_path):
+    worker_a = LocalKVIdempotencyBackend(kv_path)
+    worker_b = LocalKVIdempotencyBackend(kv_path)
+
+    assert worker_a.claim("k", lease_seconds=30)
+    assert not worker_b.claim("k", lease_seconds=30)
+    worker_a.release("k")
+    assert worker_b.claim("k", lease_seconds=30)
+
+
+def test_local_kv_stored_response_is_replayed_by_another_worker(kv_path):
+    operation, calls = counting_operation()
+
+    async def run():
+        await IdempotencyStore(LocalKVIdempotencyBackend(kv_path)).execute("orders:u1", "key-1", "fp", operation)
+        return await IdempotencyStore(LocalKVIdempotencyBackend(kv_path)).execute("orders:u1", "key-1", "fp", operation)
+
+    assert asyncio.run(run()) == ({"result": "created"}, True)
+    assert len(calls) == 1
+
+
+def test_local_kv_worker_waits_for_the_claim_holder(kv_path, monkeypatch):
+    monkeypatch.setattr(idempotency, "CLAIM_POLL_SECONDS", 0.01)
+    worker_a = IdempotencyStore(LocalKVIdempotencyBackend(kv_path))
+    worker_b = IdempotencyStore(LocalKVIdempotencyBackend(kv_path))
+    operation, calls = counting_operation(delay=0.1)
+
+    async def run():
+        first = asyncio.create_task(worker_a.execute("orders:u1", "key-1", "fp", operation))
+        await asyncio.sleep(0.02)
+        second = await worker_b.execute("orders:u1", "key-1", "fp", operation)
+        return await first, second
+
+    first, second = asyncio.run(run())
+    assert first == ({"result": "created"}, False)
+    assert second == ({"result": "created"}, True)
+    assert len(calls) == 1
+
+
+def test_claim_is_renewed_while_the_operation_runs(kv_path):
+    backend = LocalKVIdempotencyBackend(kv_path)
+    store = IdempotencyStore(backend, claim_lease_seconds=0.15)
+    other_worker = LocalKVIdempotencyBackend(kv_path)
+    taken_over = []
+
+    async def slow_operation():
+        # Outlive the original lease several times over
+        for _ in range(5):
+            await asyncio.sleep(0.1)
+            taken_over.append(other_worker.claim("orders:u1:key-1", lease_seconds=30))
+        return {"result": "created"}
+
+    assert asyncio.run(store.execute("orders:u1", "key-1", "fp", slow_operation)) == ({"result": "created"}, False)
+    assert taken_over == [False] * 5
+
+
+def test_expired_claim_of_a_crashed_worker_can_be_taken_over(kv_path):
+    crashed = LocalKVIdempotencyBackend(kv_path)
+    assert crashed.claim("k", lease_seconds=0.05)
+    time.sleep(0.06)
+    assert LocalKVIdempotencyBackend(kv_path).claim("k", lease_seconds=30)
@@ -0,0 +1,111 @@
+"""
+Authorization of the meetup RPCs, through the in-memory store's mirror of
+database/sql/meetups.sql: the acting party always comes from the caller.
+"""
+
+import pytest
+from postgrest.exceptions import APIError
+
+from supabase_client.memory_store import InMemoryDatabase, InMemoryPostgrestClient
+
+BUYER = "00000000-0000-0000-0000-00000000000b"
+SELLER = "00000000-0000-0000-0000-00000000000s"
+STRANGER = "00000000-0000-0000-0000-00000000000x"
+
+
+@pytest.fixture
+def database():
+    database = InMemoryDatabase()
+    database.load({
+        "user_profile": [{"user_id": user_id, "username": user_id[-1]} for user_id in (BUYER, SELLER, STRANGER)],
+        "listings": [{"listing_id": 1, "seller_id": SELLER, "title": "Calculator", "category": "Tech"}],
+        "orders": [{
+            "order_id": 10, "buyer_id": BUYER, "seller_id": SELLER, "listing_id": 1,
+            "transaction_method": "Meet-up", "quantity": 1
+        }],
+        "meetups": [{
+            "meetup_id": 100, "order_id": 10, "scheduled_at": "2026-11-02T10:00:00+00:00",
+            "proposed_by": "buyer", "confirmed_by_buyer": True, "is_current": True
+        }]
+    })
+    return database
+
+
+def rpc(database, user_id, function_name, params):
+    return InMemoryPostgrestClient(database, user_id).rpc(function_name, params).execute().data
+
+
+def test_confirm_acts_as_the_callers_party(database):
+    meetup = rpc(database, SELLER, "confirm_current_meetup", {"p_order_id": 10})
+    assert meetup["acting_party"] == "seller"
+    assert meetup["confirmed_by_seller"] is True
+    assert meetup["status"] == "confirmed"
+
+
+def test_buyer_cannot_confirm_for_the_seller(database):
+    meetup = rpc(database, BUYER, "confirm_current_meetup", {"p_order_id": 10})
+    assert meetup["acting_party"] == "buyer"
+    assert meetup["confirmed_by_seller"] is None
+    assert meetup["status"] == "pending"
+
+
+def test_acting_user_cannot_be_passed_as_a_parameter(database):
+    with pytest.raises(APIError) as error:
+        rpc(database, BUYER, "confirm_current_meetup", {"p_order_id": 10, "p_user_id": SELLER})
+    assert error.value.code == "PGRST202"
+    meetup = rpc(database, BUYER, "confirm_current_meetup", {"p_order_id": 10, "auth_uid": SELLER})
+    assert meetup["acting_party"] == "buyer"
+
+
+@pytest.mark.parametrize("function_name, params", [
+    ("update_current_meetup", {"p_order_id": 10, "p_location": "Library"}),
+    ("confirm_current_meetup", {"p_order_id": 10}),
+    ("cancel_current_meetup", {"p_order_id": 10, "p_reason": "Busy"}),
+])
+def test_users_outside_the_order_are_denied(database, function_name, params):
+    with pytest.raises(APIError) as error:
+        rpc(database, STRANGER, function_name, params)
+    assert error.value.code == "42501"
+    with pytest.raises(APIError) as error:
+        rpc(database, None, function_name, params)
+    assert error.value.code == "42501"
+
+
+def test_missing_order_is_not_found(database):
+    with pytest.raises(APIError) as error:
+        rpc(database, BUYER, "cancel_current_meetup", {"p_order_id": 999})
+    assert error.value.code == "P0002"
+
+
+def test_reschedule_records_the_caller_as_proposer(database):
+    meetup = rpc(database, SELLER, "update_current_meetup", {
+        "p_order_id": 10, "p_scheduled_at": "2026-11-03T10:00:00+00:00"
+    })
+    assert meetup["proposed_by"] == "seller"
+    assert meetup["status"] == "rescheduled"
+    assert meetup["meetup_id"] != 100
+
+
+def test_reschedule_over_another_of_the_sellers_meetups_is_rejected(database):
+    database.load({
+        "orders": [{
+            "order_id": 11, "buyer_id": STRANGER, "seller_id": SELLER, "listing_id": 1,
+            "transaction_method": "Meet-up", "quantity": 1
+        }],
+        "meetups": [{
+            "meetup_id": 101, "order_id": 11, "scheduled_at": "2026-11-02T12:00:00+00:00",
+            "proposed_by": "buyer", "is_current": True
+        }]
+    })
+
+    with pytest.raises(APIError) as error:
+        rpc(database, BUYER, "update_current_meetup", {"p_order_id": 10, "p_scheduled_at": "2026-11-02T12:20:00Z"})
+    assert error.value.code == "23P01"
+    assert "2026-11-02 12:30:00+00:00" in error.value.message
+    # The rejected reschedule left the current meetup untouched
+    assert rpc(database, BUYER, "update_current_meetup", {"p_order_id": 10, "p_remarks": "x"})["meetup_id"] == 100
+
+    # Back-to-back is fine, and so is overlapping a cancelled meetup
+    rpc(database, BUYER, "update_current_meetup", {"p_order_id": 10, "p_scheduled_at": "2026-11-02T12:30:00Z"})
+    rpc(database, STRANGER, "cancel_current_meetup", {"p_order_id": 11})
+    rpc(database, BUYER, "update_current_meetup", {"p_order_id": 10, "p_scheduled_at": "2026-11-02T12:10:00Z"})
@@ -0,0 +1,135 @@
+"""
+Query semantics of the in-memory PostgREST store, driven through the regular
+PostgREST client so the filters are encoded the way the database modules send them.
+"""
+
+import httpx
+import pytest
+
+from supabase_client.memory_store import InMemoryDatabase, InMemoryPostgrestClient
+
+
+ROWS = [
+    {"id": 1, "category": "Books", "price": 5, "status": "active"},
+    {"id": 2, "category": "Books", "price": None, "status": "sold"},
+    {"id": 3, "category": "Tech", "price": 20, "status": "active"},
+    {"id": 4, "category": None, "price": 12, "status": "active"},
+]
+
+
+@pytest.fixture
+def database():
+    database = InMemoryDatabase()
+    database.load({"items": [dict(row) for row in ROWS]})
+    return database
+
+
+@pytest.fixture
+def items(database):
+    client = InMemoryPostgrestClient(database)
+    return lambda count=None: client.from_("items").select("*", count=count)
+
+
+def ids(result):
+    return [row["id"] for row in result.data]
+
+
+def or_(query, conditions: str):
+    """Add an `or` filter the way listing_cards.apply_cursor does (the client has no builder for it)."""
+    query.params = query.params.add("or", f"({conditions})")
+    return query
+
+
+def get(database, params, **headers):
+    """Send a GET straight to the store with explicit query parameters and headers."""
+    return database.handle("GET", "/items", params, httpx.Headers(headers), None, None)
+
+
+# or / and / not filters
+
+def test_or_matches_any_condition(items):
+    assert sorted(ids(or_(items(), "category.eq.Tech,price.lt.10").execute())) == [1, 3]
+
+
+def test_or_with_nested_and(items):
+    result = or_(items(), "and(category.eq.Books,status.eq.sold),price.gte.15").execute()
+    assert sorted(ids(result)) == [2, 3]
+
+
+def test_not_excludes_nulls(items):
+    # NOT (NULL = 'Books') is unknown, so the row without a category is filtered out too
+    assert ids(items().not_.eq("category", "Books").execute()) == [3]
+    assert ids(items().neq("category", "Books").execute()) == [3]
+
+
+def test_not_in(items):
+    assert sorted(ids(items().not_.in_("id", [1, 2]).execute())) == [3, 4]
+
+
+def test_negated_condition_inside_or(items):
+    result = or_(items(), "category.not.eq.Books,price.is.null").execute()
+    assert sorted(ids(result)) == [2, 3]
+
+
+def test_negated_or_group(database):
+    # NOT (NULL = 'Tech' OR false) is unknown, so the row without a category is excluded
+    _, rows, _ = get(database, [("not.or", "(category.eq.Tech,status.eq.sold)")])
+    assert [row["id"] for row in rows] == [1]
+
+
+def test_negated_nested_group_keeps_its_own_negation(database):
+    _, rows, _ = get(database, [("or", "(not.and(category.eq.Books,status.eq.active),id.eq.1)")])
+    assert sorted(row["id"] for row in rows) == [1, 2, 3]
+
+
+def test_is_null(items):
+    assert ids(items().is_("price", "null").execute()) == [2]
+    assert sorted(ids(items().not_.is_("price", "null").execute())) == [1, 3, 4]
+
+
+# NULL ordering
+
+def test_nulls_sort_last_ascending(items):
+    assert ids(items().order("price").execute()) == [1, 4, 3, 2]
+
+
+def test_nulls_sort_first_descending(items):
+    assert ids(items().order("price", desc=True).execute()) == [2, 3, 4, 1]
+
+
+def test_explicit_null_placement(items, database):
+    assert ids(items().order("price", nullsfirst=True).execute()) == [2, 1, 4, 3]
+    _, rows, _ = get(database, [("order", "price.desc.nullslast")])
+    assert [row["id"] for row in rows] == [3, 4, 1, 2]
+
+
+def test_multi_column_order(items):
+    result = items().order("category").order("id", desc=True).execute()
+    assert ids(result) == [2, 1, 3, 4]
+
+
+# Range and exact counts
+
+def test_range_is_inclusive_with_total_count(database):
+    status, rows, headers = get(database, [("order", "id")], range="1-2", prefer="count=exact")
+    assert status == 200
+    assert [row["id"] for row in rows] == [2, 3]
+    assert headers["content-range"] == "1-2/4"
+
+
+def test_range_past_the_end(database):
+    _, rows, headers = get(database, [("order", "id")], range="10-19", prefer="count=exact")
+    assert rows == []
+    assert headers["content-range"] == "*/4"
+
+
+def test_count_is_taken_before_limit_and_after_filters(items):
+    result = items(count="exact").eq("status", "active").order("id").limit(1).execute()
+    assert ids(result) == [1]
+    assert result.count == 3
+
+
+def test_count_without_prefer_header_is_not_sent(database):
+    _, rows, headers = get(database, [("status", "eq.active")])
+    assert len(rows) == 3
+    assert "content-range" not in headers
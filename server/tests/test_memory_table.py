@@ -0,0 +1,137 @@
+"""
+Key semantics of the in-memory DynamoDB table: sort-key order, Limit counted
+before the filter, LastEvaluatedKey paging and conditional writes.
+"""
+
+from decimal import Decimal
+
+import pytest
+from boto3.dynamodb.conditions import Attr
+from botocore.exceptions import ClientError
+
+from dynamodb.memory_table import InMemoryTable
+
+
+@pytest.fixture
+def table():
+    table = InMemoryTable("messages", "room_id", "sent_at", page_size=4)
+    table.load(
+        {"room_id": "a", "sent_at": f"2026-01-01T00:00:{second:02d}", "seq": second, "read": second % 2 == 0}
+        for second in range(10)
+    )
+    table.load({"room_id": "b", "sent_at": f"2026-01-01T00:00:{second:02d}", "seq": second} for second in range(3))
+    return table
+
+
+def seqs(items):
+    return [int(item["seq"]) for item in items]
+
+
+def read_all(page, **kwargs):
+    """Follow LastEvaluatedKey until the last page; returns every item and the number of pages."""
+    items, start_key, pages = [], None, 0
+    while True:
+        page_items, start_key = page(start_key=start_key, **kwargs)
+        items.extend(page_items)
+        pages += 1
+        if start_key is None:
+            return items, pages
+
+
+def test_query_reads_one_partition_in_sort_key_order(table):
+    items, last_key = table.query("a")
+    assert seqs(items) == [0, 1, 2, 3]
+    assert last_key == {"room_id": "a", "sent_at": "2026-01-01T00:00:03"}
+    items, _ = table.query("a", forward=False)
+    assert seqs(items) == [9, 8, 7, 6]
+
+
+def test_query_of_missing_partition(table):
+    assert table.query("missing") == ([], None)
+
+
+def test_limit_counts_items_before_the_filter(table):
+    items, last_key = table.query("a", filter_condition=Attr("read").eq(True), limit=3)
+    # Three items were read (seq 0-2); two of them pass the filter
+    assert seqs(items) == [0, 2]
+    assert last_key == {"room_id": "a", "sent_at": "2026-01-01T00:00:02"}
+
+
+def test_filtered_page_can_be_empty_but_still_continue(table):
+    items, last_key = table.query("a", filter_condition=Attr("seq").gte(8), limit=3)
+    assert items == []
+    assert last_key is not None
+
+
+def test_query_pages_follow_last_evaluated_key(table):
+    items, pages = read_all(lambda **kwargs: table.query("a", **kwargs))
+    assert seqs(items) == list(range(10))
+    # page_size stands in for the 1 MB limit: 4 + 4 + 2
+    assert pages == 3
+
+
+def test_descending_pages_follow_last_evaluated_key(table):
+    items, _ = read_all(lambda **kwargs: table.query("a", forward=False, **kwargs), limit=3)
+    assert seqs(items) == list(range(9, -1, -1))
+
+
+def test_filtered_pages_return_every_match_once(table):
+    items, _ = read_all(lambda **kwargs: table.query("a", **kwargs), filter_condition=Attr("read").eq(True), limit=3)
+    assert seqs(items) == [0, 2, 4, 6, 8]
+
+
+def test_scan_pages_across_partitions(table):
+    items, pages = read_all(table.scan)
+    assert sorted((item["room_id"], int(item["seq"])) for item in items) == (
+        [("a", seq) for seq in range(10)] + [("b", seq) for seq in range(3)]
+    )
+    assert pages == 4
+
+
+def test_scan_limit_counts_items_before_the_filter(table):
+    # Partition "a" is scanned first: four of its items are read and none pass the filter
+    items, last_key = table.scan(filter_condition=Attr("room_id").eq("b"), limit=4)
+    assert items == []
+    assert last_key == {"room_id": "a", "sent_at": "2026-01-01T00:00:03"}
+    items, _ = read_all(table.scan, filter_condition=Attr("room_id").eq("b"), limit=5)
+    assert seqs(items) == [0, 1, 2]
+
+
+def test_put_overwrites_the_item_with_the_same_key(table):
+    table.put_item({"room_id": "b", "sent_at": "2026-01-01T00:00:01", "seq": 42})
+    assert table.get_item({"room_id": "b", "sent_at": "2026-01-01T00:00:01"}) == {
+        "room_id": "b", "sent_at": "2026-01-01T00:00:01", "seq": Decimal(42)
+    }
+    assert len(table) == 13
+
+
+def test_numbers_are_stored_as_decimal_and_floats_rejected(table):
+    assert isinstance(table.get_item({"room_id": "a", "sent_at": "2026-01-01T00:00:03"})["seq"], Decimal)
+    with pytest.raises(TypeError):
+        table.put_item({"room_id": "a", "sent_at": "x", "score": 1.5})
+
+
+def test_failed_condition_raises_and_leaves_the_item(table):
+    key = {"room_id": "a", "sent_at": "2026-01-01T00:00:01"}
+    with pytest.raises(ClientError) as error:
+        table.put_item({**key, "seq": 99}, condition=Attr("room_id").not_exists())
+    assert error.value.response["Error"]["Code"] == "ConditionalCheckFailedException"
+    assert table.get_item(key)["seq"] == 1
+
+
+def test_conditional_update_does_not_create_missing_items(table):
+    key = {"room_id": "a", "sent_at": "2026-01-01T00:00:59"}
+    with pytest.raises(ClientError):
+        table.update_item(key, {"read": True}, condition=Attr("room_id").exists())
+    assert table.get_item(key) is None
+
+    updated = table.update_item(
+        {"room_id": "a", "sent_at": "2026-01-01T00:00:01"}, {"read": True}, condition=Attr("room_id").exists()
+    )
+    assert updated["read"] is True and updated["seq"] == 1
+
+
+def test_missing_key_attribute_is_a_validation_error(table):
+    with pytest.raises(ClientError) as error:
+        table.get_item({"room_id": "a"})
+    assert error.value.response["Error"]["Code"] == "ValidationException"
@@ -0,0 +1,137 @@
+"""
+Merging worker metric snapshots for /metrics.
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from core import metrics
+
+
+def exited_pid() -> int:
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+
+def worker_snapshot(pid, requests, in_flight, connections, started_at=100.0):
+    return {
+        "pid": pid,
+        "started_at": started_at,
+        "written_at": 200.0,
+        "routes": [["GET", "/health", {
+            "statuses": {"200": requests}, "errors": 0, "in_flight": in_flight,
+            "buckets": [requests] + [0] * len(metrics.LATENCY_BUCKETS), "sum": 0.001 * requests
+        }]],
+        "websocket": {
+            "connections": connections,
+            "rooms": [connections] + [0] * len(metrics.ROOM_CONNECTION_BUCKETS),
+            **{name: 1 for name in metrics.WebSocketMetrics.COUNTERS}
+        }
+    }
+
+
+def write(directory, snapshot):
+    path = directory / f"{snapshot['pid']}-{int(snapshot['started_at'] * 1000)}.json"
+    path.write_text(json.dumps(snapshot))
+    return path
+
+
+def own_requests():
+    own = metrics.request_metrics.routes.get(("GET", "/health"))
+    return (own.statuses.get(200, 0), own.in_flight) if own else (0, 0)
+
+
+def test_counters_include_exited_workers_and_gauges_only_live_ones(tmp_path):
+    write(tmp_path, worker_snapshot(exited_pid(), 5, in_flight=3, connections=4))
+
+    requests, websockets, started_at, live_workers = metrics.merged_metrics(str(tmp_path))
+
+    count, in_flight = own_requests()
+    stats = requests.routes[("GET", "/health")]
+    assert stats.statuses[200] == 5 + count
+    assert stats.latency.count >= 5
+    assert stats.in_flight == in_flight
+    assert websockets.opened == 1 + metrics.websocket_metrics.opened
+    assert websockets.connections == metrics.websocket_metrics.connections
+    assert started_at == 100.0
+    assert live_workers == 1
+
+
+def test_exited_workers_are_folded_into_retired_totals(tmp_path):
+    first = write(tmp_path, worker_snapshot(exited_pid(), 5, in_flight=0, connections=0))
+    metrics.merged_metrics(str(tmp_path))
+    assert not first.exists()
+    write(tmp_path, worker_snapshot(exited_pid(), 7, in_flight=0, connections=0, started_at=150.0))
+
+    requests, websockets, started_at, _ = metrics.merged_metrics(str(tmp_path))
+
+    assert sorted(os.listdir(tmp_path)) == [metrics.LOCK_FILE, metrics.RETIRED_FILE]
+    assert requests.routes[("GET", "/health")].statuses[200] == 12 + own_requests()[0]
+    assert websockets.opened == 2 + metrics.websocket_metrics.opened
+    assert started_at == 100.0
+
+
+def test_files_already_in_retired_totals_are_not_counted_twice(tmp_path):
+    stale = write(tmp_path, worker_snapshot(exited_pid(), 5, in_flight=0, connections=0))
+    metrics.merged_metrics(str(tmp_path))
+    # As if the worker merging had crashed after writing retired.json but before deleting the file
+    stale.write_text(json.dumps(worker_snapshot(1, 5, in_flight=0, connections=0)))
+
+    requests, _, _, _ = metrics.merged_metrics(str(tmp_path))
+
+    assert not stale.exists()
+    assert requests.routes[("GET", "/health")].statuses[200] == 5 + own_requests()[0]
+
+
+def test_reused_pid_keeps_both_workers_counters(tmp_path):
+    # A worker that exited with the pid this process now has
+    earlier = write(tmp_path, worker_snapshot(os.getpid(), 5, in_flight=2, connections=1, started_at=1.0))
+
+    requests, websockets, _, live_workers = metrics.merged_metrics(str(tmp_path))
+
+    count, in_flight = own_requests()
+    assert not earlier.exists()
+    assert requests.routes[("GET", "/health")].statuses[200] == 5 + count
+    assert requests.routes[("GET", "/health")].in_flight == in_flight
+    assert websockets.connections == metrics.websocket_metrics.connections
+    assert live_workers == 1
+
+
+def test_own_snapshot_file_is_replaced_by_live_state(tmp_path):
+    metrics.write_snapshot(str(tmp_path))
+    (tmp_path / "garbage.json").write_text("{not json")
+
+    requests, _, _, live_workers = metrics.merged_metrics(str(tmp_path))
+
+    assert live_workers == 1
+    assert sorted(requests.routes) == sorted(metrics.request_metrics.routes)
+
+
+@pytest.mark.parametrize("sizes, rooms", [
+    ([1], [1, 0, 0, 0, 0, 0]),
+    ([1, 2, 3], [0, 0, 1, 0, 0, 0]),
+    ([1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11], [0, 0, 0, 0, 0, 1]),
+])
+def test_rooms_move_between_buckets_as_connections_join(sizes, rooms):
+    websockets = metrics.WebSocketMetrics()
+    for size in sizes:
+        websockets.connected(size)
+    assert websockets.rooms == rooms
+
+
+def test_rooms_leave_the_histogram_when_empty():
+    websockets = metrics.WebSocketMetrics()
+    websockets.connected(1)
+    websockets.connected(2)
+    websockets.connected(1)
+    websockets.disconnected(1)
+    assert websockets.rooms == [2, 0, 0, 0, 0, 0]
+    websockets.disconnected(0)
+    websockets.disconnected(0)
+    assert websockets.rooms == [0] * 6
+    assert websockets.connections == 0
@@ -0,0 +1,34 @@
+"""
+Error logging of core.utils.performance_monitor.
+"""
+
+import asyncio
+import logging
+
+import pytest
+from fastapi import HTTPException
+
+from core.utils import performance_monitor
+
+
+@performance_monitor
+async def inner(error: Exception):
+    raise error
+
+
+@performance_monitor
+async def outer(error: Exception):
+    return await inner(error)
+
+
+def test_http_exceptions_are_not_logged(caplog):
+    with caplog.at_level(logging.ERROR, logger="core.utils"), pytest.raises(HTTPException):
+        asyncio.run(outer(HTTPException(status_code=404, detail="Listing not found")))
+    assert caplog.records == []
+
+
+def test_unexpected_errors_are_logged_once_with_their_type(caplog):
+    with caplog.at_level(logging.ERROR, logger="core.utils"), pytest.raises(KeyError):
+        asyncio.run(outer(KeyError("listing_id")))
+    assert [record.getMessage().split(" after ")[0] for record in caplog.records] == ["Error in inner"]
+    assert "KeyError: 'listing_id'" in caplog.records[0].getMessage()
@@ -0,0 +1,76 @@
+"""
+Bulk updates in the DynamoDB repositories, over in-memory tables.
+"""
+
+import pytest
+
+from dynamodb.memory_table import InMemoryTable
+from dynamodb.repository import MessageRepository, NotificationRepository
+
+
+class RacingTable(InMemoryTable):
+    """Runs `on_query` once after the first query, standing in for a writer racing the bulk update."""
+
+    on_query = None
+
+    def query(self, *args, **kwargs):
+        result = super().query(*args, **kwargs)
+        on_query, self.on_query = self.on_query, None
+        if on_query is not None:
+            on_query()
+        return result
+
+
+def message(created_at, message_id, receiver_id="bob", read_status=False):
+    return {
+        "room_id": "alice#bob", "created_at": created_at, "message_id": message_id,
+        "sender_id": "alice", "receiver_id": receiver_id, "content": message_id, "read_status": read_status
+    }
+
+
+@pytest.fixture
+def messages():
+    table = RacingTable("hackybara-message", "room_id", "created_at")
+    table.load([
+        message("2026-01-01T00:00:01", "m1"),
+        message("2026-01-01T00:00:02", "m2"),
+        message("2026-01-01T00:00:03", "m3", receiver_id="alice"),
+        message("2026-01-01T00:00:04", "m4", read_status=True),
+    ])
+    return table
+
+
+def test_mark_read_updates_only_the_receivers_unread_messages(messages):
+    updated = MessageRepository(messages).mark_read("alice#bob", "bob")
+    assert sorted(item["message_id"] for item in updated) == ["m1", "m2"]
+    assert all(item["read_status"] is True for item in updated)
+    assert messages.get_item({"room_id": "alice#bob", "created_at": "2026-01-01T00:00:03"})["read_status"] is False
+
+
+def test_mark_read_keeps_concurrent_edits_and_deletes(messages):
+    def concurrent_writes():
+        messages.update_item({"room_id": "alice#bob", "created_at": "2026-01-01T00:00:01"}, {"content": "edited"})
+        messages.delete_item({"room_id": "alice#bob", "created_at": "2026-01-01T00:00:02"})
+    messages.on_query = concurrent_writes
+
+    updated = MessageRepository(messages).mark_read("alice#bob", "bob")
+
+    assert [item["message_id"] for item in updated] == ["m1"]
+    edited = messages.get_item({"room_id": "alice#bob", "created_at": "2026-01-01T00:00:01"})
+    assert edited["content"] == "edited" and edited["read_status"] is True
+    assert messages.get_item({"room_id": "alice#bob", "created_at": "2026-01-01T00:00:02"}) is None
+
+
+def test_mark_all_seen_skips_notifications_deleted_meanwhile():
+    table = RacingTable("hackybara-notification", "user_id", "timestamp")
+    table.load(
+        {"user_id": "bob", "timestamp": f"2026-01-01T00:00:0{i}", "notification_id": f"n{i}", "seen": False}
+        for i in range(5)
+    )
+    table.on_query = lambda: table.delete_item({"user_id": "bob", "timestamp": "2026-01-01T00:00:03"})
+
+    updated = NotificationRepository(table).mark_all_seen("bob")
+
+    assert sorted(item["notification_id"] for item in updated) == ["n0", "n1", "n2", "n4"]
+    assert len(table) == 4
+    assert all(item["seen"] is True for item in table.scan()[0])